@@ -0,0 +1,91 @@
+"""Benchmark: agent run wall time versus critical path and sequential cost.
+
+Builds a synthetic plan of `--branches` independent chains of `--depth`
+tool calls that fan in to one final step. Tool latencies are drawn from a
+lognormal around `--latency-ms`. A `--duplicate` fraction of the branches
+repeat branch 0's calls and are served from the run's memo. Each plan
+is run sequentially (`max_parallel=1`, the old one-call-at-a-time
+behaviour) and through the DAG scheduler.
+
+Run from apps/agent-service:
+
+    python -m benchmarks.bench_dag --branches 8 --depth 3 --latency-ms 50
+"""
+
+import argparse
+import asyncio
+import random
+from typing import List, Tuple
+
+from src.scheduler import DagScheduler, Step
+from src.tools import Tool, ToolRegistry
+
+
+def build(branches: int, depth: int, duplicate: float) -> List[Step]:
+    steps: List[Step] = []
+    repeats = round(duplicate * branches)
+    for branch in range(branches):
+        previous = None
+        # The first `repeats` branches after branch 0 repeat its calls exactly.
+        source = 0 if branch <= repeats else branch
+        for level in range(depth):
+            key = f"{source}-{level}"
+            args = {"key": key}
+            if previous is not None:
+                args["after"] = f"${{{previous}}}"
+            step_id = f"b{branch}_{level}"
+            steps.append(Step(step_id, "work", args))
+            previous = step_id
+    steps.append(Step("final", "work", {"key": "final"}, depends_on=[f"b{b}_{depth - 1}" for b in range(branches)]))
+    return steps
+
+
+def registry(latency_ms: float, sigma: float, tool_concurrency: int, seed: int) -> Tuple[ToolRegistry, dict]:
+    rng = random.Random(seed)
+    calls = {"n": 0}
+
+    async def work(key: str, after: str = "") -> str:
+        calls["n"] += 1
+        await asyncio.sleep(rng.lognormvariate(0, sigma) * latency_ms / 1000)
+        return key
+
+    return ToolRegistry([Tool("work", "synthetic tool", work, max_concurrency=tool_concurrency)]), calls
+
+
+async def run(args: argparse.Namespace, max_parallel: int) -> dict:
+    steps = build(args.branches, args.depth, args.duplicate)
+    tools, calls = registry(args.latency_ms, args.sigma, args.tool_concurrency, args.seed)
+    result = await DagScheduler(tools, max_parallel=max_parallel).run(steps)
+    assert result.status == "ok", result.status
+    return {
+        "wall_ms": result.wall_ms,
+        "busy_ms": result.busy_ms,
+        "critical_path_ms": result.critical_path_ms,
+        "steps": len(steps),
+        "calls": calls["n"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--branches", type=int, default=8)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--sigma", type=float, default=0.5, help="lognormal spread of tool latency")
+    parser.add_argument("--duplicate", type=float, default=0.2, help="fraction of branches repeating another branch")
+    parser.add_argument("--max-parallel", type=int, default=16)
+    parser.add_argument("--tool-concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'mode':<12} {'steps':>6} {'calls':>6} {'wall ms':>9} {'busy ms':>9} {'crit ms':>9} {'wall/crit':>10}")
+    for mode, max_parallel in (("sequential", 1), ("dag", args.max_parallel)):
+        stats = asyncio.run(run(args, max_parallel))
+        print(
+            f"{mode:<12} {stats['steps']:>6} {stats['calls']:>6} {stats['wall_ms']:>9.1f} {stats['busy_ms']:>9.1f} "
+            f"{stats['critical_path_ms']:>9.1f} {stats['wall_ms'] / stats['critical_path_ms']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
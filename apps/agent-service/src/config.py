@@ -7,3 +7,21 @@ LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
 LLM_GATEWAY_URL: str = os.getenv("LLM_GATEWAY_URL", "http://localhost:8001")
 RAG_SERVICE_URL: str = os.getenv("RAG_SERVICE_URL", "http://localhost:8002")
 OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+
+# Logging: queued mode writes from a background thread; LOG_SAMPLE_RATES is "/endpoint=rate,..."
+LOG_QUEUED: bool = os.getenv("LOG_QUEUED", "true").lower() == "true"
+LOG_SAMPLE_RATES: str = os.getenv("LOG_SAMPLE_RATES", "")
+LOG_DEBUG_PER_SECOND: float = float(os.getenv("LOG_DEBUG_PER_SECOND", "0"))  # 0 = uncapped
+
+# Tracing: spans are appended as JSON lines to TRACE_EXPORT_PATH (empty = not exported)
+TRACE_EXPORT_PATH: str = os.getenv("TRACE_EXPORT_PATH", "")
+TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))  # fraction of new traces exported
+
+# Agent runs
+AGENT_MAX_PARALLEL: int = int(os.getenv("AGENT_MAX_PARALLEL", "16"))  # tool calls in flight per run
+AGENT_RUN_TIMEOUT_MS: float = float(os.getenv("AGENT_RUN_TIMEOUT_MS", "120000"))
+AGENT_TOOL_TIMEOUT_MS: float = float(os.getenv("AGENT_TOOL_TIMEOUT_MS", "30000"))  # per attempt
+AGENT_TOOL_RETRIES: int = int(os.getenv("AGENT_TOOL_RETRIES", "2"))
+AGENT_TOOL_CONCURRENCY: int = int(os.getenv("AGENT_TOOL_CONCURRENCY", "8"))  # per tool, shared across runs
+AGENT_PLANNER_MODEL: str = os.getenv("AGENT_PLANNER_MODEL", "gpt-4o-mini")
+HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
@@ -1,18 +1,61 @@
 """Agent Service main application"""
 
+from contextlib import asynccontextmanager
+
+import httpx
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .config import PORT, LOG_LEVEL
-from python_common.logging import setup_logging
+from fastapi.responses import PlainTextResponse
+from .config import (
+    PORT,
+    LOG_LEVEL,
+    LOG_QUEUED,
+    LOG_SAMPLE_RATES,
+    LOG_DEBUG_PER_SECOND,
+    TRACE_EXPORT_PATH,
+    TRACE_SAMPLE_RATE,
+    HTTP_MAX_CONNECTIONS,
+)
+from .routes.run import router as run_router
+from .tools import build_registry
+from python_common.logging import parse_sample_rates, setup_logging
+from python_common.metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from python_common.observability import TracingMiddleware, instrument_httpx, setup_tracing
+
+setup_logging(
+    "agent-service",
+    LOG_LEVEL,
+    queued=LOG_QUEUED,
+    sample_rates=parse_sample_rates(LOG_SAMPLE_RATES),
+    debug_per_second=LOG_DEBUG_PER_SECOND,
+)
+setup_tracing("agent-service", TRACE_EXPORT_PATH, TRACE_SAMPLE_RATE)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own one pooled HTTP client (shared by the planner and every tool) and the tool registry."""
+    # Per-attempt deadlines come from the scheduler, so only connects are bounded here.
+    app.state.http = instrument_httpx(httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS),
+        timeout=httpx.Timeout(None, connect=5.0),
+    ))
+    app.state.tools = build_registry(app.state.http)
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
 
-setup_logging("agent-service", LOG_LEVEL)
 
 app = FastAPI(
     title="PrismFlow Agent Service",
     description="Agent execution service",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -21,12 +64,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Include routers
+app.include_router(run_router, prefix="/v1/agent", tags=["agent"])
+
 
 @app.get("/health")
 async def health():
     return {"status": "healthy", "service": "agent-service"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of the process metrics registry"""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=PORT)
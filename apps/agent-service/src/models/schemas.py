@@ -0,0 +1,48 @@
+"""Pydantic schemas"""
+
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+
+class PlanStep(BaseModel):
+    id: str = Field(..., min_length=1)
+    tool: str
+    args: Dict[str, Any] = Field(default_factory=dict)  # "${step_id}" / "${step_id.field}" reference results
+    depends_on: List[str] = Field(default_factory=list)
+
+
+class RunRequest(BaseModel):
+    goal: Optional[str] = None  # planned by the LLM when no explicit plan is given
+    plan: Optional[List[PlanStep]] = Field(default=None, min_length=1)
+    max_parallel: Optional[int] = Field(default=None, ge=1)
+    timeout_ms: Optional[float] = Field(default=None, gt=0)
+    fail_fast: bool = False  # cancel in-flight steps on the first failure
+
+
+class StepReport(BaseModel):
+    id: str
+    tool: str
+    status: str
+    output: Any = None
+    error: Optional[str] = None
+    attempts: int
+    memoized: bool
+    started_ms: Optional[float] = None
+    finished_ms: Optional[float] = None
+    duration_ms: float
+
+
+class RunTimings(BaseModel):
+    plan_ms: float
+    wall_ms: float  # scheduling only, excludes planning
+    busy_ms: float  # sum of tool call durations
+    critical_path_ms: float
+
+
+class RunResponse(BaseModel):
+    request_id: str
+    status: str
+    outputs: Dict[str, Any]
+    steps: List[StepReport]
+    critical_path: List[str]
+    timings: RunTimings
@@ -0,0 +1,85 @@
+"""LLM planner: turns a goal into a dependency DAG of tool calls.
+
+The planner asks the gateway (``strict_json`` with a schema) for a list of
+steps with explicit ``depends_on`` edges, and is told to leave independent
+calls unconnected so the scheduler can run them side by side.
+"""
+
+import json
+from typing import Any, Dict, List
+
+import httpx
+
+from .config import AGENT_PLANNER_MODEL, LLM_GATEWAY_URL
+from .scheduler import PlanError, Step
+from .tools import ToolRegistry
+
+PLANNER_PROMPT = """You plan tool calls for an agent. Reply with JSON {{"steps": [...]}} where each step is
+{{"id": "short_name", "tool": "<tool name>", "args": {{...}}, "depends_on": ["<step id>", ...]}}.
+An argument may use the result of an earlier step as "${{step_id}}" (or "${{step_id.field}}"), which makes
+that step a dependency. Only add a dependency when a step needs another step's result: steps without
+dependencies between them run in parallel. The last step should produce the final answer.
+
+Available tools:
+{tools}"""
+
+PLAN_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "steps": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string"},
+                    "tool": {"type": "string"},
+                    "args": {"type": "object"},
+                    "depends_on": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["id", "tool", "args"],
+            },
+        },
+    },
+    "required": ["steps"],
+}
+
+
+def parse_plan(content: Any) -> List[Step]:
+    """Steps from a planner reply (JSON text or already-decoded)"""
+    if isinstance(content, str):
+        try:
+            content = json.loads(content)
+        except ValueError as exc:
+            raise PlanError(f"planner returned invalid JSON: {exc}") from None
+    raw_steps = content.get("steps") if isinstance(content, dict) else None
+    if not isinstance(raw_steps, list) or not raw_steps:
+        raise PlanError("planner returned no steps")
+    steps = []
+    for raw in raw_steps:
+        if not isinstance(raw, dict) or not isinstance(raw.get("id"), str) or not isinstance(raw.get("tool"), str):
+            raise PlanError(f"malformed step: {raw!r}")
+        steps.append(Step(
+            id=raw["id"],
+            tool=raw["tool"],
+            args=raw.get("args") or {},
+            depends_on=list(raw.get("depends_on") or []),
+        ))
+    return steps
+
+
+async def plan(client: httpx.AsyncClient, goal: str, registry: ToolRegistry, model: str = AGENT_PLANNER_MODEL) -> List[Step]:
+    """Ask the gateway for a plan for `goal`; raises PlanError if the reply is unusable"""
+    tools = "\n".join(json.dumps(spec) for spec in registry.catalog())
+    payload = {
+        "messages": [
+            {"role": "system", "content": PLANNER_PROMPT.format(tools=tools)},
+            {"role": "user", "content": goal},
+        ],
+        "model": model,
+        "temperature": 0,
+        "strict_json": True,
+        "json_schema": PLAN_SCHEMA,
+    }
+    response = await client.post(f"{LLM_GATEWAY_URL}/v1/chat/", json=payload)
+    response.raise_for_status()
+    return parse_plan(response.json()["content"])
@@ -0,0 +1 @@
+"""Agent service routes"""
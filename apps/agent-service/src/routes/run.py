@@ -0,0 +1,87 @@
+"""Run routes: POST /v1/agent/run and GET /v1/agent/tools."""
+
+import logging
+import time
+from dataclasses import asdict
+from typing import Optional
+
+import httpx
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from ..config import AGENT_MAX_PARALLEL, AGENT_RUN_TIMEOUT_MS
+from ..models.schemas import RunRequest, RunResponse, StepReport
+from ..planner import plan
+from ..scheduler import DagScheduler, PlanError, Step, validate_plan
+from ..tools import ToolRegistry, get_http_client, get_registry
+from python_common.models import ErrorResponse
+from python_common.observability import get_request_id
+
+logger = logging.getLogger("agent-service")
+
+router = APIRouter()
+
+
+def _error(status_code: int, error: str, request_id: str, details: Optional[dict] = None) -> JSONResponse:
+    body = ErrorResponse(error=error, request_id=request_id, details=details)
+    return JSONResponse(status_code=status_code, content=body.model_dump())
+
+
+@router.get("/tools")
+async def tools(registry: ToolRegistry = Depends(get_registry)):
+    """Tools a plan may call"""
+    return {"tools": registry.catalog()}
+
+
+@router.post("/run", response_model=RunResponse)
+async def run(
+    request: RunRequest,
+    registry: ToolRegistry = Depends(get_registry),
+    client: httpx.AsyncClient = Depends(get_http_client),
+):
+    """Execute an explicit plan, or plan `goal` with the LLM first, as a concurrent DAG of tool calls.
+
+    Step failures do not fail the request: the response reports each step's
+    status and the run status (`ok`, `failed` or `timeout`).
+    """
+    request_id = get_request_id()
+    start = time.perf_counter()
+    if request.plan is not None:
+        steps = [Step(**step.model_dump()) for step in request.plan]
+        try:
+            validate_plan(steps, registry)
+        except PlanError as exc:
+            return _error(400, str(exc), request_id)
+    elif request.goal:
+        try:
+            steps = await plan(client, request.goal, registry)
+            validate_plan(steps, registry)
+        except PlanError as exc:
+            return _error(502, "Planner returned an invalid plan", request_id, {"reason": str(exc)})
+        except httpx.HTTPError as exc:
+            logger.warning("Planner call failed: %s", exc, extra={"request_id": request_id})
+            return _error(502, "Planner unavailable", request_id, {"type": type(exc).__name__})
+    else:
+        return _error(400, "Either goal or plan is required", request_id)
+    plan_ms = (time.perf_counter() - start) * 1000
+
+    scheduler = DagScheduler(
+        registry,
+        max_parallel=request.max_parallel or AGENT_MAX_PARALLEL,
+        timeout_s=(request.timeout_ms or AGENT_RUN_TIMEOUT_MS) / 1000,
+        fail_fast=request.fail_fast,
+    )
+    result = await scheduler.run(steps)
+    return RunResponse(
+        request_id=request_id,
+        status=result.status,
+        outputs=result.outputs,
+        steps=[StepReport(**asdict(step), duration_ms=step.duration_ms) for step in result.steps],
+        critical_path=result.critical_path,
+        timings={
+            "plan_ms": plan_ms,
+            "wall_ms": result.wall_ms,
+            "busy_ms": result.busy_ms,
+            "critical_path_ms": result.critical_path_ms,
+        },
+    )
@@ -0,0 +1,343 @@
+"""DAG scheduler for agent tool calls.
+
+A plan is a list of steps, each one tool call whose arguments may reference
+earlier results as ``${step_id}`` or ``${step_id.field.0}`` (a reference is
+an implicit dependency). Every step starts as soon as its dependencies have
+finished, so independent branches run concurrently and wall time tracks the
+plan's critical path rather than the sum of its steps. Concurrency is
+bounded per run (`max_parallel`) and per tool (`Tool.max_concurrency`);
+each attempt has the tool's timeout, retryable failures back off and retry,
+and the run has an overall deadline after which in-flight calls are
+cancelled. Identical (tool, arguments) calls within a run are made once.
+"""
+
+import asyncio
+import json
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from .config import AGENT_MAX_PARALLEL, AGENT_RUN_TIMEOUT_MS
+from .tools import Tool, ToolError, ToolRegistry
+from python_common.observability import start_span
+
+_REF = re.compile(r"\$\{([A-Za-z0-9_-]+)((?:\.[A-Za-z0-9_-]+)*)\}")
+
+
+class PlanError(ValueError):
+    """The plan is not a valid DAG over known tools"""
+
+
+@dataclass
+class Step:
+    id: str
+    tool: str
+    args: Dict[str, Any] = field(default_factory=dict)
+    depends_on: List[str] = field(default_factory=list)
+
+
+@dataclass
+class StepResult:
+    id: str
+    tool: str
+    status: str = "pending"  # ok | failed | skipped | cancelled
+    output: Any = None
+    error: Optional[str] = None
+    attempts: int = 0
+    memoized: bool = False  # reused the result of an identical call in this run
+    started_ms: Optional[float] = None  # first attempt got its slots, relative to the run start
+    finished_ms: Optional[float] = None
+
+    @property
+    def duration_ms(self) -> float:
+        if self.started_ms is None or self.finished_ms is None:
+            return 0.0
+        return self.finished_ms - self.started_ms
+
+
+@dataclass
+class RunResult:
+    status: str  # ok | failed | timeout
+    steps: List[StepResult]
+    outputs: Dict[str, Any]  # results of successful sink steps (nothing depends on them)
+    wall_ms: float
+    busy_ms: float  # sum of tool call durations (memoized steps excluded): the sequential cost
+    critical_path_ms: float  # longest dependency chain: the best possible wall time
+    critical_path: List[str]
+
+
+def _references(value: Any, found: Set[str]) -> Set[str]:
+    if isinstance(value, str):
+        found.update(match.group(1) for match in _REF.finditer(value))
+    elif isinstance(value, dict):
+        for item in value.values():
+            _references(item, found)
+    elif isinstance(value, list):
+        for item in value:
+            _references(item, found)
+    return found
+
+
+def _lookup(outputs: Dict[str, Any], step_id: str, path: str) -> Any:
+    value = outputs[step_id]
+    for key in filter(None, path.split(".")):
+        try:
+            value = value[int(key)] if isinstance(value, list) else value[key]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise ToolError(f"reference ${{{step_id}{path}}} does not resolve") from None
+    return value
+
+
+def resolve(value: Any, outputs: Dict[str, Any]) -> Any:
+    """Substitute ``${step.path}`` references; a string that is exactly one reference takes the raw value"""
+    if isinstance(value, str):
+        match = _REF.fullmatch(value)
+        if match:
+            return _lookup(outputs, match.group(1), match.group(2))
+
+        def text(match: re.Match) -> str:
+            found = _lookup(outputs, match.group(1), match.group(2))
+            return found if isinstance(found, str) else json.dumps(found)
+
+        return _REF.sub(text, value)
+    if isinstance(value, dict):
+        return {key: resolve(item, outputs) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve(item, outputs) for item in value]
+    return value
+
+
+def validate_plan(steps: List[Step], registry: ToolRegistry) -> Dict[str, Set[str]]:
+    """Dependencies per step (explicit plus referenced); raises PlanError on unknown tools/steps or a cycle"""
+    ids = [step.id for step in steps]
+    if len(set(ids)) != len(ids):
+        raise PlanError("duplicate step ids")
+    deps: Dict[str, Set[str]] = {}
+    for step in steps:
+        if step.tool not in registry:
+            raise PlanError(f"step {step.id!r} uses unknown tool {step.tool!r}")
+        deps[step.id] = set(step.depends_on) | _references(step.args, set())
+        unknown = deps[step.id] - set(ids)
+        if unknown:
+            raise PlanError(f"step {step.id!r} depends on unknown steps {sorted(unknown)}")
+        if step.id in deps[step.id]:
+            raise PlanError(f"step {step.id!r} depends on itself")
+    # Kahn's algorithm: anything left unvisited sits on a cycle.
+    waiting = {step_id: len(step_deps) for step_id, step_deps in deps.items()}
+    dependents = defaultdict(list)
+    for step_id, step_deps in deps.items():
+        for dep in step_deps:
+            dependents[dep].append(step_id)
+    ready = [step_id for step_id, count in waiting.items() if count == 0]
+    visited = 0
+    while ready:
+        step_id = ready.pop()
+        visited += 1
+        for dependent in dependents[step_id]:
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                ready.append(dependent)
+    if visited != len(steps):
+        raise PlanError(f"plan has a cycle through {sorted(s for s, count in waiting.items() if count)}")
+    return deps
+
+
+def critical_path(results: Dict[str, StepResult], deps: Dict[str, Set[str]]) -> Tuple[float, List[str]]:
+    """Longest chain of step durations through the dependency graph: (ms, step ids in order)"""
+    best: Dict[str, Tuple[float, Optional[str]]] = {}
+
+    def longest(step_id: str) -> float:
+        if step_id not in best:
+            previous = max(deps[step_id], key=longest, default=None)
+            base = longest(previous) if previous is not None else 0.0
+            best[step_id] = (base + results[step_id].duration_ms, previous)
+        return best[step_id][0]
+
+    if not results:
+        return 0.0, []
+    end = max(results, key=longest)
+    path = []
+    step_id: Optional[str] = end
+    while step_id is not None:
+        path.append(step_id)
+        step_id = best[step_id][1]
+    return best[end][0], path[::-1]
+
+
+class DagScheduler:
+    """Runs plans against a tool registry."""
+
+    def __init__(
+        self,
+        registry: ToolRegistry,
+        max_parallel: int = AGENT_MAX_PARALLEL,
+        timeout_s: float = AGENT_RUN_TIMEOUT_MS / 1000,
+        fail_fast: bool = False,
+        backoff_s: float = 0.1,
+    ):
+        self.registry = registry
+        self.max_parallel = max_parallel
+        self.timeout_s = timeout_s
+        self.fail_fast = fail_fast
+        self.backoff_s = backoff_s
+
+    async def _call(
+        self, tool: Tool, args: Dict[str, Any], slots: asyncio.Semaphore, result: StepResult, clock: Any
+    ) -> Any:
+        for attempt in range(tool.retries + 1):
+            result.attempts += 1
+            try:
+                async with slots, tool.slots:
+                    # Time spent queued for a slot is not charged to the step.
+                    if result.started_ms is None:
+                        result.started_ms = clock()
+                    with start_span(f"tool {tool.name}", attempt=attempt + 1):
+                        return await asyncio.wait_for(tool.fn(**args), tool.timeout_s)
+            except asyncio.TimeoutError:
+                error = ToolError(f"{tool.name} timed out after {tool.timeout_s:g}s", retryable=True)
+            except ToolError as exc:
+                error = exc
+            except httpx.TransportError as exc:
+                error = ToolError(f"{type(exc).__name__}: {exc}", retryable=True)
+            except Exception as exc:
+                # Bad arguments from the plan or a bug in the tool: retrying won't help.
+                error = ToolError(f"{tool.name}: {type(exc).__name__}: {exc}")
+            if not error.retryable or attempt == tool.retries:
+                raise error
+            # Back off outside the semaphores so waiting retries don't hold slots.
+            await asyncio.sleep(self.backoff_s * 2 ** attempt)
+
+    async def _run_step(
+        self,
+        step: Step,
+        result: StepResult,
+        outputs: Dict[str, Any],
+        memo: Dict[str, asyncio.Future],
+        slots: asyncio.Semaphore,
+        clock: Any,
+    ) -> None:
+        try:
+            tool = self.registry.get(step.tool)
+            args = resolve(step.args, outputs)
+            call = None
+            if tool.memoize:
+                key = json.dumps([tool.name, args], sort_keys=True, default=str)
+                call = memo.get(key)
+                if call is not None:
+                    result.memoized = True
+                    result.started_ms = clock()
+                else:
+                    call = memo[key] = asyncio.ensure_future(self._call(tool, args, slots, result, clock))
+            else:
+                call = asyncio.ensure_future(self._call(tool, args, slots, result, clock))
+            # Shielded: cancelling one step must not cancel a call another step shares.
+            result.output = await asyncio.shield(call)
+            outputs[step.id] = result.output
+            result.status = "ok"
+        except asyncio.CancelledError:
+            result.status = "cancelled"
+            raise
+        except ToolError as exc:
+            result.status = "failed"
+            result.error = str(exc)
+        finally:
+            result.finished_ms = clock()
+
+    async def run(self, steps: List[Step]) -> RunResult:
+        deps = validate_plan(steps, self.registry)
+        dependents: Dict[str, List[str]] = defaultdict(list)
+        for step_id, step_deps in deps.items():
+            for dep in step_deps:
+                dependents[dep].append(step_id)
+        by_id = {step.id: step for step in steps}
+        results = {step.id: StepResult(step.id, step.tool) for step in steps}
+        waiting = {step_id: len(step_deps) for step_id, step_deps in deps.items()}
+        outputs: Dict[str, Any] = {}
+        memo: Dict[str, asyncio.Future] = {}
+        slots = asyncio.Semaphore(self.max_parallel)
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = start + self.timeout_s
+
+        def clock() -> float:
+            return (loop.time() - start) * 1000
+
+        running: Dict[asyncio.Task, str] = {}
+
+        def launch(step_id: str) -> None:
+            task = asyncio.ensure_future(
+                self._run_step(by_id[step_id], results[step_id], outputs, memo, slots, clock)
+            )
+            running[task] = step_id
+
+        def skip_dependents(step_id: str) -> None:
+            for dependent in dependents[step_id]:
+                if results[dependent].status == "pending":
+                    results[dependent].status = "skipped"
+                    results[dependent].error = f"upstream step {step_id!r} {results[step_id].status}"
+                    skip_dependents(dependent)
+
+        async def cancel_running() -> None:
+            for task in running:
+                task.cancel()
+            for call in memo.values():
+                call.cancel()
+            await asyncio.gather(*running, *memo.values(), return_exceptions=True)
+            running.clear()
+
+        for step_id, count in waiting.items():
+            if count == 0:
+                launch(step_id)
+
+        status = "ok"
+        while running:
+            done, _ = await asyncio.wait(
+                running, timeout=max(0.0, deadline - loop.time()), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                status = "timeout"
+                for step_id in running.values():
+                    results[step_id].error = "run deadline exceeded"
+                await cancel_running()
+                break
+            for task in done:
+                step_id = running.pop(task)
+                if results[step_id].status == "ok":
+                    for dependent in dependents[step_id]:
+                        waiting[dependent] -= 1
+                        if waiting[dependent] == 0 and results[dependent].status == "pending":
+                            launch(dependent)
+                else:
+                    status = "failed"
+                    skip_dependents(step_id)
+            if status == "failed" and self.fail_fast and running:
+                for step_id in running.values():
+                    results[step_id].error = "cancelled after an earlier step failed"
+                await cancel_running()
+                break
+
+        for result in results.values():
+            if result.status == "pending":
+                result.status = "skipped"
+                result.error = result.error or f"run {status}"
+
+        finished = [result for result in results.values() if result.finished_ms is not None]
+        # A step only starts once its dependencies succeeded, so finished steps form a closed subgraph.
+        path_ms, path = critical_path({r.id: r for r in finished}, {r.id: deps[r.id] for r in finished})
+        return RunResult(
+            status=status,
+            steps=list(results.values()),
+            outputs={
+                step_id: outputs[step_id]
+                for step_id in results
+                if not dependents[step_id] and results[step_id].status == "ok"
+            },
+            wall_ms=clock(),
+            busy_ms=sum(result.duration_ms for result in finished if not result.memoized),
+            critical_path_ms=path_ms,
+            critical_path=path,
+        )
@@ -0,0 +1,141 @@
+"""Tool registry and the built-in tools.
+
+A tool is an async callable taking keyword arguments and returning a
+JSON-serializable value. Each tool carries its own concurrency limit
+(a semaphore shared by every run, so one busy agent cannot flood a
+downstream service), per-attempt timeout and retry budget.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from fastapi import Request
+
+from .config import (
+    AGENT_TOOL_CONCURRENCY,
+    AGENT_TOOL_RETRIES,
+    AGENT_TOOL_TIMEOUT_MS,
+    LLM_GATEWAY_URL,
+    RAG_SERVICE_URL,
+)
+
+ToolFn = Callable[..., Awaitable[Any]]
+
+
+class ToolError(Exception):
+    """A tool call failed; `retryable` says whether another attempt may succeed"""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+@dataclass
+class Tool:
+    name: str
+    description: str
+    fn: ToolFn
+    parameters: Dict[str, str] = field(default_factory=dict)  # argument name -> short description
+    max_concurrency: int = AGENT_TOOL_CONCURRENCY
+    timeout_s: float = AGENT_TOOL_TIMEOUT_MS / 1000
+    retries: int = AGENT_TOOL_RETRIES
+    memoize: bool = True  # identical (tool, args) calls within a run share one result
+    slots: asyncio.Semaphore = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.slots = asyncio.Semaphore(self.max_concurrency)
+
+    def spec(self) -> Dict[str, Any]:
+        return {"name": self.name, "description": self.description, "parameters": self.parameters}
+
+
+class ToolRegistry:
+    """Tools available to agent runs, by name."""
+
+    def __init__(self, tools: Optional[List[Tool]] = None):
+        self._tools: Dict[str, Tool] = {}
+        for tool in tools or []:
+            self.register(tool)
+
+    def register(self, tool: Tool) -> None:
+        self._tools[tool.name] = tool
+
+    def get(self, name: str) -> Tool:
+        return self._tools[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def catalog(self) -> List[Dict[str, Any]]:
+        return [tool.spec() for tool in self._tools.values()]
+
+
+def _raise_for_status(response: httpx.Response) -> None:
+    if response.status_code < 400:
+        return
+    try:
+        detail = response.json()
+    except ValueError:
+        detail = response.text
+    if isinstance(detail, dict):
+        detail = detail.get("error") or detail.get("detail") or detail
+    # Rate limits and server errors are worth another attempt; other client errors are not.
+    retryable = response.status_code == 429 or response.status_code >= 500
+    raise ToolError(f"{response.request.url.path} returned {response.status_code}: {detail}", retryable=retryable)
+
+
+def build_registry(client: httpx.AsyncClient) -> ToolRegistry:
+    """Built-in tools over the shared HTTP client: `llm`, `rag_answer` and `format`."""
+
+    async def llm(prompt: str, system: Optional[str] = None, model: str = "gpt-4o-mini",
+                  temperature: float = 0.2, max_tokens: Optional[int] = None) -> str:
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        payload: Dict[str, Any] = {"messages": messages, "model": model, "temperature": temperature}
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+        response = await client.post(f"{LLM_GATEWAY_URL}/v1/chat/", json=payload)
+        _raise_for_status(response)
+        return response.json()["content"]
+
+    async def rag_answer(question: str, collections: Optional[List[str]] = None, top_k: int = 5,
+                         mode: str = "vector") -> Dict[str, Any]:
+        payload = {"question": question, "collections": collections or ["default"], "top_k": top_k, "mode": mode}
+        response = await client.post(f"{RAG_SERVICE_URL}/v1/rag/answer", json=payload)
+        _raise_for_status(response)
+        body = response.json()
+        return {"answer": body["answer"], "citations": body["citations"]}
+
+    async def format_text(template: str, **values: Any) -> str:
+        try:
+            return template.format(**values)
+        except (KeyError, IndexError, ValueError) as exc:
+            raise ToolError(f"bad template: {exc}") from None
+
+    return ToolRegistry([
+        Tool(
+            "llm", "Ask the LLM a question and return its text reply.", llm,
+            {"prompt": "user message", "system": "optional system prompt", "model": "model name"},
+        ),
+        Tool(
+            "rag_answer", "Answer a question from the document collections, with citations.", rag_answer,
+            {"question": "the question", "collections": "collection names (default ['default'])"},
+        ),
+        Tool(
+            "format", "Fill a Python format string ({name} placeholders) with the other arguments.", format_text,
+            {"template": "format string", "<name>": "value for {name}"},
+            retries=0,
+        ),
+    ])
+
+
+async def get_registry(request: Request) -> ToolRegistry:
+    """FastAPI dependency returning the app-wide tool registry."""
+    return request.app.state.tools
+
+
+async def get_http_client(request: Request) -> httpx.AsyncClient:
+    """FastAPI dependency returning the app-wide pooled HTTP client."""
+    return request.app.state.http
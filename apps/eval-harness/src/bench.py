@@ -0,0 +1,348 @@
+"""Load-test suite for the PrismFlow services, with a regression gate.
+
+Starts the stack as local processes with nothing external:
+- the mock OpenAI server (``llm-gateway/src/mock_openai.py``, with
+  configurable latency per call and per token);
+- the gateway, with its response cache and rate limits off;
+- rag-service on the in-process numpy vector store, loaded with
+  ``examples/sample-documents``;
+- agent-service.
+
+Each scenario is then driven with open-loop arrivals (`src.loadgen`). The
+report gives throughput, p50/p95/p99 latency, time-to-first-token for the
+streaming endpoints and each service's peak RSS. ``--baseline`` compares
+the results against a stored run and exits non-zero on regression;
+``--update-baseline`` rewrites it. Baselines are machine-specific: record
+one on the machine that enforces it.
+
+Run from apps/eval-harness::
+
+    python -m src.bench --repeat 5 --baseline benchmarks/baseline.json --tolerance 0.5
+    python -m src.bench --scenarios gateway_stream --duration 30 --rate-scale 2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from .loadgen import RssSampler, Sample, open_loop, post_json, post_sse
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+APPS_DIR = REPO_ROOT / "apps"
+
+HIGHER_IS_WORSE = (
+    "latency_p50_ms", "latency_p95_ms", "latency_p99_ms",
+    "ttft_p50_ms", "ttft_p95_ms", "ttft_p99_ms",
+    "rss_peak_mb",
+)
+# p99 rests on a handful of samples per run, so it gets this multiple of the tolerance.
+TAIL_TOLERANCE_FACTOR = 2.0
+# Absolute slack under the relative tolerance, so sub-millisecond noise on fast paths is not a regression.
+MIN_SLACK = 5.0
+ERROR_RATE_SLACK = 0.01
+
+
+@dataclass
+class Service:
+    name: str
+    cwd: Path
+    app: str
+    env: Dict[str, str] = field(default_factory=dict)
+    port: int = 0
+    process: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> None:
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", self.app, "--host", "127.0.0.1", "--port", str(self.port),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=self.cwd,
+            env={**os.environ, "LOG_LEVEL": "WARNING", **self.env},
+            stdout=subprocess.DEVNULL,
+        )
+
+    async def wait_ready(self, client: httpx.AsyncClient, timeout_s: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout_s
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"{self.name} exited with {self.process.returncode}")
+            try:
+                await client.get(f"{self.url}/health")  # any response means it is serving
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+        raise RuntimeError(f"{self.name} did not start within {timeout_s:g}s")
+
+    def stop(self) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class Stack:
+    """Mock upstream plus the three services, wired to each other on free local ports."""
+
+    def __init__(self, upstream_latency_ms: float, token_delay_ms: float):
+        gateway_dir = APPS_DIR / "llm-gateway"
+        self.upstream = Service("mock-openai", gateway_dir, "src.mock_openai:app", {
+            "MOCK_LATENCY_MS": str(upstream_latency_ms),
+            "MOCK_TOKEN_DELAY_MS": str(token_delay_ms),
+        })
+        self.gateway = Service("llm-gateway", gateway_dir, "src.main:app", {
+            "OPENAI_API_KEY": "bench",
+            "CACHE_ENABLED": "false",
+            "RATE_LIMIT_PER_MINUTE": "0",
+        })
+        self.rag = Service("rag-service", APPS_DIR / "rag-service", "src.main:app", {
+            "VECTOR_STORE_TYPE": "numpy",
+        })
+        self.agent = Service("agent-service", APPS_DIR / "agent-service", "src.main:app")
+        self.services = [self.upstream, self.gateway, self.rag, self.agent]
+
+    async def start(self, client: httpx.AsyncClient) -> None:
+        # Started in dependency order: each one's URL goes into the next one's environment.
+        self.upstream.start()
+        await self.upstream.wait_ready(client)
+        self.gateway.env["OPENAI_BASE_URL"] = f"{self.upstream.url}/v1"
+        self.gateway.start()
+        await self.gateway.wait_ready(client)
+        for service in (self.rag, self.agent):
+            service.env["LLM_GATEWAY_URL"] = self.gateway.url
+        self.rag.start()
+        self.agent.env["RAG_SERVICE_URL"] = self.rag.url
+        self.agent.start()
+        await asyncio.gather(self.rag.wait_ready(client), self.agent.wait_ready(client))
+
+        documents = [
+            {"text": path.read_text(encoding="utf-8"), "metadata": {"source": path.name}}
+            for path in sorted((REPO_ROOT / "examples" / "sample-documents").iterdir())
+        ]
+        response = await client.post(f"{self.rag.url}/v1/rag/ingest", json={"documents": documents})
+        response.raise_for_status()
+
+    def stop(self) -> None:
+        for service in reversed(self.services):
+            service.stop()
+
+    def pids(self) -> Dict[str, int]:
+        return {service.name: service.process.pid for service in self.services if service.process is not None}
+
+
+QUESTIONS = [
+    "How are documents chunked during ingestion?",
+    "What does the embedding cache store?",
+    "How does hybrid retrieval combine keyword and vector results?",
+    "What does the gateway do on a cache hit?",
+    "How are metadata filters applied?",
+]
+
+
+def _chat(i: int) -> Dict[str, Any]:
+    # Unique prompts: every request takes the full upstream path.
+    return {"messages": [{"role": "user", "content": f"Request {i}: explain the PrismFlow request lifecycle in brief."}]}
+
+
+def _answer(i: int) -> Dict[str, Any]:
+    return {"question": QUESTIONS[i % len(QUESTIONS)], "top_k": 3, "mode": "hybrid"}
+
+
+def _plan(i: int) -> Dict[str, Any]:
+    return {"plan": [
+        {"id": "define", "tool": "llm", "args": {"prompt": f"Run {i}: define retrieval-augmented generation."}},
+        {"id": "lookup", "tool": "rag_answer", "args": {"question": QUESTIONS[i % len(QUESTIONS)]}},
+        {"id": "report", "tool": "format",
+         "args": {"template": "{a}\n{b}", "a": "${define}", "b": "${lookup.answer}"}},
+    ]}
+
+
+@dataclass
+class Scenario:
+    name: str
+    service: str  # Stack attribute
+    path: str
+    body: Callable[[int], Dict[str, Any]]
+    rate: float  # arrivals/s at --rate-scale 1
+    stream: bool = False
+    check: Optional[Callable[[Any], bool]] = None  # extra success test on a 2xx JSON body
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in [
+        Scenario("gateway_chat", "gateway", "/v1/chat/", _chat, rate=40),
+        Scenario("gateway_stream", "gateway", "/v1/chat/stream", _chat, rate=40, stream=True),
+        Scenario("rag_answer", "rag", "/v1/rag/answer", _answer, rate=15),
+        Scenario("rag_answer_stream", "rag", "/v1/rag/answer/stream", _answer, rate=15, stream=True),
+        # Step failures come back as 200 with a non-ok run status.
+        Scenario("agent_run", "agent", "/v1/agent/run", _plan, rate=8, check=lambda body: body["status"] == "ok"),
+    ]
+}
+
+
+async def run_scenario(
+    stack: Stack, client: httpx.AsyncClient, scenario: Scenario, rate: float, duration_s: float, warmup_s: float
+) -> Dict[str, Any]:
+    service: Service = getattr(stack, scenario.service)
+    url = f"{service.url}{scenario.path}"
+
+    async def request(i: int) -> Sample:
+        if scenario.stream:
+            return await post_sse(client, url, scenario.body(i))
+        return await post_json(client, url, scenario.body(i), scenario.check)
+
+    if warmup_s:
+        await open_loop(request, rate, warmup_s, seed=1)
+    with RssSampler(stack.pids()) as rss:
+        result = await open_loop(request, rate, duration_s)
+    summary = result.summary()
+    summary["rss_peak_mb"] = rss.peak_mb.get(service.name)
+    summary["rss_peak_mb_by_service"] = rss.peak_mb
+    return summary
+
+
+def median_of(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-metric median across repeated runs of a scenario (non-numeric fields from the last run)"""
+    merged = dict(runs[-1])
+    for key, value in merged.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            values = [run[key] for run in runs if run.get(key) is not None]
+            merged[key] = statistics.median(values)
+    return merged
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of `current` against `baseline` (scenarios missing from either side are ignored)"""
+    regressions = []
+    for name, base in baseline.get("scenarios", {}).items():
+        now = current["scenarios"].get(name)
+        if now is None:
+            continue
+        for metric in HIGHER_IS_WORSE:
+            if base.get(metric) is None or now.get(metric) is None:
+                continue
+            allowed = tolerance * (TAIL_TOLERANCE_FACTOR if "p99" in metric else 1.0)
+            limit = max(base[metric] * (1 + allowed), base[metric] + MIN_SLACK)
+            if now[metric] > limit:
+                regressions.append(f"{name}.{metric}: {now[metric]:.1f} > {limit:.1f} (baseline {base[metric]:.1f})")
+        if now["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}.throughput_rps: {now['throughput_rps']:.1f} < {base['throughput_rps'] * (1 - tolerance):.1f} "
+                f"(baseline {base['throughput_rps']:.1f})"
+            )
+        if now["error_rate"] > base["error_rate"] + ERROR_RATE_SLACK:
+            regressions.append(f"{name}.error_rate: {now['error_rate']:.3f} (baseline {base['error_rate']:.3f})")
+    return regressions
+
+
+def _fmt(value: Optional[float]) -> str:
+    return f"{value:.1f}" if value is not None else "-"
+
+
+def print_table(results: Dict[str, Any]) -> None:
+    print(
+        f"{'scenario':<18} {'rps in':>7} {'rps out':>8} {'err %':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'ttft p50':>9} {'ttft p95':>9} {'rss MB':>7}"
+    )
+    for name, row in results["scenarios"].items():
+        print(
+            f"{name:<18} {row['offered_rps']:>7.1f} {row['throughput_rps']:>8.1f} {row['error_rate'] * 100:>6.2f} "
+            f"{_fmt(row['latency_p50_ms']):>8} {_fmt(row['latency_p95_ms']):>8} {_fmt(row['latency_p99_ms']):>8} "
+            f"{_fmt(row.get('ttft_p50_ms')):>9} {_fmt(row.get('ttft_p95_ms')):>9} {_fmt(row['rss_peak_mb']):>7}"
+        )
+
+
+async def run_suite(args: argparse.Namespace) -> Dict[str, Any]:
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"unknown scenarios: {', '.join(unknown)} (have {', '.join(SCENARIOS)})")
+    stack = Stack(args.upstream_latency_ms, args.token_delay_ms)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+    results: Dict[str, Any] = {
+        "config": {
+            "duration_s": args.duration,
+            "repeat": args.repeat,
+            "rate_scale": args.rate_scale,
+            "upstream_latency_ms": args.upstream_latency_ms,
+            "token_delay_ms": args.token_delay_ms,
+            "cpus": os.cpu_count(),
+        },
+        "scenarios": {},
+    }
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        try:
+            await stack.start(client)
+            for name in names:
+                scenario = SCENARIOS[name]
+                runs = [
+                    await run_scenario(
+                        stack, client, scenario, scenario.rate * args.rate_scale, args.duration, args.warmup
+                    )
+                    for _ in range(args.repeat)
+                ]
+                results["scenarios"][name] = median_of(runs)
+        finally:
+            stack.stop()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.bench", description="PrismFlow load-test suite")
+    parser.add_argument("--scenarios", help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per scenario")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per scenario; metrics are the median")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds per scenario")
+    parser.add_argument("--rate-scale", type=float, default=1.0, help="multiplier on each scenario's arrival rate")
+    parser.add_argument("--upstream-latency-ms", type=float, default=20.0, help="mock OpenAI latency per call")
+    parser.add_argument("--token-delay-ms", type=float, default=2.0, help="mock OpenAI delay per streamed token")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed relative regression")
+    parser.add_argument("--out", help="write the full results JSON here")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_suite(args))
+    print_table(results)
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2) + "\n")
+    if not args.baseline:
+        return
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"baseline written to {baseline_path}")
+        return
+    baseline = json.loads(baseline_path.read_text())
+    if baseline.get("config") != results["config"]:
+        print(f"warning: baseline config {baseline.get('config')} differs from this run's {results['config']}")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} regression(s) against {baseline_path}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"no regressions against {baseline_path} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
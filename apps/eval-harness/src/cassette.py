@@ -0,0 +1,128 @@
+"""Record / replay of service responses for deterministic eval reruns.
+
+`CassetteTransport` is an ``httpx`` transport: in ``record`` mode every
+successful (< 400) response is also appended to a JSONL cassette, in ``replay`` mode requests
+are answered from the cassette without touching the network (a miss is an
+error), and ``auto`` replays what it has and records the rest. Requests are
+keyed by method, path and canonical JSON body, so a rerun of the same
+dataset hits the same entries regardless of example order or concurrency.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+MODES = ("off", "record", "replay", "auto")
+_HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+class CassetteMiss(Exception):
+    """Replay mode got a request that was never recorded"""
+
+
+def request_key(request: httpx.Request) -> str:
+    body = request.content
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode()
+    except ValueError:
+        pass
+    # Host left out so a cassette recorded against one deployment replays against another.
+    digest = hashlib.sha256(f"{request.method} {request.url.raw_path.decode()}\n".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+class Cassette:
+    """Recorded responses by request key, backed by an append-only JSONL file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from an interrupted run
+                    self.entries[entry["key"]] = entry
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def put(self, key: str, request: httpx.Request, response: httpx.Response, elapsed_ms: float) -> None:
+        if key in self.entries:
+            return
+        entry = {
+            "key": key,
+            "method": request.method,
+            "url": str(request.url),
+            "status": response.status_code,
+            "content_type": response.headers.get("content-type", "application/json"),
+            "body": response.text,
+            "elapsed_ms": elapsed_ms,
+        }
+        self.entries[key] = entry
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """Answers from / records into a `Cassette`.
+
+    Replayed responses carry ``extensions["cassette"] == "replay"`` and the
+    recorded ``extensions["elapsed_ms"]``.
+    """
+
+    def __init__(self, cassette: Cassette, mode: str = "auto", inner: Optional[httpx.AsyncBaseTransport] = None):
+        if mode not in ("record", "replay", "auto"):
+            raise ValueError(f"cassette mode must be record, replay or auto, not {mode!r}")
+        self.cassette = cassette
+        self.mode = mode
+        self.inner = inner or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = request_key(request)
+        entry = self.cassette.get(key) if self.mode != "record" else None
+        if entry is not None:
+            return httpx.Response(
+                entry["status"],
+                headers={"content-type": entry["content_type"]},
+                content=entry["body"].encode(),
+                request=request,
+                extensions={"cassette": "replay", "elapsed_ms": entry["elapsed_ms"]},
+            )
+        if self.mode == "replay":
+            raise CassetteMiss(f"{request.method} {request.url.path} is not in cassette {self.cassette.path}")
+
+        start = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        try:
+            body = await response.aread()
+        finally:
+            await response.aclose()
+        # The body is already decoded, so encoding / framing headers no longer apply.
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _HOP_HEADERS]
+        response = httpx.Response(
+            response.status_code, headers=headers, content=body, request=request,
+            extensions={"cassette": "record"},
+        )
+        # Only successes are recorded: errors (5xx, and 408 / 429 from a busy or
+        # rate-limited gateway) are often transient, and a recorded one would be
+        # replayed on every rerun, so the example could never pass on resume.
+        if response.status_code < 400:
+            self.cassette.put(key, request, response, (time.perf_counter() - start) * 1000)
+        return response
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
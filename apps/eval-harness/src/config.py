@@ -4,6 +4,16 @@ import os
 
 PORT: int = int(os.getenv("PORT", "8004"))
 LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+LOG_QUEUED: bool = os.getenv("LOG_QUEUED", "true").lower() == "true"  # log lines written by a background thread
+LOG_SAMPLE_RATES: str = os.getenv("LOG_SAMPLE_RATES", "")  # "/endpoint=rate,...": fraction of request logs kept
+LOG_DEBUG_PER_SECOND: float = float(os.getenv("LOG_DEBUG_PER_SECOND", "0"))  # DEBUG records per second; 0 = uncapped
+TRACE_EXPORT_PATH: str = os.getenv("TRACE_EXPORT_PATH", "")  # spans appended as JSON lines; empty = not exported
+TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))  # fraction of new traces exported
 LLM_GATEWAY_URL: str = os.getenv("LLM_GATEWAY_URL", "http://localhost:8001")
 RAG_SERVICE_URL: str = os.getenv("RAG_SERVICE_URL", "http://localhost:8002")
 AGENT_SERVICE_URL: str = os.getenv("AGENT_SERVICE_URL", "http://localhost:8003")
+EVAL_DATASETS_DIR: str = os.getenv("EVAL_DATASETS_DIR", "../../examples/eval")  # JSONL datasets the API may run
+EVAL_RUNS_DIR: str = os.getenv("EVAL_RUNS_DIR", "./data/runs")  # per-run results JSONL
+EVAL_CASSETTES_DIR: str = os.getenv("EVAL_CASSETTES_DIR", "./data/cassettes")  # recorded service responses per dataset
+EVAL_CONCURRENCY: int = int(os.getenv("EVAL_CONCURRENCY", "16"))  # examples in flight
+EVAL_TIMEOUT_S: float = float(os.getenv("EVAL_TIMEOUT_S", "120"))  # per example request
@@ -0,0 +1,213 @@
+"""Open-loop load generation and latency / memory measurement.
+
+Requests are launched on an arrival schedule (Poisson or fixed-interval at
+`rate` per second) regardless of how many are still in flight, and each
+latency is measured from its *scheduled* start. A slow server therefore
+shows up as growing latency instead of quietly lowering the offered load
+(the coordinated-omission trap of closed-loop "N workers" benchmarks).
+"""
+
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+try:
+    import psutil
+except ImportError:  # /proc is read directly on Linux
+    psutil = None
+
+from .runner import percentile
+
+
+@dataclass
+class Sample:
+    ok: bool
+    latency_ms: float = 0.0
+    ttft_ms: Optional[float] = None  # streaming requests: first content chunk
+    error: Optional[str] = None
+
+
+@dataclass
+class LoadResult:
+    rate: float
+    duration_s: float
+    samples: List[Sample] = field(default_factory=list)
+    dropped: int = 0  # arrivals not sent because max_in_flight was reached
+    max_in_flight: int = 0
+    elapsed_s: float = 0.0  # until the last response
+
+    def summary(self) -> Dict[str, Any]:
+        ok = [sample for sample in self.samples if sample.ok]
+        sent = len(self.samples) + self.dropped
+        latencies = [sample.latency_ms for sample in ok]
+        ttfts = [sample.ttft_ms for sample in ok if sample.ttft_ms is not None]
+        errors: Dict[str, int] = {}
+        for sample in self.samples:
+            if not sample.ok:
+                errors[sample.error or "error"] = errors.get(sample.error or "error", 0) + 1
+        summary: Dict[str, Any] = {
+            "offered_rps": self.rate,
+            "sent": sent,
+            "ok": len(ok),
+            "error_rate": (sent - len(ok)) / sent if sent else 0.0,
+            "throughput_rps": len(ok) / self.elapsed_s if self.elapsed_s else 0.0,
+            "max_in_flight": self.max_in_flight,
+        }
+        for p in (50, 95, 99):
+            summary[f"latency_p{p}_ms"] = percentile(latencies, p)
+        if ttfts:
+            for p in (50, 95, 99):
+                summary[f"ttft_p{p}_ms"] = percentile(ttfts, p)
+        if errors:
+            summary["errors"] = dict(sorted(errors.items(), key=lambda item: -item[1])[:5])
+        return summary
+
+
+RequestFn = Callable[[int], Awaitable[Sample]]
+
+
+async def open_loop(
+    request: RequestFn,
+    rate: float,
+    duration_s: float,
+    arrivals: str = "poisson",
+    max_in_flight: int = 10_000,
+    seed: int = 0,
+) -> LoadResult:
+    """Call ``request(i)`` at `rate` arrivals/s for `duration_s`, then wait for stragglers"""
+    rng = random.Random(seed)
+    result = LoadResult(rate=rate, duration_s=duration_s)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    in_flight = 0
+    tasks: List[asyncio.Task] = []
+
+    async def fire(i: int, scheduled: float) -> None:
+        nonlocal in_flight
+        began = loop.time()
+        try:
+            sample = await request(i)
+        except Exception as exc:
+            sample = Sample(ok=False, error=type(exc).__name__)
+        # Both count from the scheduled arrival, including any launch delay.
+        sample.latency_ms = (loop.time() - scheduled) * 1000
+        if sample.ttft_ms is not None:
+            sample.ttft_ms += (began - scheduled) * 1000
+        result.samples.append(sample)
+        in_flight -= 1
+
+    i = 0
+    at = start
+    while at < start + duration_s:
+        delay = at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if in_flight >= max_in_flight:
+            result.dropped += 1
+        else:
+            in_flight += 1
+            result.max_in_flight = max(result.max_in_flight, in_flight)
+            tasks.append(asyncio.ensure_future(fire(i, at)))
+        i += 1
+        at += rng.expovariate(rate) if arrivals == "poisson" else 1 / rate
+    await asyncio.gather(*tasks)
+    result.elapsed_s = loop.time() - start
+    return result
+
+
+async def post_json(
+    client: httpx.AsyncClient, url: str, body: Dict[str, Any], check: Optional[Callable[[Any], bool]] = None
+) -> Sample:
+    response = await client.post(url, json=body)
+    await response.aread()
+    if response.status_code >= 400:
+        return Sample(ok=False, error=f"HTTP {response.status_code}")
+    if check is not None and not check(response.json()):
+        return Sample(ok=False, error="check failed")
+    return Sample(ok=True)
+
+
+def _has_content(data: str) -> bool:
+    """Whether an OpenAI chunk payload carries answer text (the opening chunk only sets the role)"""
+    try:
+        choices = json.loads(data).get("choices") or []
+    except (ValueError, AttributeError):
+        return False
+    return any((choice.get("delta") or {}).get("content") for choice in choices)
+
+
+async def post_sse(client: httpx.AsyncClient, url: str, body: Dict[str, Any]) -> Sample:
+    """POST to a PrismFlow SSE endpoint; time-to-first-token is the first ``event: chunk`` frame with content.
+
+    The stream is read line by line, so a frame split across network reads
+    is still seen whole.
+    """
+    start = time.perf_counter()
+    ttft_ms = None
+    event = None
+    async with client.stream("POST", url, json=body) as response:
+        if response.status_code >= 400:
+            await response.aread()
+            return Sample(ok=False, error=f"HTTP {response.status_code}")
+        async for line in response.aiter_lines():
+            if not line:
+                event = None
+            elif line.startswith("event:"):
+                event = line[6:].strip()
+                if event == "error":
+                    return Sample(ok=False, error="stream error event")
+            elif ttft_ms is None and event == "chunk" and line.startswith("data:") and _has_content(line[5:]):
+                ttft_ms = (time.perf_counter() - start) * 1000
+    return Sample(ok=True, ttft_ms=ttft_ms)
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of `pid` in MiB (None if unavailable)"""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss / 2**20
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+class RssSampler:
+    """Samples the RSS of named processes in the background and keeps the peak per process."""
+
+    def __init__(self, pids: Dict[str, int], interval_s: float = 0.1):
+        self.pids = pids
+        self.interval_s = interval_s
+        self.peak_mb: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def sample(self) -> None:
+        for name, pid in self.pids.items():
+            value = rss_mb(pid)
+            if value is not None:
+                self.peak_mb[name] = max(self.peak_mb.get(name, 0.0), value)
+
+    async def _run(self) -> None:
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval_s)
+
+    def __enter__(self) -> "RssSampler":
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.sample()
+        if self._task is not None:
+            self._task.cancel()
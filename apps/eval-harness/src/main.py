@@ -1,18 +1,49 @@
 """Eval Harness main application"""
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .config import PORT, LOG_LEVEL
-from python_common.logging import setup_logging
+from fastapi.responses import PlainTextResponse
+from .config import PORT, LOG_LEVEL, LOG_QUEUED, LOG_SAMPLE_RATES, LOG_DEBUG_PER_SECOND, TRACE_EXPORT_PATH, TRACE_SAMPLE_RATE
+from .routes.eval import router as eval_router
+from python_common.logging import parse_sample_rates, setup_logging
+from python_common.metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from python_common.observability import TracingMiddleware, setup_tracing
+
+setup_logging(
+    "eval-harness",
+    LOG_LEVEL,
+    queued=LOG_QUEUED,
+    sample_rates=parse_sample_rates(LOG_SAMPLE_RATES),
+    debug_per_second=LOG_DEBUG_PER_SECOND,
+)
+setup_tracing("eval-harness", TRACE_EXPORT_PATH, TRACE_SAMPLE_RATE)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Track background eval runs; any still running at shutdown are cancelled (their results resume later)."""
+    app.state.eval_runs = {}
+    try:
+        yield
+    finally:
+        tasks = [run.task for run in app.state.eval_runs.values() if run.task is not None and not run.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
-setup_logging("eval-harness", LOG_LEVEL)
 
 app = FastAPI(
     title="PrismFlow Evaluation Harness",
     description="Evaluation harness for AI modules",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -21,12 +52,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Include routers
+app.include_router(eval_router, prefix="/v1/eval", tags=["eval"])
+
 
 @app.get("/health")
 async def health():
     return {"status": "healthy", "service": "eval-harness"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of the process metrics registry"""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=PORT)
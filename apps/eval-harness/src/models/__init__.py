@@ -0,0 +1 @@
+"""Eval harness models"""
@@ -0,0 +1,26 @@
+"""Pydantic schemas"""
+
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional
+
+
+class EvalRunRequest(BaseModel):
+    dataset: str = Field(..., min_length=1)  # JSONL file under EVAL_DATASETS_DIR
+    run_id: Optional[str] = Field(default=None, pattern=r"^[A-Za-z0-9_-]+$")  # resume this run
+    concurrency: Optional[int] = Field(default=None, ge=1, le=1024)
+    cassette: str = Field(default="auto", pattern="^(off|record|replay|auto)$")
+
+
+class EvalRunResponse(BaseModel):
+    run_id: str
+    status: str
+    dataset: str
+
+
+class EvalReport(BaseModel):
+    run_id: str
+    status: str  # running | completed | failed | stored (finished before this process started)
+    dataset: Optional[str] = None
+    progress: Optional[Dict[str, int]] = None
+    summary: Dict[str, Any]
+    error: Optional[str] = None
@@ -0,0 +1 @@
+"""Eval harness routes"""
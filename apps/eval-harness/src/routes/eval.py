@@ -0,0 +1,102 @@
+"""Eval routes: POST /v1/eval/run and GET /v1/eval/report/{run_id}."""
+
+import asyncio
+import logging
+import os
+import re
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from ..cassette import Cassette
+from ..config import EVAL_CASSETTES_DIR, EVAL_CONCURRENCY, EVAL_DATASETS_DIR, EVAL_RUNS_DIR
+from ..models.schemas import EvalReport, EvalRunRequest, EvalRunResponse
+from ..runner import RunProgress, build_client, load_dataset, run_eval, summarize
+from python_common.models import ErrorResponse
+from python_common.observability import get_request_id
+
+logger = logging.getLogger("eval-harness")
+
+router = APIRouter()
+
+_RUN_ID = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+@dataclass
+class EvalRun:
+    dataset: str
+    status: str = "running"
+    progress: RunProgress = field(default_factory=RunProgress)
+    error: Optional[str] = None
+    task: Optional[asyncio.Task] = None
+
+
+def _error(status_code: int, error: str, request_id: str, details: Optional[dict] = None) -> JSONResponse:
+    body = ErrorResponse(error=error, request_id=request_id, details=details)
+    return JSONResponse(status_code=status_code, content=body.model_dump())
+
+
+def _results_path(run_id: str) -> str:
+    return os.path.join(EVAL_RUNS_DIR, f"{run_id}.jsonl")
+
+
+async def _execute(run: EvalRun, run_id: str, dataset_path: str, concurrency: int, mode: str) -> None:
+    # One cassette per dataset, so every run of it replays the same recordings.
+    name = os.path.splitext(os.path.basename(dataset_path))[0]
+    cassette = Cassette(os.path.join(EVAL_CASSETTES_DIR, f"{name}.jsonl")) if mode != "off" else None
+    try:
+        async with build_client(cassette, mode, concurrency) as client:
+            await run_eval(client, load_dataset(dataset_path), _results_path(run_id), concurrency, run.progress)
+        run.status = "completed"
+    except Exception as exc:
+        logger.exception("Eval run %s failed", run_id)
+        run.status = "failed"
+        run.error = f"{type(exc).__name__}: {exc}"
+    finally:
+        if cassette is not None:
+            cassette.close()
+
+
+@router.post("/run", response_model=EvalRunResponse, status_code=202)
+async def run(request: EvalRunRequest, http_request: Request):
+    """Start (or, with `run_id`, resume) a dataset run in the background; poll `/v1/eval/report/{run_id}`."""
+    request_id = get_request_id()
+    root = os.path.realpath(EVAL_DATASETS_DIR)
+    dataset_path = os.path.realpath(os.path.join(root, request.dataset))
+    if os.path.commonpath([root, dataset_path]) != root or not os.path.isfile(dataset_path):
+        return _error(404, f"Dataset {request.dataset!r} not found", request_id)
+
+    runs = http_request.app.state.eval_runs
+    run_id = request.run_id or uuid.uuid4().hex
+    if run_id in runs and runs[run_id].status == "running":
+        return _error(409, f"Run {run_id} is already running", request_id)
+    eval_run = EvalRun(dataset=request.dataset)
+    eval_run.task = asyncio.create_task(
+        _execute(eval_run, run_id, dataset_path, request.concurrency or EVAL_CONCURRENCY, request.cassette)
+    )
+    runs[run_id] = eval_run
+    return EvalRunResponse(run_id=run_id, status=eval_run.status, dataset=request.dataset)
+
+
+@router.get("/report/{run_id}", response_model=EvalReport)
+async def report(run_id: str, http_request: Request):
+    """Progress and summary (pass rate, latency percentiles, tokens, cost) of a run."""
+    request_id = get_request_id()
+    eval_run = http_request.app.state.eval_runs.get(run_id)
+    path = _results_path(run_id)
+    if not _RUN_ID.match(run_id) or (eval_run is None and not os.path.exists(path)):
+        return _error(404, f"Run {run_id} not found", request_id)
+    summary = await asyncio.to_thread(summarize, path)
+    if eval_run is None:
+        return EvalReport(run_id=run_id, status="stored", summary=summary)
+    return EvalReport(
+        run_id=run_id,
+        status=eval_run.status,
+        dataset=eval_run.dataset,
+        progress=asdict(eval_run.progress),
+        summary=summary,
+        error=eval_run.error,
+    )
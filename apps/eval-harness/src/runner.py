@@ -0,0 +1,324 @@
+"""Eval runner: datasets through the gateway, RAG and agent services with bounded concurrency.
+
+A dataset is JSONL, one example per line::
+
+    {"id": "q1", "target": "chat" | "rag" | "agent", "input": {<request body>},
+     "expected": {"contains": ["..."], "not_contains": ["..."]}}
+
+Examples are streamed from the file into a fixed pool of workers, and each
+result is appended to the results JSONL as soon as it finishes, so memory
+stays flat for large datasets and an interrupted run resumes by skipping
+the ids already recorded (errored examples are retried). With a cassette
+(`src.cassette`) service responses are recorded once and replayed
+offline, making reruns deterministic and free.
+
+CLI (from apps/eval-harness)::
+
+    python -m src.runner run --dataset ../../examples/eval/smoke.jsonl --out data/runs/smoke.jsonl \\
+        --cassette data/cassettes/smoke.jsonl --mode auto
+    python -m src.runner report --results data/runs/smoke.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+import httpx
+
+from .cassette import Cassette, CassetteMiss, CassetteTransport
+from .config import (
+    AGENT_SERVICE_URL,
+    EVAL_CONCURRENCY,
+    EVAL_TIMEOUT_S,
+    LLM_GATEWAY_URL,
+    RAG_SERVICE_URL,
+    TRACE_EXPORT_PATH,
+    TRACE_SAMPLE_RATE,
+)
+from python_common.cost_tracking import estimate_cost
+from python_common.observability import instrument_httpx, setup_tracing, start_span
+
+TARGETS = {
+    "chat": (LLM_GATEWAY_URL, "/v1/chat/"),
+    "rag": (RAG_SERVICE_URL, "/v1/rag/answer"),
+    "agent": (AGENT_SERVICE_URL, "/v1/agent/run"),
+}
+PERCENTILES = (50, 90, 95, 99)
+
+
+@dataclass
+class Example:
+    id: str
+    target: str
+    input: Dict[str, Any]
+    expected: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class RunProgress:
+    total_done: int = 0  # includes examples skipped on resume
+    skipped: int = 0
+    ok: int = 0
+    errors: int = 0
+    replayed: int = 0
+
+
+def load_dataset(path: str) -> Iterator[Example]:
+    """Examples from a JSONL file, read lazily; ids default to the line number"""
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            raw = json.loads(line)
+            target = raw.get("target", "chat")
+            if target not in TARGETS:
+                raise ValueError(f"{path}:{number}: unknown target {target!r}")
+            yield Example(str(raw.get("id", number)), target, raw.get("input") or {}, raw.get("expected") or {})
+
+
+def read_results(path: str) -> Dict[str, Dict[str, Any]]:
+    """Latest result per example id (a resumed run appends retries after earlier errors)"""
+    results: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # torn last line from an interrupted run
+            results[result["id"]] = result
+    return results
+
+
+def score(output: str, expected: Dict[str, Any]) -> Optional[float]:
+    """Fraction of `contains` / `not_contains` checks that hold (case-insensitive); None when nothing is expected"""
+    text = output.lower()
+    checks = [needle.lower() in text for needle in expected.get("contains", [])]
+    checks += [needle.lower() not in text for needle in expected.get("not_contains", [])]
+    return sum(checks) / len(checks) if checks else None
+
+
+def _output(target: str, body: Dict[str, Any]) -> str:
+    if target == "chat":
+        return body["content"]
+    if target == "rag":
+        return body["answer"]
+    if body.get("status") != "ok":
+        failed = [step for step in body.get("steps", []) if step.get("error")]
+        raise RuntimeError(f"agent run {body.get('status')}: {failed[0]['error'] if failed else 'no output'}")
+    outputs = body.get("outputs") or {}
+    return "\n".join(value if isinstance(value, str) else json.dumps(value) for value in outputs.values())
+
+
+async def run_example(client: httpx.AsyncClient, example: Example) -> Dict[str, Any]:
+    """Call the example's service and score the reply; failures become an ``error`` result"""
+    # One trace per example, so a slow case's hops can be looked up by its trace_id.
+    with start_span("eval.example", root=True, example=example.id, target=example.target) as span:
+        result = await _run_example(client, example)
+        result["trace_id"] = span.trace_id
+        if result["status"] != "ok":
+            span.status = "error"
+        return result
+
+
+async def _run_example(client: httpx.AsyncClient, example: Example) -> Dict[str, Any]:
+    base_url, path = TARGETS[example.target]
+    result: Dict[str, Any] = {"id": example.id, "target": example.target}
+    start = time.perf_counter()
+    try:
+        response = await client.post(f"{base_url}{path}", json=example.input)
+        latency_ms = (time.perf_counter() - start) * 1000
+        result["replayed"] = response.extensions.get("cassette") == "replay"
+        if result["replayed"]:
+            # Report the recorded service latency so replayed runs keep comparable percentiles.
+            latency_ms = response.extensions["elapsed_ms"]
+        if response.status_code >= 400:
+            raise RuntimeError(f"{path} returned {response.status_code}: {response.text[:500]}")
+        body = response.json()
+        output = _output(example.target, body)
+    except (httpx.HTTPError, CassetteMiss, RuntimeError, KeyError, ValueError) as exc:
+        result.update(
+            status="error",
+            error=f"{type(exc).__name__}: {exc}",
+            latency_ms=(time.perf_counter() - start) * 1000,
+        )
+        return result
+
+    usage = body.get("usage") or {}
+    model = body.get("model") or example.input.get("model")
+    tokens_in = usage.get("tokens_in", 0)
+    tokens_out = usage.get("tokens_out", 0)
+    # Gateway cache hits were free; everything else is priced from the token counts.
+    cost = 0.0 if usage.get("cache_hit") or not model else estimate_cost(model, tokens_in, tokens_out)
+    value = score(output, example.expected)
+    result.update(
+        status="ok",
+        output=output,
+        score=value,
+        passed=None if value is None else value == 1.0,
+        latency_ms=latency_ms,
+        model=model,
+        tokens_in=tokens_in,
+        tokens_out=tokens_out,
+        cost_usd=cost,
+    )
+    return result
+
+
+async def run_eval(
+    client: httpx.AsyncClient,
+    examples: Iterator[Example],
+    results_path: str,
+    concurrency: int = EVAL_CONCURRENCY,
+    progress: Optional[RunProgress] = None,
+) -> RunProgress:
+    """Run `examples` into `results_path`, skipping ids that already succeeded there"""
+    progress = progress or RunProgress()
+    done: Set[str] = {id_ for id_, result in read_results(results_path).items() if result.get("status") == "ok"}
+    os.makedirs(os.path.dirname(results_path) or ".", exist_ok=True)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def feed() -> None:
+        try:
+            for example in examples:
+                if example.id in done:
+                    progress.skipped += 1
+                    progress.total_done += 1
+                    continue
+                await queue.put(example)
+        finally:
+            # Workers always get their stop signal, even if the dataset is malformed.
+            for _ in range(concurrency):
+                await queue.put(None)
+
+    with open(results_path, "a+", encoding="utf-8") as out:
+        if out.tell():
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                out.write("\n")  # terminate a torn line so the next result starts cleanly
+
+        async def worker() -> None:
+            while True:
+                example = await queue.get()
+                if example is None:
+                    return
+                result = await run_example(client, example)
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+                progress.total_done += 1
+                progress.replayed += bool(result.get("replayed"))
+                if result["status"] == "ok":
+                    progress.ok += 1
+                else:
+                    progress.errors += 1
+
+        await asyncio.gather(feed(), *(worker() for _ in range(concurrency)))
+    return progress
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Linear-interpolated p-th percentile (0-100)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _latency(results: List[Dict[str, Any]]) -> Dict[str, Optional[float]]:
+    values = [result["latency_ms"] for result in results if result.get("status") == "ok"]
+    return {f"p{p}_ms": percentile(values, p) for p in PERCENTILES}
+
+
+def summarize(results_path: str) -> Dict[str, Any]:
+    """Pass rate, latency percentiles, tokens and cost over the latest result per example"""
+    results = list(read_results(results_path).values())
+    ok = [result for result in results if result["status"] == "ok"]
+    scored = [result for result in ok if result.get("score") is not None]
+    summary: Dict[str, Any] = {
+        "examples": len(results),
+        "ok": len(ok),
+        "errors": len(results) - len(ok),
+        "replayed": sum(1 for result in results if result.get("replayed")),
+        "pass_rate": sum(1 for result in scored if result["passed"]) / len(scored) if scored else None,
+        "mean_score": sum(result["score"] for result in scored) / len(scored) if scored else None,
+        "latency": _latency(results),
+        "tokens_in": sum(result.get("tokens_in", 0) for result in ok),
+        "tokens_out": sum(result.get("tokens_out", 0) for result in ok),
+        # Priced as if every call went upstream; replayed calls cost nothing this run.
+        "cost_usd": sum(result.get("cost_usd", 0.0) for result in ok),
+        "spent_usd": sum(result.get("cost_usd", 0.0) for result in ok if not result.get("replayed")),
+        "by_target": {},
+    }
+    for target in TARGETS:
+        subset = [result for result in results if result["target"] == target]
+        if subset:
+            summary["by_target"][target] = {
+                "examples": len(subset),
+                "errors": sum(1 for result in subset if result["status"] != "ok"),
+                "latency": _latency(subset),
+                "cost_usd": sum(result.get("cost_usd", 0.0) for result in subset if result["status"] == "ok"),
+            }
+    return summary
+
+
+def build_client(cassette: Optional[Cassette] = None, mode: str = "off", concurrency: int = EVAL_CONCURRENCY) -> httpx.AsyncClient:
+    """Pooled client sized to the run's concurrency, routed through the cassette unless mode is "off"."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    transport = None
+    if mode != "off":
+        if cassette is None:
+            raise ValueError(f"cassette mode {mode!r} needs a cassette path")
+        transport = CassetteTransport(cassette, mode, httpx.AsyncHTTPTransport(limits=limits))
+    return instrument_httpx(httpx.AsyncClient(transport=transport, limits=limits, timeout=EVAL_TIMEOUT_S))
+
+
+async def _run_cli(args: argparse.Namespace) -> None:
+    mode = args.mode if args.cassette else "off"
+    cassette = Cassette(args.cassette) if mode != "off" else None
+    start = time.perf_counter()
+    try:
+        async with build_client(cassette, mode, args.concurrency) as client:
+            progress = await run_eval(client, load_dataset(args.dataset), args.out, args.concurrency)
+    finally:
+        if cassette is not None:
+            cassette.close()
+    elapsed = time.perf_counter() - start
+    ran = progress.ok + progress.errors
+    print(
+        f"ran {ran} examples ({progress.skipped} already done, {progress.replayed} replayed, "
+        f"{progress.errors} errors) in {elapsed:.2f}s = {ran / elapsed if elapsed else 0:.1f} examples/s"
+    )
+    print(json.dumps(summarize(args.out), indent=2))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.runner", description="Run eval datasets")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run a dataset, resuming into an existing results file")
+    run.add_argument("--dataset", required=True, help="JSONL dataset")
+    run.add_argument("--out", required=True, help="results JSONL (appended to; reruns resume)")
+    run.add_argument("--concurrency", type=int, default=EVAL_CONCURRENCY)
+    run.add_argument("--cassette", help="cassette JSONL for record / replay")
+    run.add_argument("--mode", choices=["off", "record", "replay", "auto"], default="auto",
+                     help="cassette mode (default auto: replay recorded calls, record the rest)")
+    report = commands.add_parser("report", help="summarize a results file")
+    report.add_argument("--results", required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        setup_tracing("eval-harness", TRACE_EXPORT_PATH, TRACE_SAMPLE_RATE)
+        asyncio.run(_run_cli(args))
+    else:
+        print(json.dumps(summarize(args.results), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Benchmark: SSE relay throughput and memory per concurrent stream.
+
+Compares the byte relay in ``src.sse`` (pull-driven, and with a 32-read
+prefetch queue) against the previous line-by-line ``json.loads`` /
+``json.dumps`` path, driving N concurrent streams from an in-process fake
+upstream.
+
+Run from apps/llm-gateway:
+
+    python -m benchmarks.bench_sse_relay --streams 1000 --tokens 200
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import AsyncIterator, Callable
+
+from src.sse import RelayResult, StreamMetrics, bounded, relay_frames
+
+
+def _frame(i: int) -> bytes:
+    chunk = {
+        "id": "chatcmpl-bench",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "delta": {"content": f" tok{i}"}, "finish_reason": None}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+
+async def fake_upstream(tokens: int, frames_per_read: int, token_delay_s: float) -> AsyncIterator[bytes]:
+    """Yield OpenAI-style SSE bytes, a few frames per socket read."""
+    frames = [_frame(i) for i in range(tokens)]
+    usage = {"choices": [], "usage": {"prompt_tokens": 10, "completion_tokens": tokens}}
+    frames.append(f"data: {json.dumps(usage)}\n\n".encode("utf-8"))
+    frames.append(b"data: [DONE]\n\n")
+    for i in range(0, len(frames), frames_per_read):
+        if token_delay_s:
+            await asyncio.sleep(token_delay_s)
+        else:
+            await asyncio.sleep(0)
+        yield b"".join(frames[i:i + frames_per_read])
+
+
+async def legacy_path(source: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """The old approach: split lines, decode every chunk, re-encode every delta."""
+    pending = ""
+    async for data in source:
+        pending += data.decode("utf-8")
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            if not line.startswith("data: "):
+                continue
+            payload = line[6:]
+            if payload == "[DONE]":
+                return
+            chunk = json.loads(payload)
+            for choice in chunk.get("choices", []):
+                delta = choice.get("delta", {}).get("content")
+                if delta:
+                    yield f"event: chunk\ndata: {json.dumps({'content': delta})}\n\n".encode("utf-8")
+
+
+async def relay_path(source: AsyncIterator[bytes], prefetch: int = 0) -> AsyncIterator[bytes]:
+    metrics = StreamMetrics()
+    async for out in bounded(relay_frames(source, RelayResult(), metrics), prefetch, metrics):
+        yield out
+
+
+def relay_prefetch_path(source: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    return relay_path(source, prefetch=32)
+
+
+async def run(
+    path: Callable[[AsyncIterator[bytes]], AsyncIterator[bytes]],
+    streams: int,
+    tokens: int,
+    frames_per_read: int,
+    token_delay_s: float,
+    track_memory: bool,
+) -> dict:
+    async def client() -> int:
+        n = 0
+        async for out in path(fake_upstream(tokens, frames_per_read, token_delay_s)):
+            n += len(out)
+        return n
+
+    if track_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    sizes = await asyncio.gather(*(client() for _ in range(streams)))
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if track_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "elapsed_s": elapsed,
+        "tokens_per_s": streams * tokens / elapsed,
+        "bytes_out": sum(sizes),
+        "peak_kib_per_stream": peak / streams / 1024 if track_memory else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=1000)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--frames-per-read", type=int, default=1)
+    parser.add_argument("--token-delay-ms", type=float, default=0.0,
+                        help="delay between upstream reads; >0 keeps all streams open concurrently")
+    args = parser.parse_args()
+
+    print(f"{args.streams} concurrent streams x {args.tokens} tokens, {args.frames_per_read} frame(s)/read")
+    print(f"{'path':<10} {'tokens/s':>12} {'elapsed s':>10} {'KiB/stream (peak)':>18}")
+    paths = (("legacy", legacy_path), ("relay", relay_path), ("relay+q32", relay_prefetch_path))
+    for name, path in paths:
+        common = (path, args.streams, args.tokens, args.frames_per_read, args.token_delay_ms / 1000)
+        speed = asyncio.run(run(*common, track_memory=False))
+        memory = asyncio.run(run(*common, track_memory=True))
+        print(f"{name:<10} {speed['tokens_per_s']:>12,.0f} {speed['elapsed_s']:>10.2f} "
+              f"{memory['peak_kib_per_stream']:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
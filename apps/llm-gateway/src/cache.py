@@ -0,0 +1,240 @@
+"""Response cache in front of the upstream provider.
+
+Two tiers:
+- exact: in-process LRU keyed on a canonical hash of everything that shapes the
+  completion (messages, model, temperature, json_schema, ...), with TTL and a
+  memory cap.
+- semantic (optional): nearest-neighbour lookup through any ``VectorStore``;
+  a hit needs a similarity score at or above the configured threshold.
+
+Only deterministic requests (temperature <= CACHE_MAX_TEMPERATURE) are cached.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from fastapi import Request
+from python_common.cost_tracking import estimate_cost
+
+from . import config
+from .models.schemas import ChatRequest
+
+logger = logging.getLogger("llm-gateway")
+
+# Rough per-entry bookkeeping cost (dict slot, tuple, dataclass) on top of the payload.
+_ENTRY_OVERHEAD_BYTES = 256
+
+
+@dataclass
+class CachedResponse:
+    content: str
+    model: str
+    finish_reason: str
+    tokens_in: int
+    tokens_out: int
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.content.encode("utf-8")) + _ENTRY_OVERHEAD_BYTES
+
+
+def _canonical(payload: Dict[str, Any]) -> str:
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _generation_params(request: ChatRequest) -> Dict[str, Any]:
+    """Everything except the messages that changes what the model returns."""
+    return {
+        "model": request.model,
+        "temperature": request.temperature,
+        "max_tokens": request.max_tokens,
+        "strict_json": request.strict_json,
+        "json_schema": request.json_schema,
+    }
+
+
+def cache_key(request: ChatRequest) -> str:
+    """Canonical SHA-256 of messages plus generation parameters."""
+    payload = _generation_params(request)
+    payload["messages"] = [[m.role, m.content] for m in request.messages]
+    return hashlib.sha256(_canonical(payload).encode("utf-8")).hexdigest()
+
+
+def is_cacheable(request: ChatRequest) -> bool:
+    return request.temperature <= config.CACHE_MAX_TEMPERATURE
+
+
+class ExactCache:
+    """LRU + TTL cache bounded by both entry count and approximate bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_s: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[str, Tuple[float, CachedResponse]]" = OrderedDict()
+        self.bytes_used = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: CachedResponse) -> None:
+        size = value.size_bytes
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl_s, value)
+        self.bytes_used += size
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes_used > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self.bytes_used -= value.size_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SemanticCache:
+    """Nearest-neighbour tier backed by a ``VectorStore``.
+
+    Requests are bucketed into one collection per set of generation parameters,
+    so a hit can only come from a request with the same model, temperature and
+    schema. The store is synchronous, so calls run in a worker thread.
+    """
+
+    def __init__(self, store: Any, threshold: float, collection_prefix: str):
+        self.store = store
+        self.threshold = threshold
+        self.collection_prefix = collection_prefix
+
+    def _collection(self, request: ChatRequest) -> str:
+        digest = hashlib.sha256(_canonical(_generation_params(request)).encode("utf-8")).hexdigest()
+        return f"{self.collection_prefix}-{digest[:16]}"
+
+    @staticmethod
+    def _text(request: ChatRequest) -> str:
+        return "\n".join(f"{m.role}: {m.content}" for m in request.messages)
+
+    async def get(self, request: ChatRequest) -> Optional[CachedResponse]:
+        try:
+            results = await asyncio.to_thread(
+                self.store.query, self._text(request), 1, self._collection(request)
+            )
+        except Exception as exc:
+            logger.warning("Semantic cache lookup failed: %s", exc)
+            return None
+        if not results or results[0]["score"] < self.threshold:
+            return None
+        metadata = results[0]["metadata"]
+        return CachedResponse(
+            content=metadata["content"],
+            model=metadata["model"],
+            finish_reason=metadata["finish_reason"],
+            tokens_in=int(metadata["tokens_in"]),
+            tokens_out=int(metadata["tokens_out"]),
+        )
+
+    async def put(self, request: ChatRequest, key: str, value: CachedResponse) -> None:
+        metadata = {"chunk_id": key, **asdict(value)}
+        try:
+            await asyncio.to_thread(
+                self.store.ingest, self._text(request), metadata, self._collection(request)
+            )
+        except Exception as exc:
+            logger.warning("Semantic cache store failed: %s", exc)
+
+
+class ResponseCache:
+    """Exact tier first, then the optional semantic tier, with hit/miss accounting."""
+
+    def __init__(self, exact: ExactCache, semantic: Optional[SemanticCache] = None):
+        self.exact = exact
+        self.semantic = semantic
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+        self.cost_saved_usd = 0.0
+        self._pending: Set[asyncio.Task] = set()
+
+    async def get(self, request: ChatRequest, key: str) -> Optional[Tuple[CachedResponse, str]]:
+        value = self.exact.get(key)
+        tier = "exact"
+        if value is None and self.semantic is not None:
+            value = await self.semantic.get(request)
+            tier = "semantic"
+            if value is not None:
+                # Promote so the next identical request skips the vector lookup.
+                self.exact.put(key, value)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits[tier] += 1
+        self.cost_saved_usd += self.cost_of(value)
+        return value, tier
+
+    def put(self, request: ChatRequest, key: str, value: CachedResponse) -> None:
+        """Store in the exact tier now; the semantic write happens in the background."""
+        self.exact.put(key, value)
+        if self.semantic is not None:
+            task = asyncio.create_task(self.semantic.put(request, key, value))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    @staticmethod
+    def cost_of(value: CachedResponse) -> float:
+        return estimate_cost(value.model, value.tokens_in, value.tokens_out)
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.hits["exact"] + self.hits["semantic"]
+        lookups = hits + self.misses
+        return {
+            "entries": len(self.exact),
+            "bytes_used": self.exact.bytes_used,
+            "max_bytes": self.exact.max_bytes,
+            "evictions": self.exact.evictions,
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "cost_saved_usd": self.cost_saved_usd,
+            "semantic_enabled": self.semantic is not None,
+        }
+
+
+def build_response_cache() -> Optional[ResponseCache]:
+    """Build the cache from config; ``None`` when caching is disabled."""
+    if not config.CACHE_ENABLED:
+        return None
+    exact = ExactCache(config.CACHE_MAX_ENTRIES, config.CACHE_MAX_BYTES, config.CACHE_TTL_S)
+    semantic = None
+    if config.SEMANTIC_CACHE_ENABLED:
+        from vector_store.chroma_client import ChromaVectorStore
+
+        semantic = SemanticCache(
+            ChromaVectorStore(host=config.CHROMA_HOST, port=config.CHROMA_PORT),
+            threshold=config.SEMANTIC_CACHE_THRESHOLD,
+            collection_prefix=config.SEMANTIC_CACHE_COLLECTION,
+        )
+    return ResponseCache(exact, semantic)
+
+
+async def get_cache(request: Request) -> Optional[ResponseCache]:
+    """FastAPI dependency returning the app-wide response cache (or None)."""
+    return getattr(request.app.state, "cache", None)
@@ -8,3 +8,65 @@ LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
 OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
 OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
 RATE_LIMIT_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_PER_MINUTE", "100"))
+
+# Logging: queued mode writes from a background thread; LOG_SAMPLE_RATES is "/endpoint=rate,..."
+LOG_QUEUED: bool = os.getenv("LOG_QUEUED", "true").lower() == "true"
+LOG_SAMPLE_RATES: str = os.getenv("LOG_SAMPLE_RATES", "")
+LOG_DEBUG_PER_SECOND: float = float(os.getenv("LOG_DEBUG_PER_SECOND", "0"))  # 0 = uncapped
+
+# Tracing: spans are appended as JSON lines to TRACE_EXPORT_PATH (empty = not exported)
+TRACE_EXPORT_PATH: str = os.getenv("TRACE_EXPORT_PATH", "")
+TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))  # fraction of new traces exported
+
+# Extra prompt-injection rules (JSON list of {"name", "pattern", "prefixes"}), added after the defaults
+INJECTION_RULES_PATH: Optional[str] = os.getenv("INJECTION_RULES_PATH") or None
+
+# Upstream connection pool (shared across requests for the app lifetime)
+UPSTREAM_HTTP2: bool = os.getenv("UPSTREAM_HTTP2", "true").lower() == "true"
+UPSTREAM_MAX_CONNECTIONS: int = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE: int = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "20"))
+UPSTREAM_KEEPALIVE_EXPIRY_S: float = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY_S", "30"))
+UPSTREAM_MAX_IN_FLIGHT_PER_HOST: int = int(os.getenv("UPSTREAM_MAX_IN_FLIGHT_PER_HOST", "200"))
+UPSTREAM_CONNECT_TIMEOUT_S: float = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT_S", "5"))
+UPSTREAM_READ_TIMEOUT_S: float = float(os.getenv("UPSTREAM_READ_TIMEOUT_S", "60"))
+UPSTREAM_WRITE_TIMEOUT_S: float = float(os.getenv("UPSTREAM_WRITE_TIMEOUT_S", "10"))
+UPSTREAM_POOL_TIMEOUT_S: float = float(os.getenv("UPSTREAM_POOL_TIMEOUT_S", "5"))
+
+# Response cache
+CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_BYTES: int = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_TTL_S: float = float(os.getenv("CACHE_TTL_S", "3600"))
+CACHE_MAX_TEMPERATURE: float = float(os.getenv("CACHE_MAX_TEMPERATURE", "0"))
+SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_COLLECTION: str = os.getenv("SEMANTIC_CACHE_COLLECTION", "gateway-cache")
+CHROMA_HOST: str = os.getenv("CHROMA_HOST", "localhost")
+CHROMA_PORT: int = int(os.getenv("CHROMA_PORT", "8000"))
+
+# Streaming relay: upstream reads prefetched per client connection (0 = pull-driven, no prefetch)
+SSE_RELAY_BUFFER: int = int(os.getenv("SSE_RELAY_BUFFER", "0"))
+# Coalesced streams: frames held for the slowest subscriber; one that stalls that long is dropped
+STREAM_SHARE_BUFFER: int = int(os.getenv("STREAM_SHARE_BUFFER", "256"))
+STREAM_SHARE_LAG_TIMEOUT_S: float = float(os.getenv("STREAM_SHARE_LAG_TIMEOUT_S", "5"))
+# strict_json streams are validated as they arrive; upstream calls retried after invalid JSON
+STRICT_JSON_STREAM_RETRIES: int = int(os.getenv("STRICT_JSON_STREAM_RETRIES", "1"))
+
+# Rate limiting (per caller; 0 disables a dimension). RATE_LIMIT_PER_MINUTE above counts requests.
+# Opt-in: nothing is limited unless RATE_LIMIT_ENABLED=true.
+RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true"
+# Header an authenticating proxy sets to the caller's identity (empty = key on client IP)
+RATE_LIMIT_KEY_HEADER: str = os.getenv("RATE_LIMIT_KEY_HEADER", "")
+# Client IPs / CIDRs never limited, e.g. the internal services' network
+RATE_LIMIT_EXEMPT_CLIENTS: str = os.getenv("RATE_LIMIT_EXEMPT_CLIENTS", "")
+RATE_LIMIT_TOKENS_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_TOKENS_PER_MINUTE", "0"))
+RATE_LIMIT_USD_PER_MINUTE: float = float(os.getenv("RATE_LIMIT_USD_PER_MINUTE", "0"))
+RATE_LIMIT_DEFAULT_COMPLETION_TOKENS: int = int(os.getenv("RATE_LIMIT_DEFAULT_COMPLETION_TOKENS", "512"))
+RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" or "redis"
+RATE_LIMIT_REDIS_URL: str = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_SYNC_INTERVAL_S: float = float(os.getenv("RATE_LIMIT_SYNC_INTERVAL_S", "1"))
+
+# Embedding micro-batching: concurrent /v1/embeddings inputs are merged into one upstream call
+EMBEDDING_BATCH_MAX_SIZE: int = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "256"))
+EMBEDDING_BATCH_MAX_WAIT_MS: float = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+EMBEDDING_BATCH_MAX_CONCURRENCY: int = int(os.getenv("EMBEDDING_BATCH_MAX_CONCURRENCY", "8"))
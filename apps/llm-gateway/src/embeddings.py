@@ -0,0 +1,86 @@
+"""Micro-batched upstream embedding calls.
+
+Concurrent ``/v1/embeddings`` requests are merged per model into one upstream
+``/embeddings`` call (up to ``EMBEDDING_BATCH_MAX_SIZE`` inputs, or whatever
+arrives within ``EMBEDDING_BATCH_MAX_WAIT_MS``), and each caller gets back its
+own vector. Chat completions are not batched: the provider has no multi-prompt
+completions endpoint, and pooled connections already cover that path.
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple
+
+from fastapi import Request
+
+from . import config
+from .upstream import UpstreamClient
+from python_common.batching import MicroBatcher, split_evenly
+
+# (vector, prompt tokens attributed to this input)
+Embedding = Tuple[List[float], int]
+
+
+class EmbeddingBatcher:
+    """One MicroBatcher per embedding model, sharing the pooled upstream client."""
+
+    def __init__(
+        self,
+        upstream: UpstreamClient,
+        max_batch_size: int = config.EMBEDDING_BATCH_MAX_SIZE,
+        max_wait_ms: float = config.EMBEDDING_BATCH_MAX_WAIT_MS,
+        max_concurrent_batches: int = config.EMBEDDING_BATCH_MAX_CONCURRENCY,
+    ):
+        self.upstream = upstream
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_concurrent_batches = max_concurrent_batches
+        self._batchers: Dict[str, MicroBatcher[str, Embedding]] = {}
+
+    def _batcher(self, model: str) -> MicroBatcher[str, Embedding]:
+        batcher = self._batchers.get(model)
+        if batcher is None:
+            async def dispatch(texts: List[str]) -> List[Embedding]:
+                return await self._embed_batch(model, texts)
+
+            batcher = self._batchers[model] = MicroBatcher(
+                dispatch,
+                max_batch_size=self.max_batch_size,
+                max_wait_ms=self.max_wait_ms,
+                max_concurrent_batches=self.max_concurrent_batches,
+                name=f"embeddings:{model}",
+            )
+        return batcher
+
+    async def _embed_batch(self, model: str, texts: List[str]) -> List[Embedding]:
+        """One upstream call for ``texts``; raises ValueError when the body is not one embedding per input."""
+        body = await self.upstream.post_json("/embeddings", {"model": model, "input": texts})
+        try:
+            rows = sorted(body["data"], key=lambda row: row["index"])
+            vectors = [row["embedding"] for row in rows]
+            total = (body.get("usage") or {}).get("prompt_tokens", 0)
+        except (KeyError, TypeError, AttributeError) as exc:
+            raise ValueError(f"not an embeddings response ({type(exc).__name__}: {exc})") from None
+        if len(vectors) != len(texts):
+            raise ValueError(f"{len(vectors)} embeddings for {len(texts)} inputs")
+        # The provider reports usage for the whole batch; attribute it by input length.
+        tokens = split_evenly(total, [len(text) for text in texts])
+        return list(zip(vectors, tokens))
+
+    async def embed(self, model: str, texts: Sequence[str]) -> List[Embedding]:
+        """Embed ``texts``; each input joins whichever batch is open for ``model``."""
+        return await self._batcher(model).submit_many(texts)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "models": {model: batcher.stats.snapshot() for model, batcher in self._batchers.items()},
+        }
+
+    async def aclose(self) -> None:
+        for batcher in self._batchers.values():
+            await batcher.close()
+
+
+async def get_embedder(request: Request) -> EmbeddingBatcher:
+    """FastAPI dependency returning the app-wide embedding batcher."""
+    return request.app.state.embedder
@@ -1,23 +1,107 @@
 """LLM Gateway main application"""
 
 import logging
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from .routes.chat import router as chat_router
-from .config import PORT, LOG_LEVEL
+from .routes.embeddings import router as embeddings_router
+from .config import (
+    PORT,
+    LOG_LEVEL,
+    LOG_QUEUED,
+    LOG_SAMPLE_RATES,
+    LOG_DEBUG_PER_SECOND,
+    TRACE_EXPORT_PATH,
+    TRACE_SAMPLE_RATE,
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_KEY_HEADER,
+    RATE_LIMIT_EXEMPT_CLIENTS,
+    RATE_LIMIT_PER_MINUTE,
+    RATE_LIMIT_TOKENS_PER_MINUTE,
+    RATE_LIMIT_USD_PER_MINUTE,
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_REDIS_URL,
+    RATE_LIMIT_SYNC_INTERVAL_S,
+    STREAM_SHARE_BUFFER,
+    STREAM_SHARE_LAG_TIMEOUT_S,
+)
+from .cache import build_response_cache
+from .embeddings import EmbeddingBatcher
+from .singleflight import SingleFlight
+from .sse import StreamMetrics
+from .upstream import UpstreamClient
+from python_common.metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from python_common.observability import TracingMiddleware, setup_tracing
+from python_common.rate_limit import (
+    RateLimiter,
+    RateLimitMiddleware,
+    RedisBackend,
+    default_key,
+    header_key,
+    parse_networks,
+)
 
+log_handler = None
 try:
-    from python_common.logging import setup_logging
-    setup_logging("llm-gateway", LOG_LEVEL)
+    from python_common.logging import parse_sample_rates, setup_logging
+    log_handler = setup_logging(
+        "llm-gateway",
+        LOG_LEVEL,
+        queued=LOG_QUEUED,
+        sample_rates=parse_sample_rates(LOG_SAMPLE_RATES),
+        debug_per_second=LOG_DEBUG_PER_SECOND,
+    )
 except ModuleNotFoundError:
     logging.basicConfig(level=getattr(logging, LOG_LEVEL.upper(), logging.INFO))
+setup_tracing("llm-gateway", TRACE_EXPORT_PATH, TRACE_SAMPLE_RATE)
+
+# Without RATE_LIMIT_ENABLED every limit is 0, which turns the middleware and spend checks off.
+rate_limiter = RateLimiter(
+    requests_per_minute=RATE_LIMIT_PER_MINUTE if RATE_LIMIT_ENABLED else 0,
+    tokens_per_minute=RATE_LIMIT_TOKENS_PER_MINUTE if RATE_LIMIT_ENABLED else 0,
+    usd_per_minute=RATE_LIMIT_USD_PER_MINUTE if RATE_LIMIT_ENABLED else 0,
+    backend=RedisBackend(RATE_LIMIT_REDIS_URL) if RATE_LIMIT_BACKEND == "redis" else None,
+    sync_interval_s=RATE_LIMIT_SYNC_INTERVAL_S,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own the pooled upstream client, response cache and single-flight group for the app lifetime."""
+    app.state.upstream = UpstreamClient()
+    app.state.embedder = EmbeddingBatcher(app.state.upstream)
+    app.state.cache = build_response_cache()
+    app.state.flights = SingleFlight(STREAM_SHARE_BUFFER, STREAM_SHARE_LAG_TIMEOUT_S)
+    app.state.stream_metrics = StreamMetrics()
+    app.state.rate_limiter = rate_limiter
+    await rate_limiter.start()
+    try:
+        yield
+    finally:
+        await rate_limiter.stop()
+        await app.state.embedder.aclose()
+        await app.state.upstream.aclose()
+
 
 app = FastAPI(
     title="PrismFlow LLM Gateway",
     description="Unified LLM API gateway with streaming, cost tracking, and strict JSON mode",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+# Added first so CORS stays outermost and 429s still carry CORS headers.
+app.add_middleware(
+    RateLimitMiddleware,
+    limiter=rate_limiter,
+    key_func=header_key(RATE_LIMIT_KEY_HEADER) if RATE_LIMIT_KEY_HEADER else default_key,
+    exempt_clients=parse_networks(RATE_LIMIT_EXEMPT_CLIENTS),
+)
+# Outside the rate limiter so rejected requests are counted too.
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], 
@@ -28,6 +112,7 @@ app.add_middleware(
 
 # Include routers
 app.include_router(chat_router, prefix="/v1/chat", tags=["chat"])
+app.include_router(embeddings_router, prefix="/v1/embeddings", tags=["embeddings"])
 
 
 @app.get("/health")
@@ -36,6 +121,52 @@ async def health():
     return {"status": "healthy", "service": "llm-gateway"}
 
 
+@app.get("/health/upstream")
+async def health_upstream(request: Request):
+    """Upstream connection pool configuration and saturation counters"""
+    return request.app.state.upstream.stats()
+
+
+@app.get("/health/cache")
+async def health_cache(request: Request):
+    """Response cache hit/miss counters, cost saved and in-flight coalescing"""
+    cache = request.app.state.cache
+    stats = cache.stats() if cache is not None else {"enabled": False}
+    stats["singleflight"] = request.app.state.flights.stats()
+    return stats
+
+
+@app.get("/health/rate-limit")
+async def health_rate_limit():
+    """Rate limiter configuration and rejection counters"""
+    return rate_limiter.stats()
+
+
+@app.get("/health/stream")
+async def health_stream(request: Request):
+    """Streaming relay counters and time-to-first-token / inter-token latency histograms"""
+    return request.app.state.stream_metrics.snapshot()
+
+
+@app.get("/health/embeddings")
+async def health_embeddings(request: Request):
+    """Embedding micro-batch sizes and per-batch upstream latency"""
+    return request.app.state.embedder.stats()
+
+
+@app.get("/health/logging")
+async def health_logging():
+    """Queued log writer counters: written, dropped on overflow, sampled out, rate-limited debug records"""
+    stats = getattr(log_handler, "stats", None)
+    return stats.snapshot() if stats is not None else {"queued": False}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of the process metrics registry"""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=PORT)
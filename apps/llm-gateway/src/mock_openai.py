@@ -0,0 +1,150 @@
+"""Local mock of the OpenAI chat completions and embeddings APIs.
+
+Lets the gateway run without network access or an API key:
+
+    python -m uvicorn src.mock_openai:app --port 9000
+    OPENAI_BASE_URL=http://localhost:9000/v1 python -m uvicorn src.main:app --port 8001
+
+or in-process via ``UpstreamClient(base_url="http://mock/v1",
+transport=httpx.ASGITransport(app=app))``.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+MOCK_LATENCY_MS: float = float(os.getenv("MOCK_LATENCY_MS", "0"))
+MOCK_TOKEN_DELAY_MS: float = float(os.getenv("MOCK_TOKEN_DELAY_MS", "0"))
+MOCK_EMBEDDING_DIM: int = int(os.getenv("MOCK_EMBEDDING_DIM", "64"))
+
+app = FastAPI(title="Mock OpenAI")
+app.state.calls = 0
+app.state.embedding_calls = 0
+
+
+def _reply_for(messages: List[Dict[str, Any]], json_mode: bool) -> str:
+    last = messages[-1]["content"] if messages else ""
+    if json_mode:
+        return json.dumps({"echo": last})
+    return f"Echo: {last}"
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text.split()))
+
+
+def _embed(text: str) -> List[float]:
+    """Deterministic pseudo-embedding: the same text always maps to the same unit vector."""
+    raw = b""
+    counter = 0
+    while len(raw) < MOCK_EMBEDDING_DIM:
+        raw += hashlib.sha256(f"{counter}:{text}".encode("utf-8")).digest()
+        counter += 1
+    vector = [b / 127.5 - 1.0 for b in raw[:MOCK_EMBEDDING_DIM]]
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    app.state.embedding_calls += 1
+    if MOCK_LATENCY_MS:
+        await asyncio.sleep(MOCK_LATENCY_MS / 1000)
+
+    inputs = body.get("input", [])
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    prompt_tokens = sum(_count_tokens(text) for text in inputs)
+    return {
+        "object": "list",
+        "model": body.get("model", "text-embedding-3-small"),
+        "data": [
+            {"object": "embedding", "index": i, "embedding": _embed(text)}
+            for i, text in enumerate(inputs)
+        ],
+        "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    app.state.calls += 1
+    if MOCK_LATENCY_MS:
+        await asyncio.sleep(MOCK_LATENCY_MS / 1000)
+
+    messages = body.get("messages", [])
+    model = body.get("model", "gpt-4o-mini")
+    json_mode = "response_format" in body
+    content = _reply_for(messages, json_mode)
+    prompt_tokens = sum(_count_tokens(m.get("content", "")) for m in messages)
+    completion_tokens = _count_tokens(content)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    created = int(time.time())
+
+    if not body.get("stream"):
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+    async def events():
+        pieces = content.split(" ")
+        for i, piece in enumerate(pieces):
+            if MOCK_TOKEN_DELAY_MS:
+                await asyncio.sleep(MOCK_TOKEN_DELAY_MS / 1000)
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "delta": {"content": piece if i == 0 else " " + piece},
+                        "finish_reason": "stop" if i == len(pieces) - 1 else None,
+                    }
+                ],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        if include_usage:
+            usage_chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+            yield f"data: {json.dumps(usage_chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
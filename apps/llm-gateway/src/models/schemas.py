@@ -1,7 +1,7 @@
 """Pydantic schemas"""
 
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 
 
 class ChatMessage(BaseModel):
@@ -22,6 +22,10 @@ class UsageMetrics(BaseModel):
     tokens_in: int
     tokens_out: int
     estimated_cost_usd: float
+    cache_hit: bool = False
+    cache_tier: Optional[str] = None  # "exact" or "semantic" on a hit
+    coalesced: bool = False  # shared an in-flight upstream call with an identical request
+    cost_saved_usd: float = 0.0
 
 
 class ChatResponse(BaseModel):
@@ -33,3 +37,21 @@ class ChatResponse(BaseModel):
     usage: UsageMetrics
     latency_ms: float
     finish_reason: str = "stop"
+
+
+class EmbeddingRequest(BaseModel):
+    input: Union[str, List[str]]
+    model: str = Field(default="text-embedding-3-small")
+
+
+class EmbeddingData(BaseModel):
+    index: int
+    embedding: List[float]
+
+
+class EmbeddingResponse(BaseModel):
+    request_id: str
+    model: str
+    data: List[EmbeddingData]
+    usage: UsageMetrics
+    latency_ms: float
@@ -0,0 +1,93 @@
+"""Helpers shared by the gateway routes: error responses, upstream failures and spend reservations."""
+
+import json
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+try:
+    from python_common.observability import get_request_id
+except ModuleNotFoundError:
+    import uuid
+    def get_request_id() -> str:
+        return str(uuid.uuid4())
+from python_common.models import ErrorResponse
+from python_common.rate_limit import RateLimiter
+
+logger = logging.getLogger("llm-gateway")
+
+
+def error_body(error: str, request_id: str, details: Optional[dict] = None) -> Dict[str, Any]:
+    return ErrorResponse(error=error, request_id=request_id, details=details).model_dump()
+
+
+def error_response(status_code: int, error: str, request_id: str, details: Optional[dict] = None) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content=error_body(error, request_id, details))
+
+
+def error_frame(error: str, request_id: str, details: Optional[dict] = None) -> str:
+    return f"event: error\ndata: {json.dumps(error_body(error, request_id, details))}\n\n"
+
+
+def upstream_failure(exc: httpx.HTTPError, request_id: str) -> Tuple[int, str, Optional[dict]]:
+    """Log an upstream failure; returns the (status_code, error, details) to answer with."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        logger.warning("Upstream returned %s", exc.response.status_code, extra={"request_id": request_id})
+        return 502, "Upstream provider error", {"status_code": exc.response.status_code}
+    if isinstance(exc, httpx.TimeoutException):
+        logger.warning("Upstream timeout", extra={"request_id": request_id})
+        return 504, "Upstream provider timed out", None
+    logger.warning("Upstream unreachable: %s", exc, extra={"request_id": request_id})
+    return 502, "Upstream provider unreachable", None
+
+
+def upstream_error(exc: httpx.HTTPError, request_id: str) -> JSONResponse:
+    status_code, message, details = upstream_failure(exc, request_id)
+    return error_response(status_code, message, request_id, details)
+
+
+def malformed_upstream(exc: ValueError, request_id: str) -> Tuple[str, dict]:
+    """Log a provider answer that could not be parsed; returns the (error, details) to answer with."""
+    logger.warning("Upstream returned a malformed body: %s", exc, extra={"request_id": request_id})
+    return "Upstream returned a malformed response", {"error": str(exc)}
+
+
+class SpendReservation:
+    """Estimated spend held against the caller's budget until real usage is known."""
+
+    def __init__(self, limiter: RateLimiter, key: str, model: str, tokens_in: int, tokens_out: int):
+        self.limiter = limiter
+        self.key = key
+        self.model = model
+        self.tokens_in = tokens_in
+        self.tokens_out = tokens_out
+        self.settled = False
+
+    def settle(self, tokens_in: int, tokens_out: int) -> None:
+        """Replace the estimate with actual usage; only the first call counts."""
+        if self.settled:
+            return
+        self.settled = True
+        self.limiter.record_spend(self.key, self.model, self.tokens_in, self.tokens_out, tokens_in, tokens_out)
+
+
+def reserve_spend(
+    http_request: Request, model: str, tokens_in: int, tokens_out: int, request_id: str
+) -> Tuple[Optional[SpendReservation], Optional[JSONResponse]]:
+    """Check the caller's token/USD budget for an estimated call; returns (reservation, 429 response)."""
+    limiter: Optional[RateLimiter] = getattr(http_request.app.state, "rate_limiter", None)
+    key = getattr(http_request.state, "rate_limit_key", None)
+    if limiter is None or key is None:
+        return None, None
+    decision = limiter.check_spend(key, model, tokens_in, tokens_out)
+    if not decision.allowed:
+        response = error_response(429, "Rate limit exceeded", request_id, {
+            "limit": decision.limit,
+            "retry_after_s": round(decision.retry_after_s, 3),
+        })
+        response.headers["Retry-After"] = str(max(1, round(decision.retry_after_s)))
+        return None, response
+    return SpendReservation(limiter, key, model, tokens_in, tokens_out), None
@@ -1,82 +1,397 @@
-"""Chat routes — pseudo-code and tips. Implement the logic yourself."""
-
-# -----------------------------------------------------------------------------
-# IMPORTS (tips: which lib/module to use — uncomment as you implement)
-# -----------------------------------------------------------------------------
-from fastapi import APIRouter
-# from fastapi import HTTPException  # HTTP errors + status
-# from fastapi.responses import StreamingResponse  # SSE for /stream
-# from pydantic import BaseModel, Field  # request/response schemas (or use ..models.schemas)
-# import httpx  # async HTTP client to call OpenAI API
-# import time  # measure latency
-# import json  # parse OpenAI stream chunks, build SSE payloads
-# from ..config import OPENAI_API_KEY, OPENAI_BASE_URL
-try:
-    from python_common.observability import get_request_id
-except ModuleNotFoundError:
-    import uuid
-    def get_request_id() -> str:
-        return str(uuid.uuid4())
-# from python_common.cost_tracking import estimate_cost  # token → USD
-# from python_common.security import sanitize_input, detect_injection  # safety
+"""Chat routes: POST /v1/chat and POST /v1/chat/stream."""
+
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import httpx
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from ..config import INJECTION_RULES_PATH, RATE_LIMIT_DEFAULT_COMPLETION_TOKENS, STRICT_JSON_STREAM_RETRIES
+from ..cache import CachedResponse, ResponseCache, cache_key, get_cache, is_cacheable
+from ..models.schemas import ChatRequest, ChatResponse, UsageMetrics
+from ..singleflight import SingleFlight, SubscriberLagged, get_flights
+from ..sse import (
+    MalformedFrame,
+    RelayResult,
+    StreamMetrics,
+    bounded,
+    chunk_frame,
+    content_from_frames,
+    get_stream_metrics,
+    relay_frames,
+)
+from ..upstream import UpstreamClient, get_upstream
+from ._common import (
+    SpendReservation,
+    error_frame,
+    error_response,
+    get_request_id,
+    malformed_upstream,
+    reserve_spend,
+    upstream_error,
+    upstream_failure,
+)
+from python_common.cost_tracking import estimate_cost
+from python_common.security import (
+    CompiledSchema,
+    InjectionScanner,
+    StreamingJsonValidator,
+    compile_schema,
+    load_rules,
+    sanitize_input,
+)
+
+logger = logging.getLogger("llm-gateway")
 
 router = APIRouter()
 
+injection_scanner = InjectionScanner()
+if INJECTION_RULES_PATH:
+    injection_scanner = injection_scanner.extended(load_rules(INJECTION_RULES_PATH))
+
+
+def _prepare(request: ChatRequest, request_id: str, upstream: UpstreamClient) -> Optional[JSONResponse]:
+    """Sanitize messages in place; return an error response if the request must be rejected."""
+    for message in request.messages:
+        message.content = sanitize_input(message.content)
+    user_messages = [message.content for message in request.messages if message.role == "user"]
+    for match in injection_scanner.scan_batch(user_messages):
+        if match is not None:
+            logger.warning("Rejected prompt injection (rule %s)", match.rule, extra={"request_id": request_id})
+            return error_response(400, "Potential prompt injection detected", request_id, {"rule": match.rule})
+    if not upstream.api_key:
+        return error_response(500, "OPENAI_API_KEY is not configured", request_id)
+    return None
+
+
+def _build_payload(request: ChatRequest, stream: bool = False) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {
+        "model": request.model,
+        "messages": [m.model_dump() for m in request.messages],
+        "temperature": request.temperature,
+    }
+    if request.max_tokens is not None:
+        payload["max_tokens"] = request.max_tokens
+    if request.strict_json:
+        if request.json_schema:
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "response", "schema": request.json_schema},
+            }
+        else:
+            payload["response_format"] = {"type": "json_object"}
+    if stream:
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+    return payload
+
+
+def _cached_usage(cache: ResponseCache, value: CachedResponse, tier: str) -> UsageMetrics:
+    return UsageMetrics(
+        tokens_in=value.tokens_in,
+        tokens_out=value.tokens_out,
+        estimated_cost_usd=0.0,
+        cache_hit=True,
+        cache_tier=tier,
+        cost_saved_usd=cache.cost_of(value),
+    )
+
+
+async def _cache_lookup(
+    request: ChatRequest, cache: Optional[ResponseCache]
+) -> Tuple[Optional[str], Optional[Tuple[CachedResponse, str]]]:
+    """Return (cache key, hit); the key is None when the request is not cacheable."""
+    if cache is None or not is_cacheable(request):
+        return None, None
+    key = cache_key(request)
+    return key, await cache.get(request, key)
+
+
+def _estimate_tokens(request: ChatRequest) -> Tuple[int, int]:
+    """Expected (tokens_in, tokens_out) of one upstream call for `request`."""
+    # ~4 characters per token plus per-message framing; output is capped by max_tokens.
+    tokens_in = sum(len(m.content) for m in request.messages) // 4 + 4 * len(request.messages)
+    return tokens_in, request.max_tokens or RATE_LIMIT_DEFAULT_COMPLETION_TOKENS
+
 
-# -----------------------------------------------------------------------------
-# POST /  →  full path: POST /v1/chat  (Week 1: Core Answer API)
-# -----------------------------------------------------------------------------
-# Request body: message, user_id, session_id, strict_json, json_schema
-# Response body: answer, citations, usage, request_id, errors (optional)
-# Status: 200 OK, 400/422 validation, 500 server error
-# -----------------------------------------------------------------------------
+def _reserve_spend(
+    http_request: Request, request: ChatRequest, request_id: str
+) -> Tuple[Optional[SpendReservation], Optional[JSONResponse]]:
+    """Check the caller's token/USD budget; returns (reservation, 429 response)."""
+    tokens_in, tokens_out = _estimate_tokens(request)
+    return reserve_spend(http_request, request.model, tokens_in, tokens_out, request_id)
 
-@router.post("/")  # response_model=YourResponseSchema
-async def chat(request):  # TODO: type with Pydantic model (message, user_id, session_id, strict_json, json_schema)
-    """Chat completion: one user message → one LLM answer. Citations empty in Week 1."""
 
-    request_id = get_request_id()  # pyright: ignore[reportUnusedVariable]
-    # 2. Validate/sanitize input so invalid or malicious input doesn’t reach the LLM.
-    #    Tip: python_common.security.sanitize_input, detect_injection
-    #    On failure: return 400 with typed error body (Pydantic model), not raw exception.
+def _parse_completion(data: Dict[str, Any]) -> Tuple[str, str, int, int]:
+    """Pull (content, finish_reason, tokens_in, tokens_out) out of a completion body.
 
-    # 3. Check config (e.g. OPENAI_API_KEY). If missing → 500, typed error body.
-    #    Tip: ..config
+    Raises ValueError when the body is not a chat completion.
+    """
+    try:
+        choice = data["choices"][0]
+        usage = data.get("usage") or {}
+        return (
+            choice["message"].get("content") or "",
+            choice.get("finish_reason") or "stop",
+            usage.get("prompt_tokens", 0),
+            usage.get("completion_tokens", 0),
+        )
+    except (KeyError, IndexError, TypeError, AttributeError) as exc:
+        raise ValueError(f"not a chat completion ({type(exc).__name__}: {exc})") from None
 
-    # 4. Build OpenAI-style payload: messages (e.g. [{"role":"user","content": message}]),
-    #    model, temperature; if strict_json → response_format json_object / schema.
-    #    Tip: httpx for async POST to OPENAI_BASE_URL/chat/completions
 
-    # 5. Call OpenAI, measure latency (time before/after).
-    #    Tip: time.time(); httpx.AsyncClient(timeout=...).post(...)
-    #    On HTTP or network error → 500, typed error body; no unhandled exceptions in logs.
+def _usage(model: str, tokens_in: int, tokens_out: int, coalesced: bool = False) -> UsageMetrics:
+    """Usage for an upstream-backed answer; coalesced callers did not pay for the call."""
+    cost = estimate_cost(model, tokens_in, tokens_out)
+    if coalesced:
+        return UsageMetrics(
+            tokens_in=tokens_in,
+            tokens_out=tokens_out,
+            estimated_cost_usd=0.0,
+            coalesced=True,
+            cost_saved_usd=cost,
+        )
+    return UsageMetrics(tokens_in=tokens_in, tokens_out=tokens_out, estimated_cost_usd=cost)
 
-    # 6. Map OpenAI response to your response schema: answer (content), citations ([] for Week 1),
-    #    usage (tokens_in, tokens_out, estimated_cost_usd), request_id.
-    #    Tip: python_common.cost_tracking.estimate_cost(model, prompt_tokens, completion_tokens)
 
-    # 7. Return 200 with response model (answer, citations, usage, request_id, errors if any).
-    pass
+async def _relay_upstream(
+    upstream: UpstreamClient,
+    payload: Dict[str, Any],
+    metrics: StreamMetrics,
+    started_at: float,
+    keep_frames: bool,
+    validator: Optional[StreamingJsonValidator] = None,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """Yield ("frames", bytes) per upstream read, then ("done", RelayResult)."""
+    result = RelayResult()
+    metrics.streams.inc()
+    # Leaving the block early (invalid JSON) closes the upstream connection.
+    async with upstream.stream("/chat/completions", payload) as response:
+        async for frames in relay_frames(response.aiter_bytes(), result, metrics, started_at, keep_frames, validator):
+            yield "frames", frames
+    yield "done", result
 
 
-# -----------------------------------------------------------------------------
-# POST /stream  →  full path: POST /v1/chat/stream  (Week 2: streaming)
-# -----------------------------------------------------------------------------
-# Same request as above. Response: SSE stream (event: chunk / event: done).
-# -----------------------------------------------------------------------------
+@router.post("/", response_model=ChatResponse)
+async def chat(
+    request: ChatRequest,
+    http_request: Request,
+    upstream: UpstreamClient = Depends(get_upstream),
+    cache: Optional[ResponseCache] = Depends(get_cache),
+    flights: SingleFlight = Depends(get_flights),
+):
+    """Chat completion: messages in, one LLM answer out."""
+    request_id = get_request_id()
+    rejected = _prepare(request, request_id, upstream)
+    if rejected is not None:
+        return rejected
+
+    start = time.perf_counter()
+    key, hit = await _cache_lookup(request, cache)
+    if hit is not None:
+        value, tier = hit
+        return ChatResponse(
+            id=request_id,
+            request_id=request_id,
+            content=value.content,
+            model=value.model,
+            usage=_cached_usage(cache, value, tier),
+            latency_ms=(time.perf_counter() - start) * 1000,
+            finish_reason=value.finish_reason,
+        )
+
+    spend, limited = _reserve_spend(http_request, request, request_id)
+    if limited is not None:
+        return limited
+
+    payload = _build_payload(request)
+
+    async def call() -> Dict[str, Any]:
+        data = await upstream.post_json("/chat/completions", payload)
+        if key is not None:
+            content, finish_reason, tokens_in, tokens_out = _parse_completion(data)
+            cache.put(request, key, CachedResponse(content, request.model, finish_reason, tokens_in, tokens_out))
+        return data
+
+    try:
+        if key is not None:
+            # Identical deterministic requests already in flight share one upstream call.
+            data, shared = await flights.do(key, call)
+        else:
+            data, shared = await call(), False
+        content, finish_reason, tokens_in, tokens_out = _parse_completion(data)
+    except httpx.HTTPError as exc:
+        if spend is not None:
+            spend.settle(0, 0)
+        return upstream_error(exc, request_id)
+    except ValueError as exc:
+        # Undecodable JSON or not a completion; like any provider failure, not charged.
+        if spend is not None:
+            spend.settle(0, 0)
+        message, details = malformed_upstream(exc, request_id)
+        return error_response(502, message, request_id, details)
+    latency_ms = (time.perf_counter() - start) * 1000
+
+    if spend is not None:
+        # Coalesced callers did not cause an upstream call, so they are refunded.
+        spend.settle(*((0, 0) if shared else (tokens_in, tokens_out)))
+    return ChatResponse(
+        id=data.get("id", request_id),
+        request_id=request_id,
+        content=content,
+        model=data.get("model", request.model),
+        usage=_usage(request.model, tokens_in, tokens_out, coalesced=shared),
+        latency_ms=latency_ms,
+        finish_reason=finish_reason,
+    )
+
 
 @router.post("/stream")
-async def chat_stream(request):  # TODO: same request model as chat
-    """Streaming chat: same input, response is Server-Sent Events."""
+async def chat_stream(
+    request: ChatRequest,
+    http_request: Request,
+    upstream: UpstreamClient = Depends(get_upstream),
+    cache: Optional[ResponseCache] = Depends(get_cache),
+    flights: SingleFlight = Depends(get_flights),
+    metrics: StreamMetrics = Depends(get_stream_metrics),
+):
+    """Streaming chat: same input, response is Server-Sent Events.
+
+    Each ``event: chunk`` frame carries the upstream OpenAI chunk verbatim; the
+    final ``event: done`` frame carries request_id, usage and latency.
+
+    With ``strict_json`` the answer is validated (against ``json_schema`` if
+    given) while it streams. The upstream call is cut off as soon as the JSON
+    goes wrong and retried up to STRICT_JSON_STREAM_RETRIES times; each retry
+    is announced with an ``event: retry`` frame, after which the client
+    should discard the content received so far. When no attempt is valid the
+    stream ends with ``event: error``.
+    """
+    request_id = get_request_id()
+    rejected = _prepare(request, request_id, upstream)
+    if rejected is not None:
+        return rejected
+    schema: Optional[CompiledSchema] = None
+    if request.strict_json and request.json_schema:
+        try:
+            schema = compile_schema(request.json_schema)
+        except ValueError as exc:
+            return error_response(400, "Invalid json_schema", request_id, {"error": str(exc)})
+
+    start = time.perf_counter()
+    key, hit = await _cache_lookup(request, cache)
+    if hit is not None:
+        value, tier = hit
+
+        async def replay():
+            yield chunk_frame(value.content, value.finish_reason)
+            done = {
+                "request_id": request_id,
+                "model": value.model,
+                "usage": _cached_usage(cache, value, tier).model_dump(),
+                "latency_ms": (time.perf_counter() - start) * 1000,
+            }
+            yield f"event: done\ndata: {json.dumps(done)}\n\n"
+
+        return StreamingResponse(replay(), media_type="text/event-stream")
+
+    spend, limited = _reserve_spend(http_request, request, request_id)
+    if limited is not None:
+        return limited
+
+    payload = _build_payload(request, stream=True)
+    # Usage of attempts abandoned for invalid JSON: they were paid for upstream too.
+    retried = [0, 0]
+
+    async def produce() -> AsyncIterator[Tuple[str, Any]]:
+        attempts = 1 + (STRICT_JSON_STREAM_RETRIES if request.strict_json else 0)
+        for attempt in range(1, attempts + 1):
+            validator = StreamingJsonValidator(schema) if request.strict_json else None
+            # Raw payloads are only kept (and decoded once, at the end) when the
+            # answer is going into the cache.
+            async for kind, value in _relay_upstream(upstream, payload, metrics, start, key is not None, validator):
+                if kind == "frames":
+                    yield kind, value
+                else:
+                    result = value
+            if result.invalid is None or attempt == attempts:
+                break
+            logger.warning("Upstream JSON invalid, retrying: %s", result.invalid, extra={"request_id": request_id})
+            # The attempt was cut off before its usage frame, so the estimate stands in.
+            estimate_in, estimate_out = _estimate_tokens(request)
+            retried[0] += result.usage.get("prompt_tokens", estimate_in)
+            retried[1] += result.usage.get("completion_tokens", estimate_out)
+            yield "retry", {"attempt": attempt + 1, "error": result.invalid}
+        if key is not None and result.invalid is None:
+            content, finish_reason = content_from_frames(result.frames)
+            cache.put(request, key, CachedResponse(
+                content,
+                request.model,
+                finish_reason,
+                result.usage.get("prompt_tokens", 0),
+                result.usage.get("completion_tokens", 0),
+            ))
+        yield "done", result
 
-    # 1. Request_id, sanitize, config check — same as non-stream.
+    if key is not None:
+        # Subscribers to an in-flight identical stream get the same frames; the
+        # upstream read runs in its own task and outlives dropped clients.
+        source, shared = flights.stream(f"stream:{key}", produce)
+    else:
+        source, shared = produce(), False
 
-    # 2. Build OpenAI payload with stream=True.
+    def charge(tokens_in: int, tokens_out: int) -> None:
+        # Coalesced subscribers did not cause the upstream calls, so they are refunded.
+        if spend is not None:
+            spend.settle(*((0, 0) if shared else (tokens_in + retried[0], tokens_out + retried[1])))
 
-    # 3. Use httpx client.stream("POST", ...) and iterate response.aiter_lines().
-    #    Parse "data: {...}" lines; on "[DONE]" send event: done and break.
-    #    Tip: json.loads(line[6:]) for "data: ". Yield "event: chunk\ndata: ...\n\n".
+    async def events():
+        try:
+            async for kind, value in bounded(source, metrics=metrics):
+                if kind == "frames":
+                    yield value
+                    continue
+                if kind == "retry":
+                    yield f"event: retry\ndata: {json.dumps(value)}\n\n"
+                    continue
+                if value.invalid is not None:
+                    # A stream cut off early never got its usage frame; the estimate stands in.
+                    estimate_in, estimate_out = _estimate_tokens(request)
+                    charge(
+                        value.usage.get("prompt_tokens", estimate_in),
+                        value.usage.get("completion_tokens", estimate_out),
+                    )
+                    yield error_frame("Upstream returned invalid JSON", request_id, {"error": value.invalid})
+                    continue
+                charge(value.usage.get("prompt_tokens", 0), value.usage.get("completion_tokens", 0))
+                tokens_in = value.usage.get("prompt_tokens", 0) + retried[0]
+                tokens_out = value.usage.get("completion_tokens", 0) + retried[1]
+                done = {
+                    "request_id": request_id,
+                    "model": request.model,
+                    "usage": _usage(request.model, tokens_in, tokens_out, coalesced=shared).model_dump(),
+                    "latency_ms": (time.perf_counter() - start) * 1000,
+                }
+                yield f"event: done\ndata: {json.dumps(done)}\n\n"
+        except httpx.HTTPError as exc:
+            charge(0, 0)
+            _, message, details = upstream_failure(exc, request_id)
+            yield error_frame(message, request_id, details)
+        except MalformedFrame as exc:
+            charge(0, 0)
+            message, details = malformed_upstream(exc, request_id)
+            yield error_frame(message, request_id, details)
+        except SubscriberLagged as exc:
+            logger.warning("Dropped from shared stream: %s", exc, extra={"request_id": request_id})
+            yield error_frame("Client fell behind the shared stream", request_id)
+        finally:
+            if spend is not None and not spend.settled:
+                # Client went away before the end. A coalesced subscriber never
+                # cost anything; the leader's upstream call was cut short, so
+                # its estimate stands in for the usage frame it never got.
+                charge(spend.tokens_in, spend.tokens_out)
 
-    # 4. Return StreamingResponse(generator(), media_type="text/event-stream").
-    #    Tip: fastapi.responses.StreamingResponse
-    pass
+    return StreamingResponse(events(), media_type="text/event-stream")
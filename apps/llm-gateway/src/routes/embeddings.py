@@ -0,0 +1,63 @@
+"""Embedding route: POST /v1/embeddings."""
+
+import time
+
+import httpx
+from fastapi import APIRouter, Depends, Request
+
+from ..embeddings import EmbeddingBatcher, get_embedder
+from ..models.schemas import EmbeddingData, EmbeddingRequest, EmbeddingResponse, UsageMetrics
+from ._common import error_response, get_request_id, malformed_upstream, reserve_spend, upstream_error
+from python_common.cost_tracking import estimate_cost
+
+router = APIRouter()
+
+
+@router.post("", response_model=EmbeddingResponse)
+async def embeddings(
+    request: EmbeddingRequest,
+    http_request: Request,
+    embedder: EmbeddingBatcher = Depends(get_embedder),
+):
+    """Embed one or more inputs; concurrent callers share batched upstream calls."""
+    request_id = get_request_id()
+    texts = [request.input] if isinstance(request.input, str) else request.input
+    if not texts:
+        return error_response(400, "input must not be empty", request_id)
+    if not embedder.upstream.api_key:
+        return error_response(500, "OPENAI_API_KEY is not configured", request_id)
+
+    estimate = sum(len(text) for text in texts) // 4 + len(texts)
+    spend, limited = reserve_spend(http_request, request.model, estimate, 0, request_id)
+    if limited is not None:
+        return limited
+
+    start = time.perf_counter()
+    try:
+        results = await embedder.embed(request.model, texts)
+    except httpx.HTTPError as exc:
+        return upstream_error(exc, request_id)
+    except ValueError as exc:
+        # The body was not one embedding per input
+        message, details = malformed_upstream(exc, request_id)
+        return error_response(502, message, request_id, details)
+    else:
+        tokens_in = sum(tokens for _, tokens in results)
+        if spend is not None:
+            spend.settle(tokens_in, 0)
+    finally:
+        # Any failure, including ones not answered above, is not charged.
+        if spend is not None and not spend.settled:
+            spend.settle(0, 0)
+
+    return EmbeddingResponse(
+        request_id=request_id,
+        model=request.model,
+        data=[EmbeddingData(index=i, embedding=vector) for i, (vector, _) in enumerate(results)],
+        usage=UsageMetrics(
+            tokens_in=tokens_in,
+            tokens_out=0,
+            estimated_cost_usd=estimate_cost(request.model, tokens_in, 0),
+        ),
+        latency_ms=(time.perf_counter() - start) * 1000,
+    )
@@ -0,0 +1,222 @@
+"""In-flight request coalescing (single-flight).
+
+Concurrent identical deterministic requests share one upstream call. The
+shared work runs in its own task, so a caller that disconnects (and is
+cancelled) never cancels the call the other callers are waiting on.
+Shared streams are buffered up to a bound: the upstream read waits for the
+slowest subscriber, and a subscriber that stalls is dropped.
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from fastapi import Request
+
+T = TypeVar("T")
+
+
+def _consume_result(task: asyncio.Task) -> None:
+    # Mark the exception as retrieved when every waiter has gone away.
+    if not task.cancelled():
+        task.exception()
+
+
+class SubscriberLagged(Exception):
+    """Raised to a subscriber dropped for falling too far behind a broadcast."""
+
+
+class Broadcast:
+    """Bounded item log fanned out to any number of subscribers.
+
+    Every subscriber starts at the first item. Items are kept until the
+    slowest subscriber has read them, up to `max_buffer`; past that
+    `publish` waits for it to catch up, which slows the producer to the
+    slowest reader's pace. A subscriber that leaves the buffer full for
+    `lag_timeout_s` is dropped (`SubscriberLagged`) so it cannot stall the
+    rest. Once an item has been trimmed the stream can no longer be joined.
+    """
+
+    def __init__(self, max_buffer: int = 256, lag_timeout_s: float = 5.0) -> None:
+        self.max_buffer = max_buffer
+        self.lag_timeout_s = lag_timeout_s
+        self.items: Deque[Any] = deque()
+        self.base = 0  # position of items[0] in the stream
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.dropped = 0
+        self._cursors: Dict[int, int] = {}  # subscriber -> position of its next item
+        self._next_subscriber = 0
+        self._changed = asyncio.Event()
+        self._consumed = asyncio.Event()
+
+    @property
+    def joinable(self) -> bool:
+        return self.base == 0 and not self.done
+
+    @staticmethod
+    def _signal(event: asyncio.Event) -> asyncio.Event:
+        event.set()
+        return asyncio.Event()
+
+    def _notify(self) -> None:
+        self._changed = self._signal(self._changed)
+
+    def _advanced(self) -> None:
+        self._consumed = self._signal(self._consumed)
+
+    def _trim(self) -> None:
+        end = self.base + len(self.items)
+        slowest = min(self._cursors.values(), default=end)
+        while self.base < slowest:
+            self.items.popleft()
+            self.base += 1
+
+    def _drop_slowest(self) -> None:
+        slowest = min(self._cursors.values())
+        for subscriber in [s for s, cursor in self._cursors.items() if cursor == slowest]:
+            del self._cursors[subscriber]
+            self.dropped += 1
+        self._notify()
+
+    async def publish(self, item: Any) -> None:
+        """Append an item, first waiting (bounded) for room in the buffer"""
+        loop = asyncio.get_running_loop()
+        deadline = None
+        while True:
+            self._trim()
+            if len(self.items) < self.max_buffer:
+                break
+            if deadline is None:
+                deadline = loop.time() + self.lag_timeout_s
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                self._drop_slowest()
+                deadline = None
+                continue
+            try:
+                await asyncio.wait_for(self._consumed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+        self.items.append(item)
+        self._notify()
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        self.done = True
+        self.error = error
+        self._notify()
+
+    def subscribe(self) -> AsyncIterator[Any]:
+        """Register a subscriber at the first item; it holds back trimming from now on"""
+        subscriber = self._next_subscriber
+        self._next_subscriber += 1
+        self._cursors[subscriber] = self.base
+        return self._read(subscriber)
+
+    async def _read(self, subscriber: int) -> AsyncIterator[Any]:
+        try:
+            while True:
+                changed = self._changed
+                cursor = self._cursors.get(subscriber)
+                if cursor is None:
+                    raise SubscriberLagged(f"Fell more than {self.max_buffer} items behind")
+                if cursor < self.base + len(self.items):
+                    item = self.items[cursor - self.base]
+                    self._cursors[subscriber] = cursor + 1
+                    self._advanced()
+                    yield item
+                    continue
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await changed.wait()
+        finally:
+            if self._cursors.pop(subscriber, None) is not None:
+                self._advanced()
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls and streams by key."""
+
+    def __init__(self, stream_buffer: int = 256, stream_lag_timeout_s: float = 5.0) -> None:
+        self.stream_buffer = stream_buffer
+        self.stream_lag_timeout_s = stream_lag_timeout_s
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._streams: Dict[str, Broadcast] = {}
+        self._tasks: set = set()
+        self.leaders = 0
+        self.coalesced = 0
+        self.lagged = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Run ``fn`` once per key among concurrent callers.
+
+        Returns ``(result, shared)``; ``shared`` is True for callers that
+        joined an existing call instead of starting one.
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+
+            def _done(t: asyncio.Task) -> None:
+                if self._calls.get(key) is t:
+                    del self._calls[key]
+                _consume_result(t)
+
+            task.add_done_callback(_done)
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task), shared
+
+    def stream(self, key: str, producer: Callable[[], AsyncIterator[T]]) -> Tuple[AsyncIterator[T], bool]:
+        """Subscribe to the stream for ``key``, starting ``producer`` if nobody has.
+
+        The producer is drained by a background task, so it runs to completion
+        even if every subscriber disconnects. A stream that has already
+        trimmed its first items cannot be replayed in full, so a caller
+        arriving then starts a new one.
+        """
+        broadcast = self._streams.get(key)
+        shared = broadcast is not None and broadcast.joinable
+        if not shared:
+            self.leaders += 1
+            broadcast = self._streams[key] = Broadcast(self.stream_buffer, self.stream_lag_timeout_s)
+            task = asyncio.create_task(self._pump(key, broadcast, producer))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            self.coalesced += 1
+        return broadcast.subscribe(), shared
+
+    async def _pump(self, key: str, broadcast: Broadcast, producer: Callable[[], AsyncIterator[Any]]) -> None:
+        try:
+            async for item in producer():
+                await broadcast.publish(item)
+        except BaseException as exc:
+            broadcast.close(exc)
+            if not isinstance(exc, Exception):
+                raise
+        else:
+            broadcast.close()
+        finally:
+            self.lagged += broadcast.dropped
+            if self._streams.get(key) is broadcast:
+                del self._streams[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight_calls": len(self._calls),
+            "in_flight_streams": len(self._streams),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "lagged_subscribers": self.lagged,
+        }
+
+
+async def get_flights(request: Request) -> SingleFlight:
+    """FastAPI dependency returning the app-wide single-flight group."""
+    return request.app.state.flights
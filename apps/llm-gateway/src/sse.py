@@ -0,0 +1,290 @@
+"""Low-overhead SSE relay for /v1/chat/stream.
+
+Upstream ``data:`` frames are forwarded as raw bytes, re-labelled as
+``event: chunk`` frames; nothing is decoded except the usage frame and the
+``[DONE]`` sentinel. At most a bounded number of upstream reads is buffered
+per connection: when the client reads slowly the relay stops pulling from the
+upstream socket and TCP flow control pushes back on the provider.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from python_common.metrics import REGISTRY, Histogram, MetricsRegistry
+from python_common.security import StreamingJsonValidator
+
+from . import config
+
+FRAME_SEP = b"\n\n"
+DATA_PREFIX = b"data: "
+DONE_PAYLOAD = b"[DONE]"
+CHUNK_EVENT = b"event: chunk\n"
+# OpenAI sends "usage": null on every chunk when include_usage is set; only the
+# final usage frame carries an object.
+_USAGE_OBJECT = b'"usage":{'
+_USAGE_OBJECT_SPACED = b'"usage": {'
+
+DEFAULT_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def _latency_snapshot(histogram: Histogram) -> Dict[str, Any]:
+    """Histogram (seconds) as the millisecond summary /health/stream has always returned."""
+    counts, total_s = histogram.labels().counts()
+    count = int(sum(counts))
+
+    def ms(q: float) -> Optional[float]:
+        value = histogram.quantile(q)
+        return round(value * 1000, 6) if value is not None and value != float("inf") else value
+
+    return {
+        "count": count,
+        "avg_ms": total_s * 1000 / count if count else None,
+        "p50_ms": ms(0.50),
+        "p95_ms": ms(0.95),
+        "p99_ms": ms(0.99),
+        "buckets_ms": {
+            **{str(b): int(n) for b, n in zip(DEFAULT_BUCKETS_MS, counts)},
+            "+Inf": int(counts[-1]),
+        },
+    }
+
+
+class StreamMetrics:
+    """Time-to-first-token and inter-token latency across all relayed streams.
+
+    Backed by the process metrics registry, so the same numbers are scraped
+    from /metrics; `snapshot` keeps the /health/stream JSON shape.
+    """
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY) -> None:
+        buckets = [b / 1000 for b in DEFAULT_BUCKETS_MS]
+        self.ttft = registry.histogram(
+            "gateway_stream_ttft_seconds", "Time to first relayed chunk", buckets=buckets
+        )
+        self.inter_token = registry.histogram(
+            "gateway_stream_inter_token_seconds", "Gap between relayed upstream reads", buckets=buckets
+        )
+        self.streams = registry.counter("gateway_streams_total", "Upstream streams opened")
+        self.frames = registry.counter("gateway_stream_frames_total", "SSE chunk frames relayed")
+        self.backpressure_waits = registry.counter(
+            "gateway_stream_backpressure_waits_total", "Upstream reads that found the relay buffer full"
+        )
+        self.invalid_json = registry.counter("gateway_stream_invalid_json_total", "strict_json streams cut off as invalid")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "streams": int(self.streams.get()),
+            "frames": int(self.frames.get()),
+            "backpressure_waits": int(self.backpressure_waits.get()),
+            "invalid_json": int(self.invalid_json.get()),
+            "ttft": _latency_snapshot(self.ttft),
+            "inter_token": _latency_snapshot(self.inter_token),
+        }
+
+
+class MalformedFrame(ValueError):
+    """An upstream ``data:`` payload that is not a chat.completion.chunk object."""
+
+
+def _decode(payload: bytes) -> Dict[str, Any]:
+    try:
+        chunk = json.loads(payload)
+    except ValueError:
+        raise MalformedFrame(f"undecodable frame {payload[:80]!r}") from None
+    if not isinstance(chunk, dict):
+        raise MalformedFrame(f"frame is not an object: {payload[:80]!r}")
+    return chunk
+
+
+def _choices(payload: bytes) -> List[Dict[str, Any]]:
+    choices = _decode(payload).get("choices") or []
+    if not isinstance(choices, list) or not all(isinstance(choice, dict) for choice in choices):
+        raise MalformedFrame(f"malformed choices in {payload[:80]!r}")
+    return choices
+
+
+class RelayResult:
+    """What the relay learned about the stream while forwarding it."""
+
+    def __init__(self) -> None:
+        self.usage: Dict[str, Any] = {}
+        self.frames: List[bytes] = []
+        self.done = False
+        self.invalid: Optional[str] = None  # validator error; the relay stopped reading
+
+
+def split_frames(buffer: bytes) -> Tuple[List[bytes], bytes]:
+    """Split complete ``\\n\\n``-terminated frames off the front of ``buffer``.
+
+    CRLF line endings are normalized to LF first, so ``\\r\\n\\r\\n``-framed
+    upstreams split the same way. A CR at the end of the buffer stays in the
+    remainder and pairs up with the LF that arrives next.
+    """
+    if b"\r" in buffer:
+        buffer = buffer.replace(b"\r\n", b"\n")
+    frames = []
+    start = 0
+    while True:
+        end = buffer.find(FRAME_SEP, start)
+        if end < 0:
+            break
+        frames.append(buffer[start:end + 2])
+        start = end + 2
+    return frames, buffer[start:]
+
+
+async def relay_frames(
+    source: AsyncIterator[bytes],
+    result: RelayResult,
+    metrics: Optional[StreamMetrics] = None,
+    started_at: Optional[float] = None,
+    keep_frames: bool = False,
+    validator: Optional[StreamingJsonValidator] = None,
+) -> AsyncIterator[bytes]:
+    """Re-label upstream SSE bytes as ``event: chunk`` frames.
+
+    Yields one bytes object per upstream read (possibly several frames). Only
+    the usage frame is JSON-decoded; ``[DONE]`` ends the relay. With
+    ``keep_frames`` the raw data payloads are retained on ``result`` so the
+    caller can reconstruct the full answer once the stream is over.
+
+    With a ``validator`` every chunk's delta content is decoded and fed to it;
+    the relay stops at the first frame that makes the answer invalid (that
+    frame is not forwarded) and sets ``result.invalid``.
+
+    Raises `MalformedFrame` when a payload it decodes is not a chunk object.
+    """
+    pending = b""
+    last = started_at if started_at is not None else time.perf_counter()
+    first = True
+    async for data in source:
+        frames, pending = split_frames(pending + data if pending else data)
+        if not frames:
+            continue
+        out = []
+        for frame in frames:
+            if not frame.startswith(DATA_PREFIX):
+                continue
+            payload = frame[len(DATA_PREFIX):-2]
+            if payload == DONE_PAYLOAD:
+                result.done = True
+                break
+            if validator is not None and not _validate_chunk(validator, payload):
+                result.invalid = validator.error
+                break
+            if _USAGE_OBJECT in payload or _USAGE_OBJECT_SPACED in payload:
+                result.usage = _decode(payload).get("usage") or result.usage
+            if keep_frames:
+                result.frames.append(payload)
+            out.append(CHUNK_EVENT)
+            out.append(frame)
+        if out:
+            now = time.perf_counter()
+            if metrics is not None:
+                metrics.frames.inc(len(out) // 2)
+                (metrics.ttft if first else metrics.inter_token).observe(now - last)
+            first = False
+            last = now
+            yield b"".join(out)
+        if result.invalid is not None:
+            if metrics is not None:
+                metrics.invalid_json.inc()
+            return
+        if result.done:
+            break
+    if validator is not None and not validator.close():
+        result.invalid = validator.error
+        if metrics is not None:
+            metrics.invalid_json.inc()
+
+
+def _validate_chunk(validator: StreamingJsonValidator, payload: bytes) -> bool:
+    for choice in _choices(payload):
+        delta = (choice.get("delta") or {}).get("content")
+        if delta and not validator.feed(delta):
+            return False
+    return True
+
+
+def bounded(
+    source: AsyncIterator[Any],
+    maxsize: int = config.SSE_RELAY_BUFFER,
+    metrics: Optional[StreamMetrics] = None,
+) -> AsyncIterator[Any]:
+    """Bound how far the upstream reader may run ahead of the client.
+
+    With ``maxsize <= 0`` the source is returned as-is: it is only pulled when
+    the client has taken the previous item, so at most one upstream read is
+    buffered and a slow client stalls the upstream socket directly. With
+    ``maxsize > 0`` a reader task prefetches up to ``maxsize`` items to absorb
+    upstream jitter, blocking (and so stalling upstream) once the queue is full.
+    """
+    if maxsize <= 0:
+        return source
+    return _prefetch(source, maxsize, metrics)
+
+
+async def _prefetch(
+    source: AsyncIterator[Any],
+    maxsize: int,
+    metrics: Optional[StreamMetrics],
+) -> AsyncIterator[Any]:
+    queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+    end = object()
+
+    async def reader() -> None:
+        try:
+            async for item in source:
+                if queue.full() and metrics is not None:
+                    metrics.backpressure_waits.inc()
+                await queue.put(item)
+        except Exception as exc:
+            await queue.put(exc)
+        else:
+            await queue.put(end)
+
+    # Closing this generator (client disconnect) cancels the reader.
+    task = asyncio.create_task(reader())
+    try:
+        while True:
+            item = await queue.get()
+            if item is end:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        task.cancel()
+
+
+def content_from_frames(frames: List[bytes]) -> Tuple[str, str]:
+    """Join delta content from raw chunk payloads; returns (content, finish_reason).
+
+    Raises `MalformedFrame` when a payload is not a chunk object.
+    """
+    parts = []
+    finish_reason = "stop"
+    for payload in frames:
+        for choice in _choices(payload):
+            finish_reason = choice.get("finish_reason") or finish_reason
+            delta = (choice.get("delta") or {}).get("content")
+            if delta:
+                parts.append(delta)
+    return "".join(parts), finish_reason
+
+
+def chunk_frame(content: str, finish_reason: str) -> bytes:
+    """One OpenAI-style chunk frame carrying ``content`` (used to replay cache hits)."""
+    chunk = {
+        "object": "chat.completion.chunk",
+        "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": finish_reason}],
+    }
+    return CHUNK_EVENT + DATA_PREFIX + json.dumps(chunk).encode("utf-8") + FRAME_SEP
+
+
+async def get_stream_metrics(request: Request) -> StreamMetrics:
+    """FastAPI dependency returning the app-wide stream metrics."""
+    return request.app.state.stream_metrics
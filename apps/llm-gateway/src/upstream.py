@@ -0,0 +1,165 @@
+"""Shared upstream (OpenAI-compatible) HTTP client.
+
+One pooled ``httpx.AsyncClient`` is created at app startup and reused by every
+request, so calls ride on warm keep-alive (and, when enabled, HTTP/2
+multiplexed) connections instead of paying a TCP+TLS handshake each time.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from fastapi import Request
+from python_common.observability import instrument_httpx
+
+from . import config
+
+
+class HostGate:
+    """Per-host in-flight limit with saturation counters."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._sem = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.waiting = 0
+        self.requests_total = 0
+        self.saturated_total = 0
+        self.wait_ms_total = 0.0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self._sem.locked():
+            # Every slot is taken: this request has to queue behind the pool.
+            self.saturated_total += 1
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            await self._sem.acquire()
+        finally:
+            self.waiting -= 1
+        self.wait_ms_total += (time.perf_counter() - start) * 1000
+        self.requests_total += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._sem.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "waiting": self.waiting,
+            "utilization": self.in_flight / self.limit if self.limit else 0.0,
+            "requests_total": self.requests_total,
+            "saturated_total": self.saturated_total,
+            "avg_wait_ms": self.wait_ms_total / self.requests_total if self.requests_total else 0.0,
+        }
+
+
+class UpstreamClient:
+    """Pooled async client for the upstream LLM provider."""
+
+    def __init__(
+        self,
+        base_url: str = config.OPENAI_BASE_URL,
+        api_key: Optional[str] = config.OPENAI_API_KEY,
+        *,
+        http2: bool = config.UPSTREAM_HTTP2,
+        max_connections: int = config.UPSTREAM_MAX_CONNECTIONS,
+        max_keepalive: int = config.UPSTREAM_MAX_KEEPALIVE,
+        keepalive_expiry_s: float = config.UPSTREAM_KEEPALIVE_EXPIRY_S,
+        max_in_flight_per_host: int = config.UPSTREAM_MAX_IN_FLIGHT_PER_HOST,
+        connect_timeout_s: float = config.UPSTREAM_CONNECT_TIMEOUT_S,
+        read_timeout_s: float = config.UPSTREAM_READ_TIMEOUT_S,
+        write_timeout_s: float = config.UPSTREAM_WRITE_TIMEOUT_S,
+        pool_timeout_s: float = config.UPSTREAM_POOL_TIMEOUT_S,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Args:
+            base_url: Provider base URL, e.g. ``https://api.openai.com/v1``.
+            api_key: Bearer token sent on every call (omitted when empty).
+            transport: Optional transport override, e.g. ``httpx.ASGITransport``
+                wrapping ``src.mock_openai.app`` to run against a local mock.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.max_in_flight_per_host = max_in_flight_per_host
+        self._gates: Dict[str, HostGate] = {}
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        # Calls are timed as spans, but trace IDs are not sent to the provider.
+        self._client = instrument_httpx(httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            http2=http2 if transport is None else False,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry_s,
+            ),
+            timeout=httpx.Timeout(
+                connect=connect_timeout_s,
+                read=read_timeout_s,
+                write=write_timeout_s,
+                pool=pool_timeout_s,
+            ),
+            transport=transport,
+        ), propagate=False)
+        self.http2 = http2 and transport is None
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+
+    def _gate(self, url: str) -> HostGate:
+        host = urlsplit(url).netloc or urlsplit(self.base_url).netloc
+        gate = self._gates.get(host)
+        if gate is None:
+            gate = self._gates[host] = HostGate(self.max_in_flight_per_host)
+        return gate
+
+    async def post_json(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST ``payload`` to ``path`` and return the decoded JSON body.
+
+        Raises ``httpx.HTTPStatusError`` on non-2xx and ``httpx.HTTPError`` on
+        network failures; callers map those onto API errors.
+        """
+        async with self._gate(path).slot():
+            response = await self._client.post(path, json=payload)
+            response.raise_for_status()
+            return response.json()
+
+    @asynccontextmanager
+    async def stream(self, path: str, payload: Dict[str, Any]) -> AsyncIterator[httpx.Response]:
+        """Open a streaming POST; the per-host slot is held until the body is closed."""
+        async with self._gate(path).slot():
+            async with self._client.stream("POST", path, json=payload) as response:
+                if response.is_error:
+                    await response.aread()
+                    response.raise_for_status()
+                yield response
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool configuration plus per-host saturation counters."""
+        return {
+            "base_url": self.base_url,
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive,
+            "hosts": {host: gate.stats() for host, gate in self._gates.items()},
+        }
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+async def get_upstream(request: Request) -> UpstreamClient:
+    """FastAPI dependency returning the app-wide upstream client."""
+    return request.app.state.upstream
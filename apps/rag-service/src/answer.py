@@ -0,0 +1,227 @@
+"""RAG answer pipeline: concurrent retrieval -> fusion -> context under a token budget -> streamed generation.
+
+Every (query, collection) pair is retrieved concurrently under one stage
+deadline; pairs that miss it are cancelled and the answer is built from the
+rest. Generation always reads the gateway's SSE stream, so the first token
+is observed (and, for the streaming endpoint, relayed) as soon as it arrives.
+"""
+
+import asyncio
+import time
+from contextlib import AsyncExitStack
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from .gateway import GatewayClient, chunk_content
+from .ingestion import count_tokens
+from vector_store.bm25 import reciprocal_rank_fusion
+from vector_store.interface import AsyncVectorStore
+from vector_store.metadata_index import Where
+from python_common.observability import start_span
+
+Hits = List[Dict[str, Any]]
+
+SYSTEM_PROMPT = (
+    "Answer the user's question using only the numbered context passages below. "
+    "Cite the passages you use as [n]. If the context does not contain the answer, say that you don't know."
+)
+# Tokens charged per passage for its "[n] " label and separator
+_PASSAGE_OVERHEAD = 4
+
+
+class DeadlineExceeded(Exception):
+    """A pipeline stage ran past its deadline"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"{stage} deadline exceeded")
+        self.stage = stage
+
+
+class RetrievalFailed(Exception):
+    """Every search failed (store outage, broken connection); the first failure is on `error`"""
+
+    def __init__(self, error: BaseException):
+        super().__init__(f"retrieval failed: {error}")
+        self.error = error
+        self.error_type = type(error).__name__
+
+
+@dataclass
+class StageTimer:
+    """Milliseconds per stage; first_token_ms and total_ms are measured from the request start"""
+    retrieve_ms: float = 0.0
+    rerank_ms: float = 0.0
+    first_token_ms: Optional[float] = None
+    total_ms: float = 0.0
+    started: float = field(default_factory=time.perf_counter, repr=False)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def snapshot(self) -> Dict[str, Any]:
+        timings = asdict(self)
+        timings.pop("started")
+        return timings
+
+
+@dataclass
+class RetrievalCounts:
+    searches: int = 0
+    timed_out: int = 0
+    failed: int = 0
+    hits: int = 0
+    passages: int = 0
+    context_tokens: int = 0
+
+
+@dataclass
+class AnswerContext:
+    """Everything generation needs, plus what the response reports about retrieval"""
+    messages: List[Dict[str, str]]
+    citations: List[Dict[str, Any]]
+    retrieval: RetrievalCounts
+
+
+async def retrieve(
+    store: AsyncVectorStore,
+    queries: Sequence[str],
+    collections: Sequence[str],
+    top_k: int,
+    mode: str,
+    where: Optional[Where],
+    timeout_s: float,
+    stats: RetrievalCounts,
+) -> List[Hits]:
+    """One ranking per (query, collection) that finished within `timeout_s`.
+
+    Invalid filters / modes (ValueError) are raised; other failures and
+    timeouts only drop that search, unless every search fails
+    (RetrievalFailed, or DeadlineExceeded when some timed out).
+    """
+    searches = [(query, collection) for query in queries for collection in collections]
+    tasks = [asyncio.ensure_future(store.query(query, top_k, collection, mode, where)) for query, collection in searches]
+    stats.searches = len(tasks)
+    done, pending = await asyncio.wait(tasks, timeout=timeout_s)
+    for task in pending:
+        task.cancel()
+    stats.timed_out = len(pending)
+    rankings: List[Hits] = []
+    errors: List[BaseException] = []
+    for (_, collection), task in zip(searches, tasks):
+        if task not in done:
+            continue
+        error = task.exception()
+        if error is not None:
+            if isinstance(error, ValueError):
+                raise error
+            errors.append(error)
+            continue
+        rankings.append([{**hit, "collection": collection} for hit in task.result()])
+    stats.failed = len(errors)
+    if errors and not rankings and not pending:
+        raise RetrievalFailed(errors[0]) from errors[0]
+    if not rankings and pending:
+        raise DeadlineExceeded("retrieve")
+    return rankings
+
+
+def assemble_context(
+    hits: Hits, budget_tokens: int, tokenizer: Optional[str] = None
+) -> Tuple[str, List[Dict[str, Any]], int]:
+    """Best-first passages that fit in `budget_tokens`: (context text, citations, tokens used)"""
+    passages: List[str] = []
+    citations: List[Dict[str, Any]] = []
+    used = 0
+    for hit in hits:
+        text = hit.get("text")
+        if not text:
+            continue
+        cost = count_tokens(text, tokenizer) + _PASSAGE_OVERHEAD
+        if used + cost > budget_tokens:
+            # A shorter passage further down may still fit.
+            continue
+        used += cost
+        index = len(citations) + 1
+        passages.append(f"[{index}] {text}")
+        metadata = hit.get("metadata") or {}
+        citations.append({
+            "index": index,
+            "chunk_id": hit["chunk_id"],
+            "collection": hit.get("collection"),
+            "source": metadata.get("source"),
+            "score": hit.get("score"),
+        })
+    return "\n\n".join(passages), citations, used
+
+
+async def prepare(
+    store: AsyncVectorStore,
+    question: str,
+    queries: Sequence[str],
+    collections: Sequence[str],
+    top_k: int,
+    mode: str,
+    where: Optional[Where],
+    context_tokens: int,
+    retrieve_timeout_s: float,
+    timings: StageTimer,
+    tokenizer: Optional[str] = None,
+) -> AnswerContext:
+    """Retrieve, fuse (reciprocal rank fusion across queries and collections) and assemble the prompt"""
+    stats = RetrievalCounts()
+    with start_span("rag.retrieve", collections=len(collections), mode=mode) as span:
+        rankings = await retrieve(
+            store, list(dict.fromkeys([question, *queries])), collections, top_k, mode, where, retrieve_timeout_s, stats
+        )
+    timings.retrieve_ms = span.duration_ms
+
+    with start_span("rag.rerank") as span:
+        hits = rankings[0] if len(rankings) == 1 else reciprocal_rank_fusion(rankings, sum(map(len, rankings)))
+        context, citations, used = assemble_context(hits, context_tokens, tokenizer)
+    timings.rerank_ms = span.duration_ms
+
+    stats.hits = len(hits)
+    stats.passages = len(citations)
+    stats.context_tokens = used
+    messages = [
+        {"role": "system", "content": f"{SYSTEM_PROMPT}\n\nContext:\n{context}" if context else SYSTEM_PROMPT},
+        {"role": "user", "content": question},
+    ]
+    return AnswerContext(messages=messages, citations=citations, retrieval=stats)
+
+
+async def generate(
+    gateway: GatewayClient,
+    payload: Dict[str, Any],
+    timings: StageTimer,
+    first_token_timeout_s: float,
+    timeout_s: float,
+) -> AsyncIterator[Tuple[str, bytes]]:
+    """(event, raw frame) pairs from the gateway stream, under a first-token and an overall deadline.
+
+    The overall deadline counts from the request start, so time spent in
+    retrieval is charged against it.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_s - timings.elapsed_ms() / 1000
+    first_token_deadline = min(loop.time() + first_token_timeout_s, deadline)
+
+    async def within(awaitable: Any) -> Any:
+        limit = deadline if timings.first_token_ms is not None else first_token_deadline
+        try:
+            return await asyncio.wait_for(awaitable, max(0.0, limit - loop.time()))
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("generate" if timings.first_token_ms is not None else "first_token") from None
+
+    async with AsyncExitStack() as stack:
+        frames = await within(stack.enter_async_context(gateway.stream_chat(payload)))
+        iterator = frames.__aiter__()
+        while True:
+            try:
+                event, frame = await within(iterator.__anext__())
+            except StopAsyncIteration:
+                return
+            # Only frames up to the first token are decoded.
+            if timings.first_token_ms is None and event == "chunk" and chunk_content(frame):
+                timings.first_token_ms = timings.elapsed_ms()
+            yield event, frame
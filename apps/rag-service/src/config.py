@@ -4,7 +4,31 @@ import os
 
 PORT: int = int(os.getenv("PORT", "8002"))
 LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+LOG_QUEUED: bool = os.getenv("LOG_QUEUED", "true").lower() == "true"  # log lines written by a background thread
+LOG_SAMPLE_RATES: str = os.getenv("LOG_SAMPLE_RATES", "")  # "/endpoint=rate,...": fraction of request logs kept
+LOG_DEBUG_PER_SECOND: float = float(os.getenv("LOG_DEBUG_PER_SECOND", "0"))  # DEBUG records per second; 0 = uncapped
+TRACE_EXPORT_PATH: str = os.getenv("TRACE_EXPORT_PATH", "")  # spans appended as JSON lines; empty = not exported
+TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))  # fraction of new traces exported
 CHROMA_HOST: str = os.getenv("CHROMA_HOST", "localhost")
 CHROMA_PORT: int = int(os.getenv("CHROMA_PORT", "8000"))
-VECTOR_STORE_TYPE: str = os.getenv("VECTOR_STORE_TYPE", "chroma")
+VECTOR_STORE_TYPE: str = os.getenv("VECTOR_STORE_TYPE", "chroma")  # "chroma", or in-process "numpy" / "mmap" / "ivf"
+VECTOR_STORE_PATH: str = os.getenv("VECTOR_STORE_PATH", "./data/vectors")  # on-disk root for "mmap" and "ivf"
+EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "hashing")  # in-process stores: "hashing" (lexical, no model) or "minilm" (Chroma's default model)
+EMBEDDING_DIM: int = int(os.getenv("EMBEDDING_DIM", "384"))  # in-process stores' hashing embedding
+IVF_NPROBE: int = int(os.getenv("IVF_NPROBE", "8"))  # lists scanned per query; higher = better recall, slower
+VECTOR_STORE_QUANTIZATION: str = os.getenv("VECTOR_STORE_QUANTIZATION", "none")  # "mmap" new collections: "none", "int8" or "pq"
+EMBEDDING_CACHE_MB: int = int(os.getenv("EMBEDDING_CACHE_MB", "64"))  # in-process query embedding LRU; 0 disables the cache
+EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "")  # optional SQLite file kept across restarts
+INGEST_CHUNK_TOKENS: int = int(os.getenv("INGEST_CHUNK_TOKENS", "512"))  # tokens per chunk
+INGEST_CHUNK_OVERLAP: int = int(os.getenv("INGEST_CHUNK_OVERLAP", "64"))  # tokens shared by consecutive chunks
+INGEST_TOKENIZER: str = os.getenv("INGEST_TOKENIZER", "")  # tiktoken encoding (e.g. "cl100k_base"); empty = word/punctuation split
+INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))  # chunking processes; 0 = inline
+INGEST_BLOCK_BYTES: int = int(os.getenv("INGEST_BLOCK_BYTES", str(2**20)))  # read / chunking unit for large files
+LLM_GATEWAY_URL: str = os.getenv("LLM_GATEWAY_URL", "http://localhost:8001")
+GATEWAY_MAX_CONNECTIONS: int = int(os.getenv("GATEWAY_MAX_CONNECTIONS", "100"))
+GATEWAY_CONNECT_TIMEOUT_S: float = float(os.getenv("GATEWAY_CONNECT_TIMEOUT_S", "5"))
+ANSWER_CONTEXT_TOKENS: int = int(os.getenv("ANSWER_CONTEXT_TOKENS", "3000"))  # prompt budget for retrieved passages
+ANSWER_RETRIEVE_TIMEOUT_MS: float = float(os.getenv("ANSWER_RETRIEVE_TIMEOUT_MS", "2000"))  # searches still running are dropped
+ANSWER_FIRST_TOKEN_TIMEOUT_MS: float = float(os.getenv("ANSWER_FIRST_TOKEN_TIMEOUT_MS", "15000"))
+ANSWER_TIMEOUT_MS: float = float(os.getenv("ANSWER_TIMEOUT_MS", "120000"))  # whole request, retrieval included
 OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
@@ -0,0 +1,121 @@
+"""LLM gateway client for answer generation.
+
+One pooled ``httpx.AsyncClient`` lives for the app lifetime, so generation
+calls reuse warm keep-alive connections to the gateway. Streams are read
+frame by frame: ``event: chunk`` frames are passed on as raw bytes (the
+streaming answer endpoint relays them verbatim) and only the closing
+``done`` / ``error`` frames are decoded.
+"""
+
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Tuple
+
+import httpx
+from fastapi import Request
+from python_common.observability import instrument_httpx
+
+from .config import GATEWAY_CONNECT_TIMEOUT_S, GATEWAY_MAX_CONNECTIONS, LLM_GATEWAY_URL
+
+FRAME_SEP = b"\n\n"
+_EVENT_PREFIX = b"event: "
+_DATA_PREFIX = b"data: "
+
+
+class GatewayError(Exception):
+    """The gateway rejected the call or reported an error mid-stream"""
+
+    def __init__(self, status_code: int, body: Dict[str, Any]):
+        super().__init__(body.get("error") or body.get("detail") or f"gateway returned {status_code}")
+        self.status_code = status_code
+        self.body = body
+
+
+def frame_event(frame: bytes) -> str:
+    """Event name of an SSE frame ("message" when it has no event line)"""
+    if frame.startswith(_EVENT_PREFIX):
+        return frame[len(_EVENT_PREFIX):frame.index(b"\n")].decode()
+    return "message"
+
+
+def frame_data(frame: bytes) -> Any:
+    """Decoded JSON payload of a frame's data line; ValueError when there is none or it is not JSON"""
+    start = frame.index(_DATA_PREFIX) + len(_DATA_PREFIX)
+    end = frame.find(b"\n", start)
+    return json.loads(frame[start:end if end != -1 else len(frame)])
+
+
+def frame_object(frame: bytes) -> Dict[str, Any]:
+    """`frame_data` of a frame whose payload must be a JSON object (ValueError otherwise)"""
+    data = frame_data(frame)
+    if not isinstance(data, dict):
+        raise ValueError(f"frame payload is not an object: {frame[:80]!r}")
+    return data
+
+
+def chunk_content(frame: bytes) -> str:
+    """Text delta carried by an ``event: chunk`` frame (an OpenAI chat.completion.chunk)"""
+    choices = frame_object(frame).get("choices") or []
+    if not choices:
+        return ""
+    try:
+        return (choices[0].get("delta") or {}).get("content") or ""
+    except (AttributeError, KeyError, TypeError):
+        raise ValueError(f"malformed chunk frame: {frame[:80]!r}") from None
+
+
+class GatewayClient:
+    """Pooled async client for the LLM gateway's chat endpoints."""
+
+    def __init__(
+        self,
+        base_url: str = LLM_GATEWAY_URL,
+        max_connections: int = GATEWAY_MAX_CONNECTIONS,
+        connect_timeout_s: float = GATEWAY_CONNECT_TIMEOUT_S,
+    ):
+        self.base_url = base_url
+        # Read timeouts are enforced per request by the answer deadlines, not here.
+        self._client = instrument_httpx(httpx.AsyncClient(
+            base_url=base_url,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(None, connect=connect_timeout_s),
+        ))
+
+    @asynccontextmanager
+    async def stream_chat(self, payload: Dict[str, Any]) -> AsyncIterator[AsyncIterator[Tuple[str, bytes]]]:
+        """POST /v1/chat/stream and yield an iterator of (event, raw frame) pairs"""
+        async with self._client.stream("POST", "/v1/chat/stream", json=payload) as response:
+            if response.status_code >= 400:
+                body = await response.aread()
+                try:
+                    detail = json.loads(body)
+                except ValueError:
+                    detail = {"error": body.decode(errors="replace")}
+                raise GatewayError(response.status_code, detail if isinstance(detail, dict) else {"error": detail})
+
+            async def frames() -> AsyncIterator[Tuple[str, bytes]]:
+                buffer = b""
+                async for data in response.aiter_bytes():
+                    buffer += data
+                    start = 0
+                    while True:
+                        end = buffer.find(FRAME_SEP, start)
+                        if end < 0:
+                            break
+                        frame = buffer[start:end + 2]
+                        start = end + 2
+                        event = frame_event(frame)
+                        if event == "error":
+                            raise GatewayError(502, frame_object(frame))
+                        yield event, frame
+                    buffer = buffer[start:]
+
+            yield frames()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+async def get_gateway(request: Request) -> GatewayClient:
+    """FastAPI dependency returning the app-wide gateway client."""
+    return request.app.state.gateway
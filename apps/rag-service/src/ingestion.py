@@ -0,0 +1,321 @@
+"""Streaming document ingestion: read -> chunk (process pool) -> dedupe -> batch-embed and write.
+
+Run from apps/rag-service:
+
+    python -m src.ingestion ingest --path ../../examples/sample-documents --collection default
+
+Memory stays bounded whatever the corpus size: files are read in blocks of
+`block_bytes`, at most `2 * workers` blocks are being chunked at once, and
+`VectorStore.ingest_stream` keeps at most `batch_size * max_in_flight`
+chunks in flight. Only the dedupe set grows with the corpus (one 32-char
+content hash per unique chunk).
+"""
+
+import argparse
+import codecs
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .config import INGEST_BLOCK_BYTES, INGEST_CHUNK_OVERLAP, INGEST_CHUNK_TOKENS, INGEST_TOKENIZER, INGEST_WORKERS
+from vector_store.ingest import Document, IngestReport
+from vector_store.interface import VectorStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXTENSIONS = (".txt", ".md", ".markdown", ".rst")
+
+# Words and individual punctuation marks; close to BPE token counts for English prose
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = ".!?"
+_encodings: Dict[str, Any] = {}
+
+# (source, block number, text, bytes read, chunk_tokens, overlap_tokens, tokenizer)
+_Task = Tuple[str, int, str, int, int, int, Optional[str]]
+# (source, block number, [(chunk text, content hash)], bytes read)
+_Chunked = Tuple[str, int, List[Tuple[str, str]], int]
+
+
+def token_offsets(text: str, tokenizer: Optional[str] = None) -> Tuple[List[int], List[int]]:
+    """(start, end) character offsets of each token; `tokenizer` names a tiktoken encoding, else a regex split"""
+    if not tokenizer:
+        starts, ends = [], []
+        for match in _TOKEN.finditer(text):
+            starts.append(match.start())
+            ends.append(match.end())
+        return starts, ends
+    encoding = _encodings.get(tokenizer)
+    if encoding is None:
+        try:
+            import tiktoken
+        except ImportError as exc:
+            raise ImportError(f"Tokenizer {tokenizer!r} requires the 'tiktoken' package: pip install tiktoken") from exc
+        encoding = _encodings[tokenizer] = tiktoken.get_encoding(tokenizer)
+    _, starts = encoding.decode_with_offsets(encoding.encode_ordinary(text))
+    return starts, starts[1:] + [len(text)]
+
+
+def count_tokens(text: str, tokenizer: Optional[str] = None) -> int:
+    return len(token_offsets(text, tokenizer)[0])
+
+
+def chunk_text(text: str, chunk_tokens: int, overlap_tokens: int, tokenizer: Optional[str] = None) -> List[str]:
+    """Split into windows of at most `chunk_tokens` tokens, consecutive windows sharing `overlap_tokens`.
+
+    A window ends early on a sentence boundary if one falls in its last quarter.
+    """
+    if overlap_tokens >= chunk_tokens:
+        raise ValueError(f"overlap_tokens ({overlap_tokens}) must be smaller than chunk_tokens ({chunk_tokens})")
+    starts, ends = token_offsets(text, tokenizer)
+    chunks = []
+    i, n = 0, len(starts)
+    while i < n:
+        j = min(i + chunk_tokens, n)
+        if j < n:
+            for k in range(j - 1, i + chunk_tokens * 3 // 4, -1):
+                if text[ends[k] - 1] in _SENTENCE_END:
+                    j = k + 1
+                    break
+        chunks.append(text[starts[i]:ends[j - 1]])
+        if j == n:
+            break
+        i = max(j - overlap_tokens, i + 1)
+    return chunks
+
+
+def content_hash(text: str) -> str:
+    """Chunk id from whitespace-normalized content, so identical chunks dedupe across files"""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()[:32]
+
+
+def iter_files(path: str, extensions: Sequence[str] = DEFAULT_EXTENSIONS) -> Iterator[str]:
+    """`path` itself, or every matching file under it in a stable (sorted) order; hidden entries are skipped"""
+    if os.path.isfile(path):
+        yield path
+        return
+    if not os.path.isdir(path):
+        raise FileNotFoundError(path)
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if not name.startswith(".") and name.lower().endswith(tuple(extensions)):
+                yield os.path.join(root, name)
+
+
+def _cut(text: str) -> int:
+    """Where to end a block: the last paragraph break, else the last whitespace, in its second half"""
+    half = len(text) // 2
+    for separator in ("\n\n", "\n", " "):
+        position = text.rfind(separator, half)
+        if position != -1:
+            return position + len(separator)
+    return len(text)
+
+
+def read_blocks(path: str, block_bytes: int = INGEST_BLOCK_BYTES) -> Iterator[Tuple[str, int]]:
+    """(text, bytes read) blocks of about `block_bytes`, split at paragraph or word boundaries"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    carry = ""
+    with open(path, "rb") as f:
+        while True:
+            raw = f.read(block_bytes)
+            text = carry + decoder.decode(raw, final=not raw)
+            if not raw:
+                if text:
+                    yield text, 0
+                return
+            cut = _cut(text)
+            carry = text[cut:]
+            yield text[:cut], len(raw)
+
+
+def _chunk_block(task: _Task) -> _Chunked:
+    """Process-pool stage: tokenize, window and hash one block"""
+    source, block, text, size, chunk_tokens, overlap_tokens, tokenizer = task
+    chunks = chunk_text(text, chunk_tokens, overlap_tokens, tokenizer)
+    return source, block, [(chunk, content_hash(chunk)) for chunk in chunks], size
+
+
+def chunk_stream(tasks: Iterable[_Task], workers: int) -> Iterator[_Chunked]:
+    """Chunk blocks in `workers` processes (inline if 0), in input order, with at most 2 * workers in flight"""
+    if workers <= 0:
+        for task in tasks:
+            yield _chunk_block(task)
+        return
+    # Spawn, not fork: ingest_stream's writer threads are already running.
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    pending: Deque[Future] = deque()
+    try:
+        for task in tasks:
+            pending.append(pool.submit(_chunk_block, task))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+@dataclass
+class PipelineReport:
+    """Outcome (or progress so far) of `ingest_path`"""
+    collection: str
+    files: int = 0
+    bytes: int = 0
+    chunks: int = 0
+    duplicates: int = 0
+    ingested: int = 0
+    elapsed_s: float = 0.0
+    mb_per_s: float = 0.0
+    chunks_per_s: float = 0.0
+
+    def update(self, ingest: IngestReport, elapsed_s: float) -> "PipelineReport":
+        self.ingested = ingest.ingested
+        self.elapsed_s = elapsed_s
+        self.mb_per_s = self.bytes / 2**20 / elapsed_s if elapsed_s else 0.0
+        self.chunks_per_s = self.ingested / elapsed_s if elapsed_s else 0.0
+        return self
+
+
+def ingest_path(
+    store: VectorStore,
+    path: str,
+    collection_name: str = "default",
+    chunk_tokens: int = INGEST_CHUNK_TOKENS,
+    overlap_tokens: int = INGEST_CHUNK_OVERLAP,
+    tokenizer: Optional[str] = INGEST_TOKENIZER or None,
+    workers: Optional[int] = INGEST_WORKERS,
+    block_bytes: int = INGEST_BLOCK_BYTES,
+    extensions: Sequence[str] = DEFAULT_EXTENSIONS,
+    batch_size: Optional[int] = None,
+    max_in_flight: int = 4,
+    checkpoint_path: Optional[str] = None,
+    progress_interval_s: float = 5.0,
+) -> PipelineReport:
+    """Stream every file under `path` into `collection_name`; chunks are upserted by content hash.
+
+    `workers` chunking processes (default: one per CPU; 0 chunks inline).
+    With `checkpoint_path`, a rerun skips the chunks already written.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    report = PipelineReport(collection=collection_name)
+    root = path if os.path.isdir(path) else os.path.dirname(path)
+    seen: Set[str] = set()
+    started = time.perf_counter()
+
+    def tasks() -> Iterator[_Task]:
+        for file_path in iter_files(path, extensions):
+            report.files += 1
+            source = os.path.relpath(file_path, root)
+            for block, (text, size) in enumerate(read_blocks(file_path, block_bytes)):
+                yield source, block, text, size, chunk_tokens, overlap_tokens, tokenizer
+
+    def documents() -> Iterator[Document]:
+        for source, block, chunks, size in chunk_stream(tasks(), workers):
+            report.bytes += size
+            for position, (text, chunk_id) in enumerate(chunks):
+                report.chunks += 1
+                if chunk_id in seen:
+                    report.duplicates += 1
+                    continue
+                seen.add(chunk_id)
+                yield text, {"chunk_id": chunk_id, "source": source, "block": block, "position": position}
+
+    def on_progress(ingest: IngestReport) -> None:
+        report.update(ingest, time.perf_counter() - started)
+        logger.info(
+            "Ingested %d chunks from %d files into %s (%.2f MB/s, %.0f chunks/s, %d duplicates skipped)",
+            report.ingested, report.files, collection_name, report.mb_per_s, report.chunks_per_s, report.duplicates,
+            extra={"ingest": asdict(report)},
+        )
+
+    ingest = store.ingest_stream(
+        documents(),
+        collection_name,
+        batch_size=batch_size,
+        max_in_flight=max_in_flight,
+        checkpoint_path=checkpoint_path,
+        on_progress=on_progress,
+        progress_interval_s=progress_interval_s,
+    )
+    return report.update(ingest, time.perf_counter() - started)
+
+
+def chunk_documents(
+    documents: Iterable[Document],
+    chunk_tokens: int = INGEST_CHUNK_TOKENS,
+    overlap_tokens: int = INGEST_CHUNK_OVERLAP,
+    tokenizer: Optional[str] = INGEST_TOKENIZER or None,
+) -> Tuple[List[Document], int]:
+    """In-process chunking for small inputs (the HTTP route): (unique chunks, duplicates dropped)"""
+    chunks: List[Document] = []
+    seen: Set[str] = set()
+    duplicates = 0
+    for index, (text, metadata) in enumerate(documents):
+        for position, chunk in enumerate(chunk_text(text, chunk_tokens, overlap_tokens, tokenizer)):
+            chunk_id = content_hash(chunk)
+            if chunk_id in seen:
+                duplicates += 1
+                continue
+            seen.add(chunk_id)
+            chunks.append((chunk, {**metadata, "chunk_id": chunk_id, "document": index, "position": position}))
+    return chunks, duplicates
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    from python_common.logging import setup_logging
+    from .config import LOG_LEVEL
+    from .store import build_sync_vector_store
+
+    parser = argparse.ArgumentParser(prog="python -m src.ingestion", description="RAG document ingestion")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="Chunk, dedupe, embed and write a file or directory")
+    ingest.add_argument("--path", required=True)
+    ingest.add_argument("--collection", default="default")
+    ingest.add_argument("--chunk-tokens", type=int, default=INGEST_CHUNK_TOKENS)
+    ingest.add_argument("--overlap-tokens", type=int, default=INGEST_CHUNK_OVERLAP)
+    ingest.add_argument("--tokenizer", default=INGEST_TOKENIZER or None, help="tiktoken encoding, e.g. cl100k_base")
+    ingest.add_argument("--workers", type=int, default=INGEST_WORKERS, help="chunking processes (0 = inline)")
+    ingest.add_argument("--batch-size", type=int, default=None)
+    ingest.add_argument("--max-in-flight", type=int, default=4)
+    ingest.add_argument("--extensions", nargs="+", default=list(DEFAULT_EXTENSIONS))
+    ingest.add_argument("--checkpoint", default=None, help="resume file; a rerun skips chunks already written")
+    args = parser.parse_args(argv)
+
+    setup_logging("rag-ingestion", LOG_LEVEL)
+    store = build_sync_vector_store()
+    try:
+        report = ingest_path(
+            store,
+            args.path,
+            args.collection,
+            chunk_tokens=args.chunk_tokens,
+            overlap_tokens=args.overlap_tokens,
+            tokenizer=args.tokenizer,
+            workers=args.workers,
+            extensions=args.extensions,
+            batch_size=args.batch_size,
+            max_in_flight=args.max_in_flight,
+            checkpoint_path=args.checkpoint,
+        )
+    finally:
+        close = getattr(store, "close", None)
+        if close is not None:
+            close()
+    print(
+        f"{report.files} files, {report.bytes / 2**20:.2f} MB -> {report.ingested} chunks "
+        f"({report.duplicates} duplicates skipped) into {report.collection!r} in {report.elapsed_s:.2f} s: "
+        f"{report.mb_per_s:.2f} MB/s, {report.chunks_per_s:.0f} chunks/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,52 @@
 """RAG Service main application"""
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from .config import PORT, LOG_LEVEL
-from python_common.logging import setup_logging
+from fastapi.responses import PlainTextResponse
+from .config import PORT, LOG_LEVEL, LOG_QUEUED, LOG_SAMPLE_RATES, LOG_DEBUG_PER_SECOND, TRACE_EXPORT_PATH, TRACE_SAMPLE_RATE
+from .gateway import GatewayClient
+from .routes.answer import router as answer_router
+from .routes.ingest import router as ingest_router
+from .store import build_embedding_cache, build_vector_store
+from python_common.logging import parse_sample_rates, setup_logging
+from python_common.metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from python_common.observability import TracingMiddleware, setup_tracing
+
+setup_logging(
+    "rag-service",
+    LOG_LEVEL,
+    queued=LOG_QUEUED,
+    sample_rates=parse_sample_rates(LOG_SAMPLE_RATES),
+    debug_per_second=LOG_DEBUG_PER_SECOND,
+)
+setup_tracing("rag-service", TRACE_EXPORT_PATH, TRACE_SAMPLE_RATE)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own one async vector store client (and its collection handles) and one gateway client for the app lifetime."""
+    app.state.embedding_cache = build_embedding_cache()
+    app.state.vector_store = build_vector_store(app.state.embedding_cache)
+    app.state.gateway = GatewayClient()
+    try:
+        yield
+    finally:
+        await app.state.gateway.aclose()
+        await app.state.vector_store.aclose()
+        if app.state.embedding_cache is not None:
+            app.state.embedding_cache.close()
 
-setup_logging("rag-service", LOG_LEVEL)
 
 app = FastAPI(
     title="PrismFlow RAG Service",
     description="Retrieval-Augmented Generation service",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -21,12 +55,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Include routers
+app.include_router(ingest_router, prefix="/v1/rag", tags=["rag"])
+app.include_router(answer_router, prefix="/v1/rag", tags=["rag"])
+
 
 @app.get("/health")
 async def health():
     return {"status": "healthy", "service": "rag-service"}
 
 
+@app.get("/health/embedding-cache")
+async def health_embedding_cache(request: Request):
+    """Query embedding cache hit rate, size and evictions"""
+    cache = request.app.state.embedding_cache
+    return cache.stats() if cache is not None else {"enabled": False}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of the process metrics registry"""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=PORT)
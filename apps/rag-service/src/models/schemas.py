@@ -0,0 +1,75 @@
+"""Pydantic schemas"""
+
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+
+class IngestDocument(BaseModel):
+    text: str = Field(..., min_length=1)
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+
+class IngestRequest(BaseModel):
+    documents: List[IngestDocument] = Field(..., min_length=1)
+    collection: str = Field(default="default")
+    chunk_tokens: Optional[int] = Field(default=None, gt=0)
+    overlap_tokens: Optional[int] = Field(default=None, ge=0)
+
+
+class IngestResponse(BaseModel):
+    collection: str
+    documents: int
+    chunks: int
+    duplicates: int
+    chunk_ids: List[str]
+    latency_ms: float
+
+
+class AnswerRequest(BaseModel):
+    question: str = Field(..., min_length=1)
+    queries: List[str] = Field(default_factory=list)  # extra phrasings retrieved alongside the question
+    collections: List[str] = Field(default_factory=lambda: ["default"], min_length=1)
+    top_k: int = Field(default=5, ge=1, le=100)  # hits per (query, collection) search
+    mode: str = Field(default="vector", pattern="^(vector|keyword|hybrid)$")
+    where: Optional[Dict[str, Any]] = None
+    context_tokens: Optional[int] = Field(default=None, gt=0)
+    model: str = Field(default="gpt-4o-mini")
+    temperature: float = Field(default=0.2, ge=0, le=2)
+    max_tokens: Optional[int] = None
+    retrieve_timeout_ms: Optional[float] = Field(default=None, gt=0)
+    first_token_timeout_ms: Optional[float] = Field(default=None, gt=0)
+    timeout_ms: Optional[float] = Field(default=None, gt=0)
+
+
+class Citation(BaseModel):
+    index: int
+    chunk_id: str
+    collection: Optional[str] = None
+    source: Optional[str] = None
+    score: Optional[float] = None
+
+
+class RetrievalStats(BaseModel):
+    searches: int
+    timed_out: int
+    failed: int
+    hits: int
+    passages: int
+    context_tokens: int
+
+
+class StageTimings(BaseModel):
+    retrieve_ms: float
+    rerank_ms: float
+    first_token_ms: Optional[float] = None
+    total_ms: float
+
+
+class AnswerResponse(BaseModel):
+    request_id: str
+    answer: str
+    model: str
+    citations: List[Citation]
+    retrieval: RetrievalStats
+    usage: Dict[str, Any] = Field(default_factory=dict)  # the gateway's usage block
+    timings: StageTimings
@@ -0,0 +1,192 @@
+"""Answer routes: POST /v1/rag/answer and POST /v1/rag/answer/stream."""
+
+import json
+import logging
+from dataclasses import asdict
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from ..answer import AnswerContext, DeadlineExceeded, RetrievalFailed, StageTimer, generate, prepare
+from ..config import (
+    ANSWER_CONTEXT_TOKENS,
+    ANSWER_FIRST_TOKEN_TIMEOUT_MS,
+    ANSWER_RETRIEVE_TIMEOUT_MS,
+    ANSWER_TIMEOUT_MS,
+    INGEST_TOKENIZER,
+)
+from ..gateway import GatewayClient, GatewayError, chunk_content, frame_object, get_gateway
+from ..models.schemas import AnswerRequest, AnswerResponse
+from ..store import get_vector_store
+from python_common.models import ErrorResponse
+from python_common.observability import get_request_id
+from vector_store.interface import AsyncVectorStore
+
+logger = logging.getLogger("rag-service")
+
+router = APIRouter()
+
+
+def _error(status_code: int, error: str, request_id: str, details: Optional[dict] = None) -> JSONResponse:
+    body = ErrorResponse(error=error, request_id=request_id, details=details)
+    return JSONResponse(status_code=status_code, content=body.model_dump())
+
+
+# Failures while generating: deadline, gateway error, transport error or a malformed gateway frame
+_GENERATE_ERRORS = (DeadlineExceeded, GatewayError, httpx.HTTPError, ValueError, KeyError)
+
+
+def _failure(exc: Exception, request_id: str) -> Tuple[int, str, Optional[dict]]:
+    """(status, message, details) for a generation failure (one of _GENERATE_ERRORS)"""
+    if isinstance(exc, DeadlineExceeded):
+        return 504, str(exc), {"stage": exc.stage}
+    if isinstance(exc, GatewayError):
+        # Client errors (bad model, injection check, rate limit) keep their status.
+        return (exc.status_code if 400 <= exc.status_code < 500 else 502), "LLM gateway error", exc.body
+    if isinstance(exc, (ValueError, KeyError)):
+        logger.warning("Malformed gateway frame: %s", exc, extra={"request_id": request_id})
+        return 502, "Malformed LLM gateway response", {"type": type(exc).__name__}
+    logger.warning("Gateway request failed: %s", exc, extra={"request_id": request_id})
+    return 502, "LLM gateway unavailable", {"type": type(exc).__name__}
+
+
+def _retrieval_failed(exc: RetrievalFailed, request_id: str) -> JSONResponse:
+    logger.warning("Retrieval failed: %s", exc.error, extra={"request_id": request_id})
+    return _error(503, "Vector store unavailable", request_id, {"type": exc.error_type})
+
+
+async def _prepare(request: AnswerRequest, store: AsyncVectorStore, timings: StageTimer) -> AnswerContext:
+    return await prepare(
+        store,
+        request.question,
+        request.queries,
+        request.collections,
+        request.top_k,
+        request.mode,
+        request.where,
+        request.context_tokens or ANSWER_CONTEXT_TOKENS,
+        (request.retrieve_timeout_ms or ANSWER_RETRIEVE_TIMEOUT_MS) / 1000,
+        timings,
+        INGEST_TOKENIZER or None,
+    )
+
+
+def _payload(request: AnswerRequest, context: AnswerContext) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {
+        "messages": context.messages,
+        "model": request.model,
+        "temperature": request.temperature,
+    }
+    if request.max_tokens is not None:
+        payload["max_tokens"] = request.max_tokens
+    return payload
+
+
+def _generate(request: AnswerRequest, gateway: GatewayClient, context: AnswerContext, timings: StageTimer):
+    return generate(
+        gateway,
+        _payload(request, context),
+        timings,
+        (request.first_token_timeout_ms or ANSWER_FIRST_TOKEN_TIMEOUT_MS) / 1000,
+        (request.timeout_ms or ANSWER_TIMEOUT_MS) / 1000,
+    )
+
+
+@router.post("/answer", response_model=AnswerResponse)
+async def answer(
+    request: AnswerRequest,
+    store: AsyncVectorStore = Depends(get_vector_store),
+    gateway: GatewayClient = Depends(get_gateway),
+):
+    """Retrieve across queries and collections concurrently, then generate a cited answer."""
+    request_id = get_request_id()
+    timings = StageTimer()
+    try:
+        context = await _prepare(request, store, timings)
+    except ValueError as exc:
+        return _error(400, str(exc), request_id)
+    except DeadlineExceeded as exc:
+        return _error(504, str(exc), request_id, {"stage": exc.stage})
+    except RetrievalFailed as exc:
+        return _retrieval_failed(exc, request_id)
+
+    parts = []
+    usage: Dict[str, Any] = {}
+    model = request.model
+    try:
+        async for event, frame in _generate(request, gateway, context, timings):
+            if event == "chunk":
+                parts.append(chunk_content(frame))
+            elif event == "done":
+                done = frame_object(frame)
+                usage = done.get("usage") or {}
+                model = done.get("model") or model
+    except _GENERATE_ERRORS as exc:
+        status, error, details = _failure(exc, request_id)
+        return _error(status, error, request_id, details)
+
+    timings.total_ms = timings.elapsed_ms()
+    return AnswerResponse(
+        request_id=request_id,
+        answer="".join(parts),
+        model=model,
+        citations=context.citations,
+        retrieval=asdict(context.retrieval),
+        usage=usage,
+        timings=timings.snapshot(),
+    )
+
+
+@router.post("/answer/stream")
+async def answer_stream(
+    request: AnswerRequest,
+    store: AsyncVectorStore = Depends(get_vector_store),
+    gateway: GatewayClient = Depends(get_gateway),
+):
+    """Streaming answer as Server-Sent Events.
+
+    ``event: context`` (citations, retrieval timings) is sent before generation
+    starts; each ``event: chunk`` frame is the gateway's frame relayed verbatim
+    from the first token on; ``event: done`` carries usage and stage timings.
+    """
+    request_id = get_request_id()
+    timings = StageTimer()
+    try:
+        context = await _prepare(request, store, timings)
+    except ValueError as exc:
+        return _error(400, str(exc), request_id)
+    except DeadlineExceeded as exc:
+        return _error(504, str(exc), request_id, {"stage": exc.stage})
+    except RetrievalFailed as exc:
+        return _retrieval_failed(exc, request_id)
+
+    async def events():
+        head = {
+            "request_id": request_id,
+            "citations": context.citations,
+            "retrieval": asdict(context.retrieval),
+            "timings": timings.snapshot(),
+        }
+        yield f"event: context\ndata: {json.dumps(head)}\n\n".encode()
+        usage: Dict[str, Any] = {}
+        model = request.model
+        try:
+            async for event, frame in _generate(request, gateway, context, timings):
+                if event == "chunk":
+                    yield frame
+                elif event == "done":
+                    done = frame_object(frame)
+                    usage = done.get("usage") or {}
+                    model = done.get("model") or model
+        except _GENERATE_ERRORS as exc:
+            status, error, details = _failure(exc, request_id)
+            body = ErrorResponse(error=error, request_id=request_id, details={"status": status, **(details or {})})
+            yield f"event: error\ndata: {json.dumps(body.model_dump())}\n\n".encode()
+            return
+        timings.total_ms = timings.elapsed_ms()
+        done = {"request_id": request_id, "model": model, "usage": usage, "timings": timings.snapshot()}
+        yield f"event: done\ndata: {json.dumps(done)}\n\n".encode()
+
+    return StreamingResponse(events(), media_type="text/event-stream")
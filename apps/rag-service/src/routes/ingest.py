@@ -0,0 +1,39 @@
+"""Ingest route: POST /v1/rag/ingest."""
+
+import asyncio
+import time
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from ..config import INGEST_CHUNK_OVERLAP, INGEST_CHUNK_TOKENS
+from ..ingestion import chunk_documents
+from ..models.schemas import IngestRequest, IngestResponse
+from ..store import get_vector_store
+from vector_store.interface import AsyncVectorStore
+
+router = APIRouter()
+
+
+@router.post("/ingest", response_model=IngestResponse)
+async def ingest(request: IngestRequest, store: AsyncVectorStore = Depends(get_vector_store)):
+    """Chunk, dedupe (by content hash) and write documents; large corpora go through `python -m src.ingestion`."""
+    start = time.perf_counter()
+    chunk_tokens = request.chunk_tokens or INGEST_CHUNK_TOKENS
+    overlap_tokens = request.overlap_tokens if request.overlap_tokens is not None else INGEST_CHUNK_OVERLAP
+    if overlap_tokens >= chunk_tokens:
+        raise HTTPException(status_code=400, detail="overlap_tokens must be smaller than chunk_tokens")
+    chunks, duplicates = await asyncio.to_thread(
+        chunk_documents,
+        [(document.text, document.metadata) for document in request.documents],
+        chunk_tokens,
+        overlap_tokens,
+    )
+    chunk_ids = await store.ingest_many(chunks, request.collection) if chunks else []
+    return IngestResponse(
+        collection=request.collection,
+        documents=len(request.documents),
+        chunks=len(chunks),
+        duplicates=duplicates,
+        chunk_ids=chunk_ids,
+        latency_ms=(time.perf_counter() - start) * 1000,
+    )
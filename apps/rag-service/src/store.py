@@ -0,0 +1,104 @@
+"""Vector store wiring for the RAG service"""
+
+import logging
+from typing import Optional, Tuple
+
+from fastapi import Request
+
+from .config import (
+    CHROMA_HOST,
+    CHROMA_PORT,
+    EMBEDDING_CACHE_MB,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_DIM,
+    EMBEDDING_MODEL,
+    IVF_NPROBE,
+    VECTOR_STORE_PATH,
+    VECTOR_STORE_QUANTIZATION,
+    VECTOR_STORE_TYPE,
+)
+from vector_store.embedding_cache import CachedEmbedding, EmbeddingCache
+from vector_store.embeddings import EmbeddingFunction, HashingEmbedding
+from vector_store.interface import AsyncVectorStore, ThreadedAsyncVectorStore, VectorStore
+
+logger = logging.getLogger(__name__)
+
+# Cache namespace of the model Chroma applies to collections created without an embedding function
+MINILM_NAMESPACE = "chroma-default:all-MiniLM-L6-v2"
+
+
+def build_embedding_cache() -> Optional[EmbeddingCache]:
+    """Query embedding cache sized by EMBEDDING_CACHE_MB (None when 0), on disk too with EMBEDDING_CACHE_PATH."""
+    if EMBEDDING_CACHE_MB <= 0:
+        return None
+    return EmbeddingCache(max_bytes=EMBEDDING_CACHE_MB * 2**20, path=EMBEDDING_CACHE_PATH or None)
+
+
+def _minilm() -> EmbeddingFunction:
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+    return DefaultEmbeddingFunction()
+
+
+def _chroma_query_embedding(cache: Optional[EmbeddingCache]) -> Optional[CachedEmbedding]:
+    if cache is None:
+        return None
+    return CachedEmbedding(_minilm(), MINILM_NAMESPACE, cache)
+
+
+def _in_process_embedding() -> Tuple[EmbeddingFunction, str]:
+    """Embedding function for the in-process stores, per EMBEDDING_MODEL, and its cache namespace."""
+    if EMBEDDING_MODEL == "minilm":
+        return _minilm(), MINILM_NAMESPACE
+    if EMBEDDING_MODEL != "hashing":
+        raise ValueError(f"Unsupported EMBEDDING_MODEL: {EMBEDDING_MODEL!r}")
+    logger.warning(
+        "VECTOR_STORE_TYPE=%s embeds with the lexical hashing embedding, not the MiniLM model the chroma "
+        "store uses; set EMBEDDING_MODEL=minilm for semantic retrieval",
+        VECTOR_STORE_TYPE,
+    )
+    return HashingEmbedding(EMBEDDING_DIM), f"hashing:{EMBEDDING_DIM}"
+
+
+def build_sync_vector_store(cache: Optional[EmbeddingCache] = None) -> VectorStore:
+    """Synchronous store selected by VECTOR_STORE_TYPE (for the ingestion CLI; in-process types also back the app)."""
+    if VECTOR_STORE_TYPE == "chroma":
+        from vector_store.chroma_client import ChromaVectorStore
+        return ChromaVectorStore(
+            host=CHROMA_HOST, port=CHROMA_PORT, query_embedding_function=_chroma_query_embedding(cache)
+        )
+    embedding, namespace = _in_process_embedding()
+    query_embedding = CachedEmbedding(embedding, namespace, cache) if cache is not None else None
+    if VECTOR_STORE_TYPE == "numpy":
+        from vector_store.numpy_store import NumpyVectorStore
+        return NumpyVectorStore(embedding, query_embedding_function=query_embedding)
+    if VECTOR_STORE_TYPE == "mmap":
+        from vector_store.mmap_store import MmapVectorStore
+        return MmapVectorStore(
+            VECTOR_STORE_PATH,
+            embedding,
+            quantization=VECTOR_STORE_QUANTIZATION,
+            query_embedding_function=query_embedding,
+        )
+    if VECTOR_STORE_TYPE == "ivf":
+        from vector_store.ivf_store import IVFVectorStore
+        # Saved under VECTOR_STORE_PATH on close / shutdown, loaded on first use.
+        return IVFVectorStore(
+            embedding, nprobe=IVF_NPROBE, root=VECTOR_STORE_PATH, query_embedding_function=query_embedding
+        )
+    raise ValueError(f"Unsupported VECTOR_STORE_TYPE: {VECTOR_STORE_TYPE!r}")
+
+
+def build_vector_store(cache: Optional[EmbeddingCache] = None) -> AsyncVectorStore:
+    """Create the app-wide store selected by VECTOR_STORE_TYPE; query text is embedded through `cache` if given."""
+    if VECTOR_STORE_TYPE == "chroma":
+        from vector_store.async_chroma_client import AsyncChromaVectorStore
+        return AsyncChromaVectorStore(
+            host=CHROMA_HOST, port=CHROMA_PORT, query_embedding_function=_chroma_query_embedding(cache)
+        )
+    # NumPy releases the GIL in matmul, so worker threads keep the event loop free.
+    return ThreadedAsyncVectorStore(build_sync_vector_store(cache))
+
+
+async def get_vector_store(request: Request) -> AsyncVectorStore:
+    """FastAPI dependency returning the app-wide vector store."""
+    return request.app.state.vector_store
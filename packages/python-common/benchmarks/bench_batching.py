@@ -0,0 +1,93 @@
+"""Benchmark: python_common.batching throughput versus batch window.
+
+Drives N concurrent single-input calls through a MicroBatcher into a local
+fake embedding provider whose cost is a fixed per-request round trip plus a
+small per-input cost, with a cap on concurrent requests (like a real
+provider's connection / rate limits). Window 0 means no batching.
+
+Run from packages/python-common:
+
+    PYTHONPATH=src python benchmarks/bench_batching.py --calls 5000
+"""
+
+import argparse
+import asyncio
+import time
+from typing import List
+
+from python_common.batching import MicroBatcher
+
+
+class FakeProvider:
+    def __init__(self, round_trip_ms: float, per_item_ms: float, max_concurrency: int):
+        self.round_trip_s = round_trip_ms / 1000
+        self.per_item_s = per_item_ms / 1000
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.requests = 0
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        async with self.slots:
+            self.requests += 1
+            await asyncio.sleep(self.round_trip_s + self.per_item_s * len(texts))
+            return [[float(len(text))] for text in texts]
+
+
+async def run(calls: int, window_ms: float, max_batch: int, args: argparse.Namespace) -> dict:
+    provider = FakeProvider(args.round_trip_ms, args.per_item_ms, args.provider_concurrency)
+    if window_ms <= 0:
+        async def submit(text: str) -> List[float]:
+            return (await provider.embed([text]))[0]
+        batcher = None
+    else:
+        batcher = MicroBatcher(
+            provider.embed,
+            max_batch_size=max_batch,
+            max_wait_ms=window_ms,
+            max_concurrent_batches=args.provider_concurrency,
+        )
+        submit = batcher.submit
+
+    latencies: List[float] = []
+
+    async def caller(i: int) -> None:
+        # Spread arrivals over time instead of one thundering herd.
+        await asyncio.sleep((i % 100) * args.arrival_spread_ms / 100 / 1000)
+        start = time.perf_counter()
+        await submit(f"text {i}")
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller(i) for i in range(calls)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    stats = batcher.stats.snapshot() if batcher else {"avg_batch_size": 1.0}
+    return {
+        "calls_per_s": calls / elapsed,
+        "upstream_requests": provider.requests,
+        "avg_batch": stats["avg_batch_size"],
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--round-trip-ms", type=float, default=20.0)
+    parser.add_argument("--per-item-ms", type=float, default=0.05)
+    parser.add_argument("--provider-concurrency", type=int, default=16)
+    parser.add_argument("--arrival-spread-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    print(f"{args.calls} single-input calls, provider: {args.round_trip_ms}ms round trip + "
+          f"{args.per_item_ms}ms/item, {args.provider_concurrency} concurrent requests")
+    print(f"{'window ms':>9} {'calls/s':>10} {'upstream req':>13} {'avg batch':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for window_ms in (0, 1, 2, 5, 10, 20):
+        r = asyncio.run(run(args.calls, window_ms, args.max_batch, args))
+        print(f"{window_ms:>9} {r['calls_per_s']:>10,.0f} {r['upstream_requests']:>13} "
+              f"{r['avg_batch']:>10.1f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
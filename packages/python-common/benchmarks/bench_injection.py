@@ -0,0 +1,113 @@
+"""Benchmark: prompt-injection scanning versus input size.
+
+Compares the previous detector (lowercase, then one ``re.search`` per
+pattern) with `InjectionScanner` on benign text from 1 KB to 1 MB, on the
+same text with an injection at the very end that only the last rule catches, and
+on a history of many messages scanned one by one versus in one
+`scan_batch` call.
+
+Run from packages/python-common:
+
+    PYTHONPATH=src python benchmarks/bench_injection.py
+"""
+
+import argparse
+import random
+import re
+import time
+from typing import Callable, List
+
+from python_common.security import InjectionScanner
+
+LEGACY_PATTERNS = [
+    r'ignore\s+(previous|all|above)\s+instructions?',
+    r'forget\s+(previous|all|above)',
+    r'you\s+are\s+now',
+    r'act\s+as\s+if',
+    r'pretend\s+to\s+be',
+    r'reset\s+(the\s+)?conversation',
+    r'disregard\s+(all|previous|above)\s+instructions?',
+    r'((replace|override|bypass|jailbreak).{0,15}instructions?)',
+    r'assume\s+the\s+role\s+of',
+    r'remove\s+all\s+filters',
+    r'(###|\{prompt\}|\[INSTRUCTION\])',
+    r'from\s+now\s+on[, ]*\s*you\s+(must|shall)',
+    r'ignore\s+your\s+previous\s+(rules|guidelines|directives)',
+    r'these\s+are\s+your\s+new\s+instructions',
+    r'new\s+set\s+of\s+rules\s+for\s+you',
+    r'forget\s+everything\s+you\s+have\s+been\s+told',
+    r'ignore\s+the\s+(system|safety)\s+instructions?',
+    r'you\s+must\s+not\s+follow\s+any\s+previous\s+instructions',
+    r'\b(do[-\s]?anything[-\s]?now|dan)\b',
+]
+
+# Common words, including ones that share prefixes with the rules ("you", "do", "act", "new", ...).
+WORDS = (
+    "the of and to in is you that it for are on as with was do at be this have from or one had by "
+    "not but what all were when we there can an your which their said will each about how up out "
+    "them then she many some so these would other into has more her two like him see time could no "
+    "make than first been its who now people my made over did down only way find use may water long "
+    "little very after words called just where most know get through back much before go good new "
+    "write our used me man too any day same right look think also around another came come work three "
+    "act action actual remove reset assume forgets ignore pretend replace retrieval vector embedding "
+    "gateway latency token context document chunk answer query model index cache stream"
+).split()
+
+
+def legacy_detect(text: str) -> bool:
+    text_lower = text.lower()
+    for pattern in LEGACY_PATTERNS:
+        if re.search(pattern, text_lower):
+            return True
+    return False
+
+
+def benign(size: int, rng: random.Random) -> str:
+    words: List[str] = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def per_call_ms(fn: Callable[[], object], budget_s: float) -> float:
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget_s:
+            return elapsed / calls * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-s", type=float, default=0.5, help="time spent per measurement")
+    parser.add_argument("--messages", type=int, default=200, help="messages in the history case")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    scanner = InjectionScanner()
+    print(f"{'input':<16} {'legacy ms':>10} {'scanner ms':>11} {'speedup':>8}")
+    for size in (1 << 10, 1 << 13, 1 << 16, 1 << 18, 1 << 20):
+        text = benign(size, rng)
+        assert not legacy_detect(text) and scanner.scan(text) is None
+        for label, sample in ((f"{size // 1024} KB", text), (f"{size // 1024} KB + hit", text + " call me dan")):
+            legacy = per_call_ms(lambda: legacy_detect(sample), args.budget_s)
+            scanned = per_call_ms(lambda: scanner.scan(sample), args.budget_s)
+            print(f"{label:<16} {legacy:>10.3f} {scanned:>11.3f} {legacy / scanned:>7.1f}x")
+
+    history = [benign(rng.randint(100, 2000), rng) for _ in range(args.messages)]
+    print(f"\n{args.messages} messages    legacy loop   scan loop   scan_batch")
+    legacy = per_call_ms(lambda: [legacy_detect(message) for message in history], args.budget_s)
+    looped = per_call_ms(lambda: [scanner.scan(message) for message in history], args.budget_s)
+    batched = per_call_ms(lambda: scanner.scan_batch(history), args.budget_s)
+    print(f"{'ms per history':<16} {legacy:>10.3f} {looped:>11.3f} {batched:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
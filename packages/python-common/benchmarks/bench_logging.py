@@ -0,0 +1,123 @@
+"""Benchmark: request throughput of an asyncio service with logging off, sync and queued.
+
+Simulates a service handling `--requests` requests, `--concurrency` at a
+time, on one event loop. Each request logs a request and a response line
+(`log_request` / `log_response`) around a little CPU work and one await.
+Log lines go to `--sink` (a file by default; use a pipe to a slow reader to
+see a blocking stdout). Modes:
+
+- off: logger level above INFO, so nothing is formatted or written
+- sync-jsonlogger: the previous setup (StreamHandler + pythonjsonlogger), if installed
+- sync: StreamHandler + JsonFormatter, written on the event loop
+- queued: QueuedLogHandler, written by a background thread
+- queued-sampled: queued, keeping `--sample-rate` of requests
+
+Run from packages/python-common:
+
+    PYTHONPATH=src python benchmarks/bench_logging.py --requests 20000
+"""
+
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from typing import IO, Optional
+
+from python_common import logging as common_logging
+from python_common.logging import JsonFormatter, LogSampler, QueuedLogHandler, log_request, log_response
+
+try:
+    from pythonjsonlogger import jsonlogger
+except ImportError:
+    jsonlogger = None
+
+
+def build_handler(mode: str, sink: IO[str], sample_rate: float) -> Optional[logging.Handler]:
+    if mode == "off":
+        return None
+    if mode.startswith("queued"):
+        handler: logging.Handler = QueuedLogHandler(sink, queue_size=100_000)
+        if mode == "queued-sampled":
+            sampler = LogSampler(default_rate=sample_rate, stats=handler.stats)
+            handler.addFilter(sampler)
+            common_logging._samplers[f"bench-{mode}"] = sampler  # what setup_logging registers
+        return handler
+    handler = logging.StreamHandler(sink)
+    if mode == "sync-jsonlogger":
+        handler.setFormatter(jsonlogger.JsonFormatter("%(timestamp)s %(level)s %(name)s %(message)s"))
+    else:
+        handler.setFormatter(JsonFormatter())
+    return handler
+
+
+async def serve(logger: logging.Logger, requests: int, concurrency: int, work: int) -> float:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def handle(i: int) -> None:
+        async with slots:
+            request_id = f"req-{i}"
+            start = time.perf_counter()
+            log_request(logger, request_id, "bench", "/v1/chat/", model="gpt-4o-mini")
+            sum(range(work))  # stand-in for request handling
+            await asyncio.sleep(0)
+            log_response(logger, request_id, (time.perf_counter() - start) * 1000, 200,
+                         endpoint="/v1/chat/", tokens_in=120, tokens_out=48)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(handle(i) for i in range(requests)))
+    return time.perf_counter() - start
+
+
+def run(mode: str, args: argparse.Namespace) -> dict:
+    sink = open(args.sink, "a", buffering=1 << 16) if args.sink else tempfile.TemporaryFile("w+")
+    logger = logging.getLogger(f"bench-{mode}")
+    logger.propagate = False
+    logger.setLevel(logging.CRITICAL if mode == "off" else logging.INFO)
+    handler = build_handler(mode, sink, args.sample_rate)
+    if handler is not None:
+        logger.addHandler(handler)
+    try:
+        elapsed = asyncio.run(serve(logger, args.requests, args.concurrency, args.work))
+        drain_start = time.perf_counter()
+        if handler is not None:
+            handler.close()  # queued: wait for the writer to catch up
+        drain = time.perf_counter() - drain_start
+    finally:
+        if handler is not None:
+            logger.removeHandler(handler)
+        sink.close()
+    stats = getattr(handler, "stats", None)
+    return {
+        "rps": args.requests / elapsed,
+        "drain_ms": drain * 1000,
+        "written": stats.written if stats else None,
+        "dropped": stats.dropped if stats else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--work", type=int, default=200, help="CPU work per request (range length summed)")
+    parser.add_argument("--sample-rate", type=float, default=0.1)
+    parser.add_argument("--sink", default=None, help="path to append log lines to (default: a temp file)")
+    args = parser.parse_args()
+
+    modes = ["off", "sync", "queued", "queued-sampled"]
+    if jsonlogger is not None:
+        modes.insert(1, "sync-jsonlogger")
+    print(f"{args.requests} requests, 2 log lines each, sink {args.sink or 'temp file'}"
+          f"{', orjson' if common_logging.orjson is not None else ', stdlib json'}")
+    print(f"{'mode':<16} {'req/s':>10} {'vs off':>7} {'drain ms':>9} {'written':>8} {'dropped':>8}")
+    baseline = None
+    for mode in modes:
+        r = run(mode, args)
+        baseline = baseline or r["rps"]
+        print(f"{mode:<16} {r['rps']:>10,.0f} {r['rps'] / baseline:>6.0%} {r['drain_ms']:>9.1f} "
+              f"{'' if r['written'] is None else r['written']:>8} {'' if r['dropped'] is None else r['dropped']:>8}")
+
+
+if __name__ == "__main__":
+    main()
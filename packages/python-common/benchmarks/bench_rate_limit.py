@@ -0,0 +1,76 @@
+"""Benchmark: per-request overhead of python_common.rate_limit.
+
+Target: well under 50µs per request on the hot path.
+
+Run from packages/python-common:
+
+    PYTHONPATH=src python benchmarks/bench_rate_limit.py
+"""
+
+import asyncio
+import time
+
+from python_common.rate_limit import InMemoryBackend, RateLimiter, RateLimitMiddleware
+
+N = 200_000
+
+
+def bench(label: str, fn, n: int = N) -> None:
+    start = time.perf_counter_ns()
+    for i in range(n):
+        fn(i)
+    per_call_us = (time.perf_counter_ns() - start) / n / 1000
+    print(f"{label:<44} {per_call_us:8.2f} µs/call")
+
+
+async def bench_middleware(n: int = 50_000) -> None:
+    async def app(scope, receive, send):
+        pass
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    limiter = RateLimiter(requests_per_minute=10**12)
+    wrapped = RateLimitMiddleware(app, limiter)
+    scope = {
+        "type": "http",
+        "path": "/v1/chat/",
+        "headers": [(b"content-type", b"application/json"), (b"x-api-key", b"key-123")],
+        "client": ("127.0.0.1", 5000),
+    }
+    for label, target in (("bare ASGI app", app), ("ASGI app + RateLimitMiddleware", wrapped)):
+        start = time.perf_counter_ns()
+        for _ in range(n):
+            await target(dict(scope), receive, send)
+        print(f"{label:<44} {(time.perf_counter_ns() - start) / n / 1000:8.2f} µs/call")
+
+
+def main() -> None:
+    limiter = RateLimiter(requests_per_minute=10**12, tokens_per_minute=10**12, usd_per_minute=10**9)
+    keys = [f"user-{i}" for i in range(10_000)]
+
+    bench("check_request (one hot key)", lambda i: limiter.check_request("user-0"))
+    bench("check_request (10k keys)", lambda i: limiter.check_request(keys[i % 10_000]))
+    bench("check_spend (10k keys)", lambda i: limiter.check_spend(keys[i % 10_000], "gpt-4o-mini", 500, 512))
+    bench(
+        "check_spend + record_spend (10k keys)",
+        lambda i: (
+            limiter.check_spend(keys[i % 10_000], "gpt-4o-mini", 500, 512),
+            limiter.record_spend(keys[i % 10_000], "gpt-4o-mini", 500, 512, 480, 200),
+        ),
+    )
+
+    shared = RateLimiter(requests_per_minute=10**12, backend=InMemoryBackend())
+    bench("check_request with shared backend attached", lambda i: shared.check_request(keys[i % 10_000]))
+    start = time.perf_counter()
+    asyncio.run(shared.sync_once())
+    print(f"{'background sync of 10k keys (off hot path)':<44} {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+    asyncio.run(bench_middleware())
+
+
+if __name__ == "__main__":
+    main()
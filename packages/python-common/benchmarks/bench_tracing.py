@@ -0,0 +1,75 @@
+"""Benchmark: per-span cost of tracing on the event loop.
+
+Measures nested `start_span` blocks (one request span with `--children`
+child spans, as a traced request with a few stages or outgoing calls would
+open) in three setups:
+
+- untraced: the same work with no spans
+- traced, not exported: spans are created and propagated (no TRACE_EXPORT_PATH)
+- traced, exported: finished spans are queued for the background file writer
+
+Run from packages/python-common:
+
+    PYTHONPATH=src python benchmarks/bench_tracing.py
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from python_common.observability import setup_tracing, start_span
+
+
+async def untraced(requests: int, children: int) -> None:
+    for _ in range(requests):
+        for _ in range(children):
+            await asyncio.sleep(0)
+
+
+async def traced(requests: int, children: int) -> None:
+    for i in range(requests):
+        with start_span("request", kind="server", request=i):
+            for _ in range(children):
+                with start_span("stage"):
+                    await asyncio.sleep(0)
+
+
+def per_request_us(coro_fn, requests: int, children: int) -> float:
+    start = time.perf_counter()
+    asyncio.run(coro_fn(requests, children))
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--children", type=int, default=4, help="child spans per request span")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "spans.jsonl")
+        base = per_request_us(untraced, args.requests, args.children)
+        setup_tracing("bench")
+        not_exported = per_request_us(traced, args.requests, args.children)
+        exporter = setup_tracing("bench", path)
+        exported = per_request_us(traced, args.requests, args.children)
+        drain_start = time.perf_counter()
+        exporter.close()
+        drain_ms = (time.perf_counter() - drain_start) * 1000
+        setup_tracing("bench")  # detach the closed exporter
+
+        spans = args.children + 1
+        print(f"{args.requests} requests x {spans} spans")
+        print(f"{'setup':<22} {'us/request':>11} {'us/span':>9}")
+        print(f"{'untraced':<22} {base:>11.2f} {'':>9}")
+        for label, value in (("traced, not exported", not_exported), ("traced, exported", exported)):
+            print(f"{label:<22} {value:>11.2f} {(value - base) / spans:>9.2f}")
+        stats = exporter.stats
+        print(f"\nexporter: {stats.exported} written, {stats.dropped} dropped, "
+              f"{stats.batches} batches, {drain_ms:.1f} ms to drain at close")
+
+
+if __name__ == "__main__":
+    main()
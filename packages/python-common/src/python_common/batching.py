@@ -0,0 +1,187 @@
+"""Async micro-batching for upstream calls"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class BatchStats:
+    """Running per-batch size and latency figures for a MicroBatcher"""
+
+    def __init__(self) -> None:
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.max_batch_size = 0
+        self.latency_ms_total = 0.0
+        self.latency_ms_max = 0.0
+        self.wait_ms_total = 0.0
+
+    def record(self, size: int, wait_ms: float, latency_ms: float, ok: bool) -> None:
+        self.batches += 1
+        self.items += size
+        self.max_batch_size = max(self.max_batch_size, size)
+        self.latency_ms_total += latency_ms
+        self.latency_ms_max = max(self.latency_ms_max, latency_ms)
+        self.wait_ms_total += wait_ms
+        if not ok:
+            self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        batches = self.batches or 1
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "errors": self.errors,
+            "avg_batch_size": self.items / batches,
+            "max_batch_size": self.max_batch_size,
+            "avg_batch_latency_ms": self.latency_ms_total / batches,
+            "max_batch_latency_ms": self.latency_ms_max,
+            "avg_fill_wait_ms": self.wait_ms_total / batches,
+        }
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Collect individual async calls into batches and dispatch them together.
+
+    HOW IT WORKS:
+    - `submit(item)` parks the caller on a future and adds the item to the
+      current batch
+    - The batch is dispatched as soon as it holds `max_batch_size` items, or
+      `max_wait_ms` after its first item arrived, whichever comes first
+    - `dispatch(items)` must return one result per item, in order; results
+      are handed back to the waiting callers (demultiplexed by position)
+    - If `dispatch` raises, every caller in that batch gets the exception
+    - At most `max_concurrent_batches` dispatches run at once; further full
+      batches queue behind them (and keep growing up to the size cap)
+
+    WHY:
+    Provider APIs (embeddings, Chroma `add`) accept lists. One request with
+    100 inputs costs roughly one round trip; 100 single-input requests cost 100.
+
+    Args:
+        dispatch: Async function taking a list of items, returning a list of results
+        max_batch_size: Largest batch sent in one dispatch
+        max_wait_ms: How long the first item of a batch may wait for company
+        max_concurrent_batches: Upper bound on dispatches in flight
+        name: Label used in logs and stats
+
+    Example:
+        >>> async def embed(texts): return [[0.0] * 3 for _ in texts]
+        >>> batcher = MicroBatcher(embed, max_batch_size=64, max_wait_ms=5)
+        >>> vector = await batcher.submit("hello")
+    """
+
+    def __init__(
+        self,
+        dispatch: Callable[[List[T]], Awaitable[Sequence[R]]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        max_concurrent_batches: int = 4,
+        name: str = "batcher",
+    ):
+        self.dispatch = dispatch
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000
+        self.name = name
+        self.stats = BatchStats()
+        self._slots = asyncio.Semaphore(max_concurrent_batches)
+        self._items: List[T] = []
+        self._futures: List[asyncio.Future] = []
+        self._opened_at = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self._closed = False
+
+    async def submit(self, item: T) -> R:
+        """Add one item to the current batch and wait for its result"""
+        if self._closed:
+            raise RuntimeError(f"{self.name} is closed")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self._items:
+            self._opened_at = time.perf_counter()
+            if self.max_wait_s > 0:
+                self._timer = loop.call_later(self.max_wait_s, self._flush)
+        self._items.append(item)
+        self._futures.append(future)
+        if len(self._items) >= self.max_batch_size or self.max_wait_s <= 0:
+            self._flush()
+        return await future
+
+    async def submit_many(self, items: Sequence[T]) -> List[R]:
+        """Submit several items; they may be split across or merged into batches"""
+        return list(await asyncio.gather(*(self.submit(item) for item in items)))
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._items:
+            return
+        batch = (self._items, self._futures, self._opened_at)
+        self._items, self._futures = [], []
+        task = asyncio.get_running_loop().create_task(self._run(*batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, items: List[T], futures: List[asyncio.Future], opened_at: float) -> None:
+        async with self._slots:
+            started = time.perf_counter()
+            try:
+                results = await self.dispatch(items)
+                if len(results) != len(items):
+                    raise ValueError(
+                        f"{self.name}: dispatch returned {len(results)} results for {len(items)} items"
+                    )
+            except Exception as exc:
+                self.stats.record(len(items), (started - opened_at) * 1000, (time.perf_counter() - started) * 1000, False)
+                logger.warning("%s: batch of %d failed: %s", self.name, len(items), exc)
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(exc)
+                return
+            self.stats.record(len(items), (started - opened_at) * 1000, (time.perf_counter() - started) * 1000, True)
+            for future, result in zip(futures, results):
+                # Callers that were cancelled while waiting simply drop out.
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self) -> None:
+        """Dispatch anything pending and wait for in-flight batches"""
+        self._closed = True
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+def split_evenly(total: int, weights: Sequence[int]) -> List[int]:
+    """
+    Split an integer total (e.g. a batch's token usage) proportionally to `weights`.
+
+    The parts always sum to `total`, so per-item accounting stays exact.
+
+    Example:
+        >>> split_evenly(10, [1, 1, 2])
+        [2, 3, 5]
+    """
+    weight_sum = sum(weights)
+    if not weights:
+        return []
+    if weight_sum <= 0:
+        weights = [1] * len(weights)
+        weight_sum = len(weights)
+    parts = [total * w // weight_sum for w in weights]
+    remainders: List[Tuple[int, int]] = sorted(
+        ((total * w % weight_sum, i) for i, w in enumerate(weights)), reverse=True
+    )
+    for _, i in remainders[: total - sum(parts)]:
+        parts[i] += 1
+    return parts
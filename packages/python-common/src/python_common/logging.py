@@ -1,45 +1,383 @@
 """Structured logging utilities"""
 
+import collections
+import json
 import logging
+import random
 import sys
-from pythonjsonlogger import jsonlogger
-from typing import Optional
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, IO, Optional
 
+try:
+    import orjson
+except ImportError:  # stdlib json is used instead
+    orjson = None
 
-def setup_logging(service_name: str, level: str = "INFO") -> None:
+from .metrics import REGISTRY
+from .observability import get_trace_id
+
+# Set on records whose sampling log_request / log_response already decided
+_PRESAMPLED = "_presampled"
+# Attributes every LogRecord has; anything else on a record came from `extra=`.
+_RECORD_FIELDS = frozenset(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", _PRESAMPLED}
+
+
+def _dumps(entry: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(entry, default=str)
+    return json.dumps(entry, default=str, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record: timestamp, level, name, message and every `extra=` field.
+
+    Builds the dict directly and encodes it with orjson when it is installed
+    (stdlib json otherwise), which is several times cheaper than
+    pythonjsonlogger's generic formatter.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._second = (-1, "")
+
+    def _timestamp(self, created: float) -> str:
+        # strftime once per second; only the milliseconds change in between
+        second = int(created)
+        cached, text = self._second
+        if second != cached:
+            text = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._second = (second, text)
+        return f"{text}.{int((created - second) * 1000):03d}Z"
+
+    def to_dict(self, record: logging.LogRecord) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {
+            "timestamp": self._timestamp(record.created),
+            "level": record.levelname,
+            "name": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return entry
+
+    def encode(self, record: logging.LogRecord) -> bytes:
+        return _dumps(self.to_dict(record))
+
+    def format(self, record: logging.LogRecord) -> str:
+        return self.encode(record).decode("utf-8")
+
+
+@dataclass
+class LogStats:
+    """Counters for one queued handler (and its sampler)"""
+
+    enqueued: int = 0
+    written: int = 0
+    batches: int = 0
+    dropped: int = 0  # queue full
+    sampled_out: int = 0
+    rate_limited: int = 0  # debug records over the per-second cap
+    errors: int = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class QueuedLogHandler(logging.Handler):
+    """
+    Non-blocking log handler: the caller only appends the record to a bounded
+    in-memory queue; a background thread formats records in batches and
+    writes each batch with a single buffered write + flush.
+
+    WHY:
+    - A StreamHandler serializes JSON and does a blocking write() on the
+      calling thread - in an async service that is the event loop, once
+      per log line, stalling every in-flight request on a slow stdout.
+    - When the queue is full (the writer cannot keep up) new records are
+      dropped and counted in `stats.dropped` instead of blocking requests.
+
+    The message is rendered when the record is queued, so mutable log
+    arguments are captured as they were; `extra=` values are read later by
+    the writer and should not be mutated after logging.
+    """
+
+    def __init__(
+        self,
+        stream: Optional[IO[str]] = None,
+        queue_size: int = 10000,
+        batch_size: int = 256,
+        flush_interval_s: float = 0.05,
+    ):
+        super().__init__()
+        self.stream = stream if stream is not None else sys.stdout
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.stats = LogStats()
+        self.setFormatter(JsonFormatter())
+        self._queue: Deque[logging.LogRecord] = collections.deque()
+        self._wake = threading.Event()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if len(self._queue) >= self.queue_size:
+            self.stats.dropped += 1
+            return
+        try:
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = self.formatter.formatException(record.exc_info)
+                record.exc_info = None
+        except Exception:
+            self.handleError(record)
+            return
+        self._queue.append(record)
+        self.stats.enqueued += 1
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval_s)
+            self._wake.clear()
+            self._drain()
+
+    def _drain(self) -> None:
+        encode = getattr(self.formatter, "encode", None)
+        binary = getattr(self.stream, "buffer", None) if encode is not None else None
+        with self._write_lock:
+            queue = self._queue
+            while queue:
+                lines = []
+                for _ in range(min(len(queue), self.batch_size)):
+                    record = queue.popleft()
+                    try:
+                        lines.append(encode(record) if binary is not None else self.format(record))
+                    except Exception:
+                        self.stats.errors += 1
+                if not lines:
+                    continue
+                try:
+                    if binary is not None:
+                        binary.write(b"\n".join(lines) + b"\n")
+                        binary.flush()
+                    else:
+                        self.stream.write("\n".join(lines) + "\n")
+                        self.stream.flush()
+                except Exception:
+                    self.stats.errors += len(lines)
+                    continue
+                self.stats.written += len(lines)
+                self.stats.batches += 1
+
+    def flush(self) -> None:
+        self._drain()
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._wake.set()
+            self._thread.join(timeout=5)
+            self._drain()
+        super().close()
+
+
+class TraceIdFilter(logging.Filter):
+    """
+    Add the current `trace_id` to records logged inside a trace.
+
+    Runs on the logging thread, where the trace is current; the queued
+    writer formats records later on its own thread. The trace ID is kept
+    apart from `request_id`: one trace covers every hop of a request.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "trace_id"):
+            trace_id = get_trace_id()
+            if trace_id is not None:
+                record.trace_id = trace_id
+        return True
+
+
+class LogSampler(logging.Filter):
+    """
+    Per-endpoint sampling and a per-second cap on DEBUG records.
+
+    - Records carrying an `endpoint` field (see log_request / log_response)
+      are kept with the rate of the longest matching endpoint prefix in
+      `endpoint_rates`, else `default_rate`. The decision is a hash of the
+      record's `request_id`, so a request's log lines are kept or dropped
+      together.
+    - WARNING and above, and responses with status_code >= 500, are always kept.
+    - DEBUG records beyond `debug_per_second` (token bucket) are dropped.
+
+    log_request / log_response call `keep` before building the record, so
+    their records are not sampled a second time here.
+    """
+
+    # Endpoints whose rate is remembered; raw paths with IDs in them would grow it without bound.
+    max_cached_rates = 1024
+
+    def __init__(
+        self,
+        endpoint_rates: Optional[Dict[str, float]] = None,
+        default_rate: float = 1.0,
+        debug_per_second: Optional[float] = None,
+        stats: Optional[LogStats] = None,
+    ):
+        super().__init__()
+        self.endpoint_rates = dict(endpoint_rates or {})
+        self.default_rate = default_rate
+        self.debug_per_second = debug_per_second or None
+        self.stats = stats if stats is not None else LogStats()
+        self._prefixes = sorted(self.endpoint_rates, key=len, reverse=True)
+        self._rates: Dict[Optional[str], float] = {}
+        self._tokens = float(debug_per_second or 0)
+        self._refilled = time.monotonic()
+
+    def rate_for(self, endpoint: Optional[str]) -> float:
+        rate = self._rates.get(endpoint)
+        if rate is None:
+            rate = self.default_rate
+            if endpoint is not None:
+                for prefix in self._prefixes:
+                    if endpoint.startswith(prefix):
+                        rate = self.endpoint_rates[prefix]
+                        break
+            if len(self._rates) >= self.max_cached_rates:
+                self._rates.clear()
+            self._rates[endpoint] = rate
+        return rate
+
+    def _debug_allowed(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.debug_per_second, self._tokens + (now - self._refilled) * self.debug_per_second)
+        self._refilled = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if record.levelno <= logging.DEBUG and self.debug_per_second is not None and not self._debug_allowed():
+            self.stats.rate_limited += 1
+            return False
+        if getattr(record, _PRESAMPLED, False):
+            return True
+        return self.keep(getattr(record, "endpoint", None), getattr(record, "request_id", None),
+                         getattr(record, "status_code", 0))
+
+    def keep(self, endpoint: Optional[str], request_id: Optional[str], status_code: int = 0) -> bool:
+        """Sampling decision for one request's log line"""
+        rate = self.rate_for(endpoint)
+        if rate >= 1 or status_code >= 500:
+            return True
+        draw = zlib.crc32(str(request_id).encode()) / 2**32 if request_id is not None else random.random()
+        if draw < rate:
+            return True
+        self.stats.sampled_out += 1
+        return False
+
+
+# Sampler per logger name, consulted by log_request / log_response before a record is built
+_samplers: Dict[str, LogSampler] = {}
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "/health=0,/v1/chat=0.1" into {"/health": 0.0, "/v1/chat": 0.1}"""
+    rates: Dict[str, float] = {}
+    for item in spec.split(","):
+        if item.strip():
+            endpoint, _, rate = item.partition("=")
+            rates[endpoint.strip()] = float(rate)
+    return rates
+
+
+def _register_log_metrics(stats: LogStats) -> None:
+    """Expose the queued writer's counters on /metrics (read at scrape time)"""
+    for field_name, help_text in (
+        ("written", "Log records written"),
+        ("dropped", "Log records dropped because the queue was full"),
+        ("sampled_out", "Log records skipped by sampling"),
+        ("rate_limited", "DEBUG log records over the per-second cap"),
+    ):
+        counter = REGISTRY.counter(f"log_records_{field_name}_total", help_text)
+        counter.set_function(lambda name=field_name: getattr(stats, name))
+
+
+def setup_logging(
+    service_name: str,
+    level: str = "INFO",
+    queued: bool = False,
+    sample_rates: Optional[Dict[str, float]] = None,
+    default_sample_rate: float = 1.0,
+    debug_per_second: Optional[float] = None,
+    queue_size: int = 10000,
+) -> logging.Handler:
     """
     Setup structured JSON logging for a service.
-    
+
     HOW IT WORKS:
-    - Uses Python's built-in `logging` module (no additional libraries needed for basic logging)
-    - Uses `pythonjsonlogger` library to format logs as JSON (makes them easy to parse/search)
+    - Uses Python's built-in `logging` module with a JSON formatter (orjson if installed)
     - Logs go to stdout (standard output) - this is standard practice for containers/microservices
     - JSON format allows log aggregation tools (like ELK, Datadog, CloudWatch) to parse and search logs easily
-    
+    - With `queued=True` records go through a QueuedLogHandler: nothing is formatted
+      or written on the calling thread (the event loop), a background thread writes
+      batches, and records are dropped (and counted) if it falls behind
+    - Records logged inside a trace get a `trace_id` field (TraceIdFilter)
+    - `sample_rates` / `default_sample_rate` / `debug_per_second` attach a LogSampler
+
     The logger created here can be used throughout your service to log structured data.
-    
+
     Args:
         service_name: Name of your service (e.g., "llm-gateway", "agent-service")
                      This appears in the "name" field of each log entry
         level: Log level string - "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"
                Only logs at or above this level will be output
-    
+        queued: Write through a background thread instead of on the caller's thread
+        sample_rates: Fraction of records kept per endpoint prefix, e.g. {"/health": 0.0}
+        default_sample_rate: Fraction kept for other endpoints
+        debug_per_second: Cap on DEBUG records per second (None = uncapped)
+        queue_size: Records buffered before new ones are dropped (queued mode)
+
+    Returns:
+        The handler; a QueuedLogHandler exposes its counters on `.stats`
+
     Example:
-        >>> setup_logging("my-service", "INFO")
+        >>> setup_logging("my-service", "INFO", queued=True, sample_rates={"/health": 0})
         >>> logger = logging.getLogger("my-service")
         >>> logger.info("Hello")  # Outputs JSON: {"timestamp": "...", "level": "INFO", "name": "my-service", "message": "Hello"}
     """
-    # Create a handler that writes logs to stdout (standard output)
-    # This is standard for containers - log aggregation tools read from stdout
-    log_handler = logging.StreamHandler(sys.stdout)
-    
-    # Create a JSON formatter - converts log entries into JSON format
-    # Format string defines which fields to include: timestamp, level, name (service), message
-    formatter = jsonlogger.JsonFormatter(
-        "%(timestamp)s %(level)s %(name)s %(message)s"
-    )
-    log_handler.setFormatter(formatter)
-    
+    if queued:
+        log_handler: logging.Handler = QueuedLogHandler(sys.stdout, queue_size=queue_size)
+        stats = log_handler.stats
+        _register_log_metrics(stats)
+    else:
+        # Writes on the calling thread - fine for CLIs and scripts
+        log_handler = logging.StreamHandler(sys.stdout)
+        log_handler.setFormatter(JsonFormatter())
+        stats = None
+    log_handler.addFilter(TraceIdFilter())
+    if sample_rates or default_sample_rate < 1 or debug_per_second:
+        sampler = LogSampler(sample_rates, default_sample_rate, debug_per_second, stats)
+        log_handler.addFilter(sampler)
+        _samplers[service_name] = sampler
+
     # Get or create a logger with the service name
     # All logs from this logger will include the service name
     logger = logging.getLogger(service_name)
@@ -52,6 +390,20 @@ def setup_logging(service_name: str, level: str = "INFO") -> None:
     
     # Prevent logs from propagating to parent loggers (avoids duplicate logs)
     logger.propagate = False
+    return log_handler
+
+
+def _log(logger: logging.Logger, message: str, extra: Dict[str, Any]) -> None:
+    """
+    logger.info(message, extra=extra) without the stack walk that finds the
+    caller's file and line (not part of the JSON output). Sampling was
+    already decided by the caller, so this runs once per kept line and the
+    record is marked for the handler's LogSampler to pass through.
+    """
+    if logger.isEnabledFor(logging.INFO):
+        record = logger.makeRecord(logger.name, logging.INFO, "(unknown file)", 0, message, None, None, extra=extra)
+        setattr(record, _PRESAMPLED, True)
+        logger.handle(record)
 
 
 def log_request(
@@ -90,9 +442,13 @@ def log_request(
         >>> log_request(logger, "req-123", "llm-gateway", "/chat", "POST", user_id="user-456")
         # Outputs JSON log with all these fields
     """
-    logger.info(
+    sampler = _samplers.get(logger.name)
+    if sampler is not None and not sampler.keep(endpoint, request_id):
+        return
+    _log(
+        logger,
         "Request received",
-        extra={
+        {
             "request_id": request_id,
             "service": service,
             "endpoint": endpoint,
@@ -129,16 +485,21 @@ def log_response(
         request_id: Same unique identifier as the request log
         latency_ms: Request processing time in milliseconds
         status_code: HTTP status code (default: 200)
-        **kwargs: Additional fields to include (e.g., tokens_used, cost, error_message)
+        **kwargs: Additional fields to include (e.g., tokens_used, cost, error_message);
+                  pass endpoint= so per-endpoint sampling (LogSampler) applies to the response too
     
     Example:
         >>> logger = logging.getLogger("my-service")
         >>> log_response(logger, "req-123", 45.2, 200, tokens_used=1500)
         # Outputs JSON log with latency, status, and tokens_used
     """
-    logger.info(
+    sampler = _samplers.get(logger.name)
+    if sampler is not None and not sampler.keep(kwargs.get("endpoint"), request_id, status_code):
+        return
+    _log(
+        logger,
         "Response sent",
-        extra={
+        {
             "request_id": request_id,
             "latency_ms": latency_ms,
             "status_code": status_code,
@@ -0,0 +1,432 @@
+"""In-process metrics: counters, gauges and latency histograms with Prometheus text export"""
+
+import asyncio
+import bisect
+import functools
+import math
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers a cache hit (sub-millisecond) up to a long LLM stream.
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+class _Shards:
+    """
+    Per-thread value cells, summed on read.
+
+    HOW IT WORKS:
+    - Each thread that updates the metric gets its own list of cells (via
+      threading.local), so an update is a plain `cells[i] += n` on memory no
+      other thread writes - no lock on the hot path
+    - Asyncio tasks share their loop's thread, and an increment has no await
+      in it, so tasks cannot interleave inside one either
+    - The lock is only taken the first time a thread touches the metric and
+      when a scrape copies the list of shards
+    - Cells of finished threads are kept, so counters never go backwards
+    """
+
+    __slots__ = ("size", "_local", "_all", "_lock")
+
+    def __init__(self, size: int):
+        self.size = size
+        self._local = threading.local()
+        self._all: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def cells(self) -> List[float]:
+        try:
+            return self._local.cells
+        except AttributeError:
+            cells = [0] * self.size
+            with self._lock:
+                self._all.append(cells)
+            self._local.cells = cells
+            return cells
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            shards = list(self._all)
+        return [sum(cells[i] for cells in shards) for i in range(self.size)]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        # Unlabelled metrics have exactly one child; keep it at hand for the hot path.
+        self._default = None if self.labelnames else self.labels()
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: Any, **kwargs: Any) -> Any:
+        """The child metric for one combination of label values (created on first use)"""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        child = self._children.get(values)  # hit when the values are already strings
+        if child is not None:
+            return child
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _unlabelled(self) -> Any:
+        if self._default is None:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; use .labels(...)")
+        return self._default
+
+    def children(self) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+        return iter(list(self._children.items()))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self.children():
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values: Tuple[str, ...], child: Any) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, values)} {_number(child.get())}"]
+
+
+class _CounterChild:
+    __slots__ = ("_shards", "_fn")
+
+    def __init__(self) -> None:
+        self._shards = _Shards(1)
+        self._fn: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1) -> None:
+        self._shards.cells()[0] += amount
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """Read the value from `fn` at scrape time (for totals already counted elsewhere)"""
+        self._fn = fn
+
+    def get(self) -> float:
+        return self._fn() if self._fn is not None else self._shards.totals()[0]
+
+
+class Counter(_Metric):
+    """Monotonic count (requests, bytes, errors); name it ``*_total``"""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._unlabelled().inc(amount)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._unlabelled().set_function(fn)
+
+    def get(self) -> float:
+        return self._unlabelled().get()
+
+
+class _GaugeChild:
+    __slots__ = ("_value", "_shards", "_fn")
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._shards = _Shards(1)  # inc / dec deltas since the last set()
+        self._fn: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self._value = value - self._shards.totals()[0]
+
+    def inc(self, amount: float = 1) -> None:
+        self._shards.cells()[0] += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self._shards.cells()[0] -= amount
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """Read the value from `fn` at scrape time (queue depth, pool size, ...)"""
+        self._fn = fn
+
+    def get(self) -> float:
+        return self._fn() if self._fn is not None else self._value + self._shards.totals()[0]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down (in-flight requests, queue depth)"""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._unlabelled().set(value)
+
+    def inc(self, amount: float = 1) -> None:
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self._unlabelled().dec(amount)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._unlabelled().set_function(fn)
+
+    def get(self) -> float:
+        return self._unlabelled().get()
+
+
+class _Timer:
+    """Context manager / decorator observing elapsed perf_counter_ns time, in seconds"""
+
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: "_HistogramChild"):
+        self._histogram = histogram
+        self._start = 0
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._histogram.observe((time.perf_counter_ns() - self._start) / 1e9)
+
+    def __call__(self, func: Callable) -> Callable:
+        histogram = self._histogram
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                start = time.perf_counter_ns()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe((time.perf_counter_ns() - start) / 1e9)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe((time.perf_counter_ns() - start) / 1e9)
+        return wrapper
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "_shards")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # one cell per bucket, one for +Inf, then the sum
+        self._shards = _Shards(len(buckets) + 2)
+
+    def observe(self, value: float) -> None:
+        cells = self._shards.cells()
+        cells[bisect.bisect_left(self.buckets, value)] += 1
+        cells[-1] += value
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+    def counts(self) -> Tuple[List[float], float]:
+        """(per-bucket counts with +Inf last, sum)"""
+        totals = self._shards.totals()
+        return totals[:-1], totals[-1]
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation (None when empty)"""
+        counts, _ = self.counts()
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for i, n in enumerate(counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else math.inf
+        return math.inf
+
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram (observe seconds, Prometheus convention).
+
+    Use `time()` as a context manager or decorator to record how long a block
+    or function takes; the wrapped function's return value is unchanged:
+
+        >>> REQUEST_SECONDS = REGISTRY.histogram("work_seconds", "Time spent working")
+        >>> @REQUEST_SECONDS.time()
+        ... async def work(): ...
+        >>> with REQUEST_SECONDS.time():
+        ...     do_work()
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._unlabelled().observe(value)
+
+    def time(self) -> _Timer:
+        return self._unlabelled().time()
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self._unlabelled().quantile(q)
+
+    def _render_child(self, values: Tuple[str, ...], child: _HistogramChild) -> List[str]:
+        counts, total = child.counts()
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets + (math.inf,), counts):
+            cumulative += n
+            le = 'le="' + _number(bound) + '"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {_number(cumulative)}")
+        label_text = _labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{label_text} {_number(total)}")
+        lines.append(f"{self.name}_count{label_text} {_number(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Named metrics for one process, rendered in the Prometheus text format.
+
+    `counter` / `gauge` / `histogram` return the existing metric when the name
+    is already registered, so modules (and app instances in tests) can declare
+    the metrics they use without coordinating.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls: type, name: str, *args: Any, **kwargs: Any) -> Any:
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = cls(name, *args, **kwargs)
+        if not isinstance(metric, cls):
+            raise ValueError(f"metric {name} is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide default registry; each service runs one app per process.
+REGISTRY = MetricsRegistry()
+
+
+def _route_template(scope: Dict[str, Any]) -> str:
+    """Path template of the route that handled the request, prefixes included"""
+    # FastAPI versions that keep included routers nested record the full
+    # template on their own context; scope["route"] is the inner route there.
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    path = getattr(context, "path", None) or getattr(scope.get("route"), "path", None)
+    return path or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware counting HTTP requests and timing them (until the
+    last response byte, so streams count their full duration).
+
+    Requests are labelled with the matched route template (``/v1/rag/{id}``,
+    not the raw path) to keep label cardinality bounded; requests no route
+    matched are labelled ``unmatched``.
+    """
+
+    def __init__(self, app: Callable[..., Awaitable[None]], registry: MetricsRegistry = REGISTRY,
+                 exempt_paths: Tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.exempt_paths = exempt_paths
+        self.requests = registry.counter(
+            "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+        )
+        self.duration = registry.histogram(
+            "http_request_duration_seconds", "HTTP request duration until the last response byte", ("method", "route")
+        )
+        self.in_flight = registry.gauge("http_requests_in_flight", "HTTP requests being served")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        start = time.perf_counter_ns()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.in_flight.dec()
+            route = _route_template(scope)
+            method = scope["method"]
+            self.requests.labels(method, route, status).inc()
+            self.duration.labels(method, route).observe((time.perf_counter_ns() - start) / 1e9)
@@ -1,37 +1,65 @@
-"""Observability utilities"""
+"""Observability utilities: request IDs, latency helpers and cross-service tracing"""
 
+import argparse
+import atexit
+import collections
+import contextvars
+import json
+import os
+import random
+import re
+import threading
 import time
 import uuid
-from functools import wraps
-from typing import Callable, Any
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import partial, wraps
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .metrics import REGISTRY, _route_template
 
 
 def get_request_id() -> str:
     """
-    Generate a unique request ID using UUID.
+    Return the ID to tag the current request's logs and responses with.
     
     WHAT IT DOES:
-    - Creates a unique identifier for each request
-    - Uses UUID4 (random UUID) which is virtually guaranteed to be unique
-    - Returns as string (e.g., "550e8400-e29b-41d4-a716-446655440000")
-    
+    - Inside a request handled by TracingMiddleware returns the ID the
+      middleware generated for that request (the same on every call)
+    - Otherwise creates a unique identifier using UUID4 (random UUID),
+      which is virtually guaranteed to be unique
+
+    The ID is always generated here, never taken from the client, and is
+    distinct from the trace ID: one trace spans many requests (every hop,
+    every retry), each with its own request_id. The request's server span
+    records it as the ``request_id`` attribute, and `get_trace_id` gives
+    the trace to log next to it.
+
     WHY YOU NEED IT:
-    - Trace a request through multiple services/logs
     - Debug issues by searching logs for a specific request_id
     - Correlate request and response logs
-    - Track request flow in distributed systems
-    
+    - Look up the request's trace (``--request-id`` on the trace CLI)
+
     Returns:
-        Unique request ID string
-    
+        UUID4 hex string (32 characters) or a fresh UUID string
+
     Example:
         >>> request_id = get_request_id()
         >>> print(request_id)
-        "a1b2c3d4-e5f6-7890-abcd-ef1234567890"
+        "9f1c2e7a5b3d4c0e8a6f1b2d3c4e5f60"
     """
+    request_id = _request_id.get()
+    if request_id is not None:
+        return request_id
     return str(uuid.uuid4())
 
 
+def get_trace_id() -> Optional[str]:
+    """Trace ID of the current span (shared by every hop of the request); None outside any trace"""
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+
 def track_latency(func: Callable) -> Callable:
     """
     Decorator to automatically measure function execution time (latency).
@@ -42,6 +70,12 @@ def track_latency(func: Callable) -> Callable:
     - Records end time after function completes
     - Calculates latency in milliseconds
     - Returns both the function result AND the latency
+    - Uses time.perf_counter (monotonic, high resolution), not wall-clock time
+    
+    PREFER `Histogram.time()` FOR METRICS:
+    - `python_common.metrics` histograms record latency without changing the
+      return value, and the result shows up on the service's /metrics endpoint
+    - Keep this decorator for call sites that want the number in hand
     
     SUPPORTS BOTH SYNC AND ASYNC:
     - Automatically detects if function is async (using asyncio.iscoroutinefunction)
@@ -72,34 +106,34 @@ def track_latency(func: Callable) -> Callable:
     @wraps(func)
     async def async_wrapper(*args, **kwargs):
         # Record start time before executing the async function
-        start = time.time()
+        start = time.perf_counter()
         try:
             # Execute the async function and wait for result
             result = await func(*args, **kwargs)
             # Calculate latency: (end_time - start_time) * 1000 to convert to milliseconds
-            latency_ms = (time.time() - start) * 1000
+            latency_ms = (time.perf_counter() - start) * 1000
             # Return both the result and the latency
             return result, latency_ms
         except Exception as e:
             # Even if function fails, still calculate latency (useful for debugging slow failures)
-            latency_ms = (time.time() - start) * 1000
+            latency_ms = (time.perf_counter() - start) * 1000
             # Re-raise the exception (don't swallow errors)
             raise e
     
     @wraps(func)
     def sync_wrapper(*args, **kwargs):
         # Record start time before executing the sync function
-        start = time.time()
+        start = time.perf_counter()
         try:
             # Execute the sync function
             result = func(*args, **kwargs)
             # Calculate latency in milliseconds
-            latency_ms = (time.time() - start) * 1000
+            latency_ms = (time.perf_counter() - start) * 1000
             # Return both the result and the latency
             return result, latency_ms
         except Exception as e:
             # Even if function fails, still calculate latency
-            latency_ms = (time.time() - start) * 1000
+            latency_ms = (time.perf_counter() - start) * 1000
             # Re-raise the exception
             raise e
     
@@ -141,3 +175,493 @@ def log_structured(logger, level: str, message: str, **data) -> None:
     # level.lower() converts "INFO" -> "info", "ERROR" -> "error", etc.
     # Then call that method with the message and extra structured data
     getattr(logger, level.lower())(message, extra=data)
+
+
+# Tracing
+#
+# HOW IT WORKS:
+# - The span being executed lives in a contextvar, so it follows the request
+#   through awaits and into tasks started from it, without being passed around
+# - `start_span` opens a child of the current span (or a new trace); timings use
+#   perf_counter_ns, the wall-clock start is kept only to line up processes
+# - Outgoing httpx calls (`instrument_httpx`) get a client span and a W3C
+#   `traceparent` header; `TracingMiddleware` continues that trace on the
+#   receiving side, so one user request keeps one trace ID across services
+# - Finished spans go to a SpanExporter: a bounded queue drained in batches by
+#   a background thread into a JSON-lines file (one file can be shared by all
+#   services as a stand-in for a collector)
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+_service_name = "unknown"
+_sample_rate = 1.0
+_exporter: Optional["SpanExporter"] = None
+
+# version - trace id - parent span id - flags (https://www.w3.org/TR/trace-context/)
+_TRACEPARENT = re.compile(r"([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(-.*)?")
+_SPAN_KEY = "prismflow.span"  # httpx request extension carrying the client span
+
+
+def _new_id(nbytes: int) -> str:
+    # Not security-sensitive; getrandbits is much cheaper than os.urandom per span.
+    return f"{random.getrandbits(nbytes * 8) or 1:0{nbytes * 2}x}"
+
+
+class Span:
+    """
+    One timed operation (a request, an outgoing call, a pipeline stage) in a trace.
+
+    Use `start_span` rather than creating spans directly; `duration_ms` is
+    readable while the span is still open.
+    """
+
+    __slots__ = (
+        "name", "kind", "trace_id", "span_id", "parent_id", "sampled",
+        "attributes", "status", "start_unix_ns", "duration_ns", "_start_ns",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        kind: str = "internal",
+        trace_id: Optional[str] = None,
+        parent_id: Optional[str] = None,
+        sampled: bool = True,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.kind = kind  # "server", "client" or "internal"
+        self.trace_id = trace_id or _new_id(16)
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes if attributes is not None else {}
+        self.status = "ok"
+        self.start_unix_ns = time.time_ns()
+        self.duration_ns: Optional[int] = None
+        self._start_ns = time.perf_counter_ns()
+
+    @property
+    def duration_ms(self) -> float:
+        elapsed = self.duration_ns if self.duration_ns is not None else time.perf_counter_ns() - self._start_ns
+        return elapsed / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self, status: Optional[str] = None) -> None:
+        """Stop the clock and hand the span to the exporter (later calls are ignored)"""
+        if self.duration_ns is not None:
+            return
+        self.duration_ns = time.perf_counter_ns() - self._start_ns
+        if status is not None:
+            self.status = status
+        if self.sampled and _exporter is not None:
+            _exporter.export(self)
+
+    def traceparent(self) -> str:
+        """W3C `traceparent` header value naming this span as the parent"""
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "service": _service_name,
+            "name": self.name,
+            "kind": self.kind,
+            "start_unix_ns": self.start_unix_ns,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def _child_of(parent: Optional[Span], name: str, kind: str, attributes: Dict[str, Any]) -> Span:
+    if parent is None:
+        # New trace: the sampling decision is made once, here, and propagated.
+        return Span(name, kind, sampled=_sample_rate >= 1 or random.random() < _sample_rate, attributes=attributes)
+    return Span(name, kind, parent.trace_id, parent.span_id, parent.sampled, attributes)
+
+
+def current_span() -> Optional[Span]:
+    """The span the calling code runs in (None outside any trace)"""
+    return _current_span.get()
+
+
+@contextmanager
+def start_span(name: str, kind: str = "internal", root: bool = False, **attributes: Any) -> Iterator[Span]:
+    """
+    Time a block as a child of the current span (or as a new trace).
+
+    The span is current inside the block, so spans and outgoing calls made
+    there nest under it. An exception marks it ``error`` and propagates.
+
+    Args:
+        name: What the block does, e.g. "rag.retrieve"
+        kind: "internal" (default), "server" or "client"
+        root: Start a new trace even if a span is current (e.g. one trace per
+              item of a long background job)
+        **attributes: Recorded with the span
+
+    Example:
+        >>> with start_span("rag.retrieve", collections=2) as span:
+        ...     hits = await retrieve(...)
+        >>> retrieve_ms = span.duration_ms
+    """
+    span = _child_of(None if root else _current_span.get(), name, kind, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.status = "error"
+        span.attributes["error"] = type(exc).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+def parse_traceparent(value: str) -> Optional[Tuple[str, str, bool]]:
+    """(trace_id, parent_span_id, sampled) from a W3C `traceparent` header; None if invalid"""
+    match = _TRACEPARENT.fullmatch(value.strip().lower())
+    if match is None:
+        return None
+    version, trace_id, parent_id, flags, rest = match.groups()
+    if version == "ff" or (version == "00" and rest) or trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+async def _httpx_request_hook(request: Any, propagate: bool = True) -> None:
+    url = request.url
+    span = _child_of(_current_span.get(), f"{request.method} {url.path}", "client", {
+        "http.method": request.method,
+        "http.host": f"{url.host}:{url.port}" if url.port else url.host,
+    })
+    if propagate:
+        request.headers["traceparent"] = span.traceparent()
+    request.extensions[_SPAN_KEY] = span
+
+
+async def _httpx_response_hook(response: Any) -> None:
+    span = response.request.extensions.pop(_SPAN_KEY, None)
+    if span is not None:
+        span.attributes["http.status_code"] = response.status_code
+        span.end("error" if response.status_code >= 500 else None)
+
+
+def instrument_httpx(client: Any, propagate: bool = True) -> Any:
+    """
+    Propagate the current trace on every request an httpx.AsyncClient sends.
+
+    Each request gets a client span and a `traceparent` header naming it as the
+    parent. The span ends when the response headers arrive, so for streamed
+    responses it measures time to first byte; the callee's server span covers
+    the full stream. Requests that fail before a response are not exported.
+
+    Args:
+        client: The httpx.AsyncClient to instrument
+        propagate: Send the `traceparent` header; turn off for third-party
+                   APIs that should not see internal trace IDs (the call is
+                   still timed)
+
+    Returns the same client, so it can wrap the constructor call.
+    """
+    hooks = client.event_hooks
+    hooks["request"].append(_httpx_request_hook if propagate else partial(_httpx_request_hook, propagate=False))
+    hooks["response"].append(_httpx_response_hook)
+    client.event_hooks = hooks
+    return client
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware opening a server span per HTTP request.
+
+    A valid incoming `traceparent` header makes the span part of the caller's
+    trace; otherwise the request starts a new trace. Each request also gets
+    its own ID (`get_request_id`), recorded on the span as ``request_id``.
+    The span is named after the matched route template and ends with the
+    last response byte.
+    """
+
+    def __init__(self, app: Callable, exempt_paths: Tuple[str, ...] = ("/metrics", "/health")):
+        self.app = app
+        self.exempt_paths = exempt_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        request_id = uuid.uuid4().hex
+        attributes: Dict[str, Any] = {"http.method": method, "request_id": request_id}
+        remote = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                remote = parse_traceparent(value.decode("latin-1"))
+                break
+        if remote is not None:
+            trace_id, parent_id, sampled = remote
+            span = Span(f"{method} {scope['path']}", "server", trace_id, parent_id, sampled, attributes)
+        else:
+            span = _child_of(None, f"{method} {scope['path']}", "server", attributes)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                attributes["http.status_code"] = message["status"]
+            await send(message)
+
+        token = _current_span.set(span)
+        request_token = _request_id.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as exc:
+            span.status = "error"
+            attributes["error"] = type(exc).__name__
+            raise
+        finally:
+            _request_id.reset(request_token)
+            _current_span.reset(token)
+            route = _route_template(scope)
+            attributes["http.route"] = route
+            span.name = f"{method} {route}"
+            if attributes.get("http.status_code", 500) >= 500:
+                span.status = "error"
+            span.end()
+
+
+@dataclass
+class TraceStats:
+    """Counters for the span exporter"""
+
+    exported: int = 0  # spans written
+    dropped: int = 0  # spans discarded because the queue was full
+    batches: int = 0
+    errors: int = 0  # spans that failed to encode or write
+
+    def snapshot(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class SpanExporter:
+    """
+    Batched span writer: `export` only appends to a bounded in-memory queue;
+    a background thread writes queued spans as JSON lines to `path`.
+
+    WHY:
+    - Ending a span happens on the event loop, once per request and per
+      outgoing call; encoding and file I/O there would add to every request
+    - When the writer falls behind, new spans are dropped and counted in
+      `stats.dropped` instead of growing memory or blocking requests
+    """
+
+    def __init__(self, path: str, queue_size: int = 10000, batch_size: int = 512, flush_interval_s: float = 1.0):
+        self.path = path
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.stats = TraceStats()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._queue: Deque[Span] = collections.deque()
+        self._wake = threading.Event()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        if len(self._queue) >= self.queue_size:
+            self.stats.dropped += 1
+            return
+        self._queue.append(span)
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval_s)
+            self._wake.clear()
+            self._drain()
+
+    def _drain(self) -> None:
+        with self._write_lock:
+            queue = self._queue
+            while queue:
+                lines = []
+                for _ in range(min(len(queue), self.batch_size)):
+                    try:
+                        lines.append(json.dumps(queue.popleft().to_dict(), separators=(",", ":"), default=str))
+                    except Exception:
+                        self.stats.errors += 1
+                if not lines:
+                    continue
+                try:
+                    # One write per batch: processes sharing the file append whole batches.
+                    self._file.write("\n".join(lines) + "\n")
+                    self._file.flush()
+                except Exception:
+                    self.stats.errors += len(lines)
+                    continue
+                self.stats.exported += len(lines)
+                self.stats.batches += 1
+
+    def flush(self) -> None:
+        self._drain()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self._drain()
+        self._file.close()
+
+
+def setup_tracing(
+    service_name: str,
+    export_path: Optional[str] = None,
+    sample_rate: float = 1.0,
+) -> Optional[SpanExporter]:
+    """
+    Name this process's spans and (optionally) start exporting them.
+
+    Propagation works without an exporter: incoming trace IDs are continued
+    and passed on, so request IDs still match across services.
+
+    Args:
+        service_name: Recorded on every span, e.g. "rag-service"
+        export_path: JSON-lines file spans are appended to (None / "" = not exported)
+        sample_rate: Fraction of new traces exported; traces started elsewhere
+                     follow the caller's decision (the traceparent flags)
+
+    Returns:
+        The exporter (its counters are on `.stats` and on /metrics), or None
+    """
+    global _service_name, _sample_rate, _exporter
+    _service_name = service_name
+    _sample_rate = sample_rate
+    if _exporter is not None:
+        _exporter.close()
+        _exporter = None
+    if export_path:
+        _exporter = exporter = SpanExporter(export_path)
+        atexit.register(exporter.close)
+        for field_name, help_text in (
+            ("exported", "Trace spans written"),
+            ("dropped", "Trace spans dropped because the export queue was full"),
+        ):
+            counter = REGISTRY.counter(f"trace_spans_{field_name}_total", help_text)
+            counter.set_function(lambda name=field_name: getattr(exporter.stats, name))
+    return _exporter
+
+
+def load_traces(paths: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Exported spans from one or more files, grouped by trace ID (torn lines are skipped)"""
+    traces: Dict[str, List[Dict[str, Any]]] = collections.defaultdict(list)
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    span = json.loads(line)
+                except ValueError:
+                    continue
+                traces[span["trace_id"]].append(span)
+    return traces
+
+
+def find_request(traces: Dict[str, List[Dict[str, Any]]], request_id: str) -> Optional[List[Dict[str, Any]]]:
+    """The trace containing the server span of request `request_id`"""
+    for spans in traces.values():
+        if any(span["attributes"].get("request_id") == request_id for span in spans):
+            return spans
+    return None
+
+
+def _root(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    ids = {span["span_id"] for span in spans}
+    roots = [span for span in spans if span.get("parent_id") not in ids]
+    return max(roots or spans, key=lambda span: span["duration_ms"])
+
+
+def slow_traces(
+    traces: Dict[str, List[Dict[str, Any]]], min_ms: float = 0.0, limit: int = 10
+) -> List[List[Dict[str, Any]]]:
+    """The `limit` slowest traces (by root span duration) taking at least `min_ms`"""
+    ranked = sorted(traces.values(), key=lambda spans: _root(spans)["duration_ms"], reverse=True)
+    return [spans for spans in ranked[:limit] if _root(spans)["duration_ms"] >= min_ms]
+
+
+def format_trace(spans: List[Dict[str, Any]]) -> str:
+    """
+    Per-hop latency breakdown of one trace as an indented tree.
+
+    Each line shows the span's start offset from the trace start, its
+    duration, and its self time (duration not covered by child spans - the
+    time spent in that hop itself rather than waiting on the next one).
+    Offsets across services rely on their wall clocks agreeing.
+    """
+    children: Dict[Optional[str], List[Dict[str, Any]]] = collections.defaultdict(list)
+    for span in spans:
+        children[span.get("parent_id")].append(span)
+    root = _root(spans)
+    t0 = min(span["start_unix_ns"] for span in spans)
+    lines = [f"trace {root['trace_id']}  {root['duration_ms']:.1f} ms"]
+
+    def self_ms(span: Dict[str, Any]) -> float:
+        # Union of child intervals, so concurrent children are not double-counted.
+        covered = 0.0
+        end = span["start_unix_ns"]
+        limit = span["start_unix_ns"] + span["duration_ms"] * 1e6
+        for child in sorted(children[span["span_id"]], key=lambda s: s["start_unix_ns"]):
+            start = max(child["start_unix_ns"], end)
+            stop = min(child["start_unix_ns"] + child["duration_ms"] * 1e6, limit)
+            if stop > start:
+                covered += stop - start
+                end = stop
+        return max(0.0, span["duration_ms"] - covered / 1e6)
+
+    def walk(span: Dict[str, Any], depth: int) -> None:
+        offset_ms = (span["start_unix_ns"] - t0) / 1e6
+        flag = "  !" if span.get("status") == "error" else ""
+        lines.append(
+            f"{offset_ms:>9.1f} {span['duration_ms']:>9.1f} {self_ms(span):>9.1f}  "
+            f"{'  ' * depth}{span.get('service', '?')}: {span['name']}{flag}"
+        )
+        for child in sorted(children[span["span_id"]], key=lambda s: s["start_unix_ns"]):
+            walk(child, depth + 1)
+
+    lines.append(f"{'start ms':>9} {'total ms':>9} {'self ms':>9}  span")
+    walk(root, 0)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Show the slowest exported traces with per-hop latency")
+    parser.add_argument("paths", nargs="+", help="span files written by SpanExporter (TRACE_EXPORT_PATH)")
+    parser.add_argument("--min-ms", type=float, default=0.0, help="only traces at least this slow")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--trace-id", help="show this trace (a trace_id from the logs) instead")
+    parser.add_argument("--request-id", help="show the trace of this request (a request_id from a response) instead")
+    args = parser.parse_args(argv)
+
+    traces = load_traces(args.paths)
+    if args.trace_id:
+        selected = [traces[args.trace_id]] if args.trace_id in traces else []
+    elif args.request_id:
+        spans = find_request(traces, args.request_id)
+        selected = [spans] if spans is not None else []
+    else:
+        selected = slow_traces(traces, args.min_ms, args.limit)
+    if not selected:
+        print("no matching traces")
+    else:
+        print("\n\n".join(format_trace(spans) for spans in selected))
+
+
+if __name__ == "__main__":
+    main()
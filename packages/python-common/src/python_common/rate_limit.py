@@ -0,0 +1,475 @@
+"""Token-bucket rate limiting with request and spend budgets"""
+
+import asyncio
+import hashlib
+import ipaddress
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from .cost_tracking import estimate_cost
+
+logger = logging.getLogger(__name__)
+
+# Budget dimensions tracked per key, in this order everywhere below.
+DIMENSIONS = ("requests", "tokens", "usd")
+WINDOW_S = 60
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` tokens, refilled continuously.
+
+    HOW IT WORKS:
+    - Tokens refill at `refill_per_s` and are capped at `capacity` (the burst size)
+    - A call is allowed if enough tokens are available; they are then removed
+    - `debit()` may push the balance below zero, which is how we charge for
+      work whose real cost is only known afterwards (e.g. output tokens)
+
+    There is no lock: the bucket is only touched from the event loop thread and
+    every update is a handful of float operations with no await in between.
+    """
+
+    __slots__ = ("capacity", "refill_per_s", "tokens", "updated")
+
+    def __init__(self, capacity: float, refill_per_s: float, now: float):
+        self.capacity = capacity
+        self.refill_per_s = refill_per_s
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_s)
+            self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """
+        Seconds until `amount` tokens are available (0.0 means available now).
+
+        A call costing more than the whole bucket only waits for a full
+        bucket; `debit()` then takes it below zero, so it is still paid for.
+        """
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_s
+
+    def debit(self, amount: float, now: float) -> None:
+        """Take `amount` tokens; a negative amount (a refund) never lifts the balance above capacity"""
+        self._refill(now)
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of a rate-limit check"""
+    allowed: bool
+    retry_after_s: float = 0.0
+    limit: Optional[str] = None  # which dimension rejected the call
+
+
+ALLOWED = RateLimitDecision(True)
+
+
+class _KeyState:
+    __slots__ = ("buckets", "window", "local", "remote_seen")
+
+    def __init__(self, buckets: List[Optional[TokenBucket]], window: int):
+        self.buckets = buckets
+        self.window = window
+        # Usage this replica has reported for the current window, and usage by
+        # other replicas that has already been debited from our buckets.
+        self.local = [0.0, 0.0, 0.0]
+        self.remote_seen = [0.0, 0.0, 0.0]
+
+
+class RateLimitBackend(ABC):
+    """
+    Shared store that lets several replicas agree on consumption.
+
+    Each replica periodically pushes what it consumed since the last sync and
+    gets back the global totals for the current window. Replicas never wait on
+    the backend in the request path; they only reconcile in the background.
+    """
+
+    @abstractmethod
+    async def sync(
+        self, window: int, deltas: Dict[str, Tuple[float, float, float]], keys: Set[str]
+    ) -> Dict[str, Tuple[float, float, float]]:
+        """Add `deltas` to the window's counters; return totals for `keys` and every delta key"""
+
+
+class InMemoryBackend(RateLimitBackend):
+    """Process-local backend (single replica, or several limiters in one process)"""
+
+    def __init__(self) -> None:
+        self._windows: Dict[int, Dict[str, List[float]]] = {}
+
+    async def sync(self, window, deltas, keys):
+        for old in [w for w in self._windows if w < window - 1]:
+            del self._windows[old]
+        counters = self._windows.setdefault(window, {})
+        for key, delta in deltas.items():
+            total = counters.setdefault(key, [0.0, 0.0, 0.0])
+            for i, value in enumerate(delta):
+                total[i] += value
+        return {key: tuple(counters[key]) for key in keys | deltas.keys() if key in counters}
+
+
+class RedisBackend(RateLimitBackend):
+    """
+    Redis-backed counters shared by all gateway replicas.
+
+    Requires the optional `redis` dependency (`pip install python-common[redis]`).
+    One pipelined round trip per sync; keys expire two windows after creation.
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise ImportError("RedisBackend requires the 'redis' package: pip install redis") from exc
+        self._redis = redis.from_url(url)
+        self.prefix = prefix
+
+    async def sync(self, window, deltas, keys):
+        keys = list(keys | deltas.keys())
+        if not keys:
+            return {}
+        pipe = self._redis.pipeline(transaction=False)
+        for key in keys:
+            redis_key = f"{self.prefix}:{window}:{key}"
+            for name, value in zip(DIMENSIONS, deltas.get(key, (0.0, 0.0, 0.0))):
+                # Adding 0.0 doubles as a read, so every key costs the same ops.
+                pipe.hincrbyfloat(redis_key, name, value)
+            pipe.expire(redis_key, WINDOW_S * 2)
+        results = await pipe.execute()
+        step = len(DIMENSIONS) + 1
+        return {
+            key: tuple(float(v) for v in results[i * step:i * step + len(DIMENSIONS)])
+            for i, key in enumerate(keys)
+        }
+
+
+class RateLimiter:
+    """
+    Per-key token buckets on request count, token volume and USD spend.
+
+    HOW IT WORKS:
+    - Every key (API key, user id, client IP) gets up to three buckets sized
+      from per-minute limits; a limit of 0 disables that dimension
+    - `check_request()` runs once per request (e.g. from middleware)
+    - `check_spend()` runs once the model and prompt are known, using an
+      estimate priced with MODEL_PRICING via `estimate_cost`
+    - `record_spend()` settles the estimate against the real usage afterwards
+    - With a shared backend, `start()` launches a background task that
+      reconciles usage with other replicas every `sync_interval_s`
+
+    The hot path never awaits, takes no locks and makes no network calls.
+
+    Args:
+        requests_per_minute: Request-count budget per key (0 disables)
+        tokens_per_minute: Token budget per key (0 disables)
+        usd_per_minute: Spend budget per key in USD (0 disables)
+        burst_multiplier: Bucket capacity as a multiple of the per-minute budget
+        backend: Optional shared backend for multi-replica agreement
+        sync_interval_s: How often to reconcile with the backend
+        max_keys: Upper bound on tracked keys (least recently used are dropped first)
+
+    Example:
+        >>> limiter = RateLimiter(requests_per_minute=100, usd_per_minute=0.50)
+        >>> limiter.check_request("user-1").allowed
+        True
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        usd_per_minute: float = 0,
+        burst_multiplier: float = 1.0,
+        backend: Optional[RateLimitBackend] = None,
+        sync_interval_s: float = 1.0,
+        max_keys: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limits = (float(requests_per_minute), float(tokens_per_minute), float(usd_per_minute))
+        self.burst_multiplier = burst_multiplier
+        self.backend = backend
+        self.sync_interval_s = sync_interval_s
+        self.max_keys = max_keys
+        self.clock = clock
+        self._keys: "OrderedDict[str, _KeyState]" = OrderedDict()
+        self._pending: Dict[str, List[float]] = {}
+        # Keys seen in the current window; their global totals are fetched on sync.
+        self._active: Set[str] = set()
+        self._window = int(time.time()) // WINDOW_S
+        self._task: Optional[asyncio.Task] = None
+        self.rejected = {name: 0 for name in DIMENSIONS}
+
+    @property
+    def enabled(self) -> bool:
+        return any(self.limits)
+
+    def _state(self, key: str, now: float) -> _KeyState:
+        state = self._keys.get(key)
+        if state is not None:
+            self._keys.move_to_end(key)
+        else:
+            if len(self._keys) >= self.max_keys:
+                # Dropping a key only resets it to a full bucket (lenient).
+                self._keys.popitem(last=False)
+            buckets = [
+                TokenBucket(limit * self.burst_multiplier, limit / WINDOW_S, now) if limit else None
+                for limit in self.limits
+            ]
+            state = self._keys[key] = _KeyState(buckets, self._window)
+        if self.backend is not None:
+            self._active.add(key)
+        return state
+
+    def _consume(self, key: str, amounts: Tuple[float, float, float]) -> RateLimitDecision:
+        now = self.clock()
+        state = self._state(key, now)
+        for i, amount in enumerate(amounts):
+            bucket = state.buckets[i]
+            if bucket is None or not amount:
+                continue
+            wait = bucket.wait_time(amount, now)
+            if wait:
+                self.rejected[DIMENSIONS[i]] += 1
+                return RateLimitDecision(False, wait, DIMENSIONS[i])
+        self._debit(key, state, amounts, now)
+        return ALLOWED
+
+    def _debit(self, key: str, state: _KeyState, amounts: Tuple[float, float, float], now: float) -> None:
+        for i, amount in enumerate(amounts):
+            if amount and state.buckets[i] is not None:
+                state.buckets[i].debit(amount, now)
+        if self.backend is not None:
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = self._pending[key] = [0.0, 0.0, 0.0]
+            for i, amount in enumerate(amounts):
+                pending[i] += amount
+
+    def check_request(self, key: str) -> RateLimitDecision:
+        """Take one request from `key`'s request bucket"""
+        if not self.limits[0]:
+            return ALLOWED
+        return self._consume(key, (1.0, 0.0, 0.0))
+
+    def estimate(self, model: str, tokens_in: int, tokens_out: int) -> Tuple[float, float]:
+        """(tokens, usd) for a call, priced from MODEL_PRICING"""
+        return float(tokens_in + tokens_out), estimate_cost(model, tokens_in, tokens_out)
+
+    def check_spend(self, key: str, model: str, tokens_in: int, max_tokens_out: int) -> RateLimitDecision:
+        """Reserve the estimated token/USD cost of a call before it is made"""
+        if not (self.limits[1] or self.limits[2]):
+            return ALLOWED
+        tokens, usd = self.estimate(model, tokens_in, max_tokens_out)
+        return self._consume(key, (0.0, tokens, usd))
+
+    def record_spend(
+        self,
+        key: str,
+        model: str,
+        reserved_tokens_in: int,
+        reserved_tokens_out: int,
+        tokens_in: int,
+        tokens_out: int,
+    ) -> None:
+        """Settle a reservation from `check_spend` against actual usage (may refund)"""
+        if not (self.limits[1] or self.limits[2]):
+            return
+        reserved = self.estimate(model, reserved_tokens_in, reserved_tokens_out)
+        actual = self.estimate(model, tokens_in, tokens_out)
+        now = self.clock()
+        self._debit(key, self._state(key, now), (0.0, actual[0] - reserved[0], actual[1] - reserved[1]), now)
+
+    async def sync_once(self) -> None:
+        """Push local usage to the backend and debit what other replicas consumed"""
+        if self.backend is None:
+            return
+        window = int(time.time()) // WINDOW_S
+        if window != self._window:
+            self._window = window
+            self._active = set()
+        deltas, self._pending = self._pending, {}
+        self._active |= deltas.keys()
+        try:
+            totals = await self.backend.sync(window, {k: tuple(v) for k, v in deltas.items()}, set(self._active))
+        except Exception as exc:
+            logger.warning("Rate limit backend sync failed: %s", exc)
+            # Keep the usage so it is reported on the next attempt.
+            for key, delta in deltas.items():
+                pending = self._pending.setdefault(key, [0.0, 0.0, 0.0])
+                for i, value in enumerate(delta):
+                    pending[i] += value
+            return
+        now = self.clock()
+        for n, (key, total) in enumerate(totals.items()):
+            if n and n % 1000 == 0:
+                # Let requests through between slices of a large reconciliation.
+                await asyncio.sleep(0)
+                now = self.clock()
+            state = self._state(key, now)
+            if state.window != window:
+                state.window = window
+                state.local = [0.0, 0.0, 0.0]
+                state.remote_seen = [0.0, 0.0, 0.0]
+            delta = deltas.get(key, (0.0, 0.0, 0.0))
+            for i in range(len(DIMENSIONS)):
+                state.local[i] += delta[i]
+                remote = total[i] - state.local[i]
+                new_remote = remote - state.remote_seen[i]
+                if new_remote > 0 and state.buckets[i] is not None:
+                    state.buckets[i].debit(new_remote, now)
+                    state.remote_seen[i] = remote
+
+    async def _sync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval_s)
+            await self.sync_once()
+
+    async def start(self) -> None:
+        """Start background reconciliation (no-op without a backend)"""
+        if self.backend is not None and self._task is None:
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.sync_once()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "limits_per_minute": dict(zip(DIMENSIONS, self.limits)),
+            "tracked_keys": len(self._keys),
+            "rejected": dict(self.rejected),
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+        }
+
+
+def default_key(scope: Dict[str, Any]) -> str:
+    """
+    Identify the caller of an ASGI request for rate limiting: the client IP.
+
+    Headers such as `X-API-Key` or `Authorization` are not used - nothing
+    here authenticates them, so a caller could rotate them to get a fresh
+    bucket per request. Behind an authenticating proxy, use `header_key`.
+    """
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+def header_key(header: str) -> Callable[[Dict[str, Any]], str]:
+    """
+    Key callers on a header set by an authenticating proxy (e.g. `X-User-Id`).
+
+    Only use this when the proxy overwrites the header on every request. The
+    value is hashed, so credentials never end up in memory dumps or in
+    backend key names. Requests without the header fall back to the client IP.
+    """
+    name = header.lower().encode("latin-1")
+
+    def key(scope: Dict[str, Any]) -> str:
+        for header_name, value in scope.get("headers") or ():
+            if header_name == name and value:
+                return "id:" + hashlib.sha256(value).hexdigest()[:32]
+        return default_key(scope)
+
+    return key
+
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def parse_networks(value: str) -> Tuple[Network, ...]:
+    """Parse "10.0.0.0/8,127.0.0.1" into networks (a bare address is a /32 or /128)"""
+    return tuple(ipaddress.ip_network(part.strip(), strict=False) for part in value.split(",") if part.strip())
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware enforcing `RateLimiter.check_request` on HTTP requests.
+
+    Rejected requests get a 429 with a `Retry-After` header and an
+    ErrorResponse-shaped JSON body. The caller's key is stored in
+    `request.state.rate_limit_key` so handlers can apply spend budgets.
+
+    Args:
+        app: Wrapped ASGI application
+        limiter: Shared RateLimiter instance
+        key_func: Maps the ASGI scope to a caller key (default: `default_key`)
+        exempt_paths: Paths that are never limited (health checks, metrics scrapes)
+        exempt_clients: Client networks that are never limited (internal services)
+    """
+
+    def __init__(
+        self,
+        app: Callable[..., Awaitable[None]],
+        limiter: RateLimiter,
+        key_func: Callable[[Dict[str, Any]], str] = default_key,
+        exempt_paths: Tuple[str, ...] = ("/health", "/metrics"),
+        exempt_clients: Sequence[Network] = (),
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.key_func = key_func
+        self.exempt_paths = exempt_paths
+        self.exempt_clients = tuple(exempt_clients)
+
+    def _exempt_client(self, scope: Dict[str, Any]) -> bool:
+        client = scope.get("client")
+        if not self.exempt_clients or not client:
+            return False
+        try:
+            address = ipaddress.ip_address(client[0])
+        except ValueError:
+            return False
+        return any(address in network for network in self.exempt_clients)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not self.limiter.enabled
+            or scope["path"].startswith(self.exempt_paths)
+            or self._exempt_client(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+        key = self.key_func(scope)
+        scope.setdefault("state", {})["rate_limit_key"] = key
+        decision = self.limiter.check_request(key)
+        if decision.allowed:
+            await self.app(scope, receive, send)
+            return
+        body = json.dumps({
+            "error": "Rate limit exceeded",
+            "request_id": None,
+            "details": {"limit": decision.limit, "retry_after_s": round(decision.retry_after_s, 3)},
+        }).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", str(max(1, round(decision.retry_after_s))).encode("ascii")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
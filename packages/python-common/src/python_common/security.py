@@ -1,8 +1,10 @@
 """Security utilities for input sanitization and validation"""
 
-import re
+import bisect
 import json
-from typing import Optional, Tuple
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 
 def sanitize_input(text: str) -> str:
@@ -12,34 +14,159 @@ def sanitize_input(text: str) -> str:
     return text.strip()
 
 
+@dataclass(frozen=True)
+class InjectionRule:
+    """A named injection pattern, matched against lowercased text.
+
+    `prefixes` are literals that every match starts with. A rule whose
+    prefixes are all absent is skipped without running its regex, and the
+    regex search starts at the first prefix occurrence. Leave it empty to
+    always run the regex.
+    """
+
+    name: str
+    pattern: str
+    prefixes: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class InjectionMatch:
+    rule: str
+    matched: str  # lowercased excerpt
+
+
+DEFAULT_RULES: Tuple[InjectionRule, ...] = (
+    InjectionRule("ignore_instructions", r'ignore\s+(?:previous|all|above)\s+instructions?', ("ignore",)),
+    InjectionRule("forget_previous", r'forget\s+(?:previous|all|above)', ("forget",)),
+    InjectionRule("you_are_now", r'you\s+are\s+now', ("you",)),
+    InjectionRule("act_as_if", r'act\s+as\s+if', ("act",)),
+    InjectionRule("pretend_to_be", r'pretend\s+to\s+be', ("pretend",)),
+    InjectionRule("reset_conversation", r'reset\s+(?:the\s+)?conversation', ("reset",)),
+    InjectionRule("disregard_instructions", r'disregard\s+(?:all|previous|above)\s+instructions?', ("disregard",)),
+    InjectionRule(
+        "override_instructions",
+        r'(?:replace|override|bypass|jailbreak).{0,15}instructions?',
+        ("replace", "override", "bypass", "jailbreak"),
+    ),
+    InjectionRule("assume_role", r'assume\s+the\s+role\s+of', ("assume",)),
+    InjectionRule("remove_filters", r'remove\s+all\s+filters', ("remove",)),
+    InjectionRule("template_markers", r'###|\{prompt\}|\[instruction\]', ("###", "{prompt}", "[instruction]")),
+    InjectionRule("from_now_on", r'from\s+now\s+on[, ]*\s*you\s+(?:must|shall)', ("from",)),
+    InjectionRule("ignore_rules", r'ignore\s+your\s+previous\s+(?:rules|guidelines|directives)', ("ignore",)),
+    InjectionRule("new_instructions", r'these\s+are\s+your\s+new\s+instructions', ("these",)),
+    InjectionRule("new_rules", r'new\s+set\s+of\s+rules\s+for\s+you', ("new",)),
+    InjectionRule("forget_everything", r'forget\s+everything\s+you\s+have\s+been\s+told', ("forget",)),
+    InjectionRule("ignore_system", r'ignore\s+the\s+(?:system|safety)\s+instructions?', ("ignore",)),
+    InjectionRule("do_not_follow", r'you\s+must\s+not\s+follow\s+any\s+previous\s+instructions', ("you",)),
+    # \b(do...|dan)\b, written to start with a literal so the regex engine can skip ahead to each "d".
+    InjectionRule("dan", r'd(?<!\wd)(?:o[-\s]?anything[-\s]?now|an)\b', ("do", "dan")),
+)
+
+
+def load_rules(path: str) -> List[InjectionRule]:
+    """Rules from a JSON file: ``[{"name": ..., "pattern": ..., "prefixes": [...]}, ...]``"""
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    return [InjectionRule(item["name"], item["pattern"], tuple(item.get("prefixes", ()))) for item in raw]
+
+
+class InjectionScanner:
+    """Precompiled injection rule set.
+
+    Text is lowercased once per scan. Each prefix literal is searched for at
+    most once, and only rules with a prefix present run their regex (from
+    that prefix on). The first rule in rule-set order that matches is
+    reported.
+    """
+
+    def __init__(self, rules: Iterable[InjectionRule] = DEFAULT_RULES):
+        self.rules: Tuple[InjectionRule, ...] = tuple(rules)
+        names = [rule.name for rule in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError("injection rule names must be unique")
+        self._compiled: List[Tuple[str, "re.Pattern[str]", Tuple[str, ...]]] = []
+        for rule in self.rules:
+            try:
+                regex = re.compile(rule.pattern)
+            except re.error as exc:
+                raise ValueError(f"injection rule {rule.name!r}: {exc}") from exc
+            self._compiled.append((rule.name, regex, tuple(prefix.lower() for prefix in rule.prefixes)))
+
+    def extended(self, rules: Iterable[InjectionRule]) -> "InjectionScanner":
+        """A new scanner with `rules` appended (lowest priority)"""
+        return InjectionScanner(self.rules + tuple(rules))
+
+    @staticmethod
+    def _start(text: str, prefixes: Tuple[str, ...], found: Dict[str, int]) -> int:
+        """Where the rule's regex search starts: its first prefix occurrence, -1 if none (0 without prefixes)"""
+        if not prefixes:
+            return 0
+        start = -1
+        for prefix in prefixes:
+            if prefix not in found:
+                found[prefix] = text.find(prefix)
+            position = found[prefix]
+            if position >= 0 and (start < 0 or position < start):
+                start = position
+        return start
+
+    def scan(self, text: str) -> Optional[InjectionMatch]:
+        """First matching rule, or None"""
+        lowered = text.lower()
+        found: Dict[str, int] = {}
+        for name, regex, prefixes in self._compiled:
+            position = self._start(lowered, prefixes, found)
+            if position < 0:
+                continue
+            match = regex.search(lowered, position)
+            if match is not None:
+                return InjectionMatch(name, match.group())
+        return None
+
+    def scan_batch(self, texts: Sequence[str]) -> List[Optional[InjectionMatch]]:
+        """First matching rule per text, in one pass over all of them"""
+        results: List[Optional[InjectionMatch]] = [None] * len(texts)
+        if not texts:
+            return results
+        # Texts are scanned joined; matches spanning a boundary are discarded.
+        lowered = [text.lower() for text in texts]
+        joined = "\n".join(lowered)
+        starts: List[int] = []
+        position = 0
+        for text in lowered:
+            starts.append(position)
+            position += len(text) + 1
+        found: Dict[str, int] = {}
+        pending = len(texts)
+
+        for name, regex, prefixes in self._compiled:
+            position = self._start(joined, prefixes, found)
+            while position >= 0:
+                match = regex.search(joined, position)
+                if match is None:
+                    break
+                index = bisect.bisect_right(starts, match.start()) - 1
+                end = starts[index + 1] - 1 if index + 1 < len(starts) else len(joined)
+                if match.end() > end:
+                    position = match.start() + 1
+                    continue
+                if results[index] is None:
+                    results[index] = InjectionMatch(name, match.group())
+                    pending -= 1
+                    if not pending:
+                        return results
+                if index + 1 == len(starts):
+                    break
+                position = starts[index + 1]
+        return results
+
+
+_default_scanner = InjectionScanner()
+
+
 def detect_injection(text: str) -> bool:
     """Detect common prompt injection patterns. Returns True if suspicious pattern found."""
-    patterns = [
-        r'ignore\s+(previous|all|above)\s+instructions?',
-        r'forget\s+(previous|all|above)',
-        r'you\s+are\s+now',
-        r'act\s+as\s+if',
-        r'pretend\s+to\s+be',
-        r'reset\s+(the\s+)?conversation',
-        r'disregard\s+(all|previous|above)\s+instructions?',
-        r'((replace|override|bypass|jailbreak).{0,15}instructions?)',
-        r'assume\s+the\s+role\s+of',
-        r'remove\s+all\s+filters',
-        r'(###|\{prompt\}|\[INSTRUCTION\])',
-        r'from\s+now\s+on[, ]*\s*you\s+(must|shall)',
-        r'ignore\s+your\s+previous\s+(rules|guidelines|directives)',
-        r'these\s+are\s+your\s+new\s+instructions',
-        r'new\s+set\s+of\s+rules\s+for\s+you',
-        r'forget\s+everything\s+you\s+have\s+been\s+told',
-        r'ignore\s+the\s+(system|safety)\s+instructions?',
-        r'you\s+must\s+not\s+follow\s+any\s+previous\s+instructions',
-        r'\b(do[-\s]?anything[-\s]?now|dan)\b',
-    ]
-    text_lower = text.lower()
-    for pattern in patterns:
-        if re.search(pattern, text_lower):
-            return True
-    return False
+    return _default_scanner.scan(text) is not None
 
 
 def validate_output(text: str, schema: Optional[dict] = None) -> Tuple[bool, str]:
@@ -86,3 +213,377 @@ def repair_json(text: str) -> str:
     text = re.sub(r',\s*}', '}', text)
     text = re.sub(r',\s*]', ']', text)
     return text
+
+
+_JSON_TYPES = {"object", "array", "string", "number", "integer", "boolean", "null"}
+_JSON_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?')
+_STRING_STOP = re.compile(r'["\\\x00-\x1f]')
+_NUMBER_TAIL = re.compile(r"[0-9+\-.eE]*")
+_WHITESPACE = frozenset(" \t\n\r")
+_LITERALS = {"t": ("true", True), "f": ("false", False), "n": ("null", None)}
+
+
+class CompiledSchema:
+    """A JSON Schema subset, compiled for `StreamingJsonValidator`.
+
+    Supported keywords: ``type`` (a name or list of names), ``properties``,
+    ``required``, ``additionalProperties`` (bool or schema), ``items``,
+    ``minItems`` / ``maxItems``, ``enum`` and ``const``. Other keywords
+    (``description``, ``format``, ...) are accepted and not enforced.
+    """
+
+    __slots__ = ("types", "properties", "required", "additional", "items", "min_items", "max_items", "enum")
+
+    def __init__(self, schema: Dict[str, Any]):
+        if not isinstance(schema, dict):
+            raise ValueError(f"schema must be an object, not {type(schema).__name__}")
+        types = schema.get("type")
+        if isinstance(types, str):
+            types = [types]
+        if types is not None and not set(types) <= _JSON_TYPES:
+            raise ValueError(f"unsupported schema type {types!r}")
+        self.types = frozenset(types) if types is not None else None
+        self.properties = {name: CompiledSchema(sub) for name, sub in (schema.get("properties") or {}).items()}
+        self.required = frozenset(schema.get("required") or ())
+        additional = schema.get("additionalProperties", True)
+        self.additional = CompiledSchema(additional) if isinstance(additional, dict) else bool(additional)
+        self.items = CompiledSchema(schema["items"]) if isinstance(schema.get("items"), dict) else None
+        self.min_items = schema.get("minItems")
+        self.max_items = schema.get("maxItems")
+        enum = [schema["const"]] if "const" in schema else schema.get("enum")
+        self.enum = list(enum) if enum is not None else None
+
+    def allows(self, json_type: str) -> bool:
+        if self.types is None or json_type in self.types:
+            return True
+        return json_type == "integer" and "number" in self.types
+
+    def child(self, key: str) -> Optional["CompiledSchema"]:
+        """Schema for property `key`; None when it may be anything"""
+        schema = self.properties.get(key)
+        if schema is not None:
+            return schema
+        return self.additional if isinstance(self.additional, CompiledSchema) else None
+
+
+def _json_equal(a: Any, b: Any) -> bool:
+    """Equality by JSON type as well as value: ``true`` is not ``1``, ``1`` is ``1.0``"""
+    if isinstance(a, bool) or isinstance(b, bool) or a is None or b is None:
+        return type(a) is type(b) and a == b
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a == b
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[key], b[key]) for key in a)
+    return type(a) is type(b) and a == b
+
+
+def compile_schema(schema: Dict[str, Any]) -> CompiledSchema:
+    """Compile a JSON Schema (subset) once for reuse across streams"""
+    return CompiledSchema(schema)
+
+
+class _Container:
+    __slots__ = ("value", "schema", "key", "keys")
+
+    def __init__(self, value: Any, schema: Optional[CompiledSchema]):
+        self.value = value
+        self.schema = schema
+        self.key: Optional[str] = None  # object: the member being parsed
+        self.keys: set = set()
+
+
+# Parser states
+_VALUE, _KEY_OR_END, _KEY, _COLON, _MEMBER_END, _ITEM_OR_END, _ITEM_END, _STRING, _NUMBER, _LITERAL, _DONE = range(11)
+
+
+class StreamingJsonValidator:
+    """Incremental JSON parser that validates against a schema as text arrives.
+
+    `feed` takes chunks of any size (split anywhere, even inside a string or
+    escape) and returns False as soon as the text can no longer become a
+    valid document: a syntax error, a value of the wrong type, a property
+    the schema forbids, a string that is no longer a prefix of any enum
+    member, or too many array items. Missing required properties are
+    reported when their object closes. `close` finishes the document and
+    the parsed value is left on `value`, so no second parse is needed.
+    """
+
+    def __init__(self, schema: Optional[Any] = None, max_depth: int = 64):
+        if isinstance(schema, dict):
+            schema = CompiledSchema(schema)
+        self.schema: Optional[CompiledSchema] = schema
+        self.max_depth = max_depth
+        self.error: Optional[str] = None
+        self.value: Any = None
+        self.consumed = 0  # characters accepted before the error, if any
+        self._stack: List[_Container] = []
+        self._state = _VALUE
+        self._is_key = False
+        self._parts: List[str] = []  # string / number / literal text so far
+        self._escape = False
+        self._literal = ""
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE and self.error is None
+
+    def _path(self) -> str:
+        path = "$"
+        for container in self._stack:
+            if isinstance(container.value, list):
+                path += f"[{len(container.value)}]"
+            elif container.key is not None:
+                path += f".{container.key}"
+        return path
+
+    def _fail(self, message: str) -> bool:
+        self.error = f"{self._path()}: {message}"
+        return False
+
+    def _schema_here(self) -> Optional[CompiledSchema]:
+        """Schema of the value about to start"""
+        if not self._stack:
+            return self.schema
+        parent = self._stack[-1]
+        if parent.schema is None:
+            return None
+        if isinstance(parent.value, list):
+            return parent.schema.items
+        return parent.schema.child(parent.key)
+
+    def _start(self, json_type: str) -> bool:
+        schema = self._schema_here()
+        # Whether a number is an integer is only known once it ends.
+        if schema is not None and not (schema.allows(json_type) or json_type == "number" and schema.allows("integer")):
+            return self._fail(f"expected {' or '.join(sorted(schema.types))}, got {json_type}")
+        if self._stack and isinstance(self._stack[-1].value, list):
+            parent = self._stack[-1].schema
+            if parent is not None and parent.max_items is not None and len(self._stack[-1].value) >= parent.max_items:
+                return self._fail(f"more than {parent.max_items} items")
+        if json_type in ("object", "array"):
+            if len(self._stack) >= self.max_depth:
+                return self._fail(f"nesting deeper than {self.max_depth}")
+            self._stack.append(_Container({} if json_type == "object" else [], schema))
+            self._state = _KEY_OR_END if json_type == "object" else _ITEM_OR_END
+        return True
+
+    def _complete(self, value: Any, json_type: str) -> bool:
+        """A value ended: check it against its schema and attach it to its parent"""
+        schema = self._schema_here()
+        if schema is not None:
+            if json_type == "number" and (isinstance(value, int) or value.is_integer()):
+                json_type = "integer"
+            if not schema.allows(json_type):
+                return self._fail(f"expected {' or '.join(sorted(schema.types))}, got {json_type}")
+            if schema.enum is not None and not any(_json_equal(value, member) for member in schema.enum):
+                return self._fail(f"{value!r} is not one of {schema.enum!r}")
+        if not self._stack:
+            self.value = value
+            self._state = _DONE
+            return True
+        parent = self._stack[-1]
+        if isinstance(parent.value, list):
+            parent.value.append(value)
+            self._state = _ITEM_END
+        else:
+            parent.value[parent.key] = value
+            self._state = _MEMBER_END
+        return True
+
+    def _close_container(self) -> bool:
+        container = self._stack.pop()
+        schema = container.schema
+        if schema is not None:
+            if isinstance(container.value, dict):
+                missing = schema.required - container.value.keys()
+                if missing:
+                    return self._fail(f"missing required {', '.join(sorted(missing))}")
+            elif schema.min_items is not None and len(container.value) < schema.min_items:
+                return self._fail(f"fewer than {schema.min_items} items")
+        return self._complete(container.value, "object" if isinstance(container.value, dict) else "array")
+
+    def _key(self, key: str) -> bool:
+        container = self._stack[-1]
+        if key in container.keys:
+            return self._fail(f"duplicate key {key!r}")
+        container.keys.add(key)
+        container.key = key
+        schema = container.schema
+        if schema is not None and schema.additional is False and key not in schema.properties:
+            return self._fail("property not allowed")
+        self._state = _COLON
+        return True
+
+    def _enum_prefix_ok(self) -> bool:
+        """Whether the unfinished string can still become an enum member"""
+        schema = None if self._is_key else self._schema_here()
+        if schema is None or schema.enum is None:
+            return True
+        partial = "".join(self._parts)
+        if "\\" in partial:
+            return True  # escapes are only decoded once the string ends
+        return any(isinstance(member, str) and member.startswith(partial) for member in schema.enum)
+
+    def _scan_string(self, chunk: str, i: int) -> int:
+        n = len(chunk)
+        while i < n:
+            if self._escape:
+                self._parts.append(chunk[i])
+                self._escape = False
+                i += 1
+                continue
+            match = _STRING_STOP.search(chunk, i)
+            if match is None:
+                self._parts.append(chunk[i:])
+                return n
+            j = match.start()
+            if j > i:
+                self._parts.append(chunk[i:j])
+            c = chunk[j]
+            if c == "\\":
+                self._parts.append(c)
+                self._escape = True
+                i = j + 1
+                continue
+            if c != '"':
+                self._fail("control character in string")
+                return j
+            raw = "".join(self._parts)
+            self._parts = []
+            if "\\" in raw:
+                try:
+                    raw = json.loads(f'"{raw}"')
+                except ValueError:
+                    self._fail("invalid escape in string")
+                    return j
+            if self._is_key:
+                self._key(raw)
+            else:
+                self._complete(raw, "string")
+            return j + 1
+        return n
+
+    def _finish_number(self) -> bool:
+        text = "".join(self._parts)
+        self._parts = []
+        if not _JSON_NUMBER.fullmatch(text):
+            return self._fail(f"invalid number {text!r}")
+        if "." in text or "e" in text or "E" in text:
+            return self._complete(float(text), "number")
+        return self._complete(int(text), "number")
+
+    def feed(self, chunk: str) -> bool:
+        """Consume the next piece of text; False once the document cannot be valid"""
+        if self.error is not None:
+            return False
+        i, n = 0, len(chunk)
+        while i < n and self.error is None:
+            state = self._state
+            if state == _STRING:
+                i = self._scan_string(chunk, i)
+                if self.error is None and self._state == _STRING and not self._enum_prefix_ok():
+                    self._fail(f"{''.join(self._parts)!r}... cannot match any of {self._schema_here().enum!r}")
+                continue
+            c = chunk[i]
+            if state == _NUMBER:
+                end = _NUMBER_TAIL.match(chunk, i).end()
+                if end > i:
+                    self._parts.append(chunk[i:end])
+                    i = end
+                    continue
+                if not self._finish_number():
+                    break
+                continue
+            if state == _LITERAL:
+                self._parts.append(c)
+                sofar = "".join(self._parts)
+                word, value = _LITERALS[self._literal]
+                if not word.startswith(sofar):
+                    self._fail(f"invalid literal {sofar!r}")
+                    break
+                i += 1
+                if sofar == word:
+                    self._parts = []
+                    self._complete(value, "boolean" if value is not None else "null")
+                continue
+            if c in _WHITESPACE:
+                i += 1
+                continue
+            i += 1
+            if state == _VALUE or state == _ITEM_OR_END:
+                if state == _ITEM_OR_END and c == "]":
+                    self._close_container()
+                elif c == "{":
+                    self._start("object")
+                elif c == "[":
+                    self._start("array")
+                elif c == '"':
+                    if self._start("string"):
+                        self._state = _STRING
+                        self._is_key = False
+                elif c == "-" or c.isdigit():
+                    if self._start("number"):
+                        self._state = _NUMBER
+                        self._parts = [c]
+                elif c in _LITERALS:
+                    if self._start("boolean" if c != "n" else "null"):
+                        self._state = _LITERAL
+                        self._literal = c
+                        self._parts = [c]
+                else:
+                    self._fail(f"unexpected {c!r}")
+            elif state == _KEY_OR_END or state == _KEY:
+                if c == '"':
+                    self._state = _STRING
+                    self._is_key = True
+                elif c == "}" and state == _KEY_OR_END:
+                    self._close_container()
+                else:
+                    self._fail(f"expected a property name, got {c!r}")
+            elif state == _COLON:
+                if c == ":":
+                    self._state = _VALUE
+                else:
+                    self._fail(f"expected ':', got {c!r}")
+            elif state == _MEMBER_END:
+                if c == ",":
+                    self._stack[-1].key = None
+                    self._state = _KEY
+                elif c == "}":
+                    self._close_container()
+                else:
+                    self._fail(f"expected ',' or '}}', got {c!r}")
+            elif state == _ITEM_END:
+                if c == ",":
+                    self._state = _VALUE
+                elif c == "]":
+                    self._close_container()
+                else:
+                    self._fail(f"expected ',' or ']', got {c!r}")
+            else:  # _DONE
+                self._fail(f"unexpected {c!r} after the document")
+        if self.error is None:
+            self.consumed += n
+        else:
+            self.consumed += i
+        return self.error is None
+
+    def close(self) -> bool:
+        """End of input: True if a complete, valid document was received"""
+        if self.error is None and self._state == _NUMBER and not self._stack:
+            self._finish_number()
+        if self.error is None and self._state != _DONE:
+            self._fail("unexpected end of input")
+        return self.error is None
+
+
+def validate_json_stream(chunks: Iterable[str], schema: Optional[Any] = None) -> Tuple[bool, Any, Optional[str]]:
+    """Validate chunked JSON text, stopping at the first chunk that breaks it. Returns (valid, value, error)."""
+    validator = StreamingJsonValidator(schema)
+    for chunk in chunks:
+        if not validator.feed(chunk):
+            return False, None, validator.error
+    valid = validator.close()
+    return valid, validator.value if valid else None, validator.error
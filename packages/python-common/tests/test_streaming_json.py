@@ -0,0 +1,163 @@
+"""Tests for the incremental JSON validator in python_common.security."""
+
+import json
+
+import pytest
+
+from python_common.security import StreamingJsonValidator, compile_schema, validate_json_stream
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "mode": {"enum": ["fast", "faster", "safe"]},
+        "count": {"type": "integer"},
+        "tags": {"type": "array", "items": {"type": "string"}, "maxItems": 2},
+    },
+    "required": ["name"],
+    "additionalProperties": False,
+}
+
+DOCUMENT = '{"name": "caf\\u00e9 \\"x\\"\\n", "mode": "faster", "count": -12, "tags": ["a", "b"]}'
+
+
+def feed_all(chunks, schema=None):
+    validator = StreamingJsonValidator(schema)
+    for chunk in chunks:
+        if not validator.feed(chunk):
+            return validator
+    validator.close()
+    return validator
+
+
+def split_at(text, *cuts):
+    bounds = (0, *cuts, len(text))
+    return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(DOCUMENT)])
+def test_any_chunk_size_parses_like_json_loads(size):
+    chunks = [DOCUMENT[i:i + size] for i in range(0, len(DOCUMENT), size)]
+    validator = feed_all(chunks, SCHEMA)
+    assert validator.error is None
+    assert validator.done
+    assert validator.value == json.loads(DOCUMENT)
+
+
+def test_split_inside_escape():
+    text = '{"name": "a\\u00e9\\\\b"}'
+    for cut in range(1, len(text)):
+        validator = feed_all(split_at(text, cut), SCHEMA)
+        assert validator.error is None, cut
+        assert validator.value == {"name": "aé\\b"}
+
+
+def test_number_split_across_chunks():
+    validator = feed_all(["[1", "2.", "5e", "1]"])
+    assert validator.value == [125.0]
+
+
+def test_top_level_number_finished_by_close():
+    validator = feed_all(["4", "2"], {"type": "integer"})
+    assert validator.error is None
+    assert validator.value == 42
+
+
+def test_invalid_escape():
+    validator = feed_all(['{"name": "\\', 'q"}'], SCHEMA)
+    assert "invalid escape" in validator.error
+
+
+def test_control_character_in_string():
+    validator = feed_all(['{"name": "a\nb"}'], SCHEMA)
+    assert "control character" in validator.error
+
+
+def test_enum_prefix_kept_while_possible():
+    validator = StreamingJsonValidator(SCHEMA)
+    assert validator.feed('{"name": "n", "mode": "fa')
+    assert validator.feed("st")
+    assert validator.feed('er"}')
+    assert validator.close()
+    assert validator.value["mode"] == "faster"
+
+
+def test_enum_prefix_rejected_early():
+    validator = StreamingJsonValidator(SCHEMA)
+    assert validator.feed('{"name": "n", "mode": "f')
+    assert not validator.feed("r")
+    assert "cannot match" in validator.error
+    assert validator.error.startswith("$.mode")
+
+
+def test_enum_prefix_of_member_is_not_a_member():
+    validator = feed_all(['{"name": "n", "mode": "fas"}'], SCHEMA)
+    assert "is not one of" in validator.error
+
+
+def test_enum_with_escape_checked_when_string_ends():
+    validator = feed_all(['{"name": "n", "mode": "s\\u0061fe"}'], SCHEMA)
+    assert validator.error is None
+    assert validator.value["mode"] == "safe"
+
+
+@pytest.mark.parametrize("schema,text,valid", [
+    ({"enum": [1]}, "true", False),
+    ({"enum": [True]}, "1", False),
+    ({"const": 0}, "false", False),
+    ({"enum": [1]}, "1.0", True),
+    ({"enum": [[1]]}, "[true]", False),
+    ({"enum": [None, "x"]}, "null", True),
+])
+def test_enum_compares_json_type(schema, text, valid):
+    assert (feed_all([text], schema).error is None) is valid
+
+
+@pytest.mark.parametrize("text,message", [
+    ('{"name": 3}', "expected string, got number"),
+    ('{"name": "n", "count": 1.5}', "expected integer, got number"),
+    ('{"name": "n", "extra": 1}', "property not allowed"),
+    ('{"name": "n", "name": "m"}', "duplicate key"),
+    ('{"count": 1}', "missing required name"),
+    ('{"name": "n", "tags": ["a", "b", "c"]}', "more than 2 items"),
+    ('{"name": "n", "tags": [1]}', "expected string, got number"),
+    ('{"name": "n"', "unexpected end of input"),
+])
+def test_schema_failures(text, message):
+    validator = feed_all([text], SCHEMA)
+    assert validator.error is not None
+    assert message in validator.error
+
+
+def test_invalid_literal():
+    validator = feed_all(["[true, nul", "x]"])
+    assert validator.error == "$[1]: invalid literal 'nulx'"
+
+
+def test_failure_stops_further_feeding():
+    validator = StreamingJsonValidator(SCHEMA)
+    assert not validator.feed('{"name": 1')
+    error = validator.error
+    assert not validator.feed('"}')
+    assert validator.error == error
+
+
+def test_max_depth():
+    validator = feed_all(["[" * 5], None)
+    assert validator.error == "$[0][0][0][0][0]: unexpected end of input"
+    validator = StreamingJsonValidator(max_depth=3)
+    assert not validator.feed("[[[[")
+    assert "nesting deeper than 3" in validator.error
+
+
+def test_compiled_schema_is_reusable():
+    schema = compile_schema(SCHEMA)
+    for _ in range(2):
+        valid, value, error = validate_json_stream(split_at(DOCUMENT, 5, 30), schema)
+        assert valid, error
+        assert value == json.loads(DOCUMENT)
+
+
+def test_unsupported_schema_type():
+    with pytest.raises(ValueError):
+        compile_schema({"type": "tuple"})
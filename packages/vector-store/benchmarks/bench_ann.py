@@ -0,0 +1,108 @@
+"""Benchmark harness: recall@k vs QPS for the IVF index over synthetic datasets.
+
+For each dataset, builds an IVFVectorStore and sweeps nprobe, reporting
+recall@k against exact brute-force ground truth, single-query QPS and p50/p99
+latency. The exact NumpyVectorStore is the reference row. Use the output to
+pick an operating point (smallest nprobe meeting the recall target).
+
+Datasets:
+    clustered  Gaussian mixture (realistic: embeddings cluster by topic)
+    uniform    isotropic Gaussian (worst case for any partitioning index)
+
+Run from packages/vector-store (vector_store is importable once installed):
+
+    python benchmarks/bench_ann.py --size 100000 --dim 128 --nprobe 1 2 4 8 16 32 64
+"""
+
+import argparse
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from vector_store.ivf_store import IVFVectorStore
+from vector_store.numpy_store import NumpyVectorStore
+
+
+def make_dataset(kind: str, size: int, queries: int, dim: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    if kind == "clustered":
+        centers = rng.standard_normal((max(16, size // 500), dim), dtype=np.float32)
+        data = centers[rng.integers(0, len(centers), size)] + 0.35 * rng.standard_normal((size, dim), dtype=np.float32)
+        # Queries are perturbed data points, like a question near the passage that answers it.
+        picks = rng.integers(0, size, queries)
+        query = data[picks] + 0.2 * rng.standard_normal((queries, dim), dtype=np.float32)
+    else:
+        data = rng.standard_normal((size, dim), dtype=np.float32)
+        query = rng.standard_normal((queries, dim), dtype=np.float32)
+    return data, query
+
+
+def ground_truth(data: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    d = data / np.linalg.norm(data, axis=1, keepdims=True)
+    q = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    out = np.empty((len(q), k), dtype=np.int64)
+    for start in range(0, len(q), 64):
+        scores = q[start:start + 64] @ d.T
+        top = np.argpartition(-scores, k, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        out[start:start + 64] = np.take_along_axis(top, order, axis=1)
+    return out
+
+
+def measure(search: Callable[[np.ndarray], List[List[Dict]]], queries: np.ndarray, truth: np.ndarray, k: int) -> Dict[str, float]:
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = search(query[None, :])[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len({int(h["chunk_id"]) for h in result} & set(expected.tolist()))
+    latencies.sort()
+    return {
+        "recall": hits / (len(queries) * k),
+        "qps": 1000 * len(latencies) / sum(latencies),
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[max(0, int(len(latencies) * 0.99) - 1)],
+    }
+
+
+def report(label: str, m: Dict[str, float]) -> None:
+    print(f"  {label:<22} recall {m['recall']:.3f}  {m['qps']:9,.0f} q/s  p50 {m['p50']:7.2f} ms  p99 {m['p99']:7.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--datasets", nargs="+", default=["clustered", "uniform"])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=None, help="default ~4*sqrt(size)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    for kind in args.datasets:
+        data, queries = make_dataset(kind, args.size, args.queries, args.dim)
+        ids = [str(i) for i in range(len(data))]
+        truth = ground_truth(data, queries, args.k)
+        print(f"{kind}: {args.size:,} x {args.dim}, {args.queries} queries, recall@{args.k}")
+
+        flat = NumpyVectorStore(dim=args.dim)
+        flat.add_vectors(ids, data)
+        report("exact (numpy)", measure(lambda q: flat.search_vectors(q, args.k), queries, truth, args.k))
+
+        ivf = IVFVectorStore(dim=args.dim, nlist=args.nlist, train_size=args.size)
+        start = time.perf_counter()
+        for offset in range(0, len(data), 100_000):
+            ivf.add_vectors(ids[offset:offset + 100_000], data[offset:offset + 100_000])
+        nlist = len(ivf._collections["default"].lists)
+        print(f"  ivf build (insert + k-means, nlist={nlist}): {time.perf_counter() - start:.1f} s")
+        for nprobe in args.nprobe:
+            if nprobe > nlist:
+                break
+            report(f"ivf nprobe={nprobe}", measure(
+                lambda q: ivf.search_vectors(q, args.k, nprobe=nprobe), queries, truth, args.k))
+
+
+if __name__ == "__main__":
+    main()
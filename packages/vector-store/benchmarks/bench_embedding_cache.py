@@ -0,0 +1,127 @@
+"""Benchmark harness: query embedding cache on a skewed (Zipf) query stream.
+
+Real query traffic repeats itself: a few popular questions dominate. This
+replays a Zipf-distributed stream over a pool of distinct questions (with
+random whitespace / spacing variants, which normalize to the same key)
+through a NumpyVectorStore whose query embedding costs `--embed-ms` per
+call (a stand-in for a model or an embeddings API round trip), and reports:
+
+    no cache     every query is embedded
+    memory       CachedEmbedding over an in-process LRU of `--cache-mb`
+    memory+disk  the same LRU with a SQLite tier behind it
+    disk warm    a new, empty memory tier over the SQLite file the previous
+                 run filled (a restart without a cold cache)
+
+with hit rate, p50/p99 query latency and queries per second.
+
+Run from packages/vector-store (vector_store is importable once installed):
+
+    python benchmarks/bench_embedding_cache.py --queries 5000 --pool 2000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from bench_hybrid import WORDS, percentile
+from vector_store.embedding_cache import CachedEmbedding, EmbeddingCache
+from vector_store.embeddings import HashingEmbedding
+from vector_store.numpy_store import NumpyVectorStore
+
+
+class SlowEmbedding:
+    """HashingEmbedding plus a fixed per-call delay"""
+
+    def __init__(self, dim: int, delay_ms: float):
+        self.inner = HashingEmbedding(dim)
+        self.dim = dim
+        self.delay = delay_ms / 1000
+
+    def __call__(self, input: Sequence[str]) -> np.ndarray:
+        time.sleep(self.delay)
+        return self.inner(input)
+
+
+def make_stream(pool: int, queries: int, zipf: float, seed: int = 1) -> List[str]:
+    words = np.array(WORDS)
+    pool_rng = np.random.default_rng(0)
+    questions = [" ".join(words[pool_rng.integers(0, len(words), 8)]) for _ in range(pool)]
+    rng = np.random.default_rng(seed)
+    picks = np.minimum(rng.zipf(zipf, queries) - 1, pool - 1)
+    stream = []
+    for pick in picks.tolist():
+        text, variant = questions[pick], rng.random()
+        if variant < 0.2:
+            text = f"  {text}"
+        elif variant < 0.4:
+            text = text.replace(" ", "  ", 1)
+        stream.append(text)
+    return stream
+
+
+def run(store: NumpyVectorStore, stream: List[str], k: int, cache: Optional[EmbeddingCache]) -> Dict[str, Any]:
+    latencies = []
+    start = time.perf_counter()
+    for text in stream:
+        began = time.perf_counter()
+        store.query(text, k)
+        latencies.append((time.perf_counter() - began) * 1000)
+    elapsed = time.perf_counter() - start
+    stats = cache.stats() if cache is not None else {"hit_rate": 0.0}
+    return {
+        "hit_rate": stats["hit_rate"],
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "qps": len(stream) / elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--pool", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--zipf", type=float, default=1.2)
+    parser.add_argument("--embed-ms", type=float, default=5.0)
+    parser.add_argument("--cache-mb", type=float, default=1.0)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    words = np.array(WORDS)
+    docs = [(" ".join(words[rng.integers(0, len(words), 30)]), {"chunk_id": str(i)}) for i in range(args.docs)]
+    embedding = SlowEmbedding(args.dim, args.embed_ms)
+    store = NumpyVectorStore(HashingEmbedding(args.dim))
+    store.ingest_many(docs)
+    stream = make_stream(args.pool, args.queries, args.zipf)
+    print(f"{args.docs:,} docs, {args.queries:,} queries over {args.pool:,} distinct (zipf {args.zipf}), "
+          f"embed {args.embed_ms} ms/call, cache {args.cache_mb} MB")
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "embeddings.sqlite")
+        max_bytes = int(args.cache_mb * 2**20)
+        runs = [("no cache", None), ("memory", EmbeddingCache(max_bytes)), ("memory+disk", EmbeddingCache(max_bytes, path))]
+        for label, cache in runs:
+            store.query_embedding_function = CachedEmbedding(embedding, "bench", cache) if cache is not None else embedding
+            result = run(store, stream, args.k, cache)
+            print(f"  {label:<12} hit {result['hit_rate']:.3f}  p50 {result['p50']:6.2f} ms  "
+                  f"p99 {result['p99']:6.2f} ms  {result['qps']:8.0f} qps")
+        runs[-1][1].close()
+
+        cache = EmbeddingCache(max_bytes, path)
+        store.query_embedding_function = CachedEmbedding(embedding, "bench", cache)
+        # Same questions, new order.
+        result = run(store, make_stream(args.pool, args.queries, args.zipf, seed=2), args.k, cache)
+        stats = cache.stats()
+        print(f"  {'disk warm':<12} hit {result['hit_rate']:.3f}  p50 {result['p50']:6.2f} ms  "
+              f"p99 {result['p99']:6.2f} ms  {result['qps']:8.0f} qps  ({stats['disk_hits']} from disk)")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
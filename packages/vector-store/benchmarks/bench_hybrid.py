@@ -0,0 +1,86 @@
+"""Benchmark harness: vector vs BM25 keyword vs hybrid (RRF) retrieval.
+
+Builds a synthetic support-ticket corpus where every document carries a
+unique identifier (error code + SKU) among generic prose, then asks
+questions that mention one identifier. Reports, per query mode, the hit
+rate of the identifier's document within top-k and single-query latency
+(p50/p99), plus the BM25 index build time.
+
+Run from packages/vector-store (vector_store is importable once installed):
+
+    python benchmarks/bench_hybrid.py --size 100000 --queries 500
+"""
+
+import argparse
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from vector_store.bm25 import QUERY_MODES
+from vector_store.numpy_store import NumpyVectorStore
+
+WORDS = (
+    "order payment checkout refund invoice customer account shipping delivery card failed timeout "
+    "retry warehouse stock price discount coupon cart session login password email address update "
+    "cancel return label carrier tracking gateway declined pending settled batch export report"
+).split()
+
+
+def make_corpus(size: int, seed: int = 0) -> List[str]:
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS)
+    docs = []
+    for i in range(size):
+        prose = " ".join(words[rng.integers(0, len(words), 40)])
+        docs.append(f"{prose} error E{i:06d}-{rng.integers(100, 999)} sku SKU-{i:06d} {prose[:60]}")
+    return docs
+
+
+def percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    docs = make_corpus(args.size)
+    store = NumpyVectorStore(dim=args.dim)
+    start = time.perf_counter()
+    store.ingest_many([(text, {"chunk_id": str(i)}) for i, text in enumerate(docs)])
+    print(f"{args.size:,} docs, dim {args.dim}: ingest {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    store.query("warm", 1, mode="keyword")
+    print(f"bm25 index build (first keyword query): {time.perf_counter() - start:.2f} s")
+
+    rng = np.random.default_rng(1)
+    targets = rng.integers(0, args.size, args.queries)
+    questions = []
+    for target in targets.tolist():
+        code = docs[target].split(" error ")[1].split()[0]
+        questions.append(f"why did checkout fail with error {code} on my order")
+
+    for mode in QUERY_MODES:
+        latencies, hits = [], 0
+        for target, question in zip(targets.tolist(), questions):
+            start = time.perf_counter()
+            results = store.query(question, args.k, mode=mode)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += any(hit["chunk_id"] == str(target) for hit in results)
+        stats: Dict[str, float] = {
+            "hit": hits / len(questions),
+            "p50": percentile(latencies, 0.5),
+            "p99": percentile(latencies, 0.99),
+        }
+        print(f"  {mode:<8} hit@{args.k} {stats['hit']:.3f}  p50 {stats['p50']:7.2f} ms  p99 {stats['p99']:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark: MmapVectorStore open time and zero-copy search on a persisted collection.
+
+Builds (once) an N-vector collection on disk, then measures in a fresh
+store instance: time to open it, first query (cold pages), warm query
+latency, and resident memory growth compared with loading into RAM.
+
+Run from packages/vector-store (vector_store is importable once installed):
+
+    python benchmarks/bench_mmap_store.py --size 1000000 --dim 128 --root /tmp/mmap-bench
+"""
+
+import argparse
+import os
+import resource
+import time
+
+import numpy as np
+
+from vector_store.mmap_store import MmapVectorStore
+
+
+def _rss_mib() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def build(root: str, size: int, dim: int) -> None:
+    store = MmapVectorStore(root, dim=dim, background_compaction=False)
+    if store.count("bench") == size:
+        return
+    store.delete_collection("bench")
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for offset in range(0, size, 100_000):
+        n = min(100_000, size - offset)
+        store.add_vectors(
+            [f"chunk-{i}" for i in range(offset, offset + n)],
+            rng.standard_normal((n, dim), dtype=np.float32),
+            [f"document {i}" for i in range(offset, offset + n)],
+            [{"n": i} for i in range(offset, offset + n)],
+            collection_name="bench",
+        )
+    print(f"built {size:,} x {dim} in {time.perf_counter() - start:.1f} s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--root", default="/tmp/mmap-bench")
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    build(args.root, args.size, args.dim)
+    rss_before = _rss_mib()
+    start = time.perf_counter()
+    store = MmapVectorStore(args.root)
+    count = store.count("bench")
+    open_ms = (time.perf_counter() - start) * 1000
+    print(f"open + count: {open_ms:.2f} ms ({count:,} vectors, RSS +{_rss_mib() - rss_before:.1f} MiB)")
+
+    queries = np.random.default_rng(1).standard_normal((args.queries, args.dim), dtype=np.float32)
+    start = time.perf_counter()
+    store.search_vectors(queries[:1], 10, "bench")
+    print(f"first query (pages faulted in from disk/cache): {(time.perf_counter() - start) * 1000:.1f} ms")
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        store.search_vectors(query[None, :], 10, "bench")
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    print(f"warm query p50 {samples[len(samples) // 2]:.1f} ms  p99 {samples[-1]:.1f} ms  "
+          f"(RSS +{_rss_mib() - rss_before:.1f} MiB, shared page cache, not heap)")
+    print(f"max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark: NumpyVectorStore vs ChromaVectorStore query latency and throughput.
+
+Random unit vectors at 10k / 100k / 1M rows. NumPy is measured in-process
+(single query and 64-query batches); Chroma is measured over HTTP against a
+running server and skipped when none is reachable.
+
+Run from packages/vector-store (vector_store is importable once installed):
+
+    python benchmarks/bench_numpy_store.py --sizes 10000 100000 1000000 --dim 384
+    python benchmarks/bench_numpy_store.py --chroma-host localhost --chroma-port 8000
+"""
+
+import argparse
+import time
+from typing import List
+
+import numpy as np
+
+from vector_store.numpy_store import NumpyVectorStore
+
+
+def _percentiles(samples_ms: List[float]) -> str:
+    samples = sorted(samples_ms)
+    p50 = samples[len(samples) // 2]
+    p99 = samples[max(0, int(len(samples) * 0.99) - 1)]
+    return f"p50 {p50:8.2f} ms  p99 {p99:8.2f} ms"
+
+
+def bench_numpy(vectors: np.ndarray, queries: np.ndarray, top_k: int) -> None:
+    store = NumpyVectorStore(dim=vectors.shape[1])
+    ids = [str(i) for i in range(len(vectors))]
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), 100_000):
+        store.add_vectors(ids[offset:offset + 100_000], vectors[offset:offset + 100_000])
+    load_s = time.perf_counter() - start
+
+    single = []
+    for query in queries:
+        t = time.perf_counter()
+        store.search_vectors(query[None, :], top_k)
+        single.append((time.perf_counter() - t) * 1000)
+    t = time.perf_counter()
+    for offset in range(0, len(queries), 64):
+        store.search_vectors(queries[offset:offset + 64], top_k)
+    batched_qps = len(queries) / (time.perf_counter() - t)
+    print(f"  numpy   load {load_s:6.2f} s   single {_percentiles(single)}   "
+          f"batched(64) {batched_qps:10,.0f} q/s   single {1000 / np.mean(single):8,.0f} q/s")
+
+
+def bench_chroma(vectors: np.ndarray, queries: np.ndarray, top_k: int, host: str, port: int) -> None:
+    try:
+        from vector_store.chroma_client import ChromaVectorStore
+        store = ChromaVectorStore(host=host, port=port)
+        store.client.heartbeat()
+    except Exception as exc:
+        print(f"  chroma  skipped ({type(exc).__name__}: {exc})")
+        return
+    name = f"bench-{len(vectors)}"
+    store.delete_collection(name)
+    collection = store.client.get_or_create_collection(name=name, metadata={"hnsw:space": "cosine"})
+    ids = [str(i) for i in range(len(vectors))]
+    start = time.perf_counter()
+    batch = store.client.get_max_batch_size() if hasattr(store.client, "get_max_batch_size") else 5000
+    for offset in range(0, len(vectors), batch):
+        collection.add(ids=ids[offset:offset + batch], embeddings=vectors[offset:offset + batch].tolist())
+    load_s = time.perf_counter() - start
+
+    single = []
+    for query in queries:
+        t = time.perf_counter()
+        collection.query(query_embeddings=[query.tolist()], n_results=top_k)
+        single.append((time.perf_counter() - t) * 1000)
+    print(f"  chroma  load {load_s:6.2f} s   single {_percentiles(single)}   "
+          f"single {1000 / np.mean(single):8,.0f} q/s (HNSW, approximate)")
+    store.delete_collection(name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--chroma-host", default="localhost")
+    parser.add_argument("--chroma-port", type=int, default=8000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    for size in args.sizes:
+        vectors = rng.standard_normal((size, args.dim), dtype=np.float32)
+        print(f"{size:,} x {args.dim} float32, top_k={args.top_k}")
+        bench_numpy(vectors, queries, args.top_k)
+        bench_chroma(vectors, queries, args.top_k, args.chroma_host, args.chroma_port)
+        del vectors
+
+
+if __name__ == "__main__":
+    main()
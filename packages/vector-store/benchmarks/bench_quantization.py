@@ -0,0 +1,73 @@
+"""Benchmark harness: memory vs recall for quantized MmapVectorStore collections.
+
+Loads the same synthetic dataset into one collection per setting (float32,
+int8, PQ) and reports bytes per vector scanned at query time, recall@k
+against exact ground truth with and without the float32 re-rank, QPS, and
+the process RSS growth after a query pass over each collection (the pages a
+search actually touches; codes are all a quantized scan needs resident).
+
+Run from packages/vector-store (vector_store is importable once installed):
+
+    python benchmarks/bench_quantization.py --size 200000 --dim 128 --subspaces 16 32
+"""
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+from bench_ann import ground_truth, make_dataset, measure, report
+from vector_store.mmap_store import MmapVectorStore
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux /proc; falls back to peak RSS)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", default="clustered", choices=["clustered", "uniform"])
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--subspaces", type=int, nargs="+", default=[16, 32])
+    parser.add_argument("--rerank", type=int, nargs="+", default=[0, 4, 16])
+    args = parser.parse_args()
+
+    data, queries = make_dataset(args.dataset, args.size, args.queries, args.dim)
+    ids = [str(i) for i in range(len(data))]
+    truth = ground_truth(data, queries, args.k)
+    print(f"{args.dataset}: {args.size:,} x {args.dim}, {args.queries} queries, recall@{args.k}")
+
+    settings = [("float32", None, None)] + [("int8", "int8", None)] + [(f"pq{m}", "pq", m) for m in args.subspaces]
+    with tempfile.TemporaryDirectory() as root:
+        store = MmapVectorStore(root, dim=args.dim)
+        for label, kind, subspaces in settings:
+            for rerank in ([0] if kind is None else args.rerank):
+                name = f"{label}-r{rerank}"
+                store.create_collection(name, quantization=kind, pq_subspaces=subspaces, rerank=rerank,
+                                        quantize_after=args.size)
+                start = time.perf_counter()
+                for offset in range(0, len(data), 50_000):
+                    store.add_vectors(ids[offset:offset + 50_000], data[offset:offset + 50_000], collection_name=name)
+                build = time.perf_counter() - start
+                stats = store.collection_stats(name)
+                scanned = stats["code_bytes"] or stats["vector_bytes"]
+                before = rss_mb()
+                m = measure(lambda q: store.search_vectors(q, args.k, collection_name=name), queries, truth, args.k)
+                report(f"{label} rerank={rerank}" if kind else label, m)
+                print(f"  {'':<22} {scanned / stats['rows']:6.0f} B/vector scanned ({scanned / 2**20:,.1f} MB, "
+                      f"float32 {stats['vector_bytes'] / 2**20:,.1f} MB)  rss +{rss_mb() - before:,.1f} MB  "
+                      f"build {build:.1f} s")
+                store.delete_collection(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Asyncio-native Chroma vector store implementation"""
+
+import asyncio
+import inspect
+import logging
+import chromadb
+from chromadb.config import Settings
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, TypeVar
+from .bm25 import HYBRID_DEPTH, BM25Index, KeywordIndexes, check_query_mode, reciprocal_rank_fusion, with_documents
+from .chroma_client import (
+    KEYWORD_PAGE_SIZE,
+    KEYWORD_REFRESH_S,
+    documents_by_id,
+    format_results,
+    is_missing_collection,
+    page_documents,
+    query_input,
+)
+from .embeddings import EmbeddingFunction
+from .ingest import Document, document_ids
+from .interface import AsyncVectorStore
+from .metadata_index import Where
+import uuid
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncChromaVectorStore(AsyncVectorStore):
+    """Chroma vector store on `chromadb.AsyncHttpClient`; safe to share across concurrent requests.
+
+    Keyword / hybrid queries use a BM25 sidecar index and `query_embedding_function`
+    embeds queries client-side (in a worker thread), as in `ChromaVectorStore`;
+    the sidecar is (re)built by a background task rather than a thread.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 8000,
+        ingest_batch_size: int = 256,
+        query_embedding_function: Optional[EmbeddingFunction] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.ingest_batch_size = ingest_batch_size
+        self.query_embedding_function = query_embedding_function
+        self._client: Optional[Any] = None
+        self._client_lock = asyncio.Lock()
+        # Resolved collection handles, plus per-name locks so a cold collection is resolved once
+        self._collections: Dict[str, Any] = {}
+        self._resolving: Dict[str, asyncio.Lock] = {}
+        self._keyword = KeywordIndexes()
+        self._keyword_tasks: Set[asyncio.Task] = set()
+
+    async def client(self) -> Any:
+        if self._client is None:
+            async with self._client_lock:
+                if self._client is None:
+                    self._client = await chromadb.AsyncHttpClient(
+                        host=self.host,
+                        port=self.port,
+                        settings=Settings(allow_reset=True)
+                    )
+        return self._client
+
+    async def _collection(self, collection_name: str, create: bool) -> Optional[Any]:
+        collection = self._collections.get(collection_name)
+        if collection is not None:
+            return collection
+        lock = self._resolving.setdefault(collection_name, asyncio.Lock())
+        async with lock:
+            collection = self._collections.get(collection_name)
+            if collection is not None:
+                return collection
+            client = await self.client()
+            if create:
+                collection = await client.get_or_create_collection(name=collection_name)
+            else:
+                try:
+                    collection = await client.get_collection(name=collection_name)
+                except Exception:
+                    return None
+            self._collections[collection_name] = collection
+            return collection
+
+    async def _with_collection(
+        self, collection_name: str, create: bool, op: Callable[[Any], Awaitable[T]]
+    ) -> Optional[T]:
+        """Run `op` on the cached handle; re-resolve and retry once if Chroma says the collection is gone"""
+        collection = await self._collection(collection_name, create)
+        if collection is None:
+            return None
+        try:
+            return await op(collection)
+        except Exception as exc:
+            if not is_missing_collection(exc):
+                raise
+        self._collections.pop(collection_name, None)
+        self._keyword.drop(collection_name)
+        collection = await self._collection(collection_name, create)
+        return await op(collection) if collection is not None else None
+
+    async def ingest(self, text: str, metadata: Dict[str, Any], collection_name: str = "default") -> str:
+        """Ingest a document"""
+        chunk_id = metadata.get("chunk_id") or str(uuid.uuid4())
+        await self._with_collection(collection_name, True, lambda collection: collection.upsert(
+            documents=[text],
+            metadatas=[metadata],
+            ids=[chunk_id]
+        ))
+        self._keyword.add(collection_name, [chunk_id], [text], [metadata])
+        return chunk_id
+
+    async def ingest_many(
+        self,
+        documents: Sequence[Document],
+        collection_name: str = "default",
+        batch_size: Optional[int] = None,
+    ) -> List[str]:
+        """Upsert documents in batches on the cached collection handle"""
+        batch_size = batch_size or self.ingest_batch_size
+        ids = document_ids(documents)
+        for start in range(0, len(documents), batch_size):
+            batch = dict(zip(ids[start:start + batch_size], documents[start:start + batch_size]))
+            await self._with_collection(collection_name, True, lambda collection: collection.upsert(
+                ids=list(batch),
+                documents=[text for text, _ in batch.values()],
+                metadatas=[metadata for _, metadata in batch.values()]
+            ))
+            self._keyword.add(
+                collection_name,
+                list(batch),
+                [text for text, _ in batch.values()],
+                [metadata for _, metadata in batch.values()],
+            )
+        return ids
+
+    async def query(
+        self,
+        text: str,
+        top_k: int = 5,
+        collection_name: str = "default",
+        mode: str = "vector",
+        where: Optional[Where] = None,
+        query_embedding: Optional[Sequence[float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Query similar documents; hybrid runs both retrievers concurrently"""
+        check_query_mode(mode)
+        if mode == "vector":
+            return await self._vector_query(text, top_k, collection_name, where, query_embedding)
+        if mode == "keyword":
+            return await self._keyword_query(text, top_k, collection_name, where)
+        depth = top_k * HYBRID_DEPTH
+        vector_hits, keyword_hits = await asyncio.gather(
+            self._vector_query(text, depth, collection_name, where, query_embedding),
+            self._keyword_query(text, depth, collection_name, where),
+        )
+        return reciprocal_rank_fusion([vector_hits, keyword_hits], top_k)
+
+    async def _vector_query(
+        self,
+        text: str,
+        top_k: int,
+        collection_name: str,
+        where: Optional[Where] = None,
+        query_embedding: Optional[Sequence[float]] = None,
+    ) -> List[Dict[str, Any]]:
+        if query_embedding is None and self.query_embedding_function is not None:
+            query_embedding = (await asyncio.to_thread(self.query_embedding_function, [text]))[0]
+        query = query_input(text, query_embedding, None)
+        results = await self._with_collection(collection_name, False, lambda collection: collection.query(
+            **query,
+            n_results=top_k,
+            where=where
+        ))
+        if results is None:
+            return []
+        return format_results(results)
+
+    async def _keyword_query(
+        self, text: str, top_k: int, collection_name: str, where: Optional[Where] = None
+    ) -> List[Dict[str, Any]]:
+        index = self._keyword.ready(collection_name)
+        if index is None or self._keyword.due(collection_name, KEYWORD_REFRESH_S):
+            self.warm_keyword_index(collection_name)
+        if index is None:
+            return []
+        # Scoring is CPU work; keep it off the event loop.
+        hits = await asyncio.to_thread(index.search, text, top_k, where)
+        if not hits:
+            return hits
+        results = await self._with_collection(collection_name, False, lambda collection: collection.get(
+            ids=[hit["chunk_id"] for hit in hits],
+            include=["documents", "metadatas"]
+        ))
+        return with_documents(hits, documents_by_id(results)) if results is not None else []
+
+    def warm_keyword_index(self, collection_name: str = "default") -> None:
+        """Build (or, if the collection's count moved, rebuild) the BM25 sidecar in a background task"""
+        index = self._keyword.start(collection_name)
+        if index is None:
+            return
+        task = asyncio.get_running_loop().create_task(
+            self._build_keyword_index(collection_name, index, self._keyword.ready(collection_name))
+        )
+        self._keyword_tasks.add(task)
+        task.add_done_callback(self._keyword_tasks.discard)
+
+    async def _build_keyword_index(
+        self, collection_name: str, index: BM25Index, current: Optional[BM25Index]
+    ) -> None:
+        """Backfill `index` page by page from Chroma, then make it the live one"""
+        try:
+            collection = await self._collection(collection_name, False)
+            if collection is None or (current is not None and await collection.count() == len(current)):
+                self._keyword.abandon(collection_name, index)
+                return
+            offset = 0
+            while True:
+                page = page_documents(await collection.get(
+                    include=["documents", "metadatas"],
+                    limit=KEYWORD_PAGE_SIZE,
+                    offset=offset
+                ))
+                await asyncio.to_thread(index.backfill, page)
+                offset += len(page)
+                if len(page) < KEYWORD_PAGE_SIZE:
+                    break
+        except Exception:
+            logger.exception("Building keyword index for %s failed", collection_name)
+            self._keyword.abandon(collection_name, index)
+            return
+        except BaseException:
+            self._keyword.abandon(collection_name, index)
+            raise
+        self._keyword.finish(collection_name, index)
+
+    async def delete_collection(self, collection_name: str) -> bool:
+        """Delete a collection"""
+        self._collections.pop(collection_name, None)
+        self._keyword.drop(collection_name)
+        try:
+            client = await self.client()
+            await client.delete_collection(name=collection_name)
+            return True
+        except Exception:
+            return False
+
+    async def aclose(self) -> None:
+        """Cancel keyword index builds and close the HTTP client"""
+        for task in list(self._keyword_tasks):
+            task.cancel()
+        self._collections.clear()
+        client, self._client = self._client, None
+        # The close method differs between chromadb releases.
+        close = getattr(client, "aclose", None) or getattr(client, "close", None)
+        if close is not None:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
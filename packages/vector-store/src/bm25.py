@@ -0,0 +1,403 @@
+"""In-process BM25 keyword index and hybrid (vector + keyword) rank fusion"""
+
+import math
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .metadata_index import MetadataIndex, Where
+
+QUERY_MODES = ("vector", "keyword", "hybrid")
+# Each retriever returns top_k * HYBRID_DEPTH candidates for fusion
+HYBRID_DEPTH = 3
+# Reciprocal rank fusion constant (Cormack et al.); damps the weight of the very top ranks
+RRF_K = 60
+
+# Words, plus identifiers joined by - . / : (ERR-4042, v1.2.3, SKU/123-B)
+_COMPOUND = re.compile(r"\w+(?:[-./:]\w+)*")
+_WORD = re.compile(r"\w+")
+
+Hits = List[Dict[str, Any]]
+# (chunk_id, text, metadata) as read from a store when (re)building an index
+Rows = Iterable[Tuple[str, Optional[str], Optional[Dict[str, Any]]]]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words; a compound identifier yields itself and its parts"""
+    tokens: List[str] = []
+    for token in _COMPOUND.findall(text.lower()):
+        if token.isalnum():
+            tokens.append(token)
+            continue
+        parts = _WORD.findall(token)
+        if len(parts) > 1:
+            tokens.append(token)
+        tokens.extend(parts)
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an incrementally updated inverted index.
+
+    Postings are compact per-term arrays (uint32 row, uint16 term frequency).
+    Upserts append a new row and retire the old one; retired rows are skipped
+    at query time and squeezed out once they are a large share of the index.
+    Queries touch only the postings of their own terms.
+
+    Only postings, row ids, lengths and a metadata index (for `where`) are
+    kept: text and metadata stay in the store, and `search` returns chunk
+    ids and scores for the caller to fill in (`with_documents`).
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.terms: Dict[str, int] = {}
+        self.postings: List[array] = []
+        self.freqs: List[array] = []
+        self.ids: List[str] = []
+        self.lengths = np.zeros(1024, dtype=np.uint32)
+        self.live = np.zeros(1024, dtype=bool)
+        self.rows: Dict[str, int] = {}
+        self.total_length = 0
+        self.metadata_index = MetadataIndex()
+        self.lock = threading.Lock()
+        # While backfilling from the store, ids written concurrently (their writes win)
+        self._touched: Optional[Set[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def ready(self) -> bool:
+        return self._touched is None
+
+    def _reserve(self, extra: int) -> None:
+        needed = len(self.ids) + extra
+        if needed <= len(self.live):
+            return
+        capacity = max(needed, len(self.live) * 2)
+        self.lengths = np.concatenate([self.lengths, np.zeros(capacity - len(self.lengths), dtype=np.uint32)])
+        self.live = np.concatenate([self.live, np.zeros(capacity - len(self.live), dtype=bool)])
+
+    def _retire(self, chunk_id: str) -> None:
+        row = self.rows.pop(chunk_id, None)
+        if row is not None:
+            self.live[row] = False
+            self.total_length -= int(self.lengths[row])
+
+    def _add(self, chunk_id: str, text: Optional[str]) -> Optional[int]:
+        """Index one text; returns its row (None if the id was only removed)"""
+        self._retire(chunk_id)
+        if text is None:
+            return None
+        tokens = tokenize(text)
+        row = len(self.ids)
+        terms, postings, freqs = self.terms, self.postings, self.freqs
+        for term, tf in Counter(tokens).items():
+            term_id = terms.get(term)
+            if term_id is None:
+                term_id = terms[term] = len(postings)
+                postings.append(array("I"))
+                freqs.append(array("H"))
+            postings[term_id].append(row)
+            freqs[term_id].append(tf if tf < 0xFFFF else 0xFFFF)
+        self.ids.append(chunk_id)
+        self.lengths[row] = len(tokens)
+        self.live[row] = True
+        self.rows[chunk_id] = row
+        self.total_length += len(tokens)
+        return row
+
+    def _add_rows(self, rows: Sequence[Tuple[str, Optional[str], Optional[Dict[str, Any]]]]) -> None:
+        self._reserve(len(rows))
+        written, metadatas = [], []
+        for chunk_id, text, metadata in rows:
+            row = self._add(chunk_id, text)
+            if row is not None:
+                written.append(row)
+                metadatas.append(metadata)
+        self.metadata_index.update(written, metadatas)
+
+    def add(
+        self,
+        ids: Sequence[str],
+        documents: Sequence[Optional[str]],
+        metadatas: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+    ) -> None:
+        """Upsert documents by chunk id (a None text just removes the id)"""
+        metadatas = metadatas if metadatas is not None else [None] * len(ids)
+        with self.lock:
+            self._add_rows(list(zip(ids, documents, metadatas)))
+            if self._touched is not None:
+                self._touched.update(ids)
+            self._maybe_compact()
+
+    def remove(self, ids: Iterable[str]) -> None:
+        with self.lock:
+            for chunk_id in ids:
+                self._retire(chunk_id)
+                if self._touched is not None:
+                    self._touched.add(chunk_id)
+            self._maybe_compact()
+
+    def begin_backfill(self) -> None:
+        """Start loading existing documents; writes from here on take precedence over them"""
+        with self.lock:
+            self._touched = set()
+
+    def backfill(self, rows: Rows) -> None:
+        with self.lock:
+            touched = self._touched or set()
+            self._add_rows([row for row in rows if row[0] not in touched])
+
+    def end_backfill(self) -> None:
+        with self.lock:
+            self._touched = None
+
+    def _maybe_compact(self) -> None:
+        retired = len(self.ids) - len(self.rows)
+        if retired > 1024 and retired > len(self.rows):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Drop retired rows and renumber postings (caller holds the lock)"""
+        count = len(self.ids)
+        live = self.live[:count]
+        remap = np.cumsum(live, dtype=np.int64) - 1
+        terms: Dict[str, int] = {}
+        postings: List[array] = []
+        freqs: List[array] = []
+        for term, term_id in self.terms.items():
+            rows = np.frombuffer(self.postings[term_id], dtype=np.uint32)
+            keep = live[rows]
+            if keep.any():
+                terms[term] = len(postings)
+                postings.append(array("I", remap[rows[keep]].astype(np.uint32).tobytes()))
+                freqs.append(array("H", np.frombuffer(self.freqs[term_id], dtype=np.uint16)[keep].tobytes()))
+            del rows
+        kept = np.flatnonzero(live).tolist()
+        self.terms, self.postings, self.freqs = terms, postings, freqs
+        self.ids = [self.ids[row] for row in kept]
+        self.lengths = self.lengths[kept]
+        self.live = np.ones(len(kept), dtype=bool)
+        self.metadata_index = self.metadata_index.take(np.array(kept, dtype=np.int64))
+        self.rows = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+        self._reserve(1024)
+
+    def search(self, text: str, top_k: int = 5, where: Optional[Where] = None) -> Hits:
+        """BM25 top-k ({chunk_id, score}) for a free-text query, among chunks matching `where`; scores are raw BM25"""
+        query_terms = set(tokenize(text))
+        with self.lock:
+            term_ids = [self.terms[term] for term in query_terms if term in self.terms]
+            n_live = len(self.rows)
+            if not term_ids or not n_live or top_k <= 0:
+                return []
+            live = self.live
+            if where is not None:
+                # Corpus statistics stay collection-wide; the filter only drops candidates.
+                live = live & self.metadata_index.match(where, len(live))
+            lengths = self.lengths
+            average = self.total_length / n_live or 1.0
+            all_rows, all_scores = [], []
+            for term_id in term_ids:
+                rows = np.frombuffer(self.postings[term_id], dtype=np.uint32)
+                keep = live[rows]
+                rows = rows[keep]
+                if not len(rows):
+                    continue
+                tf = np.frombuffer(self.freqs[term_id], dtype=np.uint16)[keep].astype(np.float32)
+                idf = math.log(1.0 + (n_live - len(rows) + 0.5) / (len(rows) + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * lengths[rows] / average)
+                all_rows.append(rows)
+                all_scores.append(idf * tf * (self.k1 + 1.0) / (tf + norm))
+            if not all_rows:
+                return []
+            rows = np.concatenate(all_rows)
+            if len(rows) * 8 > len(self.ids):
+                # Common terms: accumulate densely, O(postings + rows) with no sort
+                scores = np.bincount(rows, weights=np.concatenate(all_scores), minlength=len(self.ids))
+                candidates = np.flatnonzero(scores)
+                scores = scores[candidates]
+            else:
+                candidates, inverse = np.unique(rows, return_inverse=True)
+                scores = np.bincount(inverse, weights=np.concatenate(all_scores))
+            k = min(top_k, len(candidates))
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            return [
+                {"chunk_id": self.ids[row], "score": float(score)}
+                for row, score in zip(candidates[best].tolist(), scores[best].tolist())
+            ]
+
+
+def with_documents(hits: Hits, documents: Mapping[str, Tuple[Optional[str], Dict[str, Any]]]) -> Hits:
+    """Fill in text and metadata for keyword hits; ids the store no longer has are dropped"""
+    return [
+        {
+            "chunk_id": hit["chunk_id"],
+            "text": documents[hit["chunk_id"]][0],
+            "metadata": documents[hit["chunk_id"]][1],
+            "score": hit["score"],
+        }
+        for hit in hits
+        if hit["chunk_id"] in documents
+    ]
+
+
+class KeywordIndexes:
+    """
+    Per-collection BM25 indexes kept beside a vector store.
+
+    An index is built on the first keyword or hybrid query (from the store's
+    documents) and then updated by every write, so collections nobody
+    searches by keyword cost nothing.
+
+    A rebuild happens beside the live index: `start` registers a new index
+    that receives writes while it is backfilled, queries keep using the old
+    one, and `finish` swaps the new one in.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[str, BM25Index] = {}
+        self._building: Dict[str, BM25Index] = {}
+        self._checked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def ready(self, collection_name: str) -> Optional[BM25Index]:
+        return self._indexes.get(collection_name)
+
+    def building(self, collection_name: str) -> bool:
+        return collection_name in self._building
+
+    def start(self, collection_name: str) -> Optional[BM25Index]:
+        """Register an empty index that receives writes while it is backfilled (None: a build is running)"""
+        with self._lock:
+            if collection_name in self._building:
+                return None
+            index = self._building[collection_name] = BM25Index()
+            index.begin_backfill()
+            return index
+
+    def finish(self, collection_name: str, index: BM25Index) -> None:
+        """Make a backfilled index the live one (unless the collection was dropped meanwhile)"""
+        index.end_backfill()
+        with self._lock:
+            if self._building.get(collection_name) is index:
+                del self._building[collection_name]
+                self._indexes[collection_name] = index
+                self._checked[collection_name] = time.monotonic()
+
+    def abandon(self, collection_name: str, index: BM25Index) -> None:
+        with self._lock:
+            if self._building.get(collection_name) is index:
+                del self._building[collection_name]
+
+    def due(self, collection_name: str, interval_s: float) -> bool:
+        """True at most once per `interval_s` per collection: time to check the index against the store"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked.get(collection_name, 0.0) < interval_s:
+                return False
+            self._checked[collection_name] = now
+            return True
+
+    def get(self, collection_name: str, source: Callable[[], Optional[Rows]]) -> Optional[BM25Index]:
+        """The collection's index, building it from `source()` (None: no such collection) if needed.
+
+        Builds on the calling thread: for stores whose documents are already in process.
+        """
+        index = self.ready(collection_name)
+        if index is not None:
+            return index
+        with self._build_lock:
+            index = self.ready(collection_name)
+            if index is not None:
+                return index
+            # Registered before reading the store, so no write can fall between the two.
+            index = self.start(collection_name)
+            if index is None:
+                return None
+            try:
+                rows = source()
+                if rows is None:
+                    self.abandon(collection_name, index)
+                    return None
+                index.backfill(rows)
+            except BaseException:
+                self.abandon(collection_name, index)
+                raise
+            self.finish(collection_name, index)
+            return index
+
+    def _targets(self, collection_name: str) -> List[BM25Index]:
+        return [
+            index
+            for index in (self._indexes.get(collection_name), self._building.get(collection_name))
+            if index is not None
+        ]
+
+    def add(
+        self,
+        collection_name: str,
+        ids: Sequence[str],
+        documents: Sequence[Optional[str]],
+        metadatas: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+    ) -> None:
+        for index in self._targets(collection_name):
+            index.add(ids, documents, metadatas)
+
+    def remove(self, collection_name: str, ids: Iterable[str]) -> None:
+        ids = list(ids)
+        for index in self._targets(collection_name):
+            index.remove(ids)
+
+    def drop(self, collection_name: str) -> None:
+        with self._lock:
+            self._indexes.pop(collection_name, None)
+            self._building.pop(collection_name, None)
+            self._checked.pop(collection_name, None)
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Hits], top_k: int, k: int = RRF_K) -> Hits:
+    """Merge ranked hit lists by chunk_id; score = sum of 1 / (k + rank) over the lists"""
+    fused: Dict[str, float] = {}
+    hits: Dict[str, Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            chunk_id = hit["chunk_id"]
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (k + rank)
+            hits.setdefault(chunk_id, hit)
+    best = sorted(fused, key=fused.__getitem__, reverse=True)[:top_k]
+    return [{**hits[chunk_id], "score": fused[chunk_id]} for chunk_id in best]
+
+
+def check_query_mode(mode: str) -> None:
+    if mode not in QUERY_MODES:
+        raise ValueError(f"Unknown query mode {mode!r}; expected one of {', '.join(QUERY_MODES)}")
+
+
+def run_query_mode(
+    mode: str,
+    top_k: int,
+    vector: Callable[[int], List[Hits]],
+    keyword: Callable[[int], List[Hits]],
+) -> List[Hits]:
+    """Dispatch a query mode over batched retrievers (depth -> hits per query text)"""
+    check_query_mode(mode)
+    if mode == "vector":
+        return vector(top_k)
+    if mode == "keyword":
+        return keyword(top_k)
+    depth = top_k * HYBRID_DEPTH
+    return [
+        reciprocal_rank_fusion([vector_hits, keyword_hits], top_k)
+        for vector_hits, keyword_hits in zip(vector(depth), keyword(depth))
+    ]
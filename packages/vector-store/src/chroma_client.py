@@ -1,66 +1,324 @@
 """Chroma vector store implementation"""
 
+import asyncio
+import logging
+import threading
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+from python_common.batching import MicroBatcher
+from .bm25 import BM25Index, KeywordIndexes, run_query_mode, with_documents
+from .embeddings import EmbeddingFunction
+from .ingest import Document, document_ids
 from .interface import VectorStore
+from .metadata_index import Where
 import uuid
 
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+def format_results(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten a single-query Chroma result into chunk dicts"""
+    if not results["ids"] or not results["ids"][0]:
+        return []
+    
+    return [
+        {
+            "chunk_id": results["ids"][0][i],
+            "text": results["documents"][0][i],
+            "metadata": results["metadatas"][0][i],
+            "score": 1.0 - results["distances"][0][i] if results.get("distances") else 0.0,
+        }
+        for i in range(len(results["ids"][0]))
+    ]
+
+
+def query_input(
+    text: str, query_embedding: Optional[Sequence[float]], embed: Optional[EmbeddingFunction]
+) -> Dict[str, Any]:
+    """`collection.query` kwargs: a given or client-side (cached) embedding, else the text for Chroma to embed"""
+    if query_embedding is None and embed is not None:
+        query_embedding = embed([text])[0]
+    if query_embedding is not None:
+        return {"query_embeddings": [[float(x) for x in query_embedding]]}
+    return {"query_texts": [text]}
+
+
+def is_missing_collection(exc: Exception) -> bool:
+    """Whether Chroma reported the collection as gone (deleted, or recreated under a new id).
+
+    The error class moved between Chroma releases: NotFoundError,
+    InvalidCollectionException, and a plain ValueError before those.
+    """
+    if type(exc).__name__ in ("NotFoundError", "InvalidCollectionException"):
+        return True
+    return isinstance(exc, ValueError) and "does not exist" in str(exc)
+
+
+# Documents fetched per `collection.get` page when building a keyword index
+KEYWORD_PAGE_SIZE = 1000
+# How often a keyword query compares the sidecar index with the collection's count
+KEYWORD_REFRESH_S = 30.0
+
+
+def page_documents(results: Dict[str, Any]) -> List[Tuple[str, Optional[str], Dict[str, Any]]]:
+    """(chunk_id, text, metadata) rows from a `collection.get` result"""
+    metadatas = results.get("metadatas") or [None] * len(results["ids"])
+    return list(zip(results["ids"], results["documents"], metadatas))
+
+
+def documents_by_id(results: Dict[str, Any]) -> Dict[str, Tuple[Optional[str], Dict[str, Any]]]:
+    """chunk_id -> (text, metadata) from a `collection.get(ids=...)` result"""
+    return {chunk_id: (text, metadata) for chunk_id, text, metadata in page_documents(results)}
+
 
 class ChromaVectorStore(VectorStore):
-    """Chroma vector store implementation"""
+    """Chroma vector store implementation.
+
+    Keyword and hybrid queries use an in-process BM25 sidecar index per
+    collection (postings and ids only; hits are filled in from Chroma). It is
+    built in a background thread on first use, or ahead of time with
+    `warm_keyword_index`; until then keyword results are empty and hybrid
+    ranks by vector alone. This client's writes update it directly; writes
+    from other clients are picked up by a rebuild when a keyword query finds
+    the collection's count changed (checked every KEYWORD_REFRESH_S).
+
+    With `query_embedding_function` (the collection's embedding model, usually
+    behind a `CachedEmbedding`), query text is embedded here and sent as
+    `query_embeddings`, so repeated queries skip the model.
+    """
     
-    def __init__(self, host: str = "localhost", port: int = 8000):
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 8000,
+        ingest_batch_size: int = 128,
+        ingest_batch_wait_ms: float = 10.0,
+        query_embedding_function: Optional[EmbeddingFunction] = None,
+    ):
         self.client = chromadb.HttpClient(
             host=host,
             port=port,
             settings=Settings(allow_reset=True)
         )
+        self.ingest_batch_size = ingest_batch_size
+        self.ingest_batch_wait_ms = ingest_batch_wait_ms
+        self.query_embedding_function = query_embedding_function
+        self._ingest_batchers: Dict[str, MicroBatcher] = {}
+        # Resolved collection handles; dropped by delete_collection or when Chroma reports one gone
+        self._collections: Dict[str, Any] = {}
+        self._keyword = KeywordIndexes()
+
+    def _collection(self, collection_name: str, create: bool) -> Optional[Any]:
+        collection = self._collections.get(collection_name)
+        if collection is not None:
+            return collection
+        if create:
+            collection = self.client.get_or_create_collection(name=collection_name)
+        else:
+            try:
+                collection = self.client.get_collection(name=collection_name)
+            except Exception:
+                # Not cached: a collection created later must still be found.
+                return None
+        self._collections[collection_name] = collection
+        return collection
+
+    def _with_collection(self, collection_name: str, create: bool, op: Callable[[Any], T]) -> Optional[T]:
+        """Run `op` on the cached handle; re-resolve and retry once if Chroma says the collection is gone.
+
+        Only that error is retried, since the call was not applied. Without
+        `create`, a collection deleted by another client reads as absent (None).
+        """
+        collection = self._collection(collection_name, create)
+        if collection is None:
+            return None
+        try:
+            return op(collection)
+        except Exception as exc:
+            if not is_missing_collection(exc):
+                raise
+        self._collections.pop(collection_name, None)
+        self._keyword.drop(collection_name)
+        collection = self._collection(collection_name, create)
+        return op(collection) if collection is not None else None
     
     def ingest(self, text: str, metadata: Dict[str, Any], collection_name: str = "default") -> str:
         """Ingest a document"""
-        try:
-            collection = self.client.get_or_create_collection(name=collection_name)
-        except Exception:
-            collection = self.client.create_collection(name=collection_name)
-        
         chunk_id = metadata.get("chunk_id") or str(uuid.uuid4())
         
-        collection.add(
+        self._with_collection(collection_name, True, lambda collection: collection.upsert(
             documents=[text],
             metadatas=[metadata],
             ids=[chunk_id]
-        )
+        ))
+        self._keyword.add(collection_name, [chunk_id], [text], [metadata])
         
         return chunk_id
-    
-    def query(self, text: str, top_k: int = 5, collection_name: str = "default") -> List[Dict[str, Any]]:
-        """Query similar documents"""
-        try:
-            collection = self.client.get_collection(name=collection_name)
-        except Exception:
-            return []
-        
-        results = collection.query(
-            query_texts=[text],
-            n_results=top_k
+
+    async def aingest(self, text: str, metadata: Dict[str, Any], collection_name: str = "default") -> str:
+        """Ingest a document from async code; concurrent calls share one `collection.upsert`"""
+        chunk_id = metadata.get("chunk_id") or str(uuid.uuid4())
+        batcher = self._ingest_batchers.get(collection_name)
+        if batcher is None:
+            async def dispatch(items: List[Tuple[str, str, Dict[str, Any]]]) -> List[str]:
+                return await asyncio.to_thread(self._add_batch, collection_name, items)
+
+            batcher = self._ingest_batchers[collection_name] = MicroBatcher(
+                dispatch,
+                max_batch_size=self.ingest_batch_size,
+                max_wait_ms=self.ingest_batch_wait_ms,
+                name=f"chroma-ingest:{collection_name}",
+            )
+        return await batcher.submit((chunk_id, text, metadata))
+
+    def _add_batch(self, collection_name: str, items: List[Tuple[str, str, Dict[str, Any]]]) -> List[str]:
+        ids = [chunk_id for chunk_id, _, _ in items]
+        # Chroma rejects duplicate ids within one call; the last copy of a chunk wins.
+        batch = {chunk_id: (text, metadata) for chunk_id, text, metadata in items}
+        self._with_collection(collection_name, True, lambda collection: collection.upsert(
+            documents=[text for text, _ in batch.values()],
+            metadatas=[metadata for _, metadata in batch.values()],
+            ids=list(batch)
+        ))
+        self._keyword.add(
+            collection_name,
+            list(batch),
+            [text for text, _ in batch.values()],
+            [metadata for _, metadata in batch.values()],
         )
+        return ids
+
+    def ingest_many(
+        self,
+        documents: Sequence[Document],
+        collection_name: str = "default",
+        batch_size: Optional[int] = None,
+    ) -> List[str]:
+        """Upsert documents in batches: one round trip per batch on the cached collection handle"""
+        batch_size = batch_size or self.ingest_batch_size
+        ids = document_ids(documents)
+        for start in range(0, len(documents), batch_size):
+            # Chroma rejects duplicate ids within one call; the last copy of a chunk wins.
+            batch = dict(zip(ids[start:start + batch_size], documents[start:start + batch_size]))
+            self._with_collection(collection_name, True, lambda collection: collection.upsert(
+                ids=list(batch),
+                documents=[text for text, _ in batch.values()],
+                metadatas=[metadata for _, metadata in batch.values()]
+            ))
+            self._keyword.add(
+                collection_name,
+                list(batch),
+                [text for text, _ in batch.values()],
+                [metadata for _, metadata in batch.values()],
+            )
+        return ids
+
+    def ingest_stats(self) -> Dict[str, Any]:
+        """Per-collection batch size and latency for `aingest`"""
+        return {name: batcher.stats.snapshot() for name, batcher in self._ingest_batchers.items()}
+    
+    def query(
+        self,
+        text: str,
+        top_k: int = 5,
+        collection_name: str = "default",
+        mode: str = "vector",
+        where: Optional[Where] = None,
+        query_embedding: Optional[Sequence[float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Query similar documents; `where` is evaluated by Chroma itself (and by the BM25 sidecar)"""
+        return run_query_mode(
+            mode,
+            top_k,
+            lambda depth: [self._vector_query(text, depth, collection_name, where, query_embedding)],
+            lambda depth: [self._keyword_query(text, depth, collection_name, where)],
+        )[0]
+
+    def _vector_query(
+        self,
+        text: str,
+        top_k: int,
+        collection_name: str,
+        where: Optional[Where] = None,
+        query_embedding: Optional[Sequence[float]] = None,
+    ) -> List[Dict[str, Any]]:
+        query = query_input(text, query_embedding, self.query_embedding_function)
+        results = self._with_collection(collection_name, False, lambda collection: collection.query(
+            **query,
+            n_results=top_k,
+            where=where
+        ))
         
-        if not results["ids"] or not results["ids"][0]:
+        if results is None:
             return []
         
-        return [
-            {
-                "chunk_id": results["ids"][0][i],
-                "text": results["documents"][0][i],
-                "metadata": results["metadatas"][0][i],
-                "score": 1.0 - results["distances"][0][i] if "distances" in results else 0.0,
-            }
-            for i in range(len(results["ids"][0]))
-        ]
+        return format_results(results)
+
+    def _keyword_query(
+        self, text: str, top_k: int, collection_name: str, where: Optional[Where] = None
+    ) -> List[Dict[str, Any]]:
+        index = self._keyword.ready(collection_name)
+        if index is None or self._keyword.due(collection_name, KEYWORD_REFRESH_S):
+            self.warm_keyword_index(collection_name)
+        if index is None:
+            return []
+        hits = index.search(text, top_k, where)
+        if not hits:
+            return hits
+        results = self._with_collection(collection_name, False, lambda collection: collection.get(
+            ids=[hit["chunk_id"] for hit in hits],
+            include=["documents", "metadatas"]
+        ))
+        return with_documents(hits, documents_by_id(results)) if results is not None else []
+
+    def warm_keyword_index(self, collection_name: str = "default") -> None:
+        """Build (or, if the collection's count moved, rebuild) the BM25 sidecar in a background thread"""
+        index = self._keyword.start(collection_name)
+        if index is None:
+            return
+        threading.Thread(
+            target=self._build_keyword_index,
+            args=(collection_name, index, self._keyword.ready(collection_name)),
+            name=f"bm25-backfill:{collection_name}",
+            daemon=True,
+        ).start()
+
+    def _build_keyword_index(self, collection_name: str, index: BM25Index, current: Optional[BM25Index]) -> None:
+        try:
+            collection = self._collection(collection_name, False)
+            if collection is None or (current is not None and collection.count() == len(current)):
+                self._keyword.abandon(collection_name, index)
+                return
+            for page in self._document_pages(collection):
+                index.backfill(page)
+        except Exception:
+            logger.exception("Building keyword index for %s failed", collection_name)
+            self._keyword.abandon(collection_name, index)
+            return
+        self._keyword.finish(collection_name, index)
+
+    @staticmethod
+    def _document_pages(collection: Any) -> Iterator[List[Tuple[str, Optional[str], Dict[str, Any]]]]:
+        """Every document in the collection, one `collection.get` page at a time"""
+        offset = 0
+        while True:
+            page = page_documents(collection.get(
+                include=["documents", "metadatas"],
+                limit=KEYWORD_PAGE_SIZE,
+                offset=offset
+            ))
+            yield page
+            offset += len(page)
+            if len(page) < KEYWORD_PAGE_SIZE:
+                return
     
     def delete_collection(self, collection_name: str) -> bool:
         """Delete a collection"""
+        self._collections.pop(collection_name, None)
+        self._keyword.drop(collection_name)
         try:
             
             self.client.delete_collection(name=collection_name)
@@ -0,0 +1,180 @@
+"""Query embedding cache: bounded in-process LRU with an optional SQLite disk tier"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .embeddings import EmbeddingFunction
+
+# Approximate per-entry overhead (dict slot, key tuple, ndarray header) counted against max_bytes
+_ENTRY_OVERHEAD = 200
+
+
+def normalize_text(text: str) -> str:
+    """Cache key form of a query: NFKC, whitespace collapsed, trimmed (case is kept; embeddings see it)"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class EmbeddingCache:
+    """
+    Embeddings keyed by (model, normalized text).
+
+    The memory tier is an LRU bounded by `max_bytes` (vectors are stored as
+    float32). With `path`, misses also fall through to a SQLite file that
+    survives restarts; disk hits are promoted into memory. Thread-safe.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 2**20, path: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.path = path
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._db_lock = threading.Lock()
+
+    @staticmethod
+    def _disk_key(key: Tuple[str, str]) -> str:
+        return hashlib.sha256(f"{key[0]}\0{key[1]}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: Tuple[str, str], vector: np.ndarray) -> None:
+        """Insert into the LRU and evict down to the byte budget (caller holds the lock)"""
+        size = vector.nbytes + len(key[1]) + _ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.nbytes + len(key[1]) + _ENTRY_OVERHEAD
+        self._entries[key] = vector
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes + len(evicted_key[1]) + _ENTRY_OVERHEAD
+            self.evictions += 1
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Cached vector per text, or None; counts hits and misses"""
+        keys = [(model, normalize_text(text)) for text in texts]
+        found: List[Optional[np.ndarray]] = [None] * len(keys)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    found[i] = vector
+                    self.hits += 1
+                else:
+                    missing.append(i)
+        if missing and self._db is not None:
+            disk_keys = {self._disk_key(keys[i]): i for i in missing}
+            placeholders = ",".join("?" * len(disk_keys))
+            with self._db_lock:
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", list(disk_keys)
+                ).fetchall()
+            with self._lock:
+                for disk_key, blob in rows:
+                    i = disk_keys[disk_key]
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    found[i] = vector
+                    self._remember(keys[i], vector)
+                    self.disk_hits += 1
+        with self._lock:
+            self.misses += sum(1 for vector in found if vector is None)
+        return found
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Any]) -> None:
+        keys = [(model, normalize_text(text)) for text in texts]
+        arrays = [np.array(vector, dtype=np.float32).reshape(-1) for vector in vectors]
+        for array in arrays:
+            array.flags.writeable = False
+        with self._lock:
+            for key, array in zip(keys, arrays):
+                self._remember(key, array)
+        if self._db is not None:
+            with self._db_lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(self._disk_key(key), array.tobytes()) for key, array in zip(keys, arrays)],
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "disk": self.path,
+            }
+
+    def clear(self) -> None:
+        """Drop the memory tier (the disk tier is kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def close(self) -> None:
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+
+class CachedEmbedding:
+    """
+    EmbeddingFunction wrapper that serves repeats from an `EmbeddingCache`.
+
+    One call looks every text up, then embeds only the misses (deduplicated)
+    in a single batch to `embedding_function`. `model` must identify the
+    embedding model: vectors from different models never share entries.
+    """
+
+    def __init__(self, embedding_function: EmbeddingFunction, model: str, cache: Optional[EmbeddingCache] = None):
+        self.embedding_function = embedding_function
+        self.model = model
+        self.cache = cache or EmbeddingCache()
+        self.dim = getattr(embedding_function, "dim", None)
+
+    def __call__(self, input: Sequence[str]) -> List[np.ndarray]:
+        texts = list(input)
+        vectors = self.cache.get_many(self.model, texts)
+        missing: Dict[str, List[int]] = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(normalize_text(texts[i]), []).append(i)
+        if missing:
+            # Embed one original spelling per normalized key.
+            pending = [texts[positions[0]] for positions in missing.values()]
+            computed = self.embedding_function(pending)
+            self.cache.put_many(self.model, pending, computed)
+            for positions, vector in zip(missing.values(), computed):
+                array = np.array(vector, dtype=np.float32).reshape(-1)
+                for i in positions:
+                    vectors[i] = array
+        return vectors
+
+    def stats(self) -> Dict[str, Any]:
+        return {"model": self.model, **self.cache.stats()}
@@ -0,0 +1,43 @@
+"""Embedding functions for in-process vector stores"""
+
+import re
+import zlib
+from typing import Any, Callable, Sequence
+
+import numpy as np
+
+# Same call shape as chromadb embedding functions: texts in, one vector per text out
+EmbeddingFunction = Callable[[Sequence[str]], Any]
+
+_TOKEN = re.compile(r"\w+")
+
+
+class HashingEmbedding:
+    """
+    Dependency-free feature-hashing embedding over words and word bigrams.
+
+    Deterministic across processes (crc32, not Python's salted hash). Good
+    enough for lexical-overlap retrieval and tests; pass a model-backed
+    embedding function for semantic search.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def __call__(self, input: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(input), self.dim), dtype=np.float32)
+        for row, text in enumerate(input):
+            tokens = _TOKEN.findall(text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                h = zlib.crc32(feature.encode("utf-8"))
+                # Low bits pick the slot, one high bit the sign, so collisions cancel rather than pile up.
+                out[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return out
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows in place (zero rows stay zero) and return them"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
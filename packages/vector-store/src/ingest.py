@@ -0,0 +1,124 @@
+"""Bulk ingest helpers: batching, resumable checkpoints and progress reporting"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (text, metadata) - the same pair `VectorStore.ingest` takes
+Document = Tuple[str, Dict[str, Any]]
+
+
+def stable_chunk_id(text: str) -> str:
+    """Deterministic id for a chunk without an explicit chunk_id, so re-ingest upserts instead of duplicating"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def document_ids(documents: Iterable[Document]) -> List[str]:
+    return [metadata.get("chunk_id") or stable_chunk_id(text) for text, metadata in documents]
+
+
+def batched(documents: Iterable[Document], batch_size: int) -> Iterator[List[Document]]:
+    iterator = iter(documents)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+@dataclass
+class IngestReport:
+    """Outcome of an `ingest_stream` run"""
+    collection: str
+    ingested: int = 0
+    resumed_from: int = 0
+    batches: int = 0
+    elapsed_s: float = 0.0
+    docs_per_s: float = 0.0
+    watermark: int = 0
+
+
+class IngestCheckpoint:
+    """
+    JSON checkpoint holding a contiguous watermark over the input stream.
+
+    Batches may finish out of order; the watermark only advances past a
+    position once every document before it has been written, so resuming
+    from it never skips a document (it may redo a few, which upserts make safe).
+    """
+
+    def __init__(self, path: str, collection: str, watermark: int = 0):
+        self.path = path
+        self.collection = collection
+        self.watermark = watermark
+        self._completed: Dict[int, int] = {}
+
+    @classmethod
+    def load(cls, path: str, collection: str) -> "IngestCheckpoint":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return cls(path, collection)
+        if state.get("collection") != collection:
+            raise ValueError(f"Checkpoint {path} belongs to collection {state.get('collection')!r}, not {collection!r}")
+        return cls(path, collection, int(state.get("watermark", 0)))
+
+    def complete(self, start: int, size: int) -> bool:
+        """Mark documents [start, start + size) as written; returns True if the watermark moved"""
+        self._completed[start] = start + size
+        moved = False
+        while self.watermark in self._completed:
+            self.watermark = self._completed.pop(self.watermark)
+            moved = True
+        return moved
+
+    def save(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"collection": self.collection, "watermark": self.watermark, "updated_at": time.time()}, f)
+        os.replace(tmp, self.path)
+
+
+class IngestProgress:
+    """Periodic docs/sec reporting; logs by default, or calls `on_progress` with an IngestReport"""
+
+    def __init__(
+        self,
+        report: IngestReport,
+        on_progress: Optional[Callable[[IngestReport], None]] = None,
+        interval_s: float = 5.0,
+    ):
+        self.report = report
+        self.on_progress = on_progress
+        self.interval_s = interval_s
+        self._started = time.perf_counter()
+        self._last = self._started
+
+    def add(self, docs: int) -> None:
+        self.report.ingested += docs
+        self.report.batches += 1
+        now = time.perf_counter()
+        if now - self._last >= self.interval_s:
+            self._last = now
+            self.emit()
+
+    def emit(self) -> IngestReport:
+        self.report.elapsed_s = time.perf_counter() - self._started
+        self.report.docs_per_s = self.report.ingested / self.report.elapsed_s if self.report.elapsed_s else 0.0
+        if self.on_progress is not None:
+            self.on_progress(self.report)
+        else:
+            logger.info(
+                "Ingested %d docs into %s (%.0f docs/s)",
+                self.report.ingested, self.report.collection, self.report.docs_per_s,
+                extra={"ingest": asdict(self.report)},
+            )
+        return self.report
@@ -1,23 +1,199 @@
 """Vector store interface"""
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Any, Optional, Sequence, Tuple
+from .ingest import Document, IngestCheckpoint, IngestProgress, IngestReport, batched
+from .metadata_index import Where
 
 
 class VectorStore(ABC):
     """Abstract vector store interface"""
+
+    # Documents per write in ingest_many / ingest_stream; implementations may override
+    ingest_batch_size: int = 256
     
     @abstractmethod
     def ingest(self, text: str, metadata: Dict[str, Any], collection_name: str = "default") -> str:
-        """Ingest a document and return chunk_id"""
+        """Ingest a document and return chunk_id (upserts on metadata["chunk_id"] when given)"""
         pass
     
     @abstractmethod
-    def query(self, text: str, top_k: int = 5, collection_name: str = "default") -> List[Dict[str, Any]]:
-        """Query similar documents and return results with scores"""
+    def query(
+        self,
+        text: str,
+        top_k: int = 5,
+        collection_name: str = "default",
+        mode: str = "vector",
+        where: Optional[Where] = None,
+        query_embedding: Optional[Sequence[float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Query similar documents and return results with scores.
+
+        `mode` is "vector" (embedding similarity), "keyword" (BM25) or
+        "hybrid" (both, fused by reciprocal rank); see `bm25.QUERY_MODES`.
+        `where` restricts results to chunks whose metadata matches a
+        Chroma-style filter: {"tenant": "acme"}, {"year": {"$gte": 2023}},
+        {"$or": [...]}; operators $eq $ne $in $nin $gt $gte $lt $lte $and $or.
+        `query_embedding` is a precomputed vector for `text` (same model as
+        the collection); the vector retriever then skips embedding.
+        """
         pass
     
     @abstractmethod
     def delete_collection(self, collection_name: str) -> bool:
         """Delete a collection"""
         pass
+
+    def ingest_many(
+        self,
+        documents: Sequence[Document],
+        collection_name: str = "default",
+        batch_size: Optional[int] = None,
+    ) -> List[str]:
+        """Ingest (text, metadata) pairs and return their chunk_ids.
+
+        The default calls `ingest` per document; stores with a bulk write
+        override this. Implementations upsert on chunk_id, so re-ingesting a
+        document replaces it instead of duplicating it.
+        """
+        return [self.ingest(text, metadata, collection_name) for text, metadata in documents]
+
+    def ingest_stream(
+        self,
+        documents: Iterable[Document],
+        collection_name: str = "default",
+        batch_size: Optional[int] = None,
+        max_in_flight: int = 4,
+        checkpoint_path: Optional[str] = None,
+        on_progress: Optional[Callable[[IngestReport], None]] = None,
+        progress_interval_s: float = 5.0,
+    ) -> IngestReport:
+        """Ingest an iterable of (text, metadata) pairs in batches.
+
+        Up to `max_in_flight` batches are written concurrently through
+        `ingest_many`; the iterable is consumed lazily, so memory stays
+        bounded by `batch_size * max_in_flight`. With `checkpoint_path`,
+        progress is saved as a contiguous watermark and a rerun over the same
+        (deterministically ordered) iterable skips what was already written.
+        """
+        batch_size = batch_size or self.ingest_batch_size
+        checkpoint = IngestCheckpoint.load(checkpoint_path, collection_name) if checkpoint_path else None
+        offset = checkpoint.watermark if checkpoint else 0
+        report = IngestReport(collection=collection_name, resumed_from=offset, watermark=offset)
+        progress = IngestProgress(report, on_progress, progress_interval_s)
+        pending: Dict[Future, Tuple[int, int]] = {}
+
+        def collect(done: Iterable[Future]) -> None:
+            for future in done:
+                start, size = pending.pop(future)
+                future.result()
+                progress.add(size)
+                if checkpoint is not None and checkpoint.complete(start, size):
+                    checkpoint.save()
+                    report.watermark = checkpoint.watermark
+
+        with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="ingest") as pool:
+            try:
+                for batch in batched(islice(documents, offset, None), batch_size):
+                    if len(pending) >= max_in_flight:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    pending[pool.submit(self.ingest_many, batch, collection_name, batch_size)] = (offset, len(batch))
+                    offset += len(batch)
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+            finally:
+                # On failure, let in-flight batches land so the checkpoint reflects them.
+                for future in list(pending):
+                    try:
+                        collect([future])
+                    except Exception:
+                        pass
+
+        if checkpoint is None:
+            report.watermark = offset
+        return progress.emit()
+
+
+class AsyncVectorStore(ABC):
+    """Asyncio-native vector store interface (no threadpool hop per call)"""
+
+    ingest_batch_size: int = 256
+    
+    @abstractmethod
+    async def ingest(self, text: str, metadata: Dict[str, Any], collection_name: str = "default") -> str:
+        """Ingest a document and return chunk_id (upserts on metadata["chunk_id"] when given)"""
+        pass
+    
+    @abstractmethod
+    async def query(
+        self,
+        text: str,
+        top_k: int = 5,
+        collection_name: str = "default",
+        mode: str = "vector",
+        where: Optional[Where] = None,
+        query_embedding: Optional[Sequence[float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Query similar documents and return results with scores; see `VectorStore.query` for the options"""
+        pass
+    
+    @abstractmethod
+    async def delete_collection(self, collection_name: str) -> bool:
+        """Delete a collection"""
+        pass
+
+    async def ingest_many(
+        self,
+        documents: Sequence[Document],
+        collection_name: str = "default",
+        batch_size: Optional[int] = None,
+    ) -> List[str]:
+        """Ingest (text, metadata) pairs and return their chunk_ids; see `VectorStore.ingest_many`"""
+        return [await self.ingest(text, metadata, collection_name) for text, metadata in documents]
+
+    async def aclose(self) -> None:
+        """Release client resources"""
+        pass
+
+
+class ThreadedAsyncVectorStore(AsyncVectorStore):
+    """Expose a sync VectorStore through AsyncVectorStore, running each call in a worker thread"""
+
+    def __init__(self, store: VectorStore):
+        self.store = store
+        self.ingest_batch_size = store.ingest_batch_size
+
+    async def ingest(self, text: str, metadata: Dict[str, Any], collection_name: str = "default") -> str:
+        return await asyncio.to_thread(self.store.ingest, text, metadata, collection_name)
+
+    async def query(
+        self,
+        text: str,
+        top_k: int = 5,
+        collection_name: str = "default",
+        mode: str = "vector",
+        where: Optional[Where] = None,
+        query_embedding: Optional[Sequence[float]] = None,
+    ) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.query, text, top_k, collection_name, mode, where, query_embedding)
+
+    async def delete_collection(self, collection_name: str) -> bool:
+        return await asyncio.to_thread(self.store.delete_collection, collection_name)
+
+    async def ingest_many(
+        self,
+        documents: Sequence[Document],
+        collection_name: str = "default",
+        batch_size: Optional[int] = None,
+    ) -> List[str]:
+        return await asyncio.to_thread(self.store.ingest_many, documents, collection_name, batch_size)
+
+    async def aclose(self) -> None:
+        close = getattr(self.store, "close", None)
+        if close is not None:
+            await asyncio.to_thread(close)
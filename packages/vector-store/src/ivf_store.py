@@ -0,0 +1,488 @@
+"""IVF (inverted file) approximate nearest-neighbour vector store"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .embeddings import EmbeddingFunction, normalize_rows
+from .metadata_index import PREFILTER_RATIO, MetadataIndex, Where
+from .numpy_store import QUERY_BLOCK, NumpyVectorStore, select_top_k
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+
+def train_centroids(vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means: centroids are unit vectors, assignment by max dot product"""
+    rng = np.random.default_rng(seed)
+    nlist = min(nlist, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = assign_lists(vectors, centroids)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=nlist)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        nonempty = counts > 0
+        sums = np.add.reduceat(vectors[order], starts[nonempty], axis=0)
+        centroids[nonempty] = sums
+        # Re-seed empty lists from random points so every list stays useful.
+        empty = np.flatnonzero(~nonempty)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        normalize_rows(centroids)
+    return centroids
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray, block: int = 8192) -> np.ndarray:
+    out = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block):
+        out[start:start + block] = np.argmax(vectors[start:start + block] @ centroids.T, axis=1)
+    return out
+
+
+class _List:
+    """One inverted list: contiguous vectors plus the global row number of each.
+
+    Copy-on-write towards readers: `snapshot` hands out the arrays as they
+    are, and a later write into a slot a snapshot can see copies them first.
+    """
+
+    def __init__(self, dim: int, capacity: int = 16):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.rows = np.zeros(capacity, dtype=np.int64)
+        self.size = 0
+        self.exposed = 0  # slots visible through snapshots of the current arrays
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray, int]:
+        """(vectors, rows, size) that stay unchanged for the reader (caller holds the lock)"""
+        self.exposed = self.size
+        return self.vectors, self.rows, self.size
+
+    def _write(self, position: int) -> None:
+        if position < self.exposed:
+            self.vectors = self.vectors.copy()
+            self.rows = self.rows.copy()
+            self.exposed = 0
+
+    def append(self, row: int, vector: np.ndarray) -> int:
+        if self.size == len(self.rows):
+            self.vectors = np.concatenate([self.vectors, np.zeros_like(self.vectors)])
+            self.rows = np.concatenate([self.rows, np.zeros_like(self.rows)])
+            self.exposed = 0
+        self._write(self.size)
+        self.vectors[self.size] = vector
+        self.rows[self.size] = row
+        self.size += 1
+        return self.size - 1
+
+    def remove(self, position: int) -> Optional[int]:
+        """Swap-remove; returns the row that moved into `position` (if any)"""
+        last = self.size - 1
+        moved = None
+        if position != last:
+            self._write(position)
+            self.vectors[position] = self.vectors[last]
+            self.rows[position] = self.rows[last]
+            moved = int(self.rows[position])
+        self.size -= 1
+        return moved
+
+
+class _IVFCollection:
+    """
+    Inverted-file index over L2-normalized vectors.
+
+    Until `train_size` vectors arrive it searches exactly (one flat list).
+    It then trains `nlist` centroids with k-means and from there on each
+    insert goes to its nearest list; a query scans the `nprobe` lists whose
+    centroids score highest.
+    """
+
+    def __init__(self, dim: int, nlist: Optional[int], train_size: int):
+        self.dim = dim
+        self.nlist = nlist
+        self.train_size = train_size
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[_List] = [_List(dim)]
+        self.ids: List[Optional[str]] = []
+        self.documents: List[Optional[str]] = []
+        self.metadatas: List[Optional[Dict[str, Any]]] = []
+        self.location: List[Tuple[int, int]] = []  # row -> (list, position); (-1, -1) once deleted
+        self.rows: Dict[str, int] = {}
+        self.metadata_index: Optional[MetadataIndex] = None
+        self.trained_at = 0
+        self.lock = threading.RLock()
+
+    @property
+    def count(self) -> int:
+        return len(self.rows)
+
+    def _place(self, row: int, vector: np.ndarray, list_no: int) -> None:
+        self.location[row] = (list_no, self.lists[list_no].append(row, vector))
+
+    def _unplace(self, row: int) -> None:
+        list_no, position = self.location[row]
+        moved = self.lists[list_no].remove(position)
+        if moved is not None:
+            self.location[moved] = (list_no, position)
+        self.location[row] = (-1, -1)
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        vectors: np.ndarray,
+        documents: Sequence[Optional[str]],
+        metadatas: Sequence[Dict[str, Any]],
+    ) -> None:
+        with self.lock:
+            targets = assign_lists(vectors, self.centroids) if self.centroids is not None else np.zeros(len(ids), dtype=np.int64)
+            written = []
+            for chunk_id, vector, document, metadata, list_no in zip(ids, vectors, documents, metadatas, targets.tolist()):
+                row = self.rows.get(chunk_id)
+                if row is None:
+                    row = len(self.ids)
+                    self.rows[chunk_id] = row
+                    self.ids.append(chunk_id)
+                    self.documents.append(document)
+                    self.metadatas.append(metadata)
+                    self.location.append((-1, -1))
+                else:
+                    self._unplace(row)
+                    self.documents[row] = document
+                    self.metadatas[row] = metadata
+                self._place(row, vector, list_no)
+                written.append(row)
+            if self.metadata_index is not None:
+                self.metadata_index.update(written, metadatas)
+            if self.centroids is None and self.count >= self.train_size:
+                self.train()
+
+    def delete(self, ids: Sequence[str]) -> int:
+        with self.lock:
+            deleted = 0
+            for chunk_id in ids:
+                row = self.rows.pop(chunk_id, None)
+                if row is None:
+                    continue
+                self._unplace(row)
+                self.ids[row] = self.documents[row] = self.metadatas[row] = None
+                if self.metadata_index is not None:
+                    self.metadata_index.clear(row)
+                deleted += 1
+            return deleted
+
+    def _metadata_index(self) -> MetadataIndex:
+        """Secondary indexes over metadata, built on the first filtered search (caller holds the lock)"""
+        if self.metadata_index is None:
+            index = MetadataIndex(max(len(self.ids), 1024))
+            index.update(range(len(self.ids)), self.metadatas)
+            self.metadata_index = index
+        return self.metadata_index
+
+    def live_documents(self) -> List[Tuple[str, Optional[str], Dict[str, Any]]]:
+        """(chunk_id, text, metadata) per live row, copied under the lock"""
+        with self.lock:
+            return [
+                (chunk_id, document, metadata)
+                for chunk_id, document, metadata in zip(self.ids, self.documents, self.metadatas)
+                if chunk_id is not None
+            ]
+
+    def documents_by_id(self, ids: Iterable[str]) -> Dict[str, Tuple[Optional[str], Dict[str, Any]]]:
+        """chunk_id -> (text, metadata) for the given ids that exist"""
+        with self.lock:
+            rows = [(chunk_id, self.rows.get(chunk_id)) for chunk_id in ids]
+            return {chunk_id: (self.documents[row], self.metadatas[row]) for chunk_id, row in rows if row is not None}
+
+    def _live(self) -> Tuple[np.ndarray, np.ndarray]:
+        vectors = np.concatenate([lst.vectors[:lst.size] for lst in self.lists])
+        rows = np.concatenate([lst.rows[:lst.size] for lst in self.lists])
+        return vectors, rows
+
+    def train(self, nlist: Optional[int] = None, iterations: int = 10) -> None:
+        """(Re)build centroids from the current vectors and redistribute every row"""
+        with self.lock:
+            vectors, rows = self._live()
+            if len(vectors) == 0:
+                return
+            nlist = nlist or self.nlist or max(1, int(4 * np.sqrt(len(vectors))))
+            sample = vectors
+            if len(vectors) > 256 * nlist:
+                sample = vectors[np.random.default_rng(0).choice(len(vectors), 256 * nlist, replace=False)]
+            self.centroids = train_centroids(sample, nlist, iterations)
+            self._rebuild(vectors, rows, assign_lists(vectors, self.centroids), len(self.centroids))
+            self.trained_at = len(vectors)
+            logger.info("Trained IVF index: %d vectors into %d lists", len(vectors), len(self.centroids))
+
+    def _rebuild(self, vectors: np.ndarray, rows: np.ndarray, assign: np.ndarray, nlist: int) -> None:
+        """Lay out every row into its list in one pass (bulk counterpart of `_place`)"""
+        order = np.argsort(assign, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=nlist))))
+        positions = np.empty(len(rows), dtype=np.int64)
+        self.lists = []
+        for list_no in range(nlist):
+            members = order[bounds[list_no]:bounds[list_no + 1]]
+            lst = _List(self.dim, max(16, len(members)))
+            lst.vectors[:len(members)] = vectors[members]
+            lst.rows[:len(members)] = rows[members]
+            lst.size = len(members)
+            positions[members] = np.arange(len(members))
+            self.lists.append(lst)
+        for row, list_no, position in zip(rows.tolist(), assign.tolist(), positions.tolist()):
+            self.location[row] = (list_no, position)
+
+    def search(
+        self, queries: np.ndarray, top_k: int, nprobe: int = 8, where: Optional[Where] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Approximate cosine top-k: scan the `nprobe` best lists per query.
+
+        With `where`, non-matching rows are dropped from each scanned list;
+        a selective filter instead gathers every matching row and searches
+        them exactly (probing would find too few).
+        """
+        with self.lock:
+            # Scored after the lock is released; writers copy a list before changing what these see.
+            centroids = self.centroids
+            snapshots = [lst.snapshot() for lst in self.lists]
+            sizes = [size for _, _, size in snapshots]
+            views = [(vectors, rows) for vectors, rows, _ in snapshots]
+            mask = self._metadata_index().match(where, len(self.ids)) if where is not None else None
+        if mask is not None:
+            matches = int(np.count_nonzero(mask))
+            if not matches:
+                return [[] for _ in range(len(queries))]
+            if centroids is None or matches < self.count * PREFILTER_RATIO:
+                return self._search_matching(queries, top_k, views, sizes, mask)
+        results: List[List[Dict[str, Any]]] = []
+        for start in range(0, len(queries), QUERY_BLOCK):
+            block = queries[start:start + QUERY_BLOCK]
+            if centroids is None:
+                probes = np.zeros((len(block), 1), dtype=np.int64)
+            else:
+                probes, _ = select_top_k(block @ centroids.T, nprobe)
+            for query, probe in zip(block, probes.tolist()):
+                probe = [p for p in probe if sizes[p]]
+                if not probe:
+                    results.append([])
+                    continue
+                scores = np.concatenate([views[p][0][:sizes[p]] @ query for p in probe])
+                rows = np.concatenate([views[p][1][:sizes[p]] for p in probe])
+                if mask is not None:
+                    keep = mask[rows]
+                    scores, rows = scores[keep], rows[keep]
+                    if not len(rows):
+                        results.append([])
+                        continue
+                top, top_scores = select_top_k(scores[None, :], top_k)
+                results.append(self._hits(rows[top[0]].tolist(), top_scores[0].tolist()))
+        return results
+
+    def _search_matching(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        views: List[Tuple[np.ndarray, np.ndarray]],
+        sizes: List[int],
+        mask: np.ndarray,
+    ) -> List[List[Dict[str, Any]]]:
+        """Exact search over only the rows set in `mask`, gathered from every list"""
+        vectors, rows = [], []
+        for (list_vectors, list_rows), size in zip(views, sizes):
+            keep = mask[list_rows[:size]]
+            vectors.append(list_vectors[:size][keep])
+            rows.append(list_rows[:size][keep])
+        matrix, rows = np.concatenate(vectors), np.concatenate(rows)
+        results: List[List[Dict[str, Any]]] = []
+        for start in range(0, len(queries), QUERY_BLOCK):
+            top, top_scores = select_top_k(queries[start:start + QUERY_BLOCK] @ matrix.T, top_k)
+            for found, found_scores in zip(top.tolist(), top_scores.tolist()):
+                results.append(self._hits(rows[found].tolist(), found_scores))
+        return results
+
+    def _hits(self, rows: List[int], scores: List[float]) -> List[Dict[str, Any]]:
+        """Hits for scored rows, read under the lock; rows deleted since the snapshot are left out"""
+        with self.lock:
+            return [
+                {
+                    "chunk_id": self.ids[row],
+                    "text": self.documents[row],
+                    "metadata": self.metadatas[row],
+                    "score": score,
+                }
+                for row, score in zip(rows, scores)
+                if self.ids[row] is not None
+            ]
+
+    def save(self, path: str) -> None:
+        """Write the index to `path` (a directory), replacing it atomically"""
+        with self.lock:
+            tmp = f"{path}.tmp"
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(tmp)
+            vectors, rows = self._live()
+            np.save(os.path.join(tmp, "vectors.npy"), vectors)
+            np.save(os.path.join(tmp, "rows.npy"), rows)
+            np.save(os.path.join(tmp, "list_sizes.npy"), np.array([lst.size for lst in self.lists], dtype=np.int64))
+            if self.centroids is not None:
+                np.save(os.path.join(tmp, "centroids.npy"), self.centroids)
+            with open(os.path.join(tmp, "docs.jsonl"), "w", encoding="utf-8") as f:
+                for row in rows.tolist():
+                    f.write(json.dumps({"id": self.ids[row], "text": self.documents[row], "metadata": self.metadatas[row]}) + "\n")
+            with open(os.path.join(tmp, "index.json"), "w", encoding="utf-8") as f:
+                json.dump({
+                    "format": FORMAT_VERSION,
+                    "dim": self.dim,
+                    "nlist": self.nlist,
+                    "train_size": self.train_size,
+                    "trained_at": self.trained_at,
+                }, f)
+            old = f"{path}.old"
+            if os.path.exists(path):
+                os.replace(path, old)
+            os.replace(tmp, path)
+            shutil.rmtree(old, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: str) -> "_IVFCollection":
+        with open(os.path.join(path, "index.json"), "r", encoding="utf-8") as f:
+            header = json.load(f)
+        if header.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported IVF index format {header.get('format')!r} in {path}")
+        collection = cls(header["dim"], header["nlist"], header["train_size"])
+        collection.trained_at = header["trained_at"]
+        vectors = np.load(os.path.join(path, "vectors.npy"))
+        sizes = np.load(os.path.join(path, "list_sizes.npy"))
+        centroids_path = os.path.join(path, "centroids.npy")
+        if os.path.exists(centroids_path):
+            collection.centroids = np.load(centroids_path)
+        # Rows are renumbered densely on load; lists keep their saved order.
+        with open(os.path.join(path, "docs.jsonl"), "r", encoding="utf-8") as f:
+            for row, line in enumerate(f):
+                doc = json.loads(line)
+                collection.rows[doc["id"]] = row
+                collection.ids.append(doc["id"])
+                collection.documents.append(doc["text"])
+                collection.metadatas.append(doc["metadata"])
+        collection.location = [(-1, -1)] * len(collection.ids)
+        assign = np.repeat(np.arange(len(sizes)), sizes)
+        collection._rebuild(vectors, np.arange(len(vectors)), assign, len(sizes))
+        return collection
+
+
+class IVFVectorStore(NumpyVectorStore):
+    """
+    Approximate nearest-neighbour store: IVF-Flat over L2-normalized float32.
+
+    Tuning: `nlist` (lists; default ~4*sqrt(n) at training time) and
+    `nprobe` (lists scanned per query). Higher nprobe raises recall and
+    latency; nprobe == nlist is exact search. Collections below
+    `train_size` vectors are searched exactly. With `root`, collections are
+    persisted by `persist()` / `close()` and loaded on first use.
+    """
+
+    def __init__(
+        self,
+        embedding_function: Optional[EmbeddingFunction] = None,
+        dim: Optional[int] = None,
+        ingest_batch_size: int = 1024,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        train_size: int = 10_000,
+        root: Optional[str] = None,
+        query_embedding_function: Optional[EmbeddingFunction] = None,
+    ):
+        super().__init__(embedding_function, dim, ingest_batch_size, query_embedding_function)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size
+        self.root = root
+
+    def _path(self, collection_name: str) -> Optional[str]:
+        return os.path.join(self.root, f"{collection_name}.ivf") if self.root else None
+
+    def _collection(self, collection_name: str, create: bool, dim: Optional[int] = None) -> Optional[_IVFCollection]:
+        collection = self._collections.get(collection_name)
+        if collection is not None:
+            return collection
+        path = self._path(collection_name)
+        exists = path is not None and os.path.exists(os.path.join(path, "index.json"))
+        if not exists and not create:
+            return None
+        with self._lock:
+            collection = self._collections.get(collection_name)
+            if collection is None:
+                if exists:
+                    collection = _IVFCollection.load(path)
+                else:
+                    collection = _IVFCollection(dim or self.dim, self.nlist, self.train_size)
+                self._collections[collection_name] = collection
+        return collection
+
+    def _vector_search(
+        self, queries: np.ndarray, top_k: int, collection_name: str, where: Optional[Where] = None
+    ) -> List[List[Dict[str, Any]]]:
+        collection = self._collection(collection_name, False)
+        if collection is None:
+            return [[] for _ in range(len(queries))]
+        return collection.search(queries, top_k, self.nprobe, where)
+
+    def search_vectors(
+        self,
+        vectors: "np.ndarray | Sequence[Sequence[float]]",
+        top_k: int = 5,
+        collection_name: str = "default",
+        nprobe: Optional[int] = None,
+        where: Optional[Where] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        collection = self._collection(collection_name, False)
+        if collection is None:
+            return [[] for _ in range(len(vectors))]
+        return collection.search(
+            normalize_rows(np.array(vectors, dtype=np.float32)), top_k, nprobe or self.nprobe, where
+        )
+
+    def delete(self, ids: Sequence[str], collection_name: str = "default") -> int:
+        """Remove chunks by id; returns how many existed"""
+        collection = self._collection(collection_name, False)
+        if collection is None:
+            return 0
+        self._keyword.remove(collection_name, ids)
+        return collection.delete(ids)
+
+    def train(self, collection_name: str = "default", nlist: Optional[int] = None) -> None:
+        """Retrain centroids, e.g. after the collection has grown well past its first training"""
+        collection = self._collection(collection_name, False)
+        if collection is not None:
+            collection.train(nlist)
+
+    def persist(self, collection_name: Optional[str] = None) -> None:
+        """Save one collection (or all loaded ones) under `root`"""
+        if self.root is None:
+            raise ValueError("IVFVectorStore was created without a root directory")
+        os.makedirs(self.root, exist_ok=True)
+        names = [collection_name] if collection_name else list(self._collections)
+        for name in names:
+            collection = self._collections.get(name)
+            if collection is not None:
+                collection.save(self._path(name))
+
+    def close(self) -> None:
+        if self.root is not None:
+            self.persist()
+
+    def delete_collection(self, collection_name: str) -> bool:
+        """Delete a collection (and its saved index)"""
+        self._keyword.drop(collection_name)
+        with self._lock:
+            existed = self._collections.pop(collection_name, None) is not None
+        path = self._path(collection_name)
+        if path is not None and os.path.exists(path):
+            shutil.rmtree(path, ignore_errors=True)
+            existed = True
+        return existed
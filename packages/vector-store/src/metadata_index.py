@@ -0,0 +1,195 @@
+"""Secondary indexes over chunk metadata for pre-filtered search"""
+
+from functools import reduce
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Chroma-style `where` filter: {"field": value}, {"field": {"$op": value}}, {"$and" | "$or": [...]}
+Where = Dict[str, Any]
+
+# Below this share of matching rows, search gathers and scores only the matches;
+# above it, scoring every row and masking the rest is cheaper than the gather.
+PREFILTER_RATIO = 0.25
+
+_RANGE_OPS = {"$gt": np.greater, "$gte": np.greater_equal, "$lt": np.less, "$lte": np.less_equal}
+_VALUE_OPS = ("$eq", "$ne", "$in", "$nin")
+
+
+def _key(value: Any) -> Tuple[bool, Any]:
+    # True == 1 in a dict; keep booleans and numbers apart.
+    return isinstance(value, bool), value
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class _Field:
+    """One metadata field: dictionary-encoded value per row (-1 = absent), plus a numeric column for ranges"""
+
+    def __init__(self, capacity: int):
+        self.codes = np.full(capacity, -1, dtype=np.int32)
+        self.numbers: Optional[np.ndarray] = None
+        self.values: Dict[Tuple[bool, Any], int] = {}
+
+    def grow(self, capacity: int) -> None:
+        extra = capacity - len(self.codes)
+        self.codes = np.concatenate([self.codes, np.full(extra, -1, dtype=np.int32)])
+        if self.numbers is not None:
+            self.numbers = np.concatenate([self.numbers, np.full(extra, np.nan)])
+
+    def set(self, rows: List[int], values: List[Any]) -> None:
+        codes = np.full(len(values), -1, dtype=np.int32)
+        numbers = []
+        for i, value in enumerate(values):
+            try:
+                codes[i] = self.values.setdefault(_key(value), len(self.values))
+            except TypeError:
+                # Unhashable (list/dict) values are not indexed; filters never match them.
+                continue
+            if _is_number(value):
+                numbers.append(i)
+        self.codes[rows] = codes
+        if numbers:
+            if self.numbers is None:
+                self.numbers = np.full(len(self.codes), np.nan)
+            self.numbers[np.array(rows)[numbers]] = np.array([values[i] for i in numbers], dtype=np.float64)
+
+    def clear(self, rows: Any) -> None:
+        self.codes[rows] = -1
+        if self.numbers is not None:
+            self.numbers[rows] = np.nan
+
+    def codes_for(self, values: Iterable[Any]) -> List[int]:
+        codes = []
+        for value in values:
+            try:
+                code = self.values.get(_key(value))
+            except TypeError:
+                continue
+            if code is not None:
+                codes.append(code)
+        return codes
+
+
+class MetadataIndex:
+    """
+    Per-field secondary indexes over row-numbered metadata.
+
+    Each field is a dictionary-encoded int32 column (value -> code), so an
+    equality / $in predicate is one vectorized compare and produces a
+    boolean row bitmap; numeric values also get a float column for range
+    predicates. `match` combines predicates with bitmap AND / OR, and the
+    stores use the result to pick rows before (or while) scoring.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self.size = 0
+        self.fields: Dict[str, _Field] = {}
+
+    def _reserve(self, size: int) -> None:
+        if size <= self.capacity:
+            return
+        self.capacity = max(size, self.capacity * 2)
+        for field in self.fields.values():
+            field.grow(self.capacity)
+
+    def update(self, rows: Iterable[int], metadatas: Iterable[Optional[Dict[str, Any]]]) -> None:
+        """Index (or re-index) the given rows; a row listed twice keeps its last metadata"""
+        latest = dict(zip(rows, metadatas))
+        if not latest:
+            return
+        top = max(latest) + 1
+        self._reserve(top)
+        existing = [row for row in latest if row < self.size]
+        if existing:
+            for field in self.fields.values():
+                field.clear(existing)
+        columns: Dict[str, Tuple[List[int], List[Any]]] = {}
+        for row, metadata in latest.items():
+            for name, value in (metadata or {}).items():
+                column = columns.get(name)
+                if column is None:
+                    column = columns[name] = ([], [])
+                column[0].append(row)
+                column[1].append(value)
+        for name, (field_rows, values) in columns.items():
+            field = self.fields.get(name)
+            if field is None:
+                field = self.fields[name] = _Field(self.capacity)
+            field.set(field_rows, values)
+        self.size = max(self.size, top)
+
+    def clear(self, row: int) -> None:
+        """Forget a row's metadata (deleted rows)"""
+        for field in self.fields.values():
+            field.clear(row)
+
+    def take(self, rows: np.ndarray) -> "MetadataIndex":
+        """Index over `rows` only, renumbered 0..len(rows)-1 (for compaction)"""
+        index = MetadataIndex(max(len(rows), 1024))
+        index.size = len(rows)
+        for name, field in self.fields.items():
+            taken = _Field(index.capacity)
+            taken.values = dict(field.values)
+            taken.codes[:len(rows)] = field.codes[rows]
+            if field.numbers is not None:
+                taken.numbers = np.full(index.capacity, np.nan)
+                taken.numbers[:len(rows)] = field.numbers[rows]
+            index.fields[name] = taken
+        return index
+
+    def match(self, where: Where, count: int) -> np.ndarray:
+        """Boolean bitmap over the first `count` rows"""
+        mask = np.zeros(count, dtype=bool)
+        n = min(count, self.size)
+        mask[:n] = self._eval(where, n)
+        return mask
+
+    def _eval(self, where: Where, n: int) -> np.ndarray:
+        if not isinstance(where, dict) or not where:
+            raise ValueError(f"Invalid where filter: {where!r}")
+        masks = []
+        for key, condition in where.items():
+            if key in ("$and", "$or"):
+                if not isinstance(condition, list) or not condition:
+                    raise ValueError(f"{key} expects a non-empty list of filters")
+                parts = [self._eval(part, n) for part in condition]
+                masks.append(reduce(np.logical_and if key == "$and" else np.logical_or, parts))
+            elif key.startswith("$"):
+                raise ValueError(f"Unknown where operator {key!r}")
+            else:
+                masks.append(self._field_mask(key, condition, n))
+        return reduce(np.logical_and, masks)
+
+    def _field_mask(self, name: str, condition: Any, n: int) -> np.ndarray:
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        field = self.fields.get(name)
+        masks = []
+        for op, operand in condition.items():
+            if op in _RANGE_OPS:
+                if not _is_number(operand):
+                    raise ValueError(f"{op} on {name!r} needs a number, got {operand!r}")
+                if field is None or field.numbers is None:
+                    masks.append(np.zeros(n, dtype=bool))
+                else:
+                    masks.append(_RANGE_OPS[op](field.numbers[:n], operand))
+                continue
+            if op not in _VALUE_OPS:
+                raise ValueError(f"Unknown where operator {op!r} on {name!r}")
+            if op in ("$in", "$nin") and not isinstance(operand, list):
+                raise ValueError(f"{op} on {name!r} needs a list, got {operand!r}")
+            if field is None:
+                masks.append(np.zeros(n, dtype=bool))
+                continue
+            codes = field.codes[:n]
+            wanted = field.codes_for(operand if op in ("$in", "$nin") else [operand])
+            hit = np.isin(codes, wanted) if len(wanted) > 1 else codes == (wanted[0] if wanted else -2)
+            # $ne / $nin match rows that have the field with another value.
+            masks.append(hit if op in ("$eq", "$in") else (codes >= 0) & ~hit)
+        if not masks:
+            raise ValueError(f"Empty condition for {name!r}")
+        return reduce(np.logical_and, masks)
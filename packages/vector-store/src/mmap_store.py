@@ -0,0 +1,658 @@
+"""Memory-mapped on-disk vector store"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .embeddings import EmbeddingFunction
+from .metadata_index import PREFILTER_RATIO, MetadataIndex, Where
+from .numpy_store import QUERY_BLOCK, NumpyVectorStore, search_rows, select_top_k
+from .quantization import load_quantizer, make_quantizer, save_quantizer
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+HEADER = "segment.json"
+_COLLECTION_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+# Segment files, one set per compaction generation:
+#   vectors-<g>.f32     count x dim float32, L2-normalized, row-major
+#   ids-<g>.bin         utf-8 chunk ids, back to back
+#   ids-<g>.idx         count x (offset, length) uint64 into ids-<g>.bin
+#   docs-<g>.jsonl      {"text", "metadata"} per row, one JSON line each
+#   docs-<g>.idx        count x (offset, length) uint64 into docs-<g>.jsonl
+#   tombstones-<g>.u64  deleted row numbers, append-only
+#   codes-<g>.u8        count x code_size quantized rows (quantized collections, once trained)
+#   quantizer-<g>.npz   trained quantizer parameters
+# segment.json holds dim / count / deleted / generation (plus the collection's
+# quantization settings) and is the commit point: bytes past the committed
+# sizes (a crashed append, or space preallocated for appends) are ignored and
+# truncated on open.
+_FILES = {
+    "vectors": "vectors-{}.f32",
+    "ids": "ids-{}.bin",
+    "ids_idx": "ids-{}.idx",
+    "docs": "docs-{}.jsonl",
+    "docs_idx": "docs-{}.idx",
+    "tombstones": "tombstones-{}.u64",
+    "codes": "codes-{}.u8",
+}
+QUANTIZER = "quantizer-{}.npz"
+# Rows sampled to train a quantizer
+QUANTIZER_SAMPLE = 32768
+# Memory-mapped files grow by at least this many bytes (or double), so appends
+# land in preallocated space and views remap only when a file has to grow.
+GROW_BYTES = 1 << 20
+_MAPPED = ("vectors", "ids", "ids_idx", "docs", "docs_idx", "codes")
+
+
+def _map(buffer: np.ndarray, dtype: Any, shape: Tuple[int, ...]) -> np.ndarray:
+    """The leading `shape` rows of a file mapped as bytes"""
+    if shape[0] == 0:
+        return np.zeros(shape, dtype=dtype)
+    return buffer[:int(np.prod(shape)) * np.dtype(dtype).itemsize].view(dtype).reshape(shape)
+
+
+class _View:
+    """Read-only snapshot of a segment's committed rows; searches hold one for their duration"""
+
+    def __init__(self, segment: "_Segment"):
+        count, dim = segment.count, segment.dim
+        self.count = count
+        self.vectors = _map(segment.mapping("vectors"), np.float32, (count, dim))
+        self.ids_idx = _map(segment.mapping("ids_idx"), np.uint64, (count, 2))
+        self.docs_idx = _map(segment.mapping("docs_idx"), np.uint64, (count, 2))
+        self.ids_blob = _map(segment.mapping("ids"), np.uint8, (self._blob_size(self.ids_idx),))
+        self.docs_blob = _map(segment.mapping("docs"), np.uint8, (self._blob_size(self.docs_idx),))
+        self.dead = np.fromiter(sorted(segment.dead), dtype=np.int64, count=len(segment.dead))
+        # Shared with later views of the same generation: rows are only ever appended to it.
+        self.metadata = segment.metadata
+        self.quantizer = segment.quantizer
+        self.codes = None
+        if self.quantizer is not None:
+            self.codes = _map(segment.mapping("codes"), np.uint8, (count, self.quantizer.code_size))
+
+    @staticmethod
+    def _blob_size(idx: np.ndarray) -> int:
+        return int(idx[-1, 0] + idx[-1, 1]) if len(idx) else 0
+
+    def chunk_id(self, row: int) -> str:
+        offset, length = (int(v) for v in self.ids_idx[row])
+        return self.ids_blob[offset:offset + length].tobytes().decode("utf-8")
+
+    def document(self, row: int) -> Dict[str, Any]:
+        offset, length = (int(v) for v in self.docs_idx[row])
+        return json.loads(self.docs_blob[offset:offset + length].tobytes())
+
+
+class _Segment:
+    """One collection's segment directory; writes append and commit via the header"""
+
+    def __init__(
+        self,
+        path: str,
+        dim: Optional[int] = None,
+        fsync: bool = False,
+        quantization: Optional[Dict[str, Any]] = None,
+    ):
+        self.path = path
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        # One compaction at a time; held for the rewrite, which runs outside `lock`
+        self._compact_lock = threading.Lock()
+        self._rows: Optional[Dict[str, int]] = None
+        self.metadata: Optional[MetadataIndex] = None
+        self.quantizer = None
+        # Current generation's mapped files as bytes, over their full (preallocated) size;
+        # views slice the committed rows, so a map is replaced only when its file grows.
+        self._maps: Dict[str, np.ndarray] = {}
+        # Bytes written per file (appends go here) and file sizes, preallocated space included
+        self._ends: Dict[str, int] = {}
+        self._sizes: Dict[str, int] = {}
+        header_path = os.path.join(path, HEADER)
+        if os.path.exists(header_path):
+            with open(header_path, "r", encoding="utf-8") as f:
+                header = json.load(f)
+            if header.get("format") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported segment format {header.get('format')!r} in {path}")
+            self.dim = int(header["dim"])
+            self.count = int(header["count"])
+            self.generation = int(header["generation"])
+            deleted = int(header["deleted"])
+            self.quantization = header.get("quantization")
+            if header.get("trained"):
+                q = self.quantization
+                self.quantizer = load_quantizer(q["kind"], self.dim, q.get("subspaces"), self.quantizer_file())
+        else:
+            if dim is None:
+                raise ValueError(f"No segment at {path} and no dim to create one")
+            if quantization is not None:
+                # Reject bad settings at creation rather than when training kicks in.
+                make_quantizer(quantization["kind"], dim, quantization.get("subspaces"))
+            os.makedirs(path, exist_ok=True)
+            self.dim, self.count, self.generation, deleted = dim, 0, 0, 0
+            self.quantization = quantization
+            self._write_header(0)
+        for kind in _FILES:
+            open(self.file(kind), "ab").close()
+        tombstones = np.fromfile(self.file("tombstones"), dtype=np.uint64, count=deleted)
+        self.dead = set(tombstones.tolist())
+        self.view = _View(self)
+        self._truncate_uncommitted()
+        self.view = _View(self)
+
+    def file(self, kind: str, generation: Optional[int] = None) -> str:
+        return os.path.join(self.path, _FILES[kind].format(self.generation if generation is None else generation))
+
+    def mapping(self, kind: str) -> np.ndarray:
+        """The current generation's `kind` file mapped read-only as bytes (mapped once per size)"""
+        buffer = self._maps.get(kind)
+        if buffer is None:
+            if os.path.getsize(self.file(kind)):
+                buffer = np.memmap(self.file(kind), dtype=np.uint8, mode="r")
+            else:
+                buffer = np.zeros(0, dtype=np.uint8)
+            self._maps[kind] = buffer
+        return buffer
+
+    def _reset_files(self) -> None:
+        """Forget maps and write offsets after files were rewritten (caller holds the lock or is opening)"""
+        self._maps = {}
+        self._ends = {kind: os.path.getsize(self.file(kind)) for kind in _FILES}
+        self._sizes = dict(self._ends)
+
+    def quantizer_file(self, generation: Optional[int] = None) -> str:
+        return os.path.join(self.path, QUANTIZER.format(self.generation if generation is None else generation))
+
+    @property
+    def live(self) -> int:
+        return self.count - len(self.dead)
+
+    def _write_header(self, deleted: int) -> None:
+        header = {
+            "format": FORMAT_VERSION,
+            "dim": self.dim,
+            "count": self.count,
+            "deleted": deleted,
+            "generation": self.generation,
+            "quantization": self.quantization,
+            "trained": self.quantizer is not None,
+        }
+        tmp = os.path.join(self.path, HEADER + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(header, f)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.path, HEADER))
+
+    def _truncate_uncommitted(self) -> None:
+        view = self.view
+        sizes = {
+            "vectors": view.count * self.dim * 4,
+            "ids_idx": view.count * 16,
+            "docs_idx": view.count * 16,
+            "ids": view._blob_size(view.ids_idx),
+            "docs": view._blob_size(view.docs_idx),
+            "tombstones": len(self.dead) * 8,
+            "codes": view.count * self.quantizer.code_size if self.quantizer is not None else 0,
+        }
+        for kind, size in sizes.items():
+            if os.path.getsize(self.file(kind)) != size:
+                os.truncate(self.file(kind), size)
+        self._reset_files()
+
+    def _row_map(self) -> Dict[str, int]:
+        """chunk_id -> live row; built on the first write after open, not on open"""
+        if self._rows is None:
+            view = self.view
+            blob = view.ids_blob.tobytes()
+            rows: Dict[str, int] = {}
+            for row, (offset, length) in enumerate(view.ids_idx.tolist()):
+                if row not in self.dead:
+                    rows[blob[offset:offset + length].decode("utf-8")] = row
+            self._rows = rows
+        return self._rows
+
+    def _append(self, kind: str, data: bytes) -> None:
+        end = self._ends[kind] + len(data)
+        if kind in _MAPPED and end > self._sizes[kind]:
+            # Sparse until written; views of the old size keep their (still valid) map.
+            size = self._sizes[kind] = max(end, 2 * self._sizes[kind], self._sizes[kind] + GROW_BYTES)
+            os.truncate(self.file(kind), size)
+            self._maps.pop(kind, None)
+        with open(self.file(kind), "r+b") as f:
+            f.seek(self._ends[kind])
+            f.write(data)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        self._ends[kind] = end
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        vectors: np.ndarray,
+        documents: Sequence[Optional[str]],
+        metadatas: Sequence[Dict[str, Any]],
+    ) -> None:
+        # Later copies of an id within one call win, as with sequential upserts.
+        latest = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        order = sorted(latest.values())
+        with self.lock:
+            rows = self._row_map()
+            replaced = [rows[ids[i]] for i in order if ids[i] in rows]
+            id_bytes = [ids[i].encode("utf-8") for i in order]
+            doc_bytes = [
+                json.dumps({"text": documents[i], "metadata": metadatas[i]}).encode("utf-8") + b"\n"
+                for i in order
+            ]
+            self._append("vectors", np.ascontiguousarray(vectors[order], dtype=np.float32).tobytes())
+            self._append("ids", b"".join(id_bytes))
+            self._append("ids_idx", self._index(self.view.ids_idx, id_bytes))
+            self._append("docs", b"".join(doc_bytes))
+            self._append("docs_idx", self._index(self.view.docs_idx, doc_bytes))
+            if self.quantizer is not None:
+                self._append("codes", self.quantizer.encode(vectors[order]).tobytes())
+            if replaced:
+                self._append("tombstones", np.array(replaced, dtype=np.uint64).tobytes())
+                self.dead.update(replaced)
+            for n, i in enumerate(order):
+                rows[ids[i]] = self.count + n
+            if self.metadata is not None:
+                self.metadata.update(range(self.count, self.count + len(order)), [metadatas[i] for i in order])
+            self.count += len(order)
+            self._write_header(len(self.dead))
+            self.view = _View(self)
+            if self.quantization is not None and self.quantizer is None and self.live >= self.quantization["train_size"]:
+                self._train_quantizer()
+
+    def _train_quantizer(self) -> None:
+        """Fit the quantizer on a sample of live rows and encode every row (caller holds the lock)"""
+        view = self.view
+        q = self.quantization
+        live = np.setdiff1d(np.arange(view.count), view.dead)
+        sample = np.random.default_rng(0).choice(live, min(len(live), QUANTIZER_SAMPLE), replace=False)
+        quantizer = make_quantizer(q["kind"], self.dim, q.get("subspaces"))
+        quantizer.train(np.ascontiguousarray(view.vectors[np.sort(sample)]))
+        save_quantizer(quantizer, self.quantizer_file())
+        with open(self.file("codes"), "wb") as f:
+            for start in range(0, view.count, 65536):
+                f.write(quantizer.encode(np.asarray(view.vectors[start:start + 65536])).tobytes())
+        self._maps.pop("codes", None)
+        self._ends["codes"] = self._sizes["codes"] = os.path.getsize(self.file("codes"))
+        # The header flips to trained only once every row has its code.
+        self.quantizer = quantizer
+        self._write_header(len(self.dead))
+        self.view = _View(self)
+        logger.info("Trained %s quantizer for %s on %d rows", q["kind"], self.path, len(sample))
+
+    @staticmethod
+    def _index(previous: np.ndarray, items: List[bytes]) -> bytes:
+        lengths = np.fromiter((len(item) for item in items), dtype=np.uint64, count=len(items))
+        start = _View._blob_size(previous)
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.uint64) + np.uint64(start)
+        return np.stack([offsets, lengths], axis=1).tobytes()
+
+    def ensure_metadata_index(self) -> None:
+        """Build secondary indexes over row metadata (first filtered search); writes keep them current"""
+        if self.metadata is not None:
+            return
+        with self.lock:
+            if self.metadata is None:
+                view = self.view
+                # Rows are JSONL in row order (json escapes newlines in strings): one parse for all of them.
+                lines = view.docs_blob.tobytes().rstrip(b"\n").replace(b"\n", b",")
+                metadatas = [document["metadata"] for document in json.loads(b"[" + lines + b"]")]
+                index = MetadataIndex(max(view.count, 1024))
+                index.update(range(view.count), metadatas)
+                self.metadata = index
+                self.view = _View(self)
+
+    def live_documents(self) -> Iterator[Tuple[str, Optional[str], Dict[str, Any]]]:
+        """(chunk_id, text, metadata) per live row of the current view, read lazily"""
+        view = self.view
+        dead = set(view.dead.tolist())
+        for row in range(view.count):
+            if row not in dead:
+                document = view.document(row)
+                yield view.chunk_id(row), document["text"], document["metadata"]
+
+    def documents_by_id(self, ids: Iterable[str]) -> Dict[str, Tuple[Optional[str], Dict[str, Any]]]:
+        """chunk_id -> (text, metadata) for the given ids that exist, read from the current view"""
+        with self.lock:
+            rows = self._row_map()
+            found = [(chunk_id, rows[chunk_id]) for chunk_id in ids if chunk_id in rows]
+            view = self.view
+        documents = {}
+        for chunk_id, row in found:
+            document = view.document(row)
+            documents[chunk_id] = (document["text"], document["metadata"])
+        return documents
+
+    def delete(self, ids: Sequence[str]) -> int:
+        with self.lock:
+            rows = self._row_map()
+            dead = [rows.pop(chunk_id) for chunk_id in set(ids) if chunk_id in rows]
+            if dead:
+                self._append("tombstones", np.array(dead, dtype=np.uint64).tobytes())
+                self.dead.update(dead)
+                self._write_header(len(self.dead))
+                self.view = _View(self)
+            return len(dead)
+
+    def _copy_rows(
+        self, view: _View, rows: np.ndarray, generation: int, blob_sizes: Optional[Dict[str, int]] = None
+    ) -> Dict[str, int]:
+        """Write `rows` of `view` into `generation`'s files; with the `blob_sizes` a previous call returned, append"""
+        mode = "wb" if blob_sizes is None else "ab"
+        blob_sizes = dict(blob_sizes or {"ids": 0, "docs": 0})
+        with open(self.file("vectors", generation), mode) as f:
+            for start in range(0, len(rows), 65536):
+                f.write(np.ascontiguousarray(view.vectors[rows[start:start + 65536]]).tobytes())
+        for blob_kind, idx_kind, idx, blob in (
+            ("ids", "ids_idx", view.ids_idx, view.ids_blob),
+            ("docs", "docs_idx", view.docs_idx, view.docs_blob),
+        ):
+            spans = idx[rows].astype(np.int64)
+            with open(self.file(blob_kind, generation), mode) as f:
+                for offset, length in spans.tolist():
+                    f.write(blob[offset:offset + length].tobytes())
+            lengths = spans[:, 1].astype(np.uint64)
+            offsets = np.cumsum(lengths) - lengths + np.uint64(blob_sizes[blob_kind])
+            with open(self.file(idx_kind, generation), mode) as f:
+                f.write(np.stack([offsets, lengths], axis=1).tobytes())
+            blob_sizes[blob_kind] += int(lengths.sum())
+        with open(self.file("codes", generation), mode) as f:
+            if view.codes is not None:
+                for start in range(0, len(rows), 65536):
+                    f.write(np.ascontiguousarray(view.codes[rows[start:start + 65536]]).tobytes())
+        return blob_sizes
+
+    def _remove_generation(self, generation: int) -> None:
+        for path in [self.file(kind, generation) for kind in _FILES] + [self.quantizer_file(generation)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def compact(self) -> int:
+        """Rewrite live rows into a new generation; returns rows reclaimed.
+
+        The rewrite works from a snapshot, outside the segment lock, so reads
+        and writes carry on meanwhile. Under the lock, rows appended or
+        deleted since the snapshot are carried over and the new generation
+        is swapped in.
+        """
+        with self._compact_lock:
+            with self.lock:
+                if not self.dead:
+                    return 0
+                view, dead, quantizer = self.view, set(self.dead), self.quantizer
+                new_generation = self.generation + 1
+            live = np.setdiff1d(np.arange(view.count), np.fromiter(dead, dtype=np.int64, count=len(dead)))
+            blob_sizes = self._copy_rows(view, live, new_generation)
+            if view.codes is not None:
+                save_quantizer(view.quantizer, self.quantizer_file(new_generation))
+
+            with self.lock:
+                if self.quantizer is not quantizer:
+                    # Trained during the rewrite, so the new files lack codes; the next compaction redoes it.
+                    self._remove_generation(new_generation)
+                    return 0
+                current, old_generation = self.view, self.generation
+                tail = np.arange(view.count, current.count)
+                tail = tail[[row not in self.dead for row in tail.tolist()]] if len(tail) else tail
+                if len(tail):
+                    self._copy_rows(current, tail, new_generation, blob_sizes)
+                # Snapshot rows deleted during the rewrite stay dead at their new position.
+                deleted = sorted(row for row in self.dead - dead if row < view.count)
+                tombstones = np.searchsorted(live, np.array(deleted, dtype=np.int64)).astype(np.uint64)
+                with open(self.file("tombstones", new_generation), "wb") as f:
+                    f.write(tombstones.tobytes())
+                kept = np.concatenate([live, tail]).astype(np.int64)
+                reclaimed = current.count - len(kept)
+                if self.metadata is not None:
+                    self.metadata = self.metadata.take(kept)
+                self.generation, self.count = new_generation, len(kept)
+                self.dead = set(tombstones.tolist())
+                self._write_header(len(self.dead))
+                self._rows = None
+                self._reset_files()
+                self.view = _View(self)
+            # Open memmaps of the old generation stay readable after unlink (POSIX).
+            self._remove_generation(old_generation)
+            return reclaimed
+
+    def search(self, queries: np.ndarray, top_k: int, where: Optional[Where] = None) -> List[List[Dict[str, Any]]]:
+        """Cosine top-k over the memory-mapped rows, skipping tombstones.
+
+        Exact over the float32 rows; once a quantized collection is trained,
+        scores the codes instead and re-ranks the best `top_k * rerank`
+        candidates exactly against their float32 rows (rerank=0 skips that).
+        With `where`, only matching rows are candidates; a selective filter
+        is searched exactly over just the matching float32 rows.
+        """
+        if where is not None:
+            self.ensure_metadata_index()
+        with self.lock:
+            view = self.view
+            # Writers extend the shared metadata index in place; match against it under the lock.
+            mask = view.metadata.match(where, view.count) if where is not None else None
+        live = view.count - len(view.dead)
+        if mask is not None:
+            if len(view.dead):
+                mask[view.dead] = False
+            live = int(np.count_nonzero(mask))
+        if live <= 0:
+            return [[] for _ in range(len(queries))]
+        gather = mask is not None and (view.codes is None or live < view.count * PREFILTER_RATIO)
+        rerank = self.quantization.get("rerank", 0) if view.codes is not None and not gather else 0
+        results: List[List[Dict[str, Any]]] = []
+        for start in range(0, len(queries), QUERY_BLOCK):
+            block = queries[start:start + QUERY_BLOCK]
+            if gather:
+                top, top_scores = search_rows(block, view.vectors, top_k, mask)
+                results.extend(self._hits(view, top, top_scores))
+                continue
+            if view.codes is not None:
+                scores = view.quantizer.scores(block, view.codes)
+            else:
+                scores = block @ view.vectors.T
+            if mask is not None:
+                scores[:, ~mask] = -np.inf
+            elif len(view.dead):
+                scores[:, view.dead] = -np.inf
+            if rerank:
+                candidates, _ = select_top_k(scores, min(top_k * rerank, live))
+                # Sorted rows so the float32 reads walk the file forwards.
+                candidates = np.sort(candidates, axis=1)
+                exact = np.stack([view.vectors[rows] @ query for rows, query in zip(candidates, block)])
+                order, top_scores = select_top_k(exact, min(top_k, live))
+                top = np.take_along_axis(candidates, order, axis=1)
+            else:
+                top, top_scores = select_top_k(scores, min(top_k, live))
+            results.extend(self._hits(view, top, top_scores))
+        return results
+
+    @staticmethod
+    def _hits(view: _View, top: np.ndarray, top_scores: np.ndarray) -> List[List[Dict[str, Any]]]:
+        results = []
+        for rows, row_scores in zip(top.tolist(), top_scores.tolist()):
+            hits = []
+            for row, score in zip(rows, row_scores):
+                document = view.document(row)
+                hits.append({
+                    "chunk_id": view.chunk_id(row),
+                    "text": document["text"],
+                    "metadata": document["metadata"],
+                    "score": score,
+                })
+            results.append(hits)
+        return results
+
+
+class MmapVectorStore(NumpyVectorStore):
+    """
+    Persistent vector store over memory-mapped segment files (one directory per collection).
+
+    Opening a collection reads a small JSON header and maps the files, so
+    restarts take milliseconds regardless of size, and search pages vectors
+    in from the OS cache rather than loading them. Writes append and commit
+    by rewriting the header; deletes append tombstones; compaction rewrites
+    live rows in the background once `compact_ratio` of rows are dead.
+
+    Collections can be quantized ("int8" or "pq"), set per collection via
+    `create_collection` or store-wide for new ones. They search exactly
+    until `quantize_after` rows, then train a quantizer and keep compact
+    codes beside the float32 file: queries scan the codes and only read
+    float32 rows back for the re-rank candidates.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        embedding_function: Optional[EmbeddingFunction] = None,
+        dim: Optional[int] = None,
+        ingest_batch_size: int = 1024,
+        compact_ratio: float = 0.3,
+        background_compaction: bool = True,
+        fsync: bool = False,
+        quantization: Optional[str] = None,
+        pq_subspaces: Optional[int] = None,
+        rerank: int = 4,
+        quantize_after: int = 10_000,
+        query_embedding_function: Optional[EmbeddingFunction] = None,
+    ):
+        super().__init__(embedding_function, dim, ingest_batch_size, query_embedding_function)
+        self.root = root
+        self.compact_ratio = compact_ratio
+        self.background_compaction = background_compaction
+        self.fsync = fsync
+        self.default_quantization = self._quantization(quantization, pq_subspaces, rerank, quantize_after)
+        self._compacting: Dict[str, threading.Thread] = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, collection_name: str) -> str:
+        if not _COLLECTION_NAME.match(collection_name):
+            raise ValueError(f"Invalid collection name for an on-disk store: {collection_name!r}")
+        return os.path.join(self.root, collection_name)
+
+    @staticmethod
+    def _quantization(
+        kind: Optional[str], subspaces: Optional[int], rerank: int, train_size: int
+    ) -> Optional[Dict[str, Any]]:
+        if kind is None or kind == "none":
+            return None
+        return {"kind": kind, "subspaces": subspaces, "rerank": rerank, "train_size": train_size}
+
+    def _collection(
+        self,
+        collection_name: str,
+        create: bool,
+        dim: Optional[int] = None,
+        quantization: Optional[Dict[str, Any]] = None,
+    ) -> Optional[_Segment]:
+        segment = self._collections.get(collection_name)
+        if segment is not None:
+            return segment
+        path = self._path(collection_name)
+        if not create and not os.path.exists(os.path.join(path, HEADER)):
+            return None
+        with self._lock:
+            segment = self._collections.get(collection_name)
+            if segment is None:
+                segment = self._collections[collection_name] = _Segment(
+                    path, dim or self.dim, self.fsync, quantization or self.default_quantization
+                )
+        return segment
+
+    def create_collection(
+        self,
+        collection_name: str,
+        dim: Optional[int] = None,
+        quantization: Optional[str] = None,
+        pq_subspaces: Optional[int] = None,
+        rerank: int = 4,
+        quantize_after: int = 10_000,
+    ) -> None:
+        """Create an empty collection; its quantization settings are fixed from here on"""
+        if os.path.exists(os.path.join(self._path(collection_name), HEADER)):
+            raise ValueError(f"Collection {collection_name!r} already exists")
+        self._collection(
+            collection_name, True, dim, self._quantization(quantization, pq_subspaces, rerank, quantize_after)
+        )
+
+    def collection_stats(self, collection_name: str = "default") -> Dict[str, Any]:
+        """Row counts and bytes per representation (queries scan `code_bytes` once trained)"""
+        segment = self._collection(collection_name, False)
+        if segment is None:
+            return {}
+        view = segment.view
+        return {
+            "rows": view.count,
+            "live": view.count - len(view.dead),
+            "dim": segment.dim,
+            "quantization": segment.quantization,
+            "trained": view.codes is not None,
+            "vector_bytes": view.count * segment.dim * 4,
+            "code_bytes": int(view.codes.nbytes) if view.codes is not None else 0,
+        }
+
+    def delete(self, ids: Sequence[str], collection_name: str = "default") -> int:
+        """Tombstone chunks by id; returns how many were live"""
+        segment = self._collection(collection_name, False)
+        if segment is None:
+            return 0
+        self._keyword.remove(collection_name, ids)
+        deleted = segment.delete(ids)
+        if deleted and self.background_compaction and segment.count and len(segment.dead) / segment.count >= self.compact_ratio:
+            self._compact_in_background(collection_name, segment)
+        return deleted
+
+    def _compact_in_background(self, collection_name: str, segment: _Segment) -> None:
+        with self._lock:
+            running = self._compacting.get(collection_name)
+            if running is not None and running.is_alive():
+                return
+
+            def run() -> None:
+                try:
+                    reclaimed = segment.compact()
+                    logger.info("Compacted %s: reclaimed %d rows", collection_name, reclaimed)
+                except Exception:
+                    logger.exception("Compaction of %s failed", collection_name)
+
+            thread = threading.Thread(target=run, name=f"compact-{collection_name}", daemon=True)
+            self._compacting[collection_name] = thread
+            thread.start()
+
+    def compact(self, collection_name: str = "default") -> int:
+        """Compact a collection now; returns rows reclaimed"""
+        segment = self._collection(collection_name, False)
+        return segment.compact() if segment is not None else 0
+
+    def count(self, collection_name: str = "default") -> int:
+        segment = self._collection(collection_name, False)
+        return segment.live if segment is not None else 0
+
+    def wait_for_compaction(self) -> None:
+        for thread in list(self._compacting.values()):
+            thread.join()
+
+    def delete_collection(self, collection_name: str) -> bool:
+        """Delete a collection and its files"""
+        path = self._path(collection_name)
+        self._keyword.drop(collection_name)
+        with self._lock:
+            self._collections.pop(collection_name, None)
+        if not os.path.exists(path):
+            return False
+        shutil.rmtree(path, ignore_errors=True)
+        return True
@@ -0,0 +1,329 @@
+"""In-process NumPy vector store"""
+
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .bm25 import KeywordIndexes, run_query_mode, with_documents
+from .embeddings import EmbeddingFunction, HashingEmbedding, normalize_rows
+from .ingest import Document, document_ids
+from .interface import VectorStore
+from .metadata_index import PREFILTER_RATIO, MetadataIndex, Where
+
+# Query rows scored per matmul; bounds the (queries x vectors) score matrix
+QUERY_BLOCK = 64
+
+
+def select_top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Row indices and scores of the k best columns per row, best first (argpartition, then sort k)"""
+    count = scores.shape[1]
+    k = min(k, count)
+    if k <= 0:
+        return np.empty((len(scores), 0), dtype=np.int64), np.empty((len(scores), 0), dtype=scores.dtype)
+    if k < count:
+        top = np.argpartition(scores, count - k, axis=1)[:, count - k:]
+    else:
+        top = np.broadcast_to(np.arange(count), scores.shape)
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+def search_rows(
+    queries: np.ndarray, matrix: np.ndarray, top_k: int, mask: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k rows of `matrix` per query, restricted to the rows set in `mask` if given.
+
+    A selective mask gathers the matching rows and scores only those; a
+    broad one scores every row and sets the rest to -inf.
+    """
+    if mask is None:
+        return select_top_k(queries @ matrix.T, top_k)
+    rows = np.flatnonzero(mask)
+    if not len(rows):
+        return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+    if len(rows) < len(mask) * PREFILTER_RATIO:
+        top, top_scores = select_top_k(queries @ matrix[rows].T, top_k)
+        return rows[top], top_scores
+    scores = queries @ matrix.T
+    scores[:, ~mask] = -np.inf
+    return select_top_k(scores, min(top_k, len(rows)))
+
+
+class _Collection:
+    """Contiguous float32 rows (L2-normalized) plus parallel id/document/metadata lists"""
+
+    def __init__(self, dim: int, capacity: int = 1024):
+        self.dim = dim
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.count = 0
+        self.ids: List[str] = []
+        self.documents: List[Optional[str]] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.rows: Dict[str, int] = {}
+        self.metadata_index: Optional[MetadataIndex] = None
+        self.lock = threading.Lock()
+
+    def _reserve(self, extra: int) -> None:
+        needed = self.count + extra
+        if needed <= len(self.vectors):
+            return
+        capacity = max(needed, len(self.vectors) * 2)
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        grown[:self.count] = self.vectors[:self.count]
+        # Readers that already took a view keep the old buffer; it stays valid.
+        self.vectors = grown
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        vectors: np.ndarray,
+        documents: Sequence[Optional[str]],
+        metadatas: Sequence[Dict[str, Any]],
+    ) -> None:
+        with self.lock:
+            self._reserve(len(ids))
+            written = []
+            for chunk_id, vector, document, metadata in zip(ids, vectors, documents, metadatas):
+                row = self.rows.get(chunk_id)
+                if row is None:
+                    row = self.count
+                    self.rows[chunk_id] = row
+                    self.ids.append(chunk_id)
+                    self.documents.append(document)
+                    self.metadatas.append(metadata)
+                    self.count += 1
+                else:
+                    self.documents[row] = document
+                    self.metadatas[row] = metadata
+                self.vectors[row] = vector
+                written.append(row)
+            if self.metadata_index is not None:
+                self.metadata_index.update(written, metadatas)
+
+    def _metadata_index(self) -> MetadataIndex:
+        """Secondary indexes over metadata, built on the first filtered search (caller holds the lock)"""
+        if self.metadata_index is None:
+            index = MetadataIndex(max(len(self.vectors), 1024))
+            index.update(range(self.count), self.metadatas)
+            self.metadata_index = index
+        return self.metadata_index
+
+    def search(self, queries: np.ndarray, top_k: int, where: Optional[Where] = None) -> List[List[Dict[str, Any]]]:
+        """Exact cosine top-k for each row of `queries` (already normalized), among rows matching `where`"""
+        with self.lock:
+            count = self.count
+            matrix = self.vectors[:count]
+            mask = self._metadata_index().match(where, count) if where is not None else None
+        if count == 0:
+            return [[] for _ in range(len(queries))]
+        results: List[List[Dict[str, Any]]] = []
+        for start in range(0, len(queries), QUERY_BLOCK):
+            top, top_scores = search_rows(queries[start:start + QUERY_BLOCK], matrix, top_k, mask)
+            for rows, row_scores in zip(top.tolist(), top_scores.tolist()):
+                results.append([
+                    {
+                        "chunk_id": self.ids[row],
+                        "text": self.documents[row],
+                        "metadata": self.metadatas[row],
+                        "score": score,
+                    }
+                    for row, score in zip(rows, row_scores)
+                ])
+        return results
+
+    def live_documents(self) -> List[Tuple[str, Optional[str], Dict[str, Any]]]:
+        """(chunk_id, text, metadata) per row, copied under the lock"""
+        with self.lock:
+            return list(zip(self.ids[:self.count], self.documents[:self.count], self.metadatas[:self.count]))
+
+    def documents_by_id(self, ids: Iterable[str]) -> Dict[str, Tuple[Optional[str], Dict[str, Any]]]:
+        """chunk_id -> (text, metadata) for the given ids that exist"""
+        with self.lock:
+            rows = [(chunk_id, self.rows.get(chunk_id)) for chunk_id in ids]
+            return {chunk_id: (self.documents[row], self.metadatas[row]) for chunk_id, row in rows if row is not None}
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Embedded exact-search vector store: no network hop, one matmul per query block.
+
+    Vectors live in a contiguous float32 matrix per collection and are
+    L2-normalized on insert, so cosine similarity is a dot product. Top-k
+    uses `argpartition` (O(n)) and only sorts the k survivors.
+
+    Queries take `mode="vector" | "keyword" | "hybrid"`: keyword mode uses a
+    per-collection BM25 index (built on first use, then kept current by
+    writes) and hybrid fuses both rankings with reciprocal rank fusion.
+    A `where` filter on metadata is resolved through secondary indexes to a
+    row bitmap before scoring (see `metadata_index.py`).
+
+    `query_embedding_function`, if given, embeds query text instead of
+    `embedding_function` (typically the same model behind a
+    `CachedEmbedding`, so repeated queries skip the model); callers holding
+    vectors already can pass `query_embedding(s)` and skip embedding.
+    """
+
+    def __init__(
+        self,
+        embedding_function: Optional[EmbeddingFunction] = None,
+        dim: Optional[int] = None,
+        ingest_batch_size: int = 1024,
+        query_embedding_function: Optional[EmbeddingFunction] = None,
+    ):
+        self.embedding_function = embedding_function or HashingEmbedding(dim or 384)
+        self.query_embedding_function = query_embedding_function
+        self.dim = dim or getattr(self.embedding_function, "dim", None)
+        self.ingest_batch_size = ingest_batch_size
+        self._collections: Dict[str, _Collection] = {}
+        self._lock = threading.Lock()
+        self._keyword = KeywordIndexes()
+
+    def _collection(self, collection_name: str, create: bool, dim: Optional[int] = None) -> Optional[_Collection]:
+        collection = self._collections.get(collection_name)
+        if collection is None and create:
+            with self._lock:
+                collection = self._collections.get(collection_name)
+                if collection is None:
+                    collection = self._collections[collection_name] = _Collection(dim or self.dim)
+        return collection
+
+    def _embed(self, texts: Sequence[str]) -> np.ndarray:
+        return normalize_rows(np.array(self.embedding_function(list(texts)), dtype=np.float32))
+
+    def _query_vectors(
+        self, texts: Sequence[str], query_embeddings: "np.ndarray | Sequence[Sequence[float]] | None"
+    ) -> np.ndarray:
+        if query_embeddings is not None:
+            return normalize_rows(np.array(query_embeddings, dtype=np.float32).reshape(len(texts), -1))
+        embed = self.query_embedding_function or self.embedding_function
+        return normalize_rows(np.array(embed(list(texts)), dtype=np.float32))
+
+    def add_vectors(
+        self,
+        ids: Sequence[str],
+        vectors: "np.ndarray | Sequence[Sequence[float]]",
+        documents: Optional[Sequence[Optional[str]]] = None,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        collection_name: str = "default",
+    ) -> List[str]:
+        """Upsert precomputed embeddings (normalized here)"""
+        matrix = normalize_rows(np.array(vectors, dtype=np.float32))
+        collection = self._collection(collection_name, True, matrix.shape[1])
+        if matrix.shape[1] != collection.dim:
+            raise ValueError(f"Expected {collection.dim}-dim vectors, got {matrix.shape[1]}")
+        collection.upsert(
+            ids,
+            matrix,
+            documents if documents is not None else [None] * len(ids),
+            metadatas if metadatas is not None else [{} for _ in ids],
+        )
+        self._keyword.add(collection_name, ids, documents if documents is not None else [None] * len(ids), metadatas)
+        return list(ids)
+
+    def ingest(self, text: str, metadata: Dict[str, Any], collection_name: str = "default") -> str:
+        """Ingest a document"""
+        chunk_id = metadata.get("chunk_id") or str(uuid.uuid4())
+        self.add_vectors([chunk_id], self._embed([text]), [text], [metadata], collection_name)
+        return chunk_id
+
+    def ingest_many(
+        self,
+        documents: Sequence[Document],
+        collection_name: str = "default",
+        batch_size: Optional[int] = None,
+    ) -> List[str]:
+        """Embed and upsert documents, one embedding call per batch"""
+        batch_size = batch_size or self.ingest_batch_size
+        ids = document_ids(documents)
+        for start in range(0, len(documents), batch_size):
+            batch = documents[start:start + batch_size]
+            self.add_vectors(
+                ids[start:start + batch_size],
+                self._embed([text for text, _ in batch]),
+                [text for text, _ in batch],
+                [metadata for _, metadata in batch],
+                collection_name,
+            )
+        return ids
+
+    def query(
+        self,
+        text: str,
+        top_k: int = 5,
+        collection_name: str = "default",
+        mode: str = "vector",
+        where: Optional[Where] = None,
+        query_embedding: Optional[Sequence[float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Query similar documents"""
+        query_embeddings = [query_embedding] if query_embedding is not None else None
+        return self.query_many([text], top_k, collection_name, mode, where, query_embeddings)[0]
+
+    def query_many(
+        self,
+        texts: Sequence[str],
+        top_k: int = 5,
+        collection_name: str = "default",
+        mode: str = "vector",
+        where: Optional[Where] = None,
+        query_embeddings: "np.ndarray | Sequence[Sequence[float]] | None" = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Batched search: one embedding call (none with `query_embeddings`) and one matmul per block of queries"""
+        return run_query_mode(
+            mode,
+            top_k,
+            lambda depth: self._vector_search(
+                self._query_vectors(texts, query_embeddings), depth, collection_name, where
+            ),
+            lambda depth: self._keyword_search(texts, depth, collection_name, where),
+        )
+
+    def _vector_search(
+        self, queries: np.ndarray, top_k: int, collection_name: str, where: Optional[Where] = None
+    ) -> List[List[Dict[str, Any]]]:
+        collection = self._collection(collection_name, False)
+        if collection is None:
+            return [[] for _ in range(len(queries))]
+        return collection.search(queries, top_k, where)
+
+    def _keyword_search(
+        self, texts: Sequence[str], top_k: int, collection_name: str, where: Optional[Where] = None
+    ) -> List[List[Dict[str, Any]]]:
+        index = self._keyword.get(collection_name, lambda: self._documents(collection_name))
+        collection = self._collection(collection_name, False)
+        if index is None or collection is None:
+            return [[] for _ in texts]
+        results = [index.search(text, top_k, where) for text in texts]
+        documents = collection.documents_by_id({hit["chunk_id"] for hits in results for hit in hits})
+        return [with_documents(hits, documents) for hits in results]
+
+    def _documents(self, collection_name: str) -> Optional[Iterable[Tuple[str, Optional[str], Dict[str, Any]]]]:
+        """(chunk_id, text, metadata) for every live chunk, or None if the collection does not exist"""
+        collection = self._collection(collection_name, False)
+        return collection.live_documents() if collection is not None else None
+
+    def search_vectors(
+        self,
+        vectors: "np.ndarray | Sequence[Sequence[float]]",
+        top_k: int = 5,
+        collection_name: str = "default",
+        where: Optional[Where] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Batched search with precomputed query embeddings"""
+        collection = self._collection(collection_name, False)
+        if collection is None:
+            return [[] for _ in range(len(vectors))]
+        return collection.search(normalize_rows(np.array(vectors, dtype=np.float32)), top_k, where)
+
+    def count(self, collection_name: str = "default") -> int:
+        collection = self._collection(collection_name, False)
+        return collection.count if collection is not None else 0
+
+    def delete_collection(self, collection_name: str) -> bool:
+        """Delete a collection"""
+        self._keyword.drop(collection_name)
+        with self._lock:
+            return self._collections.pop(collection_name, None) is not None
@@ -0,0 +1,160 @@
+"""Vector quantizers: int8 scalar and product quantization, scored asymmetrically"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# Rows decoded per matmul when scoring codes; bounds the float32 scratch buffer
+CODE_BLOCK = 16384
+
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = 15, seed: int = 0) -> np.ndarray:
+    """Euclidean k-means (used per PQ subspace)"""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = nearest(vectors, centroids)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=k)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        nonempty = counts > 0
+        sums = np.add.reduceat(vectors[order], starts[nonempty], axis=0)
+        centroids[nonempty] = sums / counts[nonempty, None]
+        empty = np.flatnonzero(~nonempty)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+    return centroids
+
+
+def nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the closest centroid (L2) for each row"""
+    out = np.empty(len(vectors), dtype=np.int64)
+    sq = (centroids * centroids).sum(axis=1)
+    for start in range(0, len(vectors), CODE_BLOCK):
+        block = vectors[start:start + CODE_BLOCK]
+        out[start:start + CODE_BLOCK] = np.argmin(sq - 2 * (block @ centroids.T), axis=1)
+    return out
+
+
+class ScalarQuantizer:
+    """
+    8-bit scalar quantization: each dimension is mapped onto 256 levels
+    between its trained min and max (4x smaller than float32).
+
+    Scoring is asymmetric: the query stays float32 and is folded into the
+    per-dimension scale, so q . x ~= (q * scale) . code + q . low.
+    """
+
+    kind = "int8"
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.low = np.zeros(dim, dtype=np.float32)
+        self.scale = np.ones(dim, dtype=np.float32)
+
+    @property
+    def code_size(self) -> int:
+        return self.dim
+
+    def train(self, vectors: np.ndarray) -> None:
+        self.low = vectors.min(axis=0).astype(np.float32)
+        span = vectors.max(axis=0) - self.low
+        self.scale = np.where(span > 0, span / 255, 1.0).astype(np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint((vectors - self.low) / self.scale), 0, 255).astype(np.uint8)
+
+    def scores(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        out = np.empty((len(queries), len(codes)), dtype=np.float32)
+        scaled = (queries * self.scale).T
+        out[:] = (queries @ self.low)[:, None]
+        for start in range(0, len(codes), CODE_BLOCK):
+            block = codes[start:start + CODE_BLOCK].astype(np.float32)
+            out[:, start:start + CODE_BLOCK] += (block @ scaled).T
+        return out
+
+    def state(self) -> Dict[str, Any]:
+        return {"low": self.low, "scale": self.scale}
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        self.low, self.scale = state["low"], state["scale"]
+
+
+class ProductQuantizer:
+    """
+    Product quantization: the vector is split into `subspaces` chunks and
+    each chunk is replaced by the id of its nearest of 256 trained
+    centroids, so a vector costs `subspaces` bytes. Trained on fewer than
+    256 rows, each codebook holds one centroid per row instead.
+
+    Scoring is asymmetric (ADC): per query, a (subspaces x 256) table of
+    query-chunk . centroid products is built once and each code's score is
+    the sum of its table entries.
+    """
+
+    kind = "pq"
+
+    def __init__(self, dim: int, subspaces: int = 16):
+        if dim % subspaces:
+            raise ValueError(f"dim {dim} is not divisible by {subspaces} subspaces")
+        self.dim = dim
+        self.subspaces = subspaces
+        self.dsub = dim // subspaces
+        self.codebooks = np.zeros((subspaces, 256, self.dsub), dtype=np.float32)
+
+    @property
+    def code_size(self) -> int:
+        return self.subspaces
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        return vectors.reshape(len(vectors), self.subspaces, self.dsub)
+
+    def train(self, vectors: np.ndarray) -> None:
+        parts = self._split(vectors)
+        # Unused zero centroids would attract codes and score as real ones.
+        self.codebooks = np.empty((self.subspaces, min(256, len(vectors)), self.dsub), dtype=np.float32)
+        for j in range(self.subspaces):
+            self.codebooks[j] = kmeans(np.ascontiguousarray(parts[:, j]), 256, seed=j)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        parts = self._split(vectors)
+        codes = np.empty((len(vectors), self.subspaces), dtype=np.uint8)
+        for j in range(self.subspaces):
+            codes[:, j] = nearest(np.ascontiguousarray(parts[:, j]), self.codebooks[j])
+        return codes
+
+    def scores(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        tables = np.einsum("qjd,jkd->qjk", self._split(queries), self.codebooks)
+        out = np.zeros((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), CODE_BLOCK):
+            block = codes[start:start + CODE_BLOCK]
+            for j in range(self.subspaces):
+                out[:, start:start + CODE_BLOCK] += tables[:, j, block[:, j]]
+        return out
+
+    def state(self) -> Dict[str, Any]:
+        return {"codebooks": self.codebooks}
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        self.codebooks = state["codebooks"]
+
+
+def make_quantizer(kind: str, dim: int, subspaces: Optional[int] = None):
+    if kind == "int8":
+        return ScalarQuantizer(dim)
+    if kind == "pq":
+        return ProductQuantizer(dim, subspaces or 16)
+    raise ValueError(f"Unknown quantization {kind!r}; expected 'int8' or 'pq'")
+
+
+def save_quantizer(quantizer, path: str) -> None:
+    with open(path, "wb") as f:
+        np.savez(f, **quantizer.state())
+
+
+def load_quantizer(kind: str, dim: int, subspaces: Optional[int], path: str):
+    quantizer = make_quantizer(kind, dim, subspaces)
+    with np.load(path) as state:
+        quantizer.restore({name: state[name] for name in state.files})
+    return quantizer